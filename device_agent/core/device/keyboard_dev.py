@@ -81,6 +81,8 @@ class KeyboardDev:
         self.is_running = False
         self.listener = None  # pynput Listener 或 evdev InputDevice
         self._on_press_callback: Optional[Callable] = None
+        self._on_state_change_callback: Optional[Callable] = None
+        self.connected = False  # 键盘设备是否已连接（pynput 监听器已启动 / evdev 设备已打开）
         self._use_evdev = False
         self._evdev_device_path: Optional[str] = None
     
@@ -90,6 +92,25 @@ class KeyboardDev:
         :param callback: 回调函数，接收按键名称作为参数
         """
         self._on_press_callback = callback
+
+    def set_on_state_change_handler(self, callback: Callable):
+        """
+        设置设备连接状态变化回调
+        :param callback: 回调函数，接收 connected (bool) 作为参数
+        """
+        self._on_state_change_callback = callback
+
+    def _set_connected(self, connected: bool):
+        """更新连接状态，状态变化时触发回调"""
+        if self.connected == connected:
+            return
+        self.connected = connected
+        log.info(f"[KEYBOARD] 键盘设备{'已连接' if connected else '已断开'}")
+        if self._on_state_change_callback:
+            try:
+                self._on_state_change_callback(connected)
+            except Exception as e:
+                log.error(f"[KEYBOARD] 处理连接状态变化时出错：{e}")
     
     def _on_key_press_pynput(self, key):
         """pynput 按键按下事件处理"""
@@ -157,6 +178,7 @@ class KeyboardDev:
                 if listener_obj:
                     self.listener = listener_obj
                     self.listener.start()  # pyright: ignore[reportOptionalMemberAccess]
+                    self._set_connected(True)
     
             while self.is_running:
                 time.sleep(PYNPUT_SLEEP_INTERVAL)
@@ -171,6 +193,7 @@ class KeyboardDev:
                 except Exception:
                     pass
             self.is_running = False
+            self._set_connected(False)
             log.info("[KEYBOARD] pynput 监听循环已退出")
     
     def _listen_loop_evdev(self):
@@ -209,6 +232,7 @@ class KeyboardDev:
                 
                 device = evdev.InputDevice(device_path)  # pyright: ignore[reportOptionalMemberAccess]
                 log.info(f"[KEYBOARD] 开始监听设备：{device.path} ({device.name})")
+                self._set_connected(True)
                 
                 # 将设备设置为独占模式（需要权限）
                 try:
@@ -243,6 +267,8 @@ class KeyboardDev:
                         permanent_error = True
                         break
                     
+                    self._set_connected(False)
+
                     # 清理设备引用
                     if device:
                         try:
@@ -276,6 +302,7 @@ class KeyboardDev:
                         pass
         
         self.is_running = False
+        self._set_connected(False)
         log.info("[KEYBOARD] evdev 监听循环已退出")
     
     def _find_keyboard_device(self) -> Optional[str]:
@@ -424,6 +451,7 @@ class KeyboardDev:
         """获取设备状态"""
         return {
             "is_running": self.is_running,
+            "connected": self.connected,
             "platform": platform.system(),
             "pynput_available": PYNPUT_AVAILABLE,
             "evdev_available": EVDEV_AVAILABLE,
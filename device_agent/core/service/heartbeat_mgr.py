@@ -1,7 +1,9 @@
 '''
 心跳上报服务
-每10秒向center服务器发送心跳，包含服务状态
+每10秒向center服务器发送心跳，只携带变化的字段（增量），定期发送全量同步；
+键盘连接/断开等状态变化会立即上报
 '''
+import json
 import socket
 import threading
 import time
@@ -9,11 +11,23 @@ import traceback
 from typing import Dict, Optional, Tuple
 from core.log_config import root_logger
 from core.config import config_mgr
-from core.utils import _send_http_request, get_local_ip
+from core.utils import _send_http_request, get_http_stats, get_local_ip
 from core.service.keyboard_mgr import keyboard_mgr
 
 log = root_logger()
 
+# 全量同步间隔（秒），其余心跳只携带变化的字段
+HEARTBEAT_FULL_SYNC_INTERVAL = 60
+
+# 状态变化后延迟上报的时间（秒），合并短时间内的多次变化
+HEARTBEAT_PUSH_DELAY = 0.2
+
+# 参与增量比较的字段
+HEARTBEAT_DELTA_FIELDS = ("name", "actions", "keyboard")
+
+# 心跳中不上报的键盘状态字段（频繁变化，通过 /keyboard/status 查询）
+KEYBOARD_VOLATILE_FIELDS = ("event_stats",)
+
 
 class HeartbeatMgr:
     """心跳上报服务管理器"""
@@ -26,6 +40,22 @@ class HeartbeatMgr:
         self._center_url: Optional[str] = None  # 缓存中心服务器地址
         self._port: Optional[int] = None  # 缓存端口
         self._name: Optional[str] = None  # 缓存名称
+        self._local_ip: Optional[str] = None  # 缓存本机 IP（全量同步时刷新）
+
+        # 增量心跳状态
+        self._seq = 0
+        self._last_sent: Dict = {}  # 服务端已确认的字段值
+        self._force_full = True
+        self._last_full_time = 0.0
+        self._rtt_ms: Optional[float] = None
+        self._wakeup = threading.Event()
+        self._stats = {"full": 0, "delta": 0, "pushed": 0, "failed": 0}
+
+        keyboard_mgr.add_status_listener(self.notify_change)
+
+    def notify_change(self):
+        """状态发生变化，唤醒心跳线程立即上报"""
+        self._wakeup.set()
 
     def _get_center_url(self) -> Optional[str]:
         """获取center服务器地址（带缓存）"""
@@ -55,19 +85,24 @@ class HeartbeatMgr:
             self._name = config_mgr.get('agent_name', socket.gethostname()) or ''
         return self._name
 
-    def _collect_status(self) -> Dict:
+    def _collect_status(self, refresh_ip: bool = False) -> Dict:
         """
         收集服务状态
+        :param refresh_ip: 是否重新探测本机 IP
         :return: 状态字典
         """
         # 使用 try-except 避免获取状态时阻塞
         try:
             keyboard_status = keyboard_mgr.get_keyboard_status()
+            for field in KEYBOARD_VOLATILE_FIELDS:
+                keyboard_status.pop(field, None)
         except Exception as e:
             log.debug(f"[HEARTBEAT] 获取键盘状态失败: {e}")
             keyboard_status = {"error": str(e)}
 
-        ip = get_local_ip()
+        if refresh_ip or self._local_ip is None:
+            self._local_ip = get_local_ip()
+        ip = self._local_ip
         port = self._get_port()
         address = f"http://{ip}:{port}"
 
@@ -80,6 +115,36 @@ class HeartbeatMgr:
         }
         return status
 
+    def _build_payload(self, status: Dict, full: bool) -> Dict:
+        """
+        构建心跳数据：全量同步包含所有字段，增量只包含相对上次确认值变化的字段
+        :param status: _collect_status 的结果
+        :param full: 是否全量
+        :return: 心跳数据
+        """
+        payload = {
+            "timestamp": status["timestamp"],
+            "address": status["address"],
+            "full": full,
+            "seq": self._seq,
+        }
+        if self._rtt_ms is not None:
+            payload["rtt_ms"] = round(self._rtt_ms, 2)
+        for field in HEARTBEAT_DELTA_FIELDS:
+            if full or self._last_sent.get(field) != status[field]:
+                payload[field] = status[field]
+        return payload
+
+    @staticmethod
+    def _need_full(result: Dict) -> bool:
+        """服务端是否要求下次发送全量心跳"""
+        try:
+            body = json.loads(result.get("response") or "{}")
+        except ValueError:
+            return False
+        data = body.get("data") if isinstance(body, dict) else None
+        return isinstance(data, dict) and bool(data.get("need_full"))
+
     def _send_heartbeat(self) -> bool:
         """
         发送心跳
@@ -90,19 +155,42 @@ class HeartbeatMgr:
             return False
 
         try:
-            status = self._collect_status()
+            now = time.time()
+            full = self._force_full or now - self._last_full_time >= HEARTBEAT_FULL_SYNC_INTERVAL
+            status = self._collect_status(refresh_ip=full)
+            self._seq += 1
+            payload = self._build_payload(status, full)
+
+            start = time.perf_counter()
             result = _send_http_request(url=center_url,
                                         method="POST",
-                                        data=status,
+                                        data=payload,
                                         headers={"Content-Type": "application/json"})
+            rtt_ms = (time.perf_counter() - start) * 1000
 
-            if result.get("success"):
-                log.debug(f"[HEARTBEAT] 心跳上报成功: {result.get('status_code')}")
+            if result.get("success") and result.get("status_code", 0) < 400:
+                self._rtt_ms = rtt_ms
+                self._last_sent = {field: status[field] for field in HEARTBEAT_DELTA_FIELDS}
+                self._force_full = False
+                if full:
+                    self._last_full_time = now
+                self._stats["full" if full else "delta"] += 1
+                if self._need_full(result):
+                    log.info("[HEARTBEAT] 服务端要求全量同步")
+                    self._force_full = True
+                    self._wakeup.set()
+                log.debug(f"[HEARTBEAT] 心跳上报成功: {result.get('status_code')}, "
+                          f"{'全量' if full else '增量'}, 字段: {sorted(payload)}，RTT: {rtt_ms:.1f}ms")
                 return True
             else:
-                log.warning(f"[HEARTBEAT] 心跳上报失败: {result.get('error')}")
+                # 服务端是否已应用不确定，下次发送全量
+                self._force_full = True
+                self._stats["failed"] += 1
+                log.warning(f"[HEARTBEAT] 心跳上报失败: {result.get('error') or result.get('status_code')}")
                 return False
         except Exception as e:
+            self._force_full = True
+            self._stats["failed"] += 1
             log.error(f"[HEARTBEAT] 心跳上报异常: {e}")
             return False
 
@@ -117,11 +205,12 @@ class HeartbeatMgr:
             except Exception as e:
                 log.error(f"[HEARTBEAT] 心跳循环异常 Traceback: {traceback.format_exc()}")
 
-            # 等待指定间隔时间，每秒检查一次运行状态
-            for _ in range(self.interval):
-                if not self.is_running:
-                    break
-                time.sleep(1)
+            # 等待指定间隔时间，状态变化或停止服务时提前唤醒
+            triggered = self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if triggered and self.is_running:
+                time.sleep(HEARTBEAT_PUSH_DELAY)
+                self._stats["pushed"] += 1
 
         log.info("[HEARTBEAT] 心跳循环已退出")
 
@@ -141,6 +230,8 @@ class HeartbeatMgr:
 
         # 先创建线程，再设置 is_running，确保线程启动时能正确读取状态
         self.is_running = True
+        self._force_full = True
+        self._wakeup.clear()
         self.thread = threading.Thread(target=self._heartbeat_loop, daemon=True, name="HeartbeatMgr")
         self.thread.start()
         log.info(f"[HEARTBEAT] 心跳服务已启动，上报地址: {center_url}，间隔: {self.interval}秒")
@@ -152,6 +243,7 @@ class HeartbeatMgr:
             return
 
         self.is_running = False
+        self._wakeup.set()
         if self.thread:
             self.thread.join(timeout=2)
         log.info("[HEARTBEAT] 心跳服务已停止")
@@ -161,7 +253,15 @@ class HeartbeatMgr:
         获取服务状态
         :return: 状态字典
         """
-        return {"is_running": self.is_running, "interval": self.interval, "center_url": self._get_center_url()}
+        return {
+            "is_running": self.is_running,
+            "interval": self.interval,
+            "center_url": self._get_center_url(),
+            "seq": self._seq,
+            "rtt_ms": round(self._rtt_ms, 2) if self._rtt_ms is not None else None,
+            "heartbeat_stats": dict(self._stats),
+            "http_stats": get_http_stats(),
+        }
 
     def start_service(self) -> Tuple[bool, str]:
         """
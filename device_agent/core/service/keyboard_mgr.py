@@ -7,8 +7,9 @@ import os
 import platform
 import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Callable, Tuple, Union, TypedDict
+from typing import Deque, Dict, List, Optional, Callable, Tuple, Union, TypedDict
 
 from core.log_config import root_logger
 from core.config import config_mgr
@@ -32,6 +33,18 @@ DEFAULT_HTTP_METHOD = "GET"
 # 默认 F12 URL
 DEFAULT_F12_URL = "http://localhost:8000/keyboard/status"
 
+# 按键事件队列容量（超出后丢弃新事件，避免慢请求堆积）
+KEY_EVENT_QUEUE_SIZE = 64
+
+# 按键去抖间隔（秒），同一按键在该间隔内的重复按下视为抖动
+KEY_DEBOUNCE_INTERVAL = 0.05
+
+# 工作线程等待事件的超时时间（秒）
+KEY_WORKER_WAIT_TIMEOUT = 0.5
+
+# 最近延迟样本数量
+KEY_LATENCY_SAMPLES = 100
+
 
 class KeyboardMgr:
     """键盘监听管理器 - 负责按键逻辑和业务处理"""
@@ -42,14 +55,54 @@ class KeyboardMgr:
         self._lock = threading.Lock()
         self._base_url_cache: Optional[str] = None  # URL 构建缓存
 
+        # 编译后的按键绑定表（按键名 -> {method, url, data}），None 表示需要重新编译
+        self._bindings: Optional[Dict[str, Dict]] = None
+        # 编译后的有效时间窗口：(start_hour, start_minute, duration_minutes)，None 表示不限制
+        self._valid_window: Optional[Tuple[int, int, int]] = None
+
+        # 按键事件队列：输入线程只负责入队，由工作线程串行分发
+        self._events: Deque[Tuple[str, float]] = deque()
+        self._events_cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_running = False
+        self._last_press: Dict[str, float] = {}
+        self._stats = {
+            "received": 0,
+            "dispatched": 0,
+            "debounced": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+        self._latency: Deque[Tuple[float, float]] = deque(maxlen=KEY_LATENCY_SAMPLES)  # (queue_ms, total_ms)
+
+        # 状态变化监听（设备连接/断开、服务启停、配置变更），用于心跳即时上报
+        self._status_listeners: List[Callable[[], None]] = []
+
         # 初始化硬件设备
         self._device = KeyboardDev()
+        self._device.set_on_state_change_handler(lambda connected: self._notify_status_change())
+
+    def add_status_listener(self, listener: Callable[[], None]):
+        """
+        注册状态变化监听函数
+        :param listener: 无参回调，状态变化时调用（不应阻塞）
+        """
+        self._status_listeners.append(listener)
+
+    def _notify_status_change(self):
+        """通知所有状态监听函数"""
+        for listener in list(self._status_listeners):
+            try:
+                listener()
+            except Exception as e:
+                log.error(f"[KEYBOARD] 通知状态变化时出错：{e}")
 
     def set_handler(self, key: str, handler: Callable):
         """
         设置按键处理函数
         :param key: 按键名 (F12~F19)
-        :param handler: 处理函数，接收按键名作为参数
+        :param handler: 处理函数，接收按键名作为参数（合并的连续按下会逐次调用）
         """
         if key not in KEY_NAMES:
             raise ValueError(f"不支持的按键：{key}，仅支持 F12~F19")
@@ -72,44 +125,146 @@ class KeyboardMgr:
 
     def _on_key_press(self, key_name: str):
         """
-        统一的按键回调（由 keyboard_dev 调用）
+        统一的按键回调（由 keyboard_dev 的监听线程调用）
+        只做去抖和入队，不做任何阻塞操作，避免慢请求卡住输入循环
         :param key_name: 按键名称
         """
-        self._trigger_handler(key_name)
+        now = time.perf_counter()
+        with self._events_cond:
+            self._stats["received"] += 1
+            last = self._last_press.get(key_name)
+            if last is not None and now - last < KEY_DEBOUNCE_INTERVAL:
+                self._stats["debounced"] += 1
+                return
+            self._last_press[key_name] = now
 
-    def _trigger_handler(self, key_name: str):
-        """触发按键处理函数"""
+            if len(self._events) >= KEY_EVENT_QUEUE_SIZE:
+                self._stats["dropped"] += 1
+                log.warning(f"[KEYBOARD] 按键事件队列已满（{KEY_EVENT_QUEUE_SIZE}），丢弃 {key_name}")
+                return
+            self._events.append((key_name, now))
+            self._events_cond.notify()
+
+    def _next_event(self) -> Optional[Tuple[str, float, int]]:
+        """
+        取出下一个按键事件，并合并紧随其后的同一按键（如长按音量键产生的连续事件）
+        :return: (按键名, 首次按下时间, 合并次数)，服务停止时返回 None
+        """
+        with self._events_cond:
+            while not self._events:
+                if not self._worker_running:
+                    return None
+                self._events_cond.wait(KEY_WORKER_WAIT_TIMEOUT)
+            key_name, pressed_at = self._events.popleft()
+            count = 1
+            while self._events and self._events[0][0] == key_name:
+                self._events.popleft()
+                count += 1
+            if count > 1:
+                self._stats["coalesced"] += count - 1
+            return key_name, pressed_at, count
+
+    def _worker_loop(self):
+        """按键事件分发循环"""
+        log.info("[KEYBOARD] 按键事件分发线程已启动")
+        while True:
+            event = self._next_event()
+            if event is None:
+                break
+            key_name, pressed_at, count = event
+            self._dispatch(key_name, pressed_at, count)
+        log.info("[KEYBOARD] 按键事件分发线程已退出")
+
+    def _dispatch(self, key_name: str, pressed_at: float, count: int = 1):
+        """执行按键处理函数并记录输入到动作完成的延迟"""
+        queue_ms = (time.perf_counter() - pressed_at) * 1000
+        self._trigger_handler(key_name, count)
+        total_ms = (time.perf_counter() - pressed_at) * 1000
+        with self._events_cond:
+            self._stats["dispatched"] += 1
+            self._latency.append((queue_ms, total_ms))
+        log.debug(f"[KEYBOARD] 按键 {key_name} x{count} 处理完成，排队 {queue_ms:.1f}ms，总耗时 {total_ms:.1f}ms")
+
+    def _trigger_handler(self, key_name: str, count: int = 1):
+        """
+        触发按键处理函数
+        合并只减少队列调度，每次按下仍各调用一次处理函数（服务端按单次按下处理事件）
+        """
         with self._lock:
             handler = self.handlers.get(key_name)
 
         if handler:
-            try:
-                handler(key_name)
-            except Exception as e:
-                log.error(f"[KEYBOARD] 处理按键 {key_name} 时出错：{e}")
+            for _ in range(count):
+                try:
+                    handler(key_name)
+                except Exception as e:
+                    with self._events_cond:
+                        self._stats["errors"] += 1
+                    log.error(f"[KEYBOARD] 处理按键 {key_name} 时出错：{e}")
         else:
             log.debug(f"[KEYBOARD] 按键 {key_name} 未设置处理函数")
 
+    def _start_worker(self):
+        """启动按键事件分发线程"""
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker_running = True
+        self._worker = threading.Thread(target=self._worker_loop, name="keyboard-dispatch", daemon=True)
+        self._worker.start()
+
+    def _stop_worker(self):
+        """停止按键事件分发线程（丢弃未处理的事件）"""
+        with self._events_cond:
+            self._worker_running = False
+            self._events.clear()
+            self._events_cond.notify_all()
+        if self._worker:
+            self._worker.join(timeout=KEY_WORKER_WAIT_TIMEOUT * 2)
+            self._worker = None
+
     def start(self):
         """启动监听服务"""
+        self._start_worker()
         # 注册统一的按键回调到硬件设备
         self._device.set_on_press_handler(self._on_key_press)
         self._device.start()
+        self._notify_status_change()
 
     def stop(self):
         """停止监听服务"""
         self._device.stop()
+        self._stop_worker()
+        self._notify_status_change()
+
+    def get_event_stats(self) -> Dict:
+        """
+        获取按键事件统计
+        :return: 计数器、队列长度和延迟统计（毫秒，基于最近 KEY_LATENCY_SAMPLES 次分发）
+        """
+        with self._events_cond:
+            stats: Dict[str, Union[int, float]] = dict(self._stats)
+            stats["queue_size"] = len(self._events)
+            samples: List[Tuple[float, float]] = list(self._latency)
+        if samples:
+            totals = sorted(item[1] for item in samples)
+            stats["queue_avg_ms"] = round(sum(item[0] for item in samples) / len(samples), 2)
+            stats["latency_avg_ms"] = round(sum(totals) / len(totals), 2)
+            stats["latency_p95_ms"] = round(totals[min(len(totals) - 1, int(len(totals) * 0.95))], 2)
+            stats["latency_max_ms"] = round(totals[-1], 2)
+        return stats
 
     def get_status(self) -> Dict:
         """获取服务状态"""
         device_status = self._device.get_status()
         return {
             "is_running": device_status["is_running"],
+            "connected": device_status["connected"],
             "handlers": list(self.handlers.keys()),
             "platform": device_status["platform"],
             "supported": True,
             "pynput_available": device_status["pynput_available"],
-            "evdev_available": device_status["evdev_available"]
+            "evdev_available": device_status["evdev_available"],
+            "event_stats": self.get_event_stats()
         }
 
     # ==================== 工具方法 ====================
@@ -127,8 +282,8 @@ class KeyboardMgr:
         return self._base_url_cache
 
     def _clear_base_url_cache(self):
-        """清除 base_url 缓存（用于配置更新后）"""
-        self._base_url_cache = None
+        """清除 base_url 缓存并重新编译按键绑定（用于配置更新后）"""
+        self.reload_bindings()
 
     def _build_full_url(self, url: str) -> Optional[str]:
         """
@@ -187,34 +342,34 @@ class KeyboardMgr:
             "data": config_mgr.get(self._get_config_key(key, "data"), "")
         }
 
-    def _is_within_valid_time(self) -> Tuple[bool, str]:
+    def _parse_valid_window(self) -> Optional[Tuple[int, int, int]]:
         """
-        检查当前时间是否在有效时间范围内
-        :return: (is_valid: bool, reason: str)
+        解析全局有效时间配置
+        :return: (start_hour, start_minute, duration_minutes)，未配置或配置无效时返回 None（不限制）
         """
         valid_time_str = config_mgr.get(self._get_config_key("global", "key_valid_time"), "")
         duration_str = config_mgr.get(self._get_config_key("global", "key_valid_duration"), "")
 
         # 如果没有配置有效时间，则认为始终有效
         if not valid_time_str:
-            return True, "未配置有效时间限制"
+            return None
 
         # 解析开始时间（格式：HH:MM）
         valid_time_parts = valid_time_str.split(":")
         if len(valid_time_parts) != 2:
             log.warning(f"[KEYBOARD] 无效的时间格式：{valid_time_str}，应为 HH:MM")
-            return True, "时间格式错误，跳过检查"
+            return None
 
         try:
             start_hour = int(valid_time_parts[0])
             start_minute = int(valid_time_parts[1])
         except ValueError:
             log.warning(f"[KEYBOARD] 无效的时间值：{valid_time_str}")
-            return True, "时间值解析失败，跳过检查"
+            return None
 
         if not (0 <= start_hour <= 23 and 0 <= start_minute <= 59):
             log.warning(f"[KEYBOARD] 无效的时间值：{valid_time_str}")
-            return True, "时间值超出范围，跳过检查"
+            return None
 
         # 解析持续时间（分钟）
         duration_minutes = 0
@@ -228,6 +383,23 @@ class KeyboardMgr:
                 log.warning(f"[KEYBOARD] 无效的持续时间格式：{duration_str}")
                 duration_minutes = 0
 
+        return start_hour, start_minute, duration_minutes
+
+    def _is_within_valid_time(self) -> Tuple[bool, str]:
+        """
+        检查当前时间是否在有效时间范围内（使用编译后的时间窗口）
+        :return: (is_valid: bool, reason: str)
+        """
+        self._get_bindings()
+        window = self._valid_window
+        if window is None:
+            return True, "未配置有效时间限制"
+        start_hour, start_minute, duration_minutes = window
+
+        # 如果持续时间超过 24 小时，认为始终有效
+        if duration_minutes >= 24 * 60:
+            return True, f"持续时间超过 24 小时，始终有效"
+
         # 获取当前时间
         now = datetime.now()
 
@@ -237,10 +409,6 @@ class KeyboardMgr:
         # 计算结束时间
         end_time = start_time + timedelta(minutes=duration_minutes)
 
-        # 如果持续时间超过 24 小时，认为始终有效
-        if duration_minutes >= 24 * 60:
-            return True, f"持续时间超过 24 小时，始终有效"
-
         # 检查是否在时间范围内
         if start_time <= now <= end_time:
             return True, f"在有效时间内 ({start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')})"
@@ -287,6 +455,36 @@ class KeyboardMgr:
 
         return result
 
+    def reload_bindings(self) -> Dict[str, Dict]:
+        """
+        重新编译按键绑定表和有效时间窗口（配置变更后调用）
+        :return: 编译后的绑定表
+        """
+        self._base_url_cache = None
+        bindings: Dict[str, Dict] = {}
+        for key in KEY_NAMES:
+            key_config = self._get_key_config(key)
+            if key_config:
+                bindings[key] = key_config
+        valid_window = self._parse_valid_window()
+        with self._lock:
+            self._bindings = bindings
+            self._valid_window = valid_window
+        log.info(f"[KEYBOARD] 已编译按键绑定：{list(bindings.keys())}，有效时间窗口：{valid_window}")
+        self._notify_status_change()
+        return bindings
+
+    def _get_bindings(self) -> Dict[str, Dict]:
+        """获取编译后的按键绑定表（未编译时先编译）"""
+        bindings = self._bindings
+        if bindings is None:
+            bindings = self.reload_bindings()
+        return bindings
+
+    def _get_binding(self, key: str) -> Optional[Dict]:
+        """从编译后的绑定表查找按键配置"""
+        return self._get_bindings().get(key)
+
     def _create_key_handler(self, key: str) -> Callable:
         """
         创建按键处理函数
@@ -301,7 +499,7 @@ class KeyboardMgr:
                 log.warning(f"[KEYBOARD] 按键 {key_name} 触发被阻止：{reason}")
                 return
 
-            config = self._get_key_config(key_name)
+            config = self._get_binding(key_name)
             if not config:
                 log.warning(f"[KEYBOARD] 按键 {key_name} 未配置或 URL 构建失败，跳过")
                 return
@@ -360,12 +558,10 @@ class KeyboardMgr:
             # 设置 F12 的默认配置（如果未配置）
             self._setup_default_config()
 
-            for key in KEY_NAMES:
-                key_config = self._get_key_config(key)
-                if key_config:
-                    handler = self._create_key_handler(key)
-                    self.set_handler(key, handler)
-                    log.info(f"[KEYBOARD] 已配置按键 {key} -> {key_config['url']}")
+            for key, key_config in self.reload_bindings().items():
+                handler = self._create_key_handler(key)
+                self.set_handler(key, handler)
+                log.info(f"[KEYBOARD] 已配置按键 {key} -> {key_config['url']}")
 
             self.start()
             return True, "键盘监听服务已启动"
@@ -438,6 +634,7 @@ class KeyboardMgr:
             config_mgr.set(self._get_config_key("global", "key_valid_duration"), new_config["key_valid_duration"])
             if not config_mgr.save_config():
                 return False, "保存配置失败"
+            self.reload_bindings()
             log.info(f"[KEYBOARD] 已保存全局配置：{new_config}")
             return True, "全局配置已保存"
         except Exception as e:
@@ -465,7 +662,7 @@ class KeyboardMgr:
                 if config_mgr.get(self._get_config_key(key, "data")):
                     config_mgr.set(self._get_config_key(key, "data"), "")
 
-            # 清除 URL 缓存（因为可能更新了 center_server_url）
+            # 清除 URL 缓存并重新编译绑定（因为可能更新了 center_server_url）
             self._clear_base_url_cache()
 
             # 保存配置到文件
@@ -504,6 +701,8 @@ class KeyboardMgr:
             if not config_mgr.save_config():
                 return False, "保存配置失败"
 
+            self.reload_bindings()
+
             # 如果服务正在运行，移除处理函数
             if self._device.is_running:
                 self.remove_handler(key)
@@ -530,7 +729,7 @@ class KeyboardMgr:
 
             if not handler:
                 # 如果没有处理函数，尝试设置
-                key_config = self._get_key_config(key)
+                key_config = self._get_binding(key)
                 if not key_config:
                     return False, f"按键 {key} 未配置 URL 或 URL 构建失败（请检查 center_server_url 配置）", {}
 
@@ -5,8 +5,13 @@ import asyncio
 import os
 import shutil
 import socket
-from typing import Optional
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
 from flask import jsonify
 from core.log_config import root_logger
 # 使用 gevent.subprocess（通过 monkey.patch_all 自动替换）
@@ -73,49 +78,115 @@ def _handle_service_result(success: bool, message: str, data=None):
     return _err(msg=message)
 
 
+# ==================== HTTP 连接池 ====================
+# 心跳与按键请求共用一个 Session：同一 host 复用 keep-alive 连接，避免每次建连
+_HTTP_CONNECT_TIMEOUT = 3  # 连接超时（秒）
+_HTTP_READ_TIMEOUT = 10  # 读超时（秒）
+_HTTP_RETRIES = 2  # 最大重试次数
+_HTTP_BACKOFF = 0.2  # 重试退避基数（秒）
+_HTTP_POOL_MAXSIZE = 4  # 每个 host 的最大连接数
+_IDEMPOTENT_METHODS = ('GET', 'DELETE')
+
+_http_session = requests.Session()
+_http_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=_HTTP_POOL_MAXSIZE, pool_block=True)
+_http_session.mount('http://', _http_adapter)
+_http_session.mount('https://', _http_adapter)
+
+_http_stats_lock = threading.Lock()
+_http_stats: Dict[str, Dict[str, float]] = {}
+
+
+def _record_http_stat(endpoint: str, elapsed_ms: float, retries: int, ok: bool):
+    """记录单个接口的请求耗时"""
+    with _http_stats_lock:
+        item = _http_stats.setdefault(endpoint, {"count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0})
+        item["count"] += 1
+        item["retries"] += retries
+        if not ok:
+            item["errors"] += 1
+        item["total_ms"] += elapsed_ms
+        item["max_ms"] = max(item["max_ms"], elapsed_ms)
+
+
+def get_http_stats() -> Dict[str, Dict[str, float]]:
+    """
+    获取按 "METHOD host/path" 统计的 HTTP 请求耗时
+    :return: {endpoint: {count, errors, retries, avg_ms, max_ms, total_ms}}
+    """
+    with _http_stats_lock:
+        return {
+            endpoint: {**item, "avg_ms": item["total_ms"] / item["count"] if item["count"] else 0.0}
+            for endpoint, item in _http_stats.items()
+        }
+
+
+def _is_connect_error(e: requests.exceptions.ConnectionError) -> bool:
+    """
+    判断是否为建连阶段失败（连接被拒绝/无法建立，请求尚未发出）
+    :param e: requests 抛出的 ConnectionError
+    :return: 建连失败返回 True；连接被重置等请求可能已发出的错误返回 False
+    """
+    reason = getattr(e.args[0], 'reason', None) if e.args else None
+    if isinstance(reason, NewConnectionError):
+        return True
+    text = str(e)
+    return "NewConnectionError" in text or "Failed to establish" in text
+
+
 def _send_http_request(url: str, method: str = 'GET', data: Optional[dict] = None, headers: Optional[dict] = None):
     """
-    发送 HTTP 请求
+    发送 HTTP 请求（连接池复用 + 连接/读超时 + 退避重试）
+    连接建立失败（请求尚未发出）时任何方法都重试；读超时、连接被重置等请求可能已送达的错误只对幂等方法重试，
+    避免按键等 POST 被重复触发
     :param url: 请求 URL
     :param method: HTTP 方法 (GET, POST, PUT, DELETE)
     :param data: 请求数据（用于 POST/PUT）
     :param headers: 请求头
     :return: 响应结果
     """
-    try:
-        method = method.upper()
-        timeout = 10  # 10秒超时
-        
-        # 使用字典映射简化方法调用
-        method_map = {
-            'GET': requests.get,
-            'POST': requests.post,
-            'PUT': requests.put,
-            'DELETE': requests.delete
-        }
-        
-        request_func = method_map.get(method)
-        if not request_func:
-            return {"success": False, "error": f"不支持的 HTTP 方法: {method}"}
-        
-        # 统一处理请求参数
-        kwargs = {'headers': headers, 'timeout': timeout}
-        if method in ('POST', 'PUT') and data:
-            kwargs['json'] = data
-        
-        response = request_func(url, **kwargs)
-        
-        return {
-            "success": True,
-            "status_code": response.status_code,
-            "response": response.text[:500]  # 限制响应长度
-        }
-    except requests.exceptions.Timeout:
-        return {"success": False, "error": "请求超时"}
-    except requests.exceptions.RequestException as e:
-        return {"success": False, "error": str(e)}
-    except Exception as e:
-        return {"success": False, "error": f"未知错误: {str(e)}"}
+    method = method.upper()
+    if method not in ('GET', 'POST', 'PUT', 'DELETE'):
+        return {"success": False, "error": f"不支持的 HTTP 方法: {method}"}
+
+    # 统一处理请求参数
+    kwargs = {'headers': headers, 'timeout': (_HTTP_CONNECT_TIMEOUT, _HTTP_READ_TIMEOUT)}
+    if method in ('POST', 'PUT') and data:
+        kwargs['json'] = data
+
+    parsed = urlparse(url)
+    endpoint = f"{method} {parsed.netloc}{parsed.path or '/'}"
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        try:
+            response = _http_session.request(method, url, **kwargs)
+            _record_http_stat(endpoint, (time.perf_counter() - start) * 1000, attempt, response.status_code < 500)
+            return {
+                "success": True,
+                "status_code": response.status_code,
+                "response": response.text[:500]  # 限制响应长度
+            }
+        except requests.exceptions.ConnectTimeout:
+            error = {"success": False, "error": "连接超时"}
+            retryable = True
+        except requests.exceptions.Timeout:
+            error = {"success": False, "error": "请求超时"}
+            retryable = method in _IDEMPOTENT_METHODS
+        except requests.exceptions.ConnectionError as e:
+            error = {"success": False, "error": str(e)}
+            retryable = method in _IDEMPOTENT_METHODS or _is_connect_error(e)
+        except requests.exceptions.RequestException as e:
+            error = {"success": False, "error": str(e)}
+            retryable = False
+        except Exception as e:
+            error = {"success": False, "error": f"未知错误: {str(e)}"}
+            retryable = False
+
+        if not retryable or attempt >= _HTTP_RETRIES:
+            _record_http_stat(endpoint, (time.perf_counter() - start) * 1000, attempt, False)
+            return error
+        attempt += 1
+        time.sleep(_HTTP_BACKOFF * (2 ** (attempt - 1)))
 
 
 def get_local_ip() -> str:
@@ -0,0 +1,73 @@
+'''
+测试 _send_http_request 的重试策略
+非幂等方法只在建连失败时重试，请求可能已送达的错误不重放
+'''
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import core.utils as utils
+
+
+class _Resp:
+    status_code = 200
+    text = "ok"
+
+
+def _connect_refused():
+    reason = NewConnectionError(None, "Failed to establish a new connection: [Errno 111] Connection refused")
+    return requests.exceptions.ConnectionError(MaxRetryError(None, "/", reason))
+
+
+def _reset_after_send():
+    return requests.exceptions.ConnectionError("('Connection aborted.', ConnectionResetError(104, 'reset by peer'))")
+
+
+@pytest.fixture
+def session(monkeypatch):
+    calls = []
+    errors = []
+
+    def fake_request(method, url, **kwargs):
+        calls.append(method)
+        if errors:
+            raise errors.pop(0)
+        return _Resp()
+
+    monkeypatch.setattr(utils._http_session, "request", fake_request)
+    monkeypatch.setattr(utils.time, "sleep", lambda _s: None)
+    return calls, errors
+
+
+def test_post_is_not_replayed_after_connection_reset(session):
+    calls, errors = session
+    errors.append(_reset_after_send())
+
+    result = utils._send_http_request("http://example.com/key", method="POST", data={"key": "F13"})
+
+    assert result["success"] is False
+    assert calls == ["POST"]
+
+
+def test_post_retries_when_connection_was_never_established(session):
+    calls, errors = session
+    errors.append(_connect_refused())
+
+    result = utils._send_http_request("http://example.com/key", method="POST", data={"key": "F13"})
+
+    assert result["success"] is True
+    assert calls == ["POST", "POST"]
+
+
+def test_get_retries_after_connection_reset(session):
+    calls, errors = session
+    errors.append(_reset_after_send())
+
+    result = utils._send_http_request("http://example.com/status", method="GET")
+
+    assert result["success"] is True
+    assert calls == ["GET", "GET"]
@@ -0,0 +1,78 @@
+'''
+测试按键事件队列：去抖、合并与分发
+合并的连续按下必须逐次触发处理函数，不能丢失按键
+'''
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.service.keyboard_mgr as keyboard_module
+from core.service.keyboard_mgr import KeyboardMgr
+
+
+def _mgr_with_events(*keys):
+    mgr = KeyboardMgr()
+    mgr._worker_running = True
+    for key in keys:
+        mgr._events.append((key, 0.0))
+    return mgr
+
+
+def test_next_event_coalesces_consecutive_same_key():
+    mgr = _mgr_with_events("F13", "F13", "F13", "F14", "F13")
+
+    assert mgr._next_event()[::2] == ("F13", 3)
+    assert mgr._next_event()[::2] == ("F14", 1)
+    assert mgr._next_event()[::2] == ("F13", 1)
+    assert mgr._stats["coalesced"] == 2
+
+
+def test_dispatch_fires_handler_once_per_coalesced_press():
+    mgr = _mgr_with_events("F13", "F13", "F13")
+    calls = []
+    mgr.set_handler("F13", lambda key_name: calls.append(key_name))
+
+    key_name, pressed_at, count = mgr._next_event()
+    mgr._dispatch(key_name, pressed_at, count)
+
+    assert calls == ["F13", "F13", "F13"]
+    assert mgr._stats["dispatched"] == 1
+
+
+def test_dispatch_continues_after_handler_error():
+    mgr = KeyboardMgr()
+    calls = []
+
+    def handler(key_name):
+        calls.append(key_name)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    mgr.set_handler("F14", handler)
+    mgr._dispatch("F14", 0.0, 2)
+
+    assert calls == ["F14", "F14"]
+    assert mgr._stats["errors"] == 1
+
+
+def test_on_key_press_debounces_repeats():
+    mgr = KeyboardMgr()
+    mgr._on_key_press("F15")
+    mgr._on_key_press("F15")
+
+    assert len(mgr._events) == 1
+    assert mgr._stats["debounced"] == 1
+
+
+def test_key_handler_sends_one_request_per_press(monkeypatch):
+    mgr = _mgr_with_events("F13", "F13")
+    sent = []
+    monkeypatch.setattr(mgr, "_is_within_valid_time", lambda: (True, ""))
+    monkeypatch.setattr(mgr, "_get_binding", lambda key: {"url": "http://example.com/f13", "method": "POST"})
+    monkeypatch.setattr(keyboard_module, "_send_http_request",
+                        lambda url, method, data, headers: sent.append(data) or {"success": True})
+    mgr.set_handler("F13", mgr._create_key_handler("F13"))
+
+    mgr._dispatch(*mgr._next_event())
+
+    assert [d["value"] for d in sent] == [1, 1]
@@ -1,16 +1,21 @@
 from core.models import *
+import importlib
 import time
 import os
 import json
-from core.config import config, app_logger, access_logger
+from core.config import config, app_logger, access_logger, gevent_access_logger
 from core.services.scheduler_mgr import scheduler_mgr
 from core.db.db_mgr import db_mgr
 from core.db import rds_mgr
 from core.chat.chat_mgr import chat_mgr
 import core.ai.ai_mgr as ai_mgr
+from core.tools.lazy import StartupProfiler, mgr_registry
+from core.tools.metrics import registry as metrics_registry
+from core.tools.buffered_log import AccessLogSampler, GeventAccessSampleFilter, buffer_logger_handlers
 from core.tools.useragent_fix import patch_fake_useragent
 from flask_jwt_extended import (JWTManager, create_access_token, create_refresh_token, set_refresh_cookies,
-                                unset_jwt_cookies, verify_jwt_in_request)
+                                unset_jwt_cookies)
+from core.services.auth_cache import verify_jwt_cached
 from datetime import timedelta
 from flask_smorest import Api
 from flask_sqlalchemy import SQLAlchemy
@@ -24,6 +29,11 @@ from flask_limiter.util import get_remote_address
 # 全局限流实例，供各路由模块装饰器使用
 limiter = Limiter(key_func=get_remote_address)
 
+# 请求指标：route 使用路由模板（如 /api/media/<id>），未匹配的请求归为 <unmatched>，避免标签无限增长
+_HTTP_LATENCY = metrics_registry.histogram('http_request_duration_seconds', 'HTTP 请求处理耗时（秒）',
+                                           ('method', 'blueprint', 'route'))
+_HTTP_REQUESTS = metrics_registry.counter('http_requests_total', 'HTTP 请求数', ('method', 'route', 'status'))
+
 
 # 必须在导入任何使用 miservice 的模块之前 patch fake_useragent
 # 避免 fake_useragent 的 ThreadPoolExecutor 在 gevent 环境中导致 LoopExit
@@ -33,8 +43,32 @@ patch_fake_useragent()
 
 log = app_logger
 
+# (模块, 蓝图变量名, url_prefix)，按注册顺序排列
+_BLUEPRINTS = [
+    ('core.api.routes', 'api_bp', '/'),
+    ('core.api.lottery_routes', 'lottery_bp', '/'),
+    ('core.api.pic_routes', 'pic_bp', '/pic'),
+    ('core.api.agent_routes', 'agent_bp', '/'),
+    ('core.api.bluetooth_routes', 'bluetooth_bp', '/'),
+    ('core.api.media_routes', 'media_bp', '/'),
+    ('core.api.playlist_routes', 'playlist_bp', '/'),
+    ('core.api.dlna_routes', 'dlna_bp', '/'),
+    ('core.api.mi_routes', 'mi_bp', '/'),
+    ('core.api.pdf_routes', 'pdf_bp', '/'),
+    ('core.api.pdf_layout_routes', 'pdf_layout_bp', '/'),
+    ('core.api.auth_routes', 'auth_bp', '/'),
+    ('core.api.tts_routes', 'tts_bp', '/'),
+    ('core.api.ai_routes', 'ai_bp', '/'),
+    ('core.api.task_routes', 'task_bp', '/'),
+    ('core.api.usage_routes', 'usage_bp', '/'),
+    ('core.api.todo_routes', 'todo_bp', '/'),
+    ('core.api.browser_routes', 'browser_bp', '/'),
+    ('core.api.material_routes', 'material_bp', '/'),
+]
+
 
 def create_app():
+    profiler = StartupProfiler(config.STARTUP_PROFILE)
     instance_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     app = Flask(__name__, instance_path=instance_path,
                 instance_relative_config=True)
@@ -95,45 +129,11 @@ def create_app():
         ping_interval=25,  # 增加心跳间隔
     )
 
-    from core.api.routes import api_bp
-    from core.api.lottery_routes import lottery_bp
-    from core.api.agent_routes import agent_bp
-    from core.api.bluetooth_routes import bluetooth_bp
-    from core.api.dlna_routes import dlna_bp
-    from core.api.media_routes import media_bp
-    from core.api.pic_routes import pic_bp
-    from core.api.playlist_routes import playlist_bp
-    from core.api.mi_routes import mi_bp
-    from core.api.pdf_routes import pdf_bp
-    from core.api.pdf_layout_routes import pdf_layout_bp
-    from core.api.auth_routes import auth_bp
-    from core.api.tts_routes import tts_bp
-    from core.api.ai_routes import ai_bp
-    from core.api.task_routes import task_bp
-    from core.api.usage_routes import usage_bp
-    from core.api.todo_routes import todo_bp
-    from core.api.browser_routes import browser_bp
-    from core.api.material_routes import material_bp
-
-    app.register_blueprint(api_bp, url_prefix='/')
-    app.register_blueprint(lottery_bp, url_prefix='/')
-    app.register_blueprint(pic_bp, url_prefix='/pic')
-    app.register_blueprint(agent_bp, url_prefix='/')
-    app.register_blueprint(bluetooth_bp, url_prefix='/')
-    app.register_blueprint(media_bp, url_prefix='/')
-    app.register_blueprint(playlist_bp, url_prefix='/')
-    app.register_blueprint(dlna_bp, url_prefix='/')
-    app.register_blueprint(mi_bp, url_prefix='/')
-    app.register_blueprint(pdf_bp, url_prefix='/')
-    app.register_blueprint(pdf_layout_bp, url_prefix='/')
-    app.register_blueprint(auth_bp, url_prefix='/')
-    app.register_blueprint(tts_bp, url_prefix='/')
-    app.register_blueprint(ai_bp, url_prefix='/')
-    app.register_blueprint(task_bp, url_prefix='/')
-    app.register_blueprint(usage_bp, url_prefix='/')
-    app.register_blueprint(todo_bp, url_prefix='/')
-    app.register_blueprint(browser_bp, url_prefix='/')
-    app.register_blueprint(material_bp, url_prefix='/')
+    # 蓝图按表注册；STARTUP_PROFILE=1 时统计每个路由模块的导入耗时
+    for module_name, attr, url_prefix in _BLUEPRINTS:
+        with profiler.step(f'import {module_name}'):
+            module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attr), url_prefix=url_prefix)
 
     # ========== JWT Auth ==========
     app.config['JWT_SECRET_KEY'] = config.JWT_SECRET_KEY
@@ -203,7 +203,8 @@ def create_app():
             return None
         has_auth_header = bool(request.headers.get('Authorization'))
         try:
-            verify_jwt_in_request()
+            # 轮询类接口请求频繁：已验证的 token 缓存到过期，省去每次验签
+            verify_jwt_cached()
             return None
         except Exception as e:
             log.warning(
@@ -218,6 +219,7 @@ def create_app():
     def _record_start_time():
         """记录请求开始时间，用于计算响应时间"""
         cast(Any, request)._start_time = time.time()
+        cast(Any, request)._start_perf = time.perf_counter()
 
         # CORS 调试日志：记录 OPTIONS 预检请求
         if request.method == 'OPTIONS':
@@ -228,18 +230,29 @@ def create_app():
             log.debug(
                 f"[CORS Debug] Allowed origins: {config.get_cors_origins()}")
 
+    @app.after_request
+    def _observe_request(response):
+        """记录请求耗时直方图与请求计数"""
+        start = getattr(request, '_start_perf', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+            _HTTP_LATENCY.labels(request.method, request.blueprint or '', route).observe(time.perf_counter() - start)
+            _HTTP_REQUESTS.labels(request.method, route, response.status_code).inc()
+        return response
+
+    # 访问日志：写盘交给后台线程，高频轮询接口按规则采样（仅在生产环境）；gevent 过滤器内部 fork 独立计数器
+    access_sampler = AccessLogSampler.from_rules(config.ACCESS_LOG_SAMPLE_RULES, config.ACCESS_LOG_SLOW_MS)
+    if config.IS_PRODUCTION:
+        buffer_logger_handlers([access_logger, gevent_access_logger], name='access',
+                               capacity=config.ACCESS_LOG_BUFFER_SIZE,
+                               flush_interval=config.ACCESS_LOG_FLUSH_INTERVAL)
+        if not any(isinstance(f, GeventAccessSampleFilter) for f in gevent_access_logger.filters):
+            gevent_access_logger.addFilter(GeventAccessSampleFilter(access_sampler))
+
     @app.after_request
     def _log_access(response):
         """记录访问日志（仅在生产环境）"""
         if config.IS_PRODUCTION:
-            # 获取请求信息
-            method = request.method
-            path = request.path
-            status_code = response.status_code
-            client_ip = request.environ.get(
-                'HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-            user_agent = request.headers.get('User-Agent', '-')
-
             # 计算响应时间
             if hasattr(request, '_start_time'):
                 response_time = (time.time() -
@@ -247,20 +260,53 @@ def create_app():
             else:
                 response_time = 0
 
-            # 记录访问日志（格式：方法 路径 状态码 响应时间(ms) 客户端IP User-Agent）
-            access_logger.info(
-                f'{method} {path} {status_code} {response_time:.2f}ms {client_ip} {user_agent}')
+            status_code = response.status_code
+            if not access_sampler.should_log(request.script_root + request.path, status_code, response_time):
+                return response
+
+            client_ip = request.environ.get(
+                'HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
+            user_agent = request.headers.get('User-Agent', '-')
+
+            # 记录访问日志（格式：方法 路径 状态码 响应时间(ms) 客户端IP User-Agent）；格式化推迟到写线程
+            access_logger.info('%s %s %s %.2fms %s %s', request.method, request.path, status_code,
+                               response_time, client_ip, user_agent)
 
         return response
 
-    chat_mgr.init(socketio)
-    db_mgr.init(app)
-    ai_mgr.init()
+    with profiler.step('chat_mgr.init'):
+        chat_mgr.init(socketio)
+    with profiler.step('db_mgr.init'):
+        db_mgr.init(app)
+    with profiler.step('ai_mgr.init'):
+        ai_mgr.init()
 
     # 初始化定时任务调度器
-    scheduler_mgr.start()
+    with profiler.step('scheduler_mgr.start'):
+        scheduler_mgr.start()
 
     # 如果 Redis 不可用（本地回退模式），启动定时恢复检查
-    rds_mgr.start_restore_timer()
+    with profiler.step('rds_mgr.start_restore_timer'):
+        rds_mgr.start_restore_timer()
+
+    # 构造函数有启动期副作用（注册定时任务、启动 worker）的管理器在此创建，其余首次使用时创建
+    with profiler.step('mgr_registry.init_eager'):
+        mgr_registry.init_eager()
+
+    # DLNA 后台发现：维护渲染器注册表，播放时不再等待 SSDP 搜索
+    with profiler.step('dlna_registry.start'):
+        from core.device.dlna import dlna_registry
+        dlna_registry.start()
+
+    # 素材时长回填：后台扫描缺少时长的视频素材，状态查询时不再临时探测
+    with profiler.step('duration_backfill.start'):
+        from core.services.task.duration_backfill import duration_backfill
+        duration_backfill.start(app)
+
+    # 素材观看时长：内存累加，定时批量写入 t_material_stat
+    with profiler.step('material_stats.start'):
+        from core.services.task.material_stats import material_stats
+        material_stats.start(app)
 
+    profiler.report()
     return app
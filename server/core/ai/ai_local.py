@@ -1,17 +1,20 @@
 """Dify AI（本地/私有化）客户端封装。
 
 `AILocal` 提供：
-- 流式对话请求（SSE 形式的 `data:` 行）；
-- 取消流式任务；
+- 流式对话请求（SSE 形式的 `data:` 行），按会话记录首 token 延迟与生成速度（`stream_stats`）；
+- 取消流式任务（停止读取上游并通知服务端 stop）；
 - 拉取历史消息。
 
 该类被 `core/chat/chat_mgr.py` 用作对话与语音链路的一环。
 """
 
 import json
+import time
 
 import requests
 
+from core.ai.stream_relay import stream_stats
+from core.ai.transport import dify_client
 from core.config import app_logger, config
 
 log = app_logger
@@ -42,6 +45,7 @@ class AILocal:
         self.on_msg = on_msg or (lambda a, b, c: None)
         self.on_err = on_err or (lambda x: None)
         self.last_task_id = -1
+        self._cancelled = False
 
     def stream_msg(self, query: str, inputs: dict | None = None, timeout: int = 30, try_times: int = 0) -> None:
         """发起流式对话请求。
@@ -49,7 +53,7 @@ class AILocal:
         Args:
             query (str): 用户输入文本。
             inputs (dict | None): 透传给 Dify 的 inputs。
-            timeout (int): HTTP 超时时间（秒）。
+            timeout (int): 读超时（秒），即两个流式 chunk 之间的最长间隔；总超时由 dify_client 控制。
             try_times (int): 内部递归重试计数（仅做一次轻量重试）。
         """
         payload = {
@@ -60,34 +64,50 @@ class AILocal:
             "user": self.user,
         }
         log.info(f"==== [AI] Query: {self.user} - {query}")
+        self._cancelled = False
+        started = time.monotonic()
+        first_at = None
+        chunks = 0
+        usage_tokens = None
 
         try:
-            with requests.post(
+            with dify_client.stream(
+                    "POST",
                     f"{API_URL}/chat-messages",
                     headers=HEADERS,
                     json=payload,
-                    stream=True,
                     timeout=timeout,
             ) as response:
                 response.raise_for_status()
 
-                for line in response.iter_lines():
+                for line in dify_client.iter_lines(response):
+                    if self._cancelled:
+                        log.info(">>[AI] 已取消，停止读取")
+                        break
                     if line and line.startswith(b"data:"):
                         chunk = json.loads(line.decode("utf-8")[6:])
                         self.aiConversationId = chunk["conversation_id"]
                         if "task_id" in chunk:
                             self.last_task_id = chunk["task_id"]
                         if "message" == chunk["event"]:
+                            if first_at is None:
+                                first_at = time.monotonic()
+                            chunks += 1
                             self.on_msg(chunk["answer"], chunk["message_id"], 0)
                         elif chunk["event"] == "error":
                             raise RuntimeError(f"{chunk['code']} : {chunk['message']}")
                         elif chunk["event"] == "message_end":
                             log.info(chunk["metadata"])
+                            usage_tokens = (chunk["metadata"].get("usage") or {}).get("completion_tokens")
                             self.on_msg(chunk["metadata"], chunk["message_id"], 1)
 
+            if first_at is not None:
+                stream_stats.record(self.aiConversationId, first_at - started, usage_tokens or chunks,
+                                    time.monotonic() - first_at)
+
         except requests.exceptions.RequestException as e:
             log.error(f">>[AI] 请求失败: {str(e)}")
-            if try_times < 1:
+            if try_times < 1 and not self._cancelled:
                 self.aiConversationId = ""
                 self.stream_msg(query, inputs, timeout, try_times + 1)
             else:
@@ -97,14 +117,17 @@ class AILocal:
             self.on_err(ee)
 
     def streaming_cancel(self) -> None:
-        """取消当前流式任务（如果服务端支持 stop）。"""
+        """取消当前流式任务：停止读取上游，并通知服务端 stop。"""
+        self._cancelled = True
         payload = {"user": self.user}
         log.info(">>[AI] cancel streaming")
         try:
-            with requests.post(
-                    f"{API_URL}/chat-messages/:{self.last_task_id}/stop",
+            with dify_client.request(
+                    "POST",
+                    f"{API_URL}/chat-messages/{self.last_task_id}/stop",
                     headers=HEADERS,
                     json=payload,
+                    timeout=5,
             ) as response:
                 response.raise_for_status()
 
@@ -123,7 +146,8 @@ class AILocal:
             }
             if first_id:
                 payload["first_id"] = first_id
-            with requests.get(
+            with dify_client.request(
+                    "GET",
                     f"{API_URL}/messages",
                     headers=HEADERS,
                     params=payload,
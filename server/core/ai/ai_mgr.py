@@ -3,13 +3,12 @@
 该模块提供最小封装以便在服务端调用豆包 Chat Completions 接口。
 配置项来源于 `core.config.config`。
 
-注意：此处为轻量封装，不负责复杂的重试/限流/熔断策略。
+重试、限流与熔断由共享传输层 `core.ai.transport.doubao_client` 负责。
 """
 
 import json
 
-import requests
-
+from core.ai.transport import doubao_client
 from core.config import app_logger, config
 
 log = app_logger
@@ -56,10 +55,13 @@ def call_doubao_api(prompt: str) -> dict | None:
         ],
     }
     try:
-        response = requests.post(
+        # 生成类请求无副作用，允许读超时 / 5xx 时重试
+        response = doubao_client.request(
+            "POST",
             API_URL + ENDPOINT,
             data=json.dumps(data, ensure_ascii=False).encode("utf-8"),
             headers=headers,
+            idempotent=True,
         )
         log.debug(response.text)
         response.raise_for_status()
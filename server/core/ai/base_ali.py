@@ -2,11 +2,25 @@
 阿里相关模块公用：在能导入 core.config 时使用应用 logger 与 ALI_KEY，否则使用 dotenv + 默认 logger。
 供独立运行脚本或测试时使用。
 """
-import dashscope
+import importlib
 import platform
+from types import ModuleType
+from typing import Optional
+
+DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com/api/v1"
+
+_dashscope: Optional[ModuleType] = None
+
+
+def get_dashscope() -> ModuleType:
+    """按需导入 dashscope（导入耗时约 300ms，不放在模块顶层），并统一设置基础 URL。"""
+    global _dashscope
+    if _dashscope is None:
+        module = importlib.import_module("dashscope")
+        setattr(module, "base_http_api_url", DASHSCOPE_BASE_URL)
+        _dashscope = module
+    return _dashscope
 
-# 统一设置 dashscope 的基础 URL
-dashscope.base_http_api_url = "https://dashscope.aliyuncs.com/api/v1"
 
 # Python 3.13 + gevent + dashscope 组合说明（非常重要）：
 # - dashscope 在构造默认 UA 时会调用 platform.platform() / platform.processor()
@@ -1,7 +1,6 @@
-from dashscope import MultiModalConversation
-
 import time
-from core.ai.base_ali import BaseAli, log, ALI_KEY
+
+from core.ai.base_ali import BaseAli, log, ALI_KEY, get_dashscope
 
 PROMPT = """请从图片中提取文章内容，要求如下：
 
@@ -40,6 +39,12 @@ PROMPT = """请从图片中提取文章内容，要求如下：
 - 如果图片中有"寓意点拨"相关的段落内容，必须在正文后保留，但**不要输出"寓意点拨"这几个字本身**，只输出其后的段落内容，保持原文的自然段落分隔
 - 故事正文结束后立即停止，不返回任何后续的总结性、解释性文字"""
 
+# 多图分块识别时，非首块追加的说明（见 core.ai.ocr_pipeline）
+CONTINUATION_PROMPT = """
+
+## 续页说明
+这些图片是同一篇文章的后续页，前面的页已单独识别：不要补写或重复文章标题，直接从第一张图片的正文接续输出。"""
+
 
 class OCRAli(BaseAli):
     """
@@ -49,11 +54,12 @@ class OCRAli(BaseAli):
     def __init__(self):
         super().__init__("OCR")
 
-    def query(self, image_paths: str | list[str]) -> tuple[str, str]:
+    def query(self, image_paths: str | list[str], continuation: bool = False) -> tuple[str, str]:
         """查询 OCR Ali API
         
         Args:
             image_paths: 图片路径，可以是单个路径字符串或路径列表
+            continuation: 是否为同一篇文章的后续页（不输出标题）
         
         Returns:
             tuple: (状态, 提取的文章内容)
@@ -85,14 +91,14 @@ class OCRAli(BaseAli):
                 })
 
             # 添加文本提示
-            content.append({"text": PROMPT})
+            content.append({"text": PROMPT + CONTINUATION_PROMPT if continuation else PROMPT})
 
             messages = [{
                 "role": "user",
                 "content": content,
             }]
 
-            response = MultiModalConversation.call(
+            response = get_dashscope().MultiModalConversation.call(
                 api_key=ALI_KEY,
                 model="qwen-vl-plus",
                 messages=messages,
@@ -0,0 +1,222 @@
+"""
+OCR 流水线：在 OCR 后端（默认 OCRAli）之前加一层缓存与并发。
+
+- 缓存：按图片内容哈希（sha1）缓存每块的识别结果，重复提交同一批照片不再请求后端；
+  识别失败不缓存。
+- 分块并发：多图按 ``chunk_size`` 顺序分块，各块并行识别（``run_blocking_many``），
+  结果按原顺序合并；非首块以「续页」方式识别，避免重复输出标题。
+- 预缩放：未命中缓存的图片先在本地缩放到 ``max_side`` 并重新编码为 JPEG，
+  比原图小时才使用，减少上传体积与耗时；Pillow 不可用时直接上传原图。
+- 超时：整批超时后尚未开始的块不再执行，仍在运行的块结束后才删除临时目录。
+
+后端可替换（``OcrPipeline(backend=...)``），签名同 ``OCRAli.query(image_paths, continuation)``，
+便于离线测试缓存命中与吞吐。
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.ai.base_ali import log
+from core.tools.async_util import run_blocking_many
+
+OCR_CHUNK_SIZE = 3  # 每次请求的图片数
+OCR_MAX_WORKERS = 3  # 同时进行的请求数
+OCR_TIMEOUT = 300  # 整批识别超时（秒）
+OCR_CACHE_MAX = 256
+OCR_MAX_SIDE = 2048  # 预缩放后长边像素
+OCR_JPEG_QUALITY = 85
+_HASH_READ_SIZE = 1024 * 1024
+_EXIF_ORIENTATION = 0x0112
+
+OcrResult = Tuple[str, str]  # (状态, 文本或错误信息)
+OcrBackend = Callable[[List[str], bool], OcrResult]
+_CacheKey = Tuple[Tuple[str, ...], bool]
+
+
+def image_digest(path: str) -> str:
+    """图片文件内容的 sha1。"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prepare_image(path: str, work_dir: str, max_side: int = OCR_MAX_SIDE, quality: int = OCR_JPEG_QUALITY) -> str:
+    """按 EXIF 方向摆正、缩放到长边 max_side 并重新编码为 JPEG；结果不比原图小时返回原路径。"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return path
+    fd, out_path = tempfile.mkstemp(suffix='.jpg', dir=work_dir)
+    os.close(fd)
+    try:
+        with Image.open(path) as src:
+            if src.format == 'JPEG' and max(src.size) <= max_side and src.getexif().get(_EXIF_ORIENTATION, 1) == 1:
+                # 无需缩放 / 旋转的 JPEG 不再重新编码（避免二次压缩损失）
+                os.remove(out_path)
+                return path
+            img = ImageOps.exif_transpose(src)
+            if max(img.size) > max_side:
+                img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            if img.mode in ('RGBA', 'LA', 'P'):
+                # 透明区域铺白底，避免转 RGB 后变黑
+                rgba = img.convert('RGBA')
+                img = Image.new('RGB', rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.getchannel('A'))
+            elif img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            img.save(out_path, 'JPEG', quality=quality, optimize=True)
+        if os.path.getsize(out_path) < os.path.getsize(path):
+            return out_path
+    except Exception as e:
+        log.warning(f"[OCR] 预处理图片失败，使用原图 {path}: {e}")
+    os.remove(out_path)
+    return path
+
+
+class _ScratchDir:
+    """一批识别共用的临时目录：release 后不再接受新任务，最后一个运行中的任务结束时删除目录。"""
+
+    def __init__(self) -> None:
+        self.path = tempfile.mkdtemp(prefix='ocr_')
+        self._active = 0
+        self._released = False
+        self._lock = threading.Lock()
+
+    def run(self, func: Callable[[str], OcrResult]) -> OcrResult:
+        with self._lock:
+            if self._released:
+                raise TimeoutError("OCR 批次已结束，跳过未开始的分块")
+            self._active += 1
+        try:
+            return func(self.path)
+        finally:
+            with self._lock:
+                self._active -= 1
+                cleanup = self._released and self._active == 0
+            if cleanup:
+                shutil.rmtree(self.path, ignore_errors=True)
+
+    def release(self) -> None:
+        with self._lock:
+            self._released = True
+            cleanup = self._active == 0
+        if cleanup:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+class OcrPipeline:
+    """带内容哈希缓存、分块并发与本地预缩放的 OCR 流水线（接口同 OCRAli.query）。"""
+
+    def __init__(self,
+                 backend: Optional[OcrBackend] = None,
+                 chunk_size: int = OCR_CHUNK_SIZE,
+                 max_workers: int = OCR_MAX_WORKERS,
+                 cache_max: int = OCR_CACHE_MAX,
+                 max_side: int = OCR_MAX_SIDE) -> None:
+        self._backend = backend
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.cache_max = cache_max
+        self.max_side = max_side
+        self._cache: OrderedDict[_CacheKey, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'backend_calls': 0, 'uploaded_bytes': 0}
+
+    @property
+    def backend(self) -> OcrBackend:
+        if self._backend is None:
+            from core.ai.ocr_ali import OCRAli
+            self._backend = OCRAli().query
+        return self._backend
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, 'cached': len(self._cache)}
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_get(self, key: _CacheKey) -> Optional[str]:
+        with self._lock:
+            text = self._cache.get(key)
+            if text is None:
+                self._stats['misses'] += 1
+                return None
+            self._cache.move_to_end(key)
+            self._stats['hits'] += 1
+            return text
+
+    def _cache_put(self, key: _CacheKey, text: str) -> None:
+        with self._lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_max:
+                self._cache.popitem(last=False)
+
+    def _recognize(self, paths: List[str], continuation: bool, work_dir: str) -> OcrResult:
+        prepared = [prepare_image(p, work_dir, self.max_side) for p in paths]
+        size = sum(os.path.getsize(p) for p in prepared)
+        with self._lock:
+            self._stats['backend_calls'] += 1
+            self._stats['uploaded_bytes'] += size
+        return self.backend(prepared, continuation)
+
+    def query(self, image_paths: str | list[str]) -> OcrResult:
+        """识别一篇文章的全部图片，返回 (状态, 合并后的文本)；状态为 "ok" 或 "error"。"""
+        if isinstance(image_paths, str):
+            image_paths = [image_paths]
+        if not image_paths:
+            return "error", "图片路径列表为空"
+        start_time = time.time()
+        try:
+            digests = [image_digest(p) for p in image_paths]
+        except OSError as e:
+            log.error(f"[OCR] 读取图片失败: {e}")
+            return "error", f"读取图片失败: {e}"
+
+        n = self.chunk_size
+        chunks = [image_paths[i:i + n] for i in range(0, len(image_paths), n)]
+        keys: List[_CacheKey] = [(tuple(digests[i:i + n]), i > 0) for i in range(0, len(digests), n)]
+        texts: List[Optional[str]] = [self._cache_get(key) for key in keys]
+        missing = [i for i, text in enumerate(texts) if text is None]
+
+        if missing:
+            # 超时后 worker 线程可能仍在读取预处理图片，目录由最后一个结束的 worker 删除
+            scratch = _ScratchDir()
+            try:
+                outcomes = run_blocking_many(
+                    [partial(scratch.run, partial(self._recognize, chunks[i], i > 0)) for i in missing],
+                    max_workers=self.max_workers, timeout=OCR_TIMEOUT)
+            except Exception as e:
+                log.error(f"[OCR] 分块识别失败: {e}", exc_info=True)
+                return "error", f"分块识别失败: {e}"
+            finally:
+                scratch.release()
+            failed: Optional[OcrResult] = None
+            for i, (status, text) in zip(missing, outcomes):
+                if status != "ok" or not text:
+                    failed = failed or ("error", text or "OCR 识别失败")
+                    continue
+                # 成功的块先缓存，整批重试时只需重新识别失败的块
+                self._cache_put(keys[i], text)
+                texts[i] = text
+            if failed:
+                return failed
+
+        log.info(f"[OCR] 识别完成：图片 {len(image_paths)} 张，{len(chunks)} 块（缓存命中 "
+                 f"{len(chunks) - len(missing)}），耗时 {time.time() - start_time:.2f}秒")
+        return "ok", "\n\n".join((text or '').strip() for text in texts)
+
+
+ocr_pipeline = OcrPipeline()
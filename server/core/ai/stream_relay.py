@@ -0,0 +1,259 @@
+"""
+AI 流式回复中继：上游读取与下游推送解耦。
+
+AILocal 逐个 chunk 回调 on_msg；若直接在回调里推送 SocketIO，慢客户端会拖住上游读取。
+StreamRelay 在两者之间放一个按会话的有界缓冲：
+- 上游 ``push`` 只追加到缓冲，立即返回；后台 greenlet 负责推送；
+- 合并：连续的同一条消息的 chunk 合并后一次推送，缓冲达到 ``flush_chars`` 或
+  最早的 chunk 等待超过 ``flush_interval`` 时推送；
+- 背压：缓冲超过 ``max_buffer_chars`` 时 ``push`` 让出等待下游消化，
+  ``stall_timeout`` 内仍无进展则判定客户端过慢，取消本次流式回复；
+- 取消：``cancel`` 丢弃未推送内容，并调用 ``on_cancel``（AILocal.streaming_cancel）通知上游停止。
+
+StreamStats 按会话记录首 token 延迟（TTFT）与生成速度（tokens/s），并输出到 /metrics。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gevent import sleep, spawn
+from gevent.event import Event
+
+from core.config import app_logger
+from core.tools.metrics import registry
+
+log = app_logger
+
+RELAY_FLUSH_CHARS = 64  # 缓冲达到该字符数立即推送
+RELAY_FLUSH_INTERVAL = 0.05  # 最早的 chunk 最多等待（秒）
+RELAY_MAX_BUFFER_CHARS = 16 * 1024  # 单会话缓冲上限
+RELAY_STALL_TIMEOUT = 10.0  # 缓冲满后等待下游消化的最长时间（秒）
+_BACKPRESSURE_POLL = 0.01
+
+STREAM_STATS_MAX_CONVERSATIONS = 200
+
+MSG_CHUNK = 0  # 流式 chunk（与 AILocal.on_msg 的 type 一致）
+MSG_END = 1  # message_end
+
+_FIRST_TOKEN_SECONDS = registry.histogram('ai_stream_first_token_seconds', 'AI 流式回复首 token 延迟（秒）',
+                                          buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0))
+_TOKENS_PER_SECOND = registry.histogram('ai_stream_tokens_per_second', 'AI 流式回复生成速度（tokens/s）',
+                                        buckets=(1, 5, 10, 20, 30, 50, 80, 120, 200))
+_RELAY_FLUSHES = registry.counter('ai_stream_relay_flushes_total', 'AI 流式中继推送次数（合并后）')
+_RELAY_CANCELS = registry.counter('ai_stream_relay_cancels_total', 'AI 流式中继取消次数', ('reason',))
+
+Sink = Callable[[Any, str, int], None]
+_Item = Tuple[int, Any, str]  # (type, payload, message_id)
+
+
+class StreamRelay:
+    """单个会话的有界、合并推送中继（greenlet 安全，非线程安全：push 与推送需在同一 hub）。"""
+
+    def __init__(self,
+                 sink: Sink,
+                 on_cancel: Optional[Callable[[], None]] = None,
+                 flush_chars: int = RELAY_FLUSH_CHARS,
+                 flush_interval: float = RELAY_FLUSH_INTERVAL,
+                 max_buffer_chars: int = RELAY_MAX_BUFFER_CHARS,
+                 stall_timeout: float = RELAY_STALL_TIMEOUT) -> None:
+        """
+        Args:
+            sink: 推送回调 ``sink(payload, message_id, type)``，协议同 AILocal.on_msg
+            on_cancel: 取消时调用，用于通知上游停止读取
+            flush_chars: 缓冲达到该字符数立即推送
+            flush_interval: 最早的 chunk 最多等待的秒数
+            max_buffer_chars: 缓冲上限，超过后 push 等待下游消化
+            stall_timeout: 缓冲满后等待下游的最长秒数，超时取消本次回复
+        """
+        self.sink = sink
+        self.on_cancel = on_cancel
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self.max_buffer_chars = max_buffer_chars
+        self.stall_timeout = stall_timeout
+
+        self._items: List[_Item] = []
+        self._chars = 0
+        self._first_at: Optional[float] = None
+        self._wake = Event()
+        self._greenlet = None
+        self._cancelled = False
+        self._active = False
+        self._stats: Dict[str, int] = {'chunks': 0, 'flushes': 0, 'stalls': 0, 'cancels': 0, 'max_buffered': 0}
+
+    # ---------- 上游 ----------
+
+    def begin(self) -> None:
+        """开始一次新的流式回复（清除上一次的取消状态）。"""
+        self._cancelled = False
+        self._active = True
+
+    def finish(self) -> None:
+        """上游读取结束（已缓冲的内容继续推送）；之后的 cancel 不再通知上游。"""
+        self._active = False
+
+    def on_msg(self, payload: Any, message_id: str, type: int = MSG_CHUNK) -> None:
+        """AILocal.on_msg 适配：chunk 进缓冲，message_end 在已缓冲内容之后推送。"""
+        if type == MSG_CHUNK:
+            self.push(payload, message_id)
+        else:
+            self.end(payload, message_id)
+
+    def push(self, text: str, message_id: str) -> bool:
+        """追加一个 chunk；已取消或因下游过慢被取消时返回 False。"""
+        if self._cancelled:
+            return False
+        if self._chars >= self.max_buffer_chars and not self._wait_for_room():
+            return False
+        self._append((MSG_CHUNK, text, message_id), len(text))
+        self._stats['chunks'] += 1
+        if self._chars >= self.flush_chars:
+            self._wake.set()
+        return True
+
+    def end(self, payload: Any, message_id: str) -> None:
+        """本条消息结束：立即推送剩余内容与结束事件。"""
+        if self._cancelled:
+            return
+        self._append((MSG_END, payload, message_id), 0)
+        self._wake.set()
+
+    def cancel(self, reason: str = 'client') -> None:
+        """丢弃未推送的内容，上游仍在读取时通知其停止。"""
+        if self._cancelled:
+            return
+        self._cancelled = True
+        active, self._active = self._active, False
+        self._items, self._chars, self._first_at = [], 0, None
+        self._stats['cancels'] += 1
+        _RELAY_CANCELS.labels(reason).inc()
+        self._wake.set()
+        if active and self.on_cancel is not None:
+            try:
+                self.on_cancel()
+            except Exception as e:
+                log.error(f"[AI-RELAY] 取消上游失败: {e}")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def buffered_chars(self) -> int:
+        return self._chars
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, 'buffered': self._chars}
+
+    def _append(self, item: _Item, chars: int) -> None:
+        if not self._items:
+            self._first_at = time.monotonic()
+        self._items.append(item)
+        self._chars += chars
+        self._stats['max_buffered'] = max(self._stats['max_buffered'], self._chars)
+        if self._greenlet is None or self._greenlet.dead:
+            self._greenlet = spawn(self._drain)
+
+    def _wait_for_room(self) -> bool:
+        """缓冲已满：让出等待下游消化；超时则取消本次回复。"""
+        self._stats['stalls'] += 1
+        self._wake.set()
+        deadline = time.monotonic() + self.stall_timeout
+        while self._chars >= self.max_buffer_chars and not self._cancelled:
+            if time.monotonic() >= deadline:
+                log.warning(f"[AI-RELAY] 客户端消费过慢（缓冲 {self._chars} 字符），取消本次回复")
+                self.cancel('stalled')
+                return False
+            sleep(_BACKPRESSURE_POLL)
+        return not self._cancelled
+
+    # ---------- 下游 ----------
+
+    def _drain(self) -> None:
+        while self._items:
+            wait = self.flush_interval - (time.monotonic() - (self._first_at or 0.0))
+            if wait > 0 and self._chars < self.flush_chars and not any(t == MSG_END for t, _, _ in self._items):
+                self._wake.wait(wait)
+            self._wake.clear()
+            items, self._items, self._chars, self._first_at = self._items, [], 0, None
+            for item in _coalesce(items):
+                if self._cancelled:
+                    return
+                try:
+                    self.sink(item[1], item[2], item[0])
+                except Exception as e:
+                    log.error(f"[AI-RELAY] 推送失败: {e}")
+                if item[0] == MSG_CHUNK:
+                    self._stats['flushes'] += 1
+                    _RELAY_FLUSHES.inc()
+
+
+def _coalesce(items: List[_Item]) -> List[_Item]:
+    """合并相邻的同一消息的 chunk，保持与 message_end 的先后顺序。"""
+    merged: List[_Item] = []
+    for item in items:
+        last = merged[-1] if merged else None
+        if last and item[0] == MSG_CHUNK and last[0] == MSG_CHUNK and last[2] == item[2]:
+            merged[-1] = (MSG_CHUNK, last[1] + item[1], item[2])
+        else:
+            merged.append(item)
+    return merged
+
+
+class StreamStats:
+    """按会话记录流式回复的首 token 延迟与生成速度（最近 STREAM_STATS_MAX_CONVERSATIONS 个会话）。"""
+
+    def __init__(self, max_conversations: int = STREAM_STATS_MAX_CONVERSATIONS) -> None:
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, Dict[str, float]] = OrderedDict()
+
+    def record(self, conversation_id: str, first_token_seconds: Optional[float], tokens: int,
+               generate_seconds: float) -> None:
+        """记录一次回复。
+
+        Args:
+            conversation_id: 会话 ID
+            first_token_seconds: 请求发出到首个 chunk 的秒数，无输出时为 None
+            tokens: 生成 token 数（优先用上游 usage，否则为 chunk 数）
+            generate_seconds: 首个 chunk 到结束的秒数
+        """
+        tps = tokens / generate_seconds if tokens and generate_seconds > 0 else 0.0
+        if first_token_seconds is not None:
+            _FIRST_TOKEN_SECONDS.observe(first_token_seconds)
+        if tps:
+            _TOKENS_PER_SECOND.observe(tps)
+        with self._lock:
+            item = self._items.pop(conversation_id, None) or {
+                'replies': 0, 'tokens': 0, 'ttft_total': 0.0, 'ttft_count': 0
+            }
+            item['replies'] += 1
+            item['tokens'] += tokens
+            if first_token_seconds is not None:
+                item['ttft_total'] += first_token_seconds
+                item['ttft_count'] += 1
+                item['last_ttft'] = round(first_token_seconds, 3)
+            item['last_tps'] = round(tps, 2)
+            item['updated_at'] = time.time()
+            self._items[conversation_id] = item
+            while len(self._items) > self.max_conversations:
+                self._items.popitem(last=False)
+
+    def get(self, conversation_id: Optional[str] = None) -> Dict[str, Dict[str, Optional[float]]]:
+        """返回各会话统计（含平均 TTFT）；指定 conversation_id 时只返回该会话。"""
+        with self._lock:
+            if conversation_id is None:
+                items = list(self._items.items())
+            else:
+                items = [(conversation_id, self._items[conversation_id])] if conversation_id in self._items else []
+            result = {}
+            for cid, item in items:
+                out: Dict[str, Optional[float]] = {k: v for k, v in item.items() if k not in ('ttft_total', 'ttft_count')}
+                out['avg_ttft'] = round(item['ttft_total'] / item['ttft_count'], 3) if item['ttft_count'] else None
+                result[cid] = out
+            return result
+
+
+stream_stats = StreamStats()
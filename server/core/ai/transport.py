@@ -0,0 +1,55 @@
+"""
+AI 接口共享的 HTTP 传输层。
+
+Dify 对话、豆包大模型、豆包 TTS 各自使用一个 PooledHttpClient：
+- keep-alive 连接池复用 TLS 连接；
+- 连接 / 读 / 总超时均显式配置，不再有无超时的请求；
+- 每个后端限制并发数，超出排队，排队超时抛出 HttpClientBusy；
+- 重试带抖动退避，连续失败后熔断（CircuitOpenError），冷却后放行一个试探请求；
+- 耗时按客户端名称输出到 /metrics（http_client_request_seconds）。
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from core.tools.http_client import PooledHttpClient
+
+# Dify 对话：流式响应，读超时是两个 chunk 之间的最长间隔
+dify_client = PooledHttpClient("dify",
+                               pool_maxsize=8,
+                               connect_timeout=3.0,
+                               read_timeout=30.0,
+                               total_timeout=120.0,
+                               max_concurrency=8,
+                               retries=1,
+                               breaker_threshold=5,
+                               breaker_cooldown=30.0)
+
+# 豆包大模型：非流式，生成耗时较长
+doubao_client = PooledHttpClient("doubao",
+                                 connect_timeout=3.0,
+                                 read_timeout=60.0,
+                                 total_timeout=120.0,
+                                 max_concurrency=4,
+                                 retries=2,
+                                 backoff=0.5,
+                                 breaker_threshold=5,
+                                 breaker_cooldown=60.0)
+
+# 豆包 TTS：单次合成通常数秒内返回
+doubao_tts_client = PooledHttpClient("doubao_tts",
+                                     connect_timeout=3.0,
+                                     read_timeout=20.0,
+                                     total_timeout=45.0,
+                                     max_concurrency=4,
+                                     retries=2,
+                                     backoff=0.3,
+                                     breaker_threshold=5,
+                                     breaker_cooldown=30.0)
+
+AI_HTTP_CLIENTS = (dify_client, doubao_client, doubao_tts_client)
+
+
+def get_transport_stats() -> Dict[str, Dict[str, Any]]:
+    """各 AI 后端的并发 / 熔断状态与按接口的请求统计。"""
+    return {client.name: {**client.get_state(), "endpoints": client.get_stats()} for client in AI_HTTP_CLIENTS}
@@ -1,7 +1,6 @@
-from dashscope import Generation
 import time
 
-from core.ai.base_ali import BaseAli, log, ALI_KEY
+from core.ai.base_ali import BaseAli, log, ALI_KEY, get_dashscope
 
 MODEL = "qwen-plus"
 
@@ -47,7 +46,7 @@ class TxtAli(BaseAli):
                 },
             ]
 
-            response = Generation.call(
+            response = get_dashscope().Generation.call(
                 api_key=ALI_KEY,
                 model=MODEL,
                 messages=messages,
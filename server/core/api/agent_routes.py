@@ -15,6 +15,7 @@ from flask import Blueprint, request
 from flask.typing import ResponseReturnValue
 
 from core.config import app_logger
+from core.device.agent import agent_http_client
 from core.services.agent_mgr import HEARTBEAT_TIMEOUT, agent_mgr
 from core.tools.validation import parse_with_model
 from core.utils import _err, _ok, read_json_from_request
@@ -57,9 +58,13 @@ def agent_heartbeat() -> ResponseReturnValue:
         address (str): Agent 的访问地址 (e.g., "192.168.1.10:8000")。
         name (str, optional): Agent 的可读名称。
         actions (list[str], optional): Agent 支持的操作列表。
+        full (bool, optional): 是否为全量心跳，默认 True；增量心跳只携带变化的字段。
+        seq (int, optional): 心跳序号。
+        rtt_ms (float, optional): Agent 测得的上一次心跳往返耗时。
 
     Returns:
-        ResponseReturnValue: 成功时返回 code=0，失败时返回错误信息。
+        ResponseReturnValue: 成功时返回 code=0，data.need_full 为 True 表示 Agent 需发送全量心跳；
+        失败时返回错误信息。
     """
     try:
         req: Dict[str, Any] = read_json_from_request()
@@ -72,8 +77,8 @@ def agent_heartbeat() -> ResponseReturnValue:
         log.debug(
             f"=> [Agent Heartbeat] client_ip={client_ip}, address={data.address}, name={data.name}, actions={data.actions}"
         )
-        agent_mgr.handle_heartbeat(client_ip=client_ip, data=data)
-        return _ok()
+        device = agent_mgr.handle_heartbeat(client_ip=client_ip, data=data)
+        return _ok({'need_full': device is None})
     except Exception as e:
         log.error(f"[Agent] Heartbeat error: {e}")
         return _err(f'error: {str(e)}')
@@ -145,6 +150,8 @@ def agent_list() -> ResponseReturnValue:
                 'last_heartbeat_ago': int(current_time - heartbeat_time) if heartbeat_time > 0 else -1,
                 'is_online': (current_time - heartbeat_time) < HEARTBEAT_TIMEOUT if heartbeat_time > 0 else False,
                 'keyboard': device_info.get('keyboard', {}),
+                'rtt_ms': device_info.get('rtt_ms'),
+                'rtt_avg_ms': device_info.get('rtt_avg_ms'),
             }
             device_list.append(device_data)
         return _ok(device_list)
@@ -153,6 +160,20 @@ def agent_list() -> ResponseReturnValue:
         return _err(f'error: {str(e)}')
 
 
+@agent_bp.route("/agent/http/stats", methods=['GET'])
+def agent_http_stats() -> ResponseReturnValue:
+    """获取 DeviceAgent HTTP 连接池的按接口耗时统计。
+
+    Returns:
+        ResponseReturnValue: ``{"METHOD path": {count, errors, retries, avg_ms, max_ms, total_ms}}``。
+    """
+    try:
+        return _ok(agent_http_client.get_stats())
+    except Exception as e:
+        log.error(f"[Agent] HTTP stats error: {e}")
+        return _err(f'error: {str(e)}')
+
+
 @agent_bp.route("/agent/mock", methods=['POST'])
 def agent_mock() -> ResponseReturnValue:
     """模拟 Agent 设备操作接口，用于测试或调试。
@@ -2,6 +2,7 @@
 
 提供 AI 相关功能的 API 接口：
 - OCR 图片文字识别
+- OCR 缓存统计
 
 所有路由挂载在 `/api` 下（由 create_app 设置 url_prefix='/'）。
 """
@@ -14,7 +15,9 @@ from flask import Blueprint, request
 from flask.typing import ResponseReturnValue
 from pydantic import BaseModel
 
-from core.ai.ocr_ali import OCRAli
+from core.ai.ocr_pipeline import ocr_pipeline
+from core.ai.stream_relay import stream_stats
+from core.ai.transport import get_transport_stats
 from core.api.types import OCRBody
 from core.config import app_logger
 from core.tools.validation import parse_with_model
@@ -24,8 +27,8 @@ log = app_logger
 
 ai_bp = Blueprint('ai', __name__)
 
-# 初始化 OCR 客户端
-ocr_client = OCRAli()
+# OCR 客户端：带内容哈希缓存与分块并发的流水线
+ocr_client = ocr_pipeline
 
 
 @ai_bp.route('/ai/ocr', methods=['POST'])
@@ -107,3 +110,21 @@ def ocr() -> ResponseReturnValue:
     except Exception as e:
         log.error(f"[OCR] OCR 接口错误: {e}")
         return _err(f"OCR 识别失败: {str(e)}")
+
+
+@ai_bp.route('/ai/ocr/stats', methods=['GET'])
+def ocr_stats() -> ResponseReturnValue:
+    """OCR 流水线统计（缓存命中 / 未命中、后端请求数、上传字节数）。"""
+    return _ok(ocr_client.get_stats())
+
+
+@ai_bp.route('/ai/http/stats', methods=['GET'])
+def http_stats() -> ResponseReturnValue:
+    """AI 后端 HTTP 传输统计（并发数、熔断状态、按接口的请求次数 / 错误 / 耗时）。"""
+    return _ok(get_transport_stats())
+
+
+@ai_bp.route('/ai/stream/stats', methods=['GET'])
+def stream_stats_route() -> ResponseReturnValue:
+    """AI 流式回复统计：按会话的首 token 延迟（秒）与生成速度（tokens/s）；可选参数 conversation_id。"""
+    return _ok(stream_stats.get(request.args.get('conversation_id') or None))
@@ -13,6 +13,7 @@ from flask_jwt_extended import (create_access_token, create_refresh_token, decod
 from core.config import app_logger, config
 from core.db import db_obj
 from core.models.user import User
+from core.services.auth_cache import user_cache
 from core.utils import read_json_from_request
 
 log = app_logger
@@ -34,28 +35,26 @@ def auth_login() -> ResponseReturnValue:
 
         # Password compatibility:
         # legacy frontend uses CryptoJS.MD5(password).toString() and compares to user.pwd.
-        user = db_obj.session.query(User).filter(User.name == username).first()
-        if not user:
-            return {"code": -1, "msg": "invalid credentials"}, 401
-
-        ok = False
-        if user.pwd is None:
-            ok = True
-        elif str(user.pwd) == password:
-            ok = True
+        # 用户名 → 身份 / 密码摘要走缓存，错误密码的重试不再查库
+        cached = user_cache.get(username)
+        if cached is None:
+            user = db_obj.session.query(User).filter(User.name == username).first()
+            if not user:
+                return {"code": -1, "msg": "invalid credentials"}, 401
+            cached = user_cache.put(username, user.id, int(user.admin or 0), user.pwd)
         else:
-            try:
-                import hashlib
+            user = None
 
-                md5 = hashlib.md5(password.encode('utf-8')).hexdigest()
-                if str(user.pwd) == md5:
-                    ok = True
-            except Exception:
-                pass
-
-        if not ok:
+        if not user_cache.check_password(cached, password):
             return {"code": -1, "msg": "invalid credentials"}, 401
 
+        if user is None:
+            # 按主键取最新资料（积分等字段变化频繁，不缓存）
+            user = db_obj.session.get(User, cached["id"])
+            if not user:
+                user_cache.invalidate(cached["id"])
+                return {"code": -1, "msg": "invalid credentials"}, 401
+
         identity = {"id": user.id, "name": user.name, "admin": int(user.admin or 0)}
         access_expires = timedelta(days=int(config.JWT_ACCESS_DAYS))
         refresh_expires = timedelta(days=int(config.JWT_REFRESH_DAYS))
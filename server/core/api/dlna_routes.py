@@ -17,11 +17,12 @@ dlna_bp = Blueprint('dlna', __name__)
 
 @dlna_bp.route("/dlna/scan", methods=['GET'])
 def dlna_scan() -> ResponseReturnValue:
-    """扫描 DLNA 设备。"""
+    """列出 DLNA 设备（注册表缓存，force=1 时立即重新扫描）。"""
     try:
         timeout = request.args.get('timeout', 5.0, type=float)
-        log.info(f"=> [DLNA Scan] timeout={timeout}")
-        return _ok(scan_devices_sync(timeout))
+        force = request.args.get('force', '').lower() in ('1', 'true')
+        log.info(f"=> [DLNA Scan] timeout={timeout}, force={force}")
+        return _ok(scan_devices_sync(timeout, force=force))
     except Exception as e:
         log.error(f"[DLNA] Scan error: {e}")
         return _err(f'error: {str(e)}')
@@ -11,9 +11,10 @@ from pydantic import BaseModel
 from typing import List, Optional
 
 from core.config import app_logger
+from core.services.task.duration_backfill import duration_backfill
 from core.services.task.material_mgr import material_mgr
 from core.tools.validation import parse_with_model
-from core.utils import _err, read_json_from_request
+from core.utils import _err, _ok, read_json_from_request
 
 log = app_logger
 material_bp = Blueprint('material', __name__)
@@ -28,6 +29,13 @@ class ApplyUnlimitQuery(BaseModel):
     lock_code: int = 0
 
 
+class MaterialStatusBatchQuery(BaseModel):
+    """批量查询素材锁定状态参数"""
+    user_id: int
+    material_ids: List[int]
+    task_id: Optional[int] = None
+
+
 class ApproveDenyQuery(BaseModel):
     """批量审批/拒绝参数"""
     ids: List[int]
@@ -66,6 +74,24 @@ def get_material_status() -> ResponseReturnValue:
     return material_mgr.get_material_status(user_id, material_id, task_id)
 
 
+@material_bp.route('/material/status/batch', methods=['POST'])
+def get_materials_status() -> ResponseReturnValue:
+    """批量查询素材锁定状态（目录页一次性检查多个素材）"""
+    json_data = read_json_from_request()
+    body, err = parse_with_model(MaterialStatusBatchQuery, json_data, err_factory=_err)
+    if err or not body:
+        return err or _err('Invalid request body')
+    if body.user_id <= 0:
+        return _err('Invalid userId')
+    return material_mgr.get_materials_status(body.user_id, body.material_ids, body.task_id)
+
+
+@material_bp.route('/material/duration/backfill', methods=['GET'])
+def get_duration_backfill_stats() -> ResponseReturnValue:
+    """素材时长回填进度（队列、探测中、成功/失败数与启动扫描进度）"""
+    return _ok(duration_backfill.stats())
+
+
 @material_bp.route('/material/unlimit/apply', methods=['POST'])
 def apply_material_unlimit() -> ResponseReturnValue:
     """申请视频不限时（暂时解除观看时长限制）"""
@@ -20,6 +20,7 @@ from core.config import app_logger
 from core.services.tools.audio_merge_mgr import audio_merge_mgr
 from core.services.tools.audio_convert_mgr import audio_convert_mgr
 from core.services.media_mgr import media_mgr
+from core.tools.file_serving import serve_file
 from core.services.subtitle_mgr import subtitle_mgr
 from core.config import get_media_task_dir, ALLOWED_AUDIO_EXTENSIONS
 from core.config import config
@@ -83,13 +84,14 @@ def serve_media_file(filepath: str) -> ResponseReturnValue:
     Notes:
         - 自动处理路径安全（过滤 `../` 等危险字符）
         - 自动设置 MIME 类型
-        - 支持 HTTP Range 请求（通过 Flask 的 `send_file` 自动处理）
+        - 支持单段 / 多段 Range、If-Range 与 ETag / Last-Modified 条件请求（304）
+        - 已校验路径与打开的文件在短期内复用，拖动进度时的连续 Range 请求不再重复 stat/open；
+          gevent 服务器下用 sendfile 零拷贝下发（见 core.tools.file_serving）
     """
-    result = media_mgr.prepare_serve_file(filepath)
+    result = media_mgr.open_serve_file(filepath)
     if result.get('code') != 0:
         abort(result.get('http_status', 404))
-    data = result['data']
-    return send_file(data['path'], mimetype=data['mimetype'], conditional=True)
+    return serve_file(result['data']['file'], request)
 
 
 @media_bp.route("/media/subtitle/get", methods=['GET'])
@@ -546,6 +548,35 @@ def list_all_tasks() -> ResponseReturnValue:
         return _err(f"列出任务失败: {str(e)}")
 
 
+@media_bp.route("/media/merge/stop", methods=['POST'])
+def stop_task() -> ResponseReturnValue:
+    """停止正在进行的音频合成任务。
+
+    合成线程检测到停止请求后终止 ffmpeg、清理临时文件，任务状态变为 failed（"任务已被停止"）。
+
+    JSON / Form Body:
+        task_id (str): 要停止的任务 ID。
+
+    Returns:
+        ResponseReturnValue: 成功时返回 `{"code": 0, "msg": str}`；失败时返回错误信息。
+    """
+    try:
+        data = read_json_from_request() or request.form.to_dict()
+        body, err = parse_with_model(_TaskIdBody, data, err_factory=_err)
+        if err or not body:
+            return err or _err("Invalid request body")
+
+        code, msg = audio_merge_mgr.stop_task(body.task_id)
+        if code != 0:
+            return _err(msg)
+
+        return _ok({"message": msg})
+
+    except Exception as e:
+        log.error(f"[AudioMerge] 停止任务失败: {e}")
+        return _err(f"停止任务失败: {str(e)}")
+
+
 @media_bp.route("/media/merge/delete", methods=['POST'])
 def delete_task() -> ResponseReturnValue:
     """删除音频合成任务及其关联文件。
@@ -2,15 +2,21 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
 from flask import Blueprint, request
 from flask.typing import ResponseReturnValue
 
 from core.config import app_logger
-from core.device.mi_device import MiDevice, scan_devices_sync
+from core.tools.lazy import lazy_import
 from core.utils import _err, _ok, read_json_from_request, get_json_body
 
+if TYPE_CHECKING:
+    import core.device.mi_device as mi_device
+else:
+    # miservice/aiohttp 导入较重，首次调用小米接口时再加载
+    mi_device = lazy_import('core.device.mi_device')
+
 log = app_logger
 mi_bp = Blueprint('mi', __name__)
 
@@ -21,7 +27,7 @@ def mi_scan() -> ResponseReturnValue:
     try:
         timeout = request.args.get('timeout', 5.0, type=float)
         log.info(f"=> [MI Scan] timeout={timeout}")
-        devices = scan_devices_sync(timeout)
+        devices = mi_device.scan_devices_sync(timeout)
         return _ok(devices)
     except Exception as e:
         log.error(f"[MI] Scan error: {e}")
@@ -38,7 +44,7 @@ def mi_volume() -> ResponseReturnValue:
         if not device_id or not device_did:
             return _err('device_id or device_did is required')
 
-        device = MiDevice(address=device_id, did=device_did)
+        device = mi_device.MiDevice(address=device_id, did=device_did)
 
         if request.method == 'GET':
             code, volume = device.get_volume()
@@ -78,7 +84,7 @@ def mi_status() -> ResponseReturnValue:
         if not device_id or not device_did:
             return _err('device_id or device_did is required')
 
-        device = MiDevice(address=device_id, did=device_did)
+        device = mi_device.MiDevice(address=device_id, did=device_did)
         code, status = device.get_status()
         if code == 0:
             return _ok(status)
@@ -99,7 +105,7 @@ def mi_stop() -> ResponseReturnValue:
         if not device_id or not device_did:
             return _err('device_id or device_did is required')
 
-        device = MiDevice(address=device_id, did=device_did)
+        device = mi_device.MiDevice(address=device_id, did=device_did)
         code, msg = device.stop()
         if code == 0:
             return _ok({'message': msg or '停止成功'})
@@ -108,3 +114,13 @@ def mi_stop() -> ResponseReturnValue:
     except Exception as e:
         log.error(f"[MI] Stop error: {e}")
         return _err(f'error: {str(e)}')
+
+
+@mi_bp.route("/mi/client/stats", methods=['GET'])
+def mi_client_stats() -> ResponseReturnValue:
+    """常驻 MiClient 的命令耗时与 token 续期统计。"""
+    try:
+        return _ok(mi_device.get_mi_client_stats())
+    except Exception as e:
+        log.error(f"[MI] Client stats error: {e}")
+        return _err(f'error: {str(e)}')
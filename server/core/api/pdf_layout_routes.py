@@ -36,6 +36,16 @@ class _PdfLayoutUpdateBody(BaseModel):
     is_saddle_stitch: Optional[bool] = None
 
 
+class _PdfLayoutGenerateBody(BaseModel):
+    task_id: str
+    background: bool = False
+
+
+class _PdfLayoutPreviewBody(BaseModel):
+    task_id: str
+    spreads: int = 4
+
+
 @limiter.limit("10 per minute; 50 per hour")
 @pdf_layout_bp.route("/pdf_layout/upload", methods=['POST'])
 def pdf_layout_upload() -> ResponseReturnValue:
@@ -185,15 +195,18 @@ def pdf_layout_save() -> ResponseReturnValue:
 
 @pdf_layout_bp.route("/pdf_layout/generate", methods=['POST'])
 def pdf_layout_generate() -> ResponseReturnValue:
-    """生成骑缝排版 PDF（使用已保存的填充配置）。"""
+    """生成骑缝排版 PDF（使用已保存的填充配置）。
+
+    background=true 时提交后台任务立即返回，通过 /pdf_layout/task 查看 progress。
+    """
     try:
         data: Dict[str, Any] = read_json_from_request()
         body, err = parse_with_model(
-            _PdfLayoutProcessBody, data, err_factory=_err)
+            _PdfLayoutGenerateBody, data, err_factory=_err)
         if err or not body:
             return err or _err("Invalid request body")
 
-        code, msg = pdf_layout_mgr.generate_layout(body.task_id)
+        code, msg = pdf_layout_mgr.generate_layout(body.task_id, background=body.background)
         if code != 0:
             return _err(msg)
 
@@ -203,3 +216,24 @@ def pdf_layout_generate() -> ResponseReturnValue:
     except Exception as e:
         log.error(f"[PDF 排版] 生成骑缝 PDF 失败: {e}")
         return _err(f"生成骑缝 PDF 失败: {str(e)}")
+
+
+@pdf_layout_bp.route("/pdf_layout/preview", methods=['POST'])
+def pdf_layout_preview() -> ResponseReturnValue:
+    """生成前 N 个对开页的骑缝预览 PDF，返回可通过 /pdf_layout/download 下载的文件名。"""
+    try:
+        data: Dict[str, Any] = read_json_from_request()
+        body, err = parse_with_model(
+            _PdfLayoutPreviewBody, data, err_factory=_err)
+        if err or not body:
+            return err or _err("Invalid request body")
+
+        code, msg, filename = pdf_layout_mgr.generate_preview(body.task_id, body.spreads)
+        if code != 0:
+            return _err(msg)
+
+        return _ok({"filename": filename, "spreads": body.spreads})
+
+    except Exception as e:
+        log.error(f"[PDF 排版] 生成预览失败: {e}")
+        return _err(f"生成预览失败: {str(e)}")
@@ -201,6 +201,27 @@ def playlist_stop() -> ResponseReturnValue:
         return _err(f'error: {str(e)}')
 
 
+@playlist_bp.route("/playlist/reportStatus", methods=['POST'])
+def playlist_report_status() -> ResponseReturnValue:
+    """设备 / Agent 主动上报播放状态（state、position、duration），立即校准播放时钟与切歌定时器。"""
+    try:
+        args: Dict[str, Any] = read_json_from_request()
+        pid, err = _require_playlist_id(args)
+        if err:
+            return err
+        if not args.get("state"):
+            return _err("state is required")
+
+        status = {k: args[k] for k in ("state", "position", "duration") if args.get(k) is not None}
+        ret, msg = playlist_mgr.report_playback_status(str(pid), status)
+        if ret != 0:
+            return _err(msg)
+        return _ok()
+    except Exception as e:
+        log.error(f"[PLAYLIST] ReportStatus error: {e}")
+        return _err(f'error: {str(e)}')
+
+
 @playlist_bp.route("/playlist/reload", methods=['POST'])
 def playlist_reload() -> ResponseReturnValue:
     """重新从 RDS 中加载 playlist 数据。"""
@@ -6,16 +6,29 @@ from typing import Any, Dict, Optional
 
 import core.db.rds_mgr as rds_mgr
 from core.ai.ai_local import AILocal
-from core.config import app_logger
+from core.config import app_logger, config
+from core.config.log_archive import list_archives
 from core.db.db_mgr import db_mgr
+from core.services.auth_cache import user_cache
 from core.services.file_mgr import file_mgr
+from core.tools.cache import cache_registry
+from core.tools.log_reader import LogReader
+from core.tools.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from core.tools.metrics import registry as metrics_registry
 from core.utils import read_json_from_request
-from flask import Blueprint, json, jsonify, render_template, request
+from flask import Blueprint, Response, json, jsonify, render_template, request
 from flask.typing import ResponseReturnValue
 
 log = app_logger
 api_bp = Blueprint('api', __name__)
 
+# /log 页面默认展示的最新记录条数
+LOG_PAGE_SIZE = 1000
+# /log/query 单页最大记录条数
+LOG_QUERY_MAX_LIMIT = 5000
+
+app_log_reader = LogReader(f"{config.LOG_DIR}/app.log")
+
 
 def _parse_int(value: Any, name: str) -> tuple[Optional[int], Optional[ResponseReturnValue]]:
     """把输入解析为 int。失败时返回错误响应。"""
@@ -45,13 +58,60 @@ def natapp() -> ResponseReturnValue:
 
 @api_bp.route("/log")
 def server_log() -> ResponseReturnValue:
-    with open("logs/app.log", "r") as f:
-        lines = f.readlines()
-        lines.reverse()
-        log_content = ''.join(lines)
+    """倒序展示最新的日志记录（支持 limit/keyword/level/since/until 过滤）。"""
+    limit = min(request.args.get('limit', LOG_PAGE_SIZE, type=int) or LOG_PAGE_SIZE, LOG_QUERY_MAX_LIMIT)
+    page = app_log_reader.query(limit=limit,
+                                keyword=request.args.get('keyword') or None,
+                                level=request.args.get('level') or None,
+                                since=request.args.get('since') or None,
+                                until=request.args.get('until') or None)
+    log_content = '\n'.join(page["lines"])
     return render_template('server_log.html', log_content=log_content)
 
 
+@api_bp.route("/log/query", methods=['GET'])
+def server_log_query() -> ResponseReturnValue:
+    """分页查询日志记录（从新到旧），跨轮转文件。
+
+    Query:
+        limit: 单页条数，默认 200
+        keyword: 子串过滤
+        level: 级别过滤，逗号分隔（如 ERROR,WARNING）
+        since / until: 时间范围（含），格式 YYYY-MM-DD HH:MM:SS，可只给前缀
+        file / offset: 上一页返回的 next 游标
+    """
+    try:
+        limit = min(max(request.args.get('limit', 200, type=int) or 200, 1), LOG_QUERY_MAX_LIMIT)
+        cursor = None
+        if request.args.get('file'):
+            offset, err = _parse_int(request.args.get('offset'), 'offset')
+            if err:
+                return err
+            cursor = {"file": request.args.get('file'), "offset": offset}
+            if cursor["file"] not in app_log_reader.files():
+                return {"code": -1, "msg": "file not found"}
+        page = app_log_reader.query(limit=limit,
+                                    cursor=cursor,
+                                    keyword=request.args.get('keyword') or None,
+                                    level=request.args.get('level') or None,
+                                    since=request.args.get('since') or None,
+                                    until=request.args.get('until') or None)
+        return {"code": 0, "msg": "ok", "data": page}
+    except Exception as e:
+        log.error(e)
+        return {"code": -1, "msg": 'error' + str(e)}
+
+
+@api_bp.route("/log/archives", methods=['GET'])
+def server_log_archives() -> ResponseReturnValue:
+    """日志归档目录：每个轮转文件的时间范围、压缩后大小与原文大小（从新到旧）。"""
+    try:
+        return {"code": 0, "msg": "ok", "data": list_archives(app_log_reader.path)}
+    except Exception as e:
+        log.error(e)
+        return {"code": -1, "msg": 'error' + str(e)}
+
+
 @api_bp.route("/write_log", methods=['POST'])
 def write_log() -> ResponseReturnValue:
     try:
@@ -62,6 +122,51 @@ def write_log() -> ResponseReturnValue:
     return {}
 
 
+def _client_ip() -> str:
+    """
+    取用于 /metrics 白名单判断的客户端地址。
+    仅当直连对端是可信代理时才看转发头：优先 nginx 设置的 X-Real-IP，其次 X-Forwarded-For 的最后一跳
+    （$proxy_add_x_forwarded_for 会把真实对端追加在末尾，前面的内容可由客户端伪造）；否则取 REMOTE_ADDR。
+    """
+    remote = request.remote_addr or ''
+    trusted = {ip.strip() for ip in config.METRICS_TRUSTED_PROXIES.split(',') if ip.strip()}
+    if remote not in trusted:
+        return remote
+    real_ip = request.headers.get('X-Real-IP', '').strip()
+    if real_ip:
+        return real_ip
+    forwarded = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+    if forwarded:
+        return forwarded[-1]
+    return remote
+
+
+@api_bp.route("/metrics", methods=['GET'])
+def metrics() -> ResponseReturnValue:
+    """Prometheus 文本格式的进程内指标（仅允许 METRICS_ALLOWED_IPS 中的地址访问）。"""
+    allowed = {ip.strip() for ip in config.METRICS_ALLOWED_IPS.split(',') if ip.strip()}
+    if _client_ip() not in allowed:
+        return Response('forbidden\n', status=403, content_type='text/plain; charset=utf-8')
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+@api_bp.route("/cache/stats", methods=['GET'])
+def cache_stats() -> ResponseReturnValue:
+    """进程内缓存各命名空间的配置、条数与命中 / 加载统计。"""
+    return {"code": 0, "msg": "ok", "data": cache_registry.stats()}
+
+
+@api_bp.route("/cache/invalidate", methods=['POST'])
+def cache_invalidate() -> ResponseReturnValue:
+    """失效指定命名空间（body: namespace，可选 key；不传 key 时清空整个命名空间）。"""
+    args: Dict[str, Any] = read_json_from_request() or {}
+    name = args.get('namespace')
+    if not name or cache_registry.get(name) is None:
+        return {"code": -1, "msg": "namespace not found"}
+    removed = cache_registry.invalidate(name, args['key']) if 'key' in args else cache_registry.invalidate(name)
+    return {"code": 0, "msg": "ok", "data": removed}
+
+
 # =========== SAVE ==========
 @api_bp.route("/getSave", methods=['GET'])
 def get_save() -> ResponseReturnValue:
@@ -151,7 +256,10 @@ def set_data() -> ResponseReturnValue:
     if table is None or data is None:
         return {"code": -1, "msg": "table or data is required"}
     log.info(f"=> [Set Data] {table}: {data}")
-    return db_mgr.set_data(table, data)
+    result = db_mgr.set_data(table, data)
+    if table == 't_user' and isinstance(data, dict) and data.get('id') is not None:
+        user_cache.invalidate(data['id'])
+    return result
 
 
 @api_bp.route("/user/update", methods=['POST'])
@@ -183,7 +291,10 @@ def update_user() -> ResponseReturnValue:
     if not filtered_data or 'id' not in filtered_data:
         return {"code": -1, "msg": "no valid fields to update"}
 
-    return db_mgr.set_data('t_user', filtered_data)
+    result = db_mgr.set_data('t_user', filtered_data)
+    # 用户名 / 权限可能已变，登录身份缓存按 id 失效
+    user_cache.invalidate(user_id)
+    return result
 
 
 @api_bp.route("/delData", methods=['POST'])
@@ -200,7 +311,10 @@ def del_data() -> ResponseReturnValue:
     if err:
         return err
 
-    return db_mgr.del_data(table, data_id)
+    result = db_mgr.del_data(table, data_id)
+    if table == 't_user':
+        user_cache.invalidate(data_id)
+    return result
 
 
 @api_bp.route("/query", methods=['POST'])
@@ -283,6 +397,8 @@ def set_rds_data() -> ResponseReturnValue:
         rid = data.get('id') if isinstance(data, dict) else None
         value = data.get('value') if isinstance(data, dict) else None
         rds_mgr.set(f"{table}:{rid}", value)
+        # 缓存了该 key 的命名空间（全局 block_time、浏览器配置等）立即失效
+        cache_registry.invalidate_rds_key(f"{table}:{rid}")
         return {"code": 0, "msg": "ok", "data": rid}
     except Exception as e:
         log.error(e)
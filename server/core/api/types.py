@@ -8,6 +8,9 @@ class AgentHeartbeatData(BaseModel):
     actions: list[str] | None = None  # 设备支持的操作列表
     config: dict[str, Any] | None = None  # 设备配置
     keyboard: dict[str, Any] | None = None  # 设备键盘配置
+    full: bool = True  # 是否为全量同步；False 表示增量心跳，仅包含变化的字段
+    seq: int | None = None  # 心跳序号，用于检测丢失的增量
+    rtt_ms: float | None = None  # Agent 测得的上一次心跳往返耗时（毫秒）
 
 
 class AgentConfigBody(BaseModel):
@@ -3,6 +3,7 @@
 该模块负责 WebSocket（Flask-SocketIO）侧的会话管理与事件分发：
 - 为每个 Socket 客户端维护 `ClientContext`（AI/ASR/TTS 管线）；
 - 处理文本与音频消息，转发/聚合结果并推送给前端；
+- AI 流式回复经 `StreamRelay` 合并后推送，慢客户端不拖住上游读取；
 - chat_room 模式下将消息写入 Redis 列表用于房间广播。
 """
 
@@ -11,9 +12,9 @@ import time
 
 import core.db.rds_mgr as rds_mgr
 from core.ai.ai_local import AILocal
+from core.ai.stream_relay import StreamRelay
 from core.chat.asr_client import AsrClient
 from core.config import app_logger
-from core.tts.tts_client import TTSClient
 from flask import json, request
 
 log = app_logger
@@ -27,15 +28,19 @@ class ClientContext:
     """单个 Socket 客户端上下文。
 
     包含：
-    - `AILocal`: 对话流式输出
+    - `AILocal`: 对话流式输出（经 `StreamRelay` 合并、背压后推送）
     - `AsrClient`: 语音识别（音频 -> 文本）
     - `TTSClient`: 语音合成（文本 -> 音频）
     """
 
     def __init__(self, sid, socketio):
+        # dashscope 导入较重，首个会话建立时再加载
+        from core.tts.tts_client import TTSClient
+
         self.sid = sid
         self.pending_audio = False
-        self.ai = AILocal(self.on_ai_msg, self.on_err)
+        self.relay = StreamRelay(self.on_ai_msg, on_cancel=lambda: self.ai.streaming_cancel())
+        self.ai = AILocal(self.relay.on_msg, self.on_err)
         self.asr = AsrClient(self.on_asr_result, self.on_err)  # 语音识别
         self.tts = TTSClient(self.on_tts_msg, self.on_err)  # 语音合成
         self.autoTTS = False
@@ -44,6 +49,18 @@ class ClientContext:
     def close(self):
         self.asr.close()
 
+    def ask_ai(self, text):
+        """发起一次 AI 流式回复。"""
+        self.relay.begin()
+        try:
+            self.ai.stream_msg(text)
+        finally:
+            self.relay.finish()
+
+    def cancel_ai(self):
+        """取消当前 AI 回复：丢弃未推送内容并通知上游停止。"""
+        self.relay.cancel()
+
     def on_asr_result(self, text):
         '''
             处理asr的返回消息，收到消息后转发给ai和客户端
@@ -52,7 +69,7 @@ class ClientContext:
             return
         msg = {"content": text}
         self.socketio.emit('msgAsr', msg, room=self.sid)
-        self.ai.stream_msg(text)
+        self.ask_ai(text)
 
     def on_ai_msg(self, text, id, type=0):
         '''
@@ -112,7 +129,7 @@ class ChatMgr:
 
     def remove_client(self, sid):
         if sid in self.clients:
-            del self.clients[sid]
+            self.clients.pop(sid).relay.cancel('disconnect')
 
     def handle_text(self, sid, data):
         try:
@@ -137,7 +154,7 @@ class ChatMgr:
 
             else:
                 client: ClientContext = self.clients.get(sid)
-                client.ai.stream_msg(content)
+                client.ask_ai(content)
         except Exception as e:
             log.error(f"[CHAT] Error handling text for client {sid}: {e}")
 
@@ -241,7 +258,7 @@ class ChatMgr:
         @self.socketio.on('chatCancel')
         def handle_chat_cancel():
             ctx = self.clients[request.sid]
-            ctx.ai.streaming_cancel()
+            ctx.cancel_ai()
 
         @self.socketio.on('config')
         def handle_chat_config(data):
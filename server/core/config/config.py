@@ -81,6 +81,8 @@ class Config:
     DEFAULT_BASE_DIR: str = os.environ.get('DEFAULT_BASE_DIR', '/opt/my_todo/data')
     ALLOWED_DIR: str = os.environ.get('ALLOWED_DIR', '/mnt')
     LOG_DIR: str = os.environ.get('LOG_DIR', 'logs')
+    # 日志归档：轮转文件后台压缩为 .gz，按归档总大小（MB，每个日志文件分别计算）保留，超出时删除最旧的
+    LOG_ARCHIVE_MAX_MB: int = int(os.environ.get('LOG_ARCHIVE_MAX_MB', 256))
 
     # ========== ASSRT 射手网字幕 ==========
     ASSRT_API_KEY: str = os.environ.get('ASSRT_API_KEY', '')
@@ -119,6 +121,21 @@ class Config:
     # 示例：redis://localhost:6379/1
     RATE_LIMIT_STORAGE_URI: str = os.environ.get('RATE_LIMIT_STORAGE_URI', 'memory://')
 
+    # ========== 监控配置 ==========
+    # /metrics 允许访问的客户端 IP（逗号分隔），默认仅本机
+    METRICS_ALLOWED_IPS: str = os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1')
+    # 可信反向代理地址（逗号分隔）：仅当直连对端在此列表中时才采信 X-Real-IP / X-Forwarded-For
+    METRICS_TRUSTED_PROXIES: str = os.environ.get('METRICS_TRUSTED_PROXIES', '127.0.0.1,::1')
+    # 访问日志：内存环形缓冲 + 后台线程写盘；缓冲满时丢弃最旧的记录（计入 log_buffer_dropped_total）
+    ACCESS_LOG_BUFFER_SIZE: int = int(os.environ.get('ACCESS_LOG_BUFFER_SIZE', 10000))
+    ACCESS_LOG_FLUSH_INTERVAL: float = float(os.environ.get('ACCESS_LOG_FLUSH_INTERVAL', 1.0))
+    # 访问日志采样：路径前缀:N（每 N 条记 1 条），逗号分隔；4xx/5xx 与慢请求始终记录
+    ACCESS_LOG_SAMPLE_RULES: str = os.environ.get('ACCESS_LOG_SAMPLE_RULES',
+                                                  '/api/material/status:10,/api/mi/status:10,/api/metrics:10,/web/:20')
+    ACCESS_LOG_SLOW_MS: float = float(os.environ.get('ACCESS_LOG_SLOW_MS', 1000))
+    # 启动耗时统计：为 1 时 create_app 结束后输出蓝图导入、初始化步骤与管理器创建耗时
+    STARTUP_PROFILE: bool = os.environ.get('STARTUP_PROFILE', '0') == '1'
+
     @classmethod
     def get_cors_origins(cls) -> list:
         """获取 CORS 允许的来源列表"""
@@ -0,0 +1,276 @@
+"""
+日志归档：轮转文件后台压缩、按总大小保留、按时间范围建索引。
+
+- 压缩：轮转出的 ``app.log.YYYY-MM-DD`` 在后台线程压缩为 ``app.log.YYYY-MM-DD.gz``。
+  文件由多个独立的 gzip member 组成，每个约 member_size 字节原文且只在记录边界切分
+  （zcat / gzip -d 照常可解压整个文件）；
+- 索引：同名 ``.idx`` 文件（JSON）记录每个 member 的压缩偏移 / 长度、原文偏移 / 长度与首末时间戳，
+  LogReader 按索引定位 member，只解压需要的部分；
+- 保留：不再按天数删除，归档（压缩文件 + 索引 + 尚未压缩的轮转文件）总大小超过预算时从最旧的开始删除。
+
+本模块被 log_config 导入，只能依赖标准库（core.tools 会反向导入 core.config）。
+
+使用示例：
+```python
+handler = ArchivingTimedRotatingFileHandler("logs/app.log", max_archive_bytes=256 * 1024 * 1024)
+archives = list_archives("logs/app.log")  # [{"file", "first_ts", "last_ts", "size", "raw_size"}, ...]
+```
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from logging.handlers import TimedRotatingFileHandler
+from typing import Any, Dict, List, Optional, Tuple
+
+ARCHIVE_SUFFIX = '.gz'
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+DEFAULT_MEMBER_SIZE = 1024 * 1024  # 每个 gzip member 的原文大小（字节）
+DEFAULT_COMPRESS_LEVEL = 6
+
+# 与 LogReader 一致：以时间戳开头的行开始一条记录
+_TS_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+# TimedRotatingFileHandler(when="midnight") 轮转文件后缀，压缩后追加 .gz
+_ROTATED_SUFFIX_RE = re.compile(r'^(\d{4}-\d{2}-\d{2}(?:_\d{2}(?:-\d{2}){0,2})?)(\.gz)?$')
+
+# member 字段：[压缩偏移, 压缩长度, 原文偏移, 原文长度, 首条时间戳, 末条时间戳]
+Member = List[Any]
+
+log = logging.getLogger('app')
+
+
+def rotated_files(base_path: str) -> List[Tuple[str, str]]:
+    """返回 base_path 的轮转文件 [(日期后缀, 路径)]，按旧到新排序；同一天同时存在原文与压缩文件时只取原文。"""
+    found: Dict[str, str] = {}
+    for path in glob.glob(glob.escape(base_path) + '.*'):
+        match = _ROTATED_SUFFIX_RE.match(path[len(base_path) + 1:])
+        if not match:
+            continue
+        stamp = match.group(1)
+        if match.group(2) and stamp in found:
+            continue
+        found[stamp] = path
+    return sorted(found.items())
+
+
+def is_archive(path: str) -> bool:
+    return path.endswith(ARCHIVE_SUFFIX)
+
+
+def compress_log_file(src: str,
+                      member_size: int = DEFAULT_MEMBER_SIZE,
+                      level: int = DEFAULT_COMPRESS_LEVEL) -> str:
+    """把 src 压缩为多 member 的 ``src.gz`` 并写入 ``src.gz.idx``，完成后删除 src，返回压缩文件路径。"""
+    dst = src + ARCHIVE_SUFFIX
+    members: List[Member] = []
+    raw_offset = 0
+
+    with open(src, 'rb') as fin, open(dst + '.tmp', 'wb') as fout:
+        chunk: List[bytes] = []
+        chunk_len = 0
+        first_ts: Optional[bytes] = None
+        last_ts: Optional[bytes] = None
+
+        def flush() -> None:
+            nonlocal chunk, chunk_len, first_ts, last_ts, raw_offset
+            data = b''.join(chunk)
+            packed = gzip.compress(data, compresslevel=level, mtime=0)
+            members.append([fout.tell(), len(packed), raw_offset, len(data),
+                            first_ts.decode() if first_ts else None,
+                            last_ts.decode() if last_ts else None])
+            fout.write(packed)
+            raw_offset += len(data)
+            chunk, chunk_len, first_ts, last_ts = [], 0, None, None
+
+        for line in fin:
+            match = _TS_RE.match(line)
+            if match:
+                # 只在记录开始处切分，多行记录（Traceback）不会跨 member
+                if chunk_len >= member_size:
+                    flush()
+                first_ts = first_ts or match.group(1)
+                last_ts = match.group(1)
+            chunk.append(line)
+            chunk_len += len(line)
+        if chunk:
+            flush()
+
+    timestamps = [m[4] for m in members if m[4]] + [m[5] for m in members if m[5]]
+    index = {
+        'version': INDEX_VERSION,
+        'raw_size': raw_offset,
+        'first_ts': min(timestamps) if timestamps else None,
+        'last_ts': max(timestamps) if timestamps else None,
+        'members': members,
+    }
+    with open(dst + INDEX_SUFFIX + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    # 先落索引再落压缩文件：压缩文件出现时索引一定可用
+    os.replace(dst + INDEX_SUFFIX + '.tmp', dst + INDEX_SUFFIX)
+    os.replace(dst + '.tmp', dst)
+    os.remove(src)
+    return dst
+
+
+def load_archive_index(path: str) -> Optional[Dict[str, Any]]:
+    """读取压缩文件的 member 索引；索引缺失或损坏时返回 None。"""
+    try:
+        with open(path + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    return index
+
+
+def scan_archive_index(path: str) -> Dict[str, Any]:
+    """没有索引的 .gz（外部压缩的文件）：整体解压一次，作为单个 member 建立内存索引。"""
+    with open(path, 'rb') as f:
+        packed = f.read()
+    data = gzip.decompress(packed)
+    stamps = [m.group(1).decode() for m in (_TS_RE.match(line) for line in data.split(b'\n')) if m]
+    first_ts = stamps[0] if stamps else None
+    last_ts = stamps[-1] if stamps else None
+    return {
+        'version': INDEX_VERSION,
+        'raw_size': len(data),
+        'first_ts': first_ts,
+        'last_ts': last_ts,
+        'members': [[0, len(packed), 0, len(data), first_ts, last_ts]],
+    }
+
+
+def read_member(f, member: Member) -> bytes:
+    """解压单个 member，返回原文。"""
+    f.seek(member[0])
+    return gzip.decompress(f.read(member[1]))
+
+
+def _archive_size(path: str) -> int:
+    size = 0
+    for p in (path, path + INDEX_SUFFIX):
+        try:
+            size += os.path.getsize(p)
+        except OSError:
+            pass
+    return size
+
+
+def enforce_budget(base_path: str, max_bytes: int) -> List[str]:
+    """归档总大小超过 max_bytes 时从最旧的开始删除，返回删除的文件；不动当前日志文件。"""
+    files = [path for _, path in rotated_files(base_path)]
+    sizes = [_archive_size(path) for path in files]
+    total = sum(sizes)
+    removed: List[str] = []
+    for path, size in zip(files, sizes):
+        if total <= max_bytes:
+            break
+        for p in (path, path + INDEX_SUFFIX):
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+        total -= size
+        removed.append(path)
+    return removed
+
+
+def list_archives(base_path: str) -> List[Dict[str, Any]]:
+    """归档目录：每个轮转文件的时间范围与大小，按新到旧排序。"""
+    result = []
+    for _, path in reversed(rotated_files(base_path)):
+        index = load_archive_index(path) if is_archive(path) else None
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        result.append({
+            'file': path,
+            'compressed': is_archive(path),
+            'first_ts': index and index['first_ts'],
+            'last_ts': index and index['last_ts'],
+            'size': size,
+            'raw_size': index['raw_size'] if index else (None if is_archive(path) else size),
+        })
+    return result
+
+
+class LogArchiver:
+    """后台归档线程：依次处理提交的日志文件，压缩未压缩的轮转文件并执行大小预算。"""
+
+    def __init__(self, member_size: int = DEFAULT_MEMBER_SIZE, level: int = DEFAULT_COMPRESS_LEVEL) -> None:
+        self.member_size = member_size
+        self.level = level
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, base_path: str, max_bytes: int) -> None:
+        """提交归档任务（不阻塞调用方，轮转发生在写日志的线程中）。"""
+        self._queue.put((base_path, max_bytes))
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='log-archiver', daemon=True)
+                    self._thread.start()
+
+    def join(self) -> None:
+        """等待已提交的任务全部完成。"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            base_path, max_bytes = self._queue.get()
+            try:
+                self.archive(base_path, max_bytes)
+            except Exception as e:
+                log.error(f"[LogArchive] 归档失败 {base_path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def archive(self, base_path: str, max_bytes: int) -> Dict[str, List[str]]:
+        """同步执行一次归档：压缩未压缩的轮转文件，再按预算删除最旧的归档。"""
+        compressed = []
+        for _, path in rotated_files(base_path):
+            if is_archive(path):
+                continue
+            try:
+                compressed.append(compress_log_file(path, self.member_size, self.level))
+            except OSError as e:
+                log.warning(f"[LogArchive] 压缩失败 {path}: {e}")
+        removed = enforce_budget(base_path, max_bytes)
+        if compressed or removed:
+            log.info(f"[LogArchive] {os.path.basename(base_path)}: 压缩 {len(compressed)} 个, 删除 {len(removed)} 个")
+        return {'compressed': compressed, 'removed': removed}
+
+
+class ArchivingTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """按时间轮转，轮转文件交给后台压缩，按归档总大小（而非天数）保留。"""
+
+    def __init__(self,
+                 filename: str,
+                 when: str = 'midnight',
+                 max_archive_bytes: int = 256 * 1024 * 1024,
+                 encoding: Optional[str] = 'utf-8',
+                 archiver: Optional[LogArchiver] = None) -> None:
+        # backupCount=0：父类不再按数量删除轮转文件
+        super().__init__(filename, when=when, backupCount=0, encoding=encoding)
+        self.max_archive_bytes = max_archive_bytes
+        self.archiver = archiver or log_archiver
+        # 启动时处理上次遗留的未压缩轮转文件（含升级前按天保留的旧文件）
+        self.archiver.submit(self.baseFilename, self.max_archive_bytes)
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.archiver.submit(self.baseFilename, self.max_archive_bytes)
+
+
+log_archiver = LogArchiver()
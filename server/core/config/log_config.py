@@ -1,12 +1,13 @@
 import logging
 import os
 import sys
-from logging.handlers import TimedRotatingFileHandler
 
 from core.config import config
+from core.config.log_archive import ArchivingTimedRotatingFileHandler
 
 LOG_DIR = config.LOG_DIR
 IS_PRODUCTION = config.IS_PRODUCTION
+LOG_ARCHIVE_MAX_BYTES = config.LOG_ARCHIVE_MAX_MB * 1024 * 1024
 # 仅在 Linux 平台创建日志文件
 if sys.platform == "linux":
     # 确保 logs 目录存在
@@ -50,11 +51,12 @@ def _create_app_logger() -> logging.Logger:
         h.addFilter(handler_filter)
 
     if IS_PRODUCTION:
-        file_handler = TimedRotatingFileHandler(log_file, when="midnight", backupCount=3, encoding="utf-8")
+        file_handler = ArchivingTimedRotatingFileHandler(log_file, when="midnight",
+                                                         max_archive_bytes=LOG_ARCHIVE_MAX_BYTES)
         file_handler.setFormatter(formatter)
         file_handler.addFilter(handler_filter)
         logger.addHandler(file_handler)
-        logger.info(f'Root log: logs/app.log (rotating daily, keeping 3 days)')
+        logger.info(f'Root log: logs/app.log (rotating daily, gzip archives up to {config.LOG_ARCHIVE_MAX_MB}MB)')
     else:
         logger.info('Root log file: disabled (non-production environment)')
     return logger
@@ -83,12 +85,13 @@ def _create_access_logger() -> tuple[logging.Logger, logging.Logger]:
     app_access_logger.setLevel(logging.INFO)
     app_access_logger.propagate = False
 
-    # 仅在生产环境创建访问日志文件，保留10天
+    # 仅在生产环境创建访问日志文件
     if IS_PRODUCTION:
         log_file = f"{LOG_DIR}/access.log"
 
-        # 创建访问日志文件处理器（按天轮转，保留10天）
-        access_handler = TimedRotatingFileHandler(log_file, when="midnight", backupCount=10, encoding="utf-8")
+        # 创建访问日志文件处理器（按天轮转，轮转文件压缩归档，按总大小保留）
+        access_handler = ArchivingTimedRotatingFileHandler(log_file, when="midnight",
+                                                           max_archive_bytes=LOG_ARCHIVE_MAX_BYTES)
 
         # 配置访问日志格式：时间 方法 路径 状态码 响应时间 客户端IP User-Agent
         access_formatter = logging.Formatter('%(asctime)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -1,3 +1,4 @@
+import functools
 import json
 import traceback
 from typing import Any, Dict, List, Optional, Union, cast
@@ -10,6 +11,7 @@ from core.config.const import (DB_CODE_ERROR, DB_CODE_ERROR_RUNTIME, DB_CODE_SUC
 from core.db import db_obj
 from core.models.score_history import ScoreHistory
 from core.models.user import User
+from core.tools.metrics import registry
 from core.utils import fmt_ts
 
 log = app_logger
@@ -17,6 +19,29 @@ log = app_logger
 DB_NAME = "data.db"
 TABLE_SAVE = "t_user_save"
 
+_DB_CALLS = registry.counter("db_calls_total", "DbMgr 调用次数", ("op",))
+_DB_ERRORS = registry.counter("db_errors_total", "DbMgr 调用失败次数（异常或返回 DB_CODE_ERROR）", ("op",))
+
+
+def _tracked(func):
+    """统计 DbMgr 方法的调用与失败次数。"""
+    calls = _DB_CALLS.labels(func.__name__)
+    errors = _DB_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        calls.inc()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        if isinstance(result, dict) and result.get("code") == DB_CODE_ERROR:
+            errors.inc()
+        return result
+
+    return wrapper
+
 
 class DbMgr:
     """数据库管理类，封装通用 CRUD 操作"""
@@ -54,6 +79,7 @@ class DbMgr:
         db_obj.init_app(app)
         self._initialized = True
 
+    @_tracked
     def set_save(self, id: Optional[int], user_name: Optional[str], data: str) -> Dict[str, Any]:
         """
         保存或更新用户数据到 t_user_save 表。
@@ -88,6 +114,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": id}
 
+    @_tracked
     def get_save(self, id: Optional[int]) -> Dict[str, Any]:
         """
         根据 id 从 t_user_save 表获取用户保存的数据。
@@ -117,6 +144,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": data}
 
+    @_tracked
     def get_data_idx(self, table: str, id: int, idx: int = 1) -> Dict[str, Any]:
         """根据 id 从指定表获取单个字段的数据。"""
         try:
@@ -138,6 +166,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": data}
 
+    @_tracked
     def get_data(self, table: str, id: int, fields: Union[str, List[str]]) -> Dict[str, Any]:
         """根据 id 从指定表获取一个或多个字段的数据。"""
         try:
@@ -173,6 +202,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": data}
 
+    @_tracked
     def set_data(self, table: str, data: Dict[str, Any], conditions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         向指定表插入或更新数据。
@@ -256,6 +286,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e), 'cnt': cnt}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": id, "cnt": cnt}
 
+    @_tracked
     def add_score(
         self,
         user_id: int,
@@ -300,6 +331,7 @@ class DbMgr:
             traceback.print_exc()
             return {"code": DB_CODE_ERROR, "msg": f'error: {str(e)}'}
 
+    @_tracked
     def del_data(self, table: str, id: int) -> Dict[str, Any]:
         """从指定表删除一条数据。"""
         try:
@@ -317,6 +349,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": cnt}
 
+    @_tracked
     def query(self, sql: str) -> Dict[str, Any]:
         """执行原生 SQL 查询。"""
         try:
@@ -333,6 +366,7 @@ class DbMgr:
             return {"code": DB_CODE_ERROR, "msg": 'error ' + str(e)}
         return {"code": DB_CODE_SUCCESS, "msg": "ok", "data": data}
 
+    @_tracked
     def get_list(self,
                  table: str,
                  page_num: int = 1,
@@ -12,6 +12,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import os
 import threading
@@ -21,6 +22,7 @@ import redis
 from gevent import Timeout
 
 from core.config import app_logger
+from core.tools.metrics import registry
 
 log = app_logger
 
@@ -289,6 +291,43 @@ def start_restore_timer() -> None:
     )
 
 
+_RDS_CALLS = registry.counter('rds_calls_total', 'rds_mgr 调用次数', ('op', 'backend'))
+_RDS_ERRORS = registry.counter('rds_errors_total', 'rds_mgr 调用异常次数', ('op', 'backend'))
+_RDS_FALLBACK = registry.gauge('rds_local_fallback', '是否处于本地 JSON 回退模式（1=是）')
+
+
+def _backend() -> str:
+    return 'local' if _local_store is not None else 'redis'
+
+
+def _tracked(func):
+    """统计 rds_mgr 操作的调用与异常次数（按当前存储后端区分）。"""
+    op = func.__name__
+    children = {
+        backend: (_RDS_CALLS.labels(op, backend), _RDS_ERRORS.labels(op, backend))
+        for backend in ('local', 'redis')
+    }
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        calls, errors = children[_backend()]
+        calls.inc()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+
+    return wrapper
+
+
+def _collect_metrics() -> None:
+    _RDS_FALLBACK.set(1 if is_local_fallback else 0)
+
+
+registry.add_collector(_collect_metrics)
+
+
 def _safe_redis_operation(operation, timeout: float = 3.0):
     """安全执行 Redis 操作，带超时保护。"""
     try:
@@ -298,6 +337,7 @@ def _safe_redis_operation(operation, timeout: float = 3.0):
         raise redis.TimeoutError(f"Redis operation timeout after {timeout} seconds")
 
 
+@_tracked
 def get_str(key: str) -> str:
     """获取字符串值（bytes -> str），不存在时返回空字符串。"""
     if _local_store is not None:
@@ -309,6 +349,7 @@ def get_str(key: str) -> str:
     return v.decode('utf-8')  # pyright: ignore[reportAttributeAccessIssue]
 
 
+@_tracked
 def get(key: str):
     """获取 Redis 键值（带超时保护）。"""
     if _local_store is not None:
@@ -317,6 +358,7 @@ def get(key: str):
     return _safe_redis_operation(lambda: _rds.get(key), timeout=3.0)
 
 
+@_tracked
 def set(key: str, value) -> bool:
     """设置 Redis 键值（带超时保护）。"""
     if _local_store is not None:
@@ -325,6 +367,7 @@ def set(key: str, value) -> bool:
     return _safe_redis_operation(lambda: _rds.set(key, value), timeout=3.0)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def append_value(key: str, value) -> int:
     """向字符串 key 追加内容。"""
     if _local_store is not None:
@@ -333,6 +376,7 @@ def append_value(key: str, value) -> int:
     return rds.append(key, value)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def exists(key: str) -> int:
     """判断 key 是否存在。"""
     if _local_store is not None:
@@ -341,6 +385,7 @@ def exists(key: str) -> int:
     return rds.exists(key)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def llen(key: str) -> int:
     """获取列表长度。"""
     if _local_store is not None:
@@ -349,6 +394,7 @@ def llen(key: str) -> int:
     return rds.llen(key)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def lrange(key: str, start: int, end: int) -> list[str]:
     """获取列表指定范围的数据（bytes -> str）。"""
     if _local_store is not None:
@@ -358,6 +404,7 @@ def lrange(key: str, start: int, end: int) -> list[str]:
     return [item.decode('utf-8') for item in data]  # pyright: ignore[reportGeneralTypeIssues]
 
 
+@_tracked
 def lpush(key: str, value) -> int:
     """在列表头部插入数据。"""
     if _local_store is not None:
@@ -366,6 +413,7 @@ def lpush(key: str, value) -> int:
     return rds.lpush(key, value)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def rpush(key: str, value) -> int:
     """在列表尾部插入数据。"""
     if _local_store is not None:
@@ -374,6 +422,7 @@ def rpush(key: str, value) -> int:
     return rds.rpush(key, value)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def hset(key: str, field: str, value) -> int:
     """设置 Hash 字段的值（带超时保护）。"""
     if _local_store is not None:
@@ -382,6 +431,7 @@ def hset(key: str, field: str, value) -> int:
     return _safe_redis_operation(lambda: _rds.hset(key, field, value), timeout=3.0)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def hget(key: str, field: str):
     """获取 Hash 字段的值（带超时保护）。"""
     if _local_store is not None:
@@ -390,6 +440,7 @@ def hget(key: str, field: str):
     return _safe_redis_operation(lambda: _rds.hget(key, field), timeout=3.0)
 
 
+@_tracked
 def hgetall(key: str) -> dict:
     """获取 Hash 所有字段和值（带超时保护）。"""
     if _local_store is not None:
@@ -404,6 +455,7 @@ def hgetall(key: str) -> dict:
     }
 
 
+@_tracked
 def hdel(key: str, *fields) -> int:
     """删除 Hash 中的一个或多个字段（带超时保护）。"""
     if _local_store is not None:
@@ -412,6 +464,7 @@ def hdel(key: str, *fields) -> int:
     return _safe_redis_operation(lambda: _rds.hdel(key, *fields), timeout=3.0)  # pyright: ignore[reportReturnType]
 
 
+@_tracked
 def hlen(key: str) -> int:
     """获取 Hash 字段数量（带超时保护）。"""
     if _local_store is not None:
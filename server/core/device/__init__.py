@@ -1,11 +1,25 @@
 """
 设备模块
 提供设备创建和管理功能
+
+各设备类依赖的第三方库（miservice/aiohttp、upnpclient、bleak）较重，
+在首次创建对应类型的设备时才导入。
 """
-from core.device.agent import DeviceAgent
-from core.device.bluetooth import BluetoothDev
-from core.device.dlna import DlnaDev
-from core.device.mi_device import MiDevice
+import importlib
+
+_DEVICE_CLASSES = {
+    "DeviceAgent": "core.device.agent",
+    "BluetoothDev": "core.device.bluetooth",
+    "DlnaDev": "core.device.dlna",
+    "MiDevice": "core.device.mi_device",
+}
+
+
+def __getattr__(name):
+    module = _DEVICE_CLASSES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
 
 
 def create_device(node):
@@ -19,11 +33,15 @@ def create_device(node):
     """
     ret = {"node": node, "obj": None}
     if node["type"] == "agent":
+        from core.device.agent import DeviceAgent
         ret["obj"] = DeviceAgent(address=node["address"], name=node.get("name"))
     elif node["type"] == "bluetooth":
+        from core.device.bluetooth import BluetoothDev
         ret["obj"] = BluetoothDev(node["address"], name=node.get("name"))
     elif node["type"] == "dlna":
+        from core.device.dlna import DlnaDev
         ret["obj"] = DlnaDev(node["address"], name=node.get("name"))
     elif node["type"] == "mi":
+        from core.device.mi_device import MiDevice
         ret["obj"] = MiDevice(address=node.get("address", ""), did=node.get("did"), name=node.get("name"))
     return ret
@@ -6,6 +6,7 @@ import requests
 from typing import Optional, Dict, Any
 from core.config import app_logger
 from core.device.base import DeviceBase
+from core.tools.http_client import PooledHttpClient
 
 log = app_logger
 
@@ -14,6 +15,14 @@ DEVICE_AGENT_BASE_URL = f"http://192.168.50.184:8000"
 
 # 请求超时时间（秒）
 DEVICE_AGENT_TIMEOUT = 30
+# 连接超时时间（秒）：内网 agent 连不上时尽快失败
+DEVICE_AGENT_CONNECT_TIMEOUT = 3
+
+# 所有 DeviceAgent 共享的连接池：每个 agent 最多 4 条 keep-alive 连接
+agent_http_client = PooledHttpClient("device_agent",
+                                     pool_maxsize=4,
+                                     connect_timeout=DEVICE_AGENT_CONNECT_TIMEOUT,
+                                     read_timeout=DEVICE_AGENT_TIMEOUT)
 
 
 class DeviceAgent(DeviceBase):
@@ -55,7 +64,11 @@ class DeviceAgent(DeviceBase):
         try:
             log.debug(f"[DeviceAgent] {method} {url}, params={params}, json={json_data}")
 
-            response = requests.request(method=method, url=url, params=params, json=json_data, timeout=self.timeout)
+            response = agent_http_client.request(method,
+                                                 url,
+                                                 params=params,
+                                                 json=json_data,
+                                                 timeout=(DEVICE_AGENT_CONNECT_TIMEOUT, self.timeout))
 
             # 检查HTTP状态码
             response.raise_for_status()
@@ -1,12 +1,13 @@
 '''
 蓝牙设备类
 '''
-from typing import Dict, Optional, Any, Union
-
-from bleak import BleakClient
+from typing import TYPE_CHECKING, Dict, Optional, Any, Union
 
 from core.device.base import DeviceBase
 
+if TYPE_CHECKING:
+    from bleak import BleakClient
+
 
 class BluetoothDev(DeviceBase):
     """蓝牙设备类"""
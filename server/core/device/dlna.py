@@ -1,19 +1,45 @@
 '''
 dlna设备管理
 '''
+import json
+import threading
+import time
 import traceback
-from typing import Dict, List, Any, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Set, Tuple
 from urllib.parse import urlparse
 
-import upnpclient
+import gevent
+from gevent.pool import Pool
 from ssdpy import SSDPClient
 
 from core.config import app_logger
+from core.db import rds_mgr
 from core.device.base import DeviceBase
+from core.tools.lazy import lazy_import
 from core.utils import convert_to_http_url
 
+if TYPE_CHECKING:
+    import upnpclient
+else:
+    # upnpclient（含 lxml/requests 依赖）在首次拉取设备描述时再加载
+    upnpclient = lazy_import('upnpclient')
+
 log = app_logger
 
+_REGISTRY_RDS_KEY = 'dlna:registry'
+# 设备描述缓存有效期（秒），超过后在下次发现时重新拉取
+_REGISTRY_TTL = 30 * 60
+# scan 接口在该时间（秒）内直接返回内存数据
+_SCAN_MAX_AGE = 30
+# 超过该时间（秒）未再出现的设备从注册表移除（仍可按 location 解析已知设备）
+_EXPIRE_AFTER = 7 * 24 * 3600
+# 后台发现间隔（秒）
+_REFRESH_INTERVAL = 120
+# 设备列表只返回该时间（秒）内出现过的设备（约三次后台发现），离线设备不再展示
+_ONLINE_WINDOW = 3 * _REFRESH_INTERVAL
+# 并行拉取设备描述的并发数
+_FETCH_POOL_SIZE = 8
+
 
 def _device_to_dict(device: Any) -> Dict[str, str]:
     """将 upnpclient.Device 对象转换为字典"""
@@ -41,11 +67,201 @@ def _device_to_dict(device: Any) -> Dict[str, str]:
         }
 
 
-def scan_devices_sync(timeout: float = 5.0) -> List[Dict]:
-    """同步扫描网络中的 DLNA MediaRenderer 设备。
+def _discover_locations(timeout: float) -> Set[str]:
+    """SSDP 搜索 MediaRenderer，返回设备描述文档 URL 集合。"""
+    locations: Set[str] = set()
+
+    # 使用 SSDPClient 搜索设备
+    if SSDPClient:
+        try:
+            client = SSDPClient()
+            mx_value = min(max(int(timeout), 1), 5)  # 限制在 1-5 秒之间
+            responses = client.m_search(st="urn:schemas-upnp-org:device:MediaRenderer:1", mx=mx_value)
+            for resp in responses:
+                location = resp.get("location") or resp.get("LOCATION")
+                if location:
+                    locations.add(location)
+            log.info(f"[DLNA] Found {len(locations)} device locations via ssdpy")
+        except Exception as e:
+            log.warning(f"[DLNA] SSDPClient search failed: {e}")
+
+    # 如果 SSDPClient 没有找到设备，尝试使用 upnpclient.discover
+    if not locations and hasattr(upnpclient, 'discover'):
+        try:
+            devices = upnpclient.discover(timeout=int(timeout))
+            for device in devices:
+                if hasattr(device, 'location'):
+                    locations.add(device.location)
+            log.info(f"[DLNA] Found {len(locations)} device locations via upnpclient.discover")
+        except Exception as e:
+            log.warning(f"[DLNA] upnpclient.discover failed: {e}")
+
+    return locations
+
+
+class DlnaRegistry:
+    """已知 DLNA 渲染器注册表。
+
+    - 后台定时 SSDP 搜索，设备描述（upnpclient.Device）用 gevent 池并行拉取并缓存在内存；
+    - 描述超过 ttl 才重新拉取，查询/播放直接命中内存，不再包含发现耗时；
+    - 设备基本信息持久化到 rds_mgr，重启后先加载再后台预热描述；
+    - 设备列表只含 online_window 内出现过的设备，expire_after 只决定已知设备保留多久。
+    """
+
+    def __init__(self,
+                 ttl: float = _REGISTRY_TTL,
+                 scan_max_age: float = _SCAN_MAX_AGE,
+                 expire_after: float = _EXPIRE_AFTER,
+                 pool_size: int = _FETCH_POOL_SIZE,
+                 online_window: float = _ONLINE_WINDOW) -> None:
+        self.ttl = ttl
+        self.scan_max_age = scan_max_age
+        self.expire_after = expire_after
+        self.online_window = online_window
+        self.pool_size = pool_size
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._devices: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.RLock()
+        self._last_scan = 0.0
+        self._loaded = False
+
+    # ---------- 持久化 ----------
+
+    def load(self) -> None:
+        """从 rds_mgr 加载上次保存的设备列表（只加载一次）。"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+        try:
+            raw = rds_mgr.get_str(_REGISTRY_RDS_KEY)
+            data = json.loads(raw) if raw else {}
+        except Exception as e:
+            log.warning(f"[DLNA] Load registry error: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for location, entry in (data or {}).items():
+                if isinstance(entry, dict) and now - float(entry.get("last_seen", 0)) < self.expire_after:
+                    self._entries.setdefault(location, entry)
+        log.info(f"[DLNA] Registry loaded: {len(self._entries)} devices")
+
+    def _save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._entries, ensure_ascii=False)
+        try:
+            rds_mgr.set(_REGISTRY_RDS_KEY, data)
+        except Exception as e:
+            log.warning(f"[DLNA] Save registry error: {e}")
+
+    # ---------- 描述拉取 ----------
+
+    def _fetch(self, location: str) -> Optional[Any]:
+        try:
+            device = upnpclient.Device(location)
+        except Exception as e:
+            log.warning(f"[DLNA] Error processing {location}: {e}")
+            return None
+        now = time.time()
+        info = _device_to_dict(device)
+        with self._lock:
+            self._devices[location] = (device, now)
+            self._entries[location] = {**info, "last_seen": now}
+        return device
+
+    def _is_fresh(self, location: str, now: float) -> bool:
+        cached = self._devices.get(location)
+        return cached is not None and now - cached[1] < self.ttl
+
+    def _fetch_all(self, locations: List[str]) -> None:
+        """并行拉取设备描述。"""
+        if not locations:
+            return
+        pool = Pool(min(self.pool_size, len(locations)))
+        pool.map(self._fetch, locations)
+
+    # ---------- 对外接口 ----------
+
+    def refresh(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """执行一次 SSDP 搜索，拉取新出现或已过期设备的描述，返回当前设备列表。"""
+        self.load()
+        log.info(f"[DLNA] Starting scan (timeout: {timeout}s)")
+        locations = _discover_locations(timeout)
+        now = time.time()
+        with self._lock:
+            stale = [loc for loc in locations if not self._is_fresh(loc, now)]
+            for loc in locations:
+                if loc in self._entries:
+                    self._entries[loc]["last_seen"] = now
+        self._fetch_all(stale)
+        with self._lock:
+            for loc in [loc for loc, e in self._entries.items() if now - float(e.get("last_seen", 0)) >= self.expire_after]:
+                self._entries.pop(loc, None)
+                self._devices.pop(loc, None)
+            self._last_scan = time.time()
+        self._save()
+        devices = self.list_cached()
+        log.info(f"[DLNA] Found {len(devices)} devices ({len(stale)} descriptions fetched)")
+        return devices
+
+    def list_cached(self) -> List[Dict[str, Any]]:
+        """返回 online_window 内出现过的设备（最近出现的在前）。"""
+        now = time.time()
+        with self._lock:
+            online = [e for e in self._entries.values() if now - float(e.get("last_seen", 0)) < self.online_window]
+            entries = sorted(online, key=lambda e: -float(e.get("last_seen", 0)))
+            return [{k: v for k, v in e.items() if k != "last_seen"} for e in entries]
+
+    def list_devices(self, timeout: float = 5.0, force: bool = False) -> List[Dict[str, Any]]:
+        """列出设备：最近扫描过（scan_max_age 内）直接返回内存数据，否则扫描一次。"""
+        if force or time.time() - self._last_scan >= self.scan_max_age:
+            return self.refresh(timeout)
+        return self.list_cached()
+
+    def get_device(self, location: str) -> Optional[Any]:
+        """获取 location 对应的 upnpclient.Device；命中缓存时不发起网络请求。"""
+        with self._lock:
+            cached = self._devices.get(location)
+        if cached is not None:
+            return cached[0]
+        return self._fetch(location)
+
+    def invalidate(self, location: str) -> None:
+        """丢弃缓存的设备描述（设备重启/地址变化后），下次使用时重新拉取。"""
+        with self._lock:
+            self._devices.pop(location, None)
+
+    def warm_up(self) -> None:
+        """加载持久化的设备列表并并行预热设备描述。"""
+        self.load()
+        with self._lock:
+            locations = [loc for loc in self._entries if loc not in self._devices]
+        self._fetch_all(locations)
+
+    def start(self, interval: int = _REFRESH_INTERVAL) -> None:
+        """启动后台发现：立即预热，之后每 interval 秒刷新一次。"""
+        from core.services.scheduler_mgr import scheduler_mgr
+
+        def _job() -> None:
+            try:
+                self.refresh()
+            except Exception as e:
+                log.error(f"[DLNA] Background refresh error: {e}")
+
+        gevent.spawn(self.warm_up)
+        scheduler_mgr.add_interval_job(_job, 'dlna_registry_refresh', seconds=interval)
+        log.info(f"[DLNA] Background discovery started, interval={interval}s")
+
+
+dlna_registry = DlnaRegistry()
+
+
+def scan_devices_sync(timeout: float = 5.0, force: bool = False) -> List[Dict]:
+    """同步列出网络中的 DLNA MediaRenderer 设备（由 dlna_registry 提供缓存）。
 
     Args:
         timeout (float): 扫描超时时间（秒）。
+        force (bool): 忽略缓存，立即重新扫描。
 
     Returns:
         List[Dict]: 发现的设备列表，每项包含设备信息字典。
@@ -55,47 +271,7 @@ def scan_devices_sync(timeout: float = 5.0) -> List[Dict]:
         return []
 
     try:
-        log.info(f"[DLNA] Starting scan (timeout: {timeout}s)")
-        device_list = []
-        locations = set()
-
-        # 使用 SSDPClient 搜索设备
-        if SSDPClient:
-            try:
-                client = SSDPClient()
-                mx_value = min(max(int(timeout), 1), 5)  # 限制在 1-5 秒之间
-                responses = client.m_search(st="urn:schemas-upnp-org:device:MediaRenderer:1", mx=mx_value)
-                for resp in responses:
-                    location = resp.get("location") or resp.get("LOCATION")
-                    if location:
-                        locations.add(location)
-                log.info(f"[DLNA] Found {len(locations)} device locations via ssdpy")
-            except Exception as e:
-                log.warning(f"[DLNA] SSDPClient search failed: {e}")
-
-        # 如果 SSDPClient 没有找到设备，尝试使用 upnpclient.discover
-        if not locations and hasattr(upnpclient, 'discover'):
-            try:
-                devices = upnpclient.discover(timeout=int(timeout))
-                for device in devices:
-                    if hasattr(device, 'location'):
-                        locations.add(device.location)
-                log.info(f"[DLNA] Found {len(locations)} device locations via upnpclient.discover")
-            except Exception as e:
-                log.warning(f"[DLNA] upnpclient.discover failed: {e}")
-
-        # 处理发现的设备
-        for location in locations:
-            try:
-                device = upnpclient.Device(location)
-                device_dict = _device_to_dict(device)
-                device_list.append(device_dict)
-                log.info(f"发现设备: {device_dict['name']} (地址: {device_dict['address']})")
-            except Exception as e:
-                log.warning(f"[DLNA] Error processing {location}: {e}")
-
-        log.info(f"[DLNA] Found {len(device_list)} devices")
-        return device_list
+        return dlna_registry.list_devices(timeout, force=force)
     except Exception as e:
         log.error(f"[DLNA] Scan error: {e}")
         log.error(traceback.format_exc())
@@ -119,7 +295,7 @@ class DlnaDev(DeviceBase):
         self._rendering_control = None
 
     def _get_device(self) -> Optional[Any]:
-        """获取 upnpclient.Device 对象"""
+        """获取 upnpclient.Device 对象（优先使用 dlna_registry 中缓存的描述）"""
         if self._device is None:
             try:
                 if not self.location or not (self.location.startswith('http://')
@@ -127,13 +303,23 @@ class DlnaDev(DeviceBase):
                     log.error(f"[DlnaDev] Invalid location URL: {self.location}")
                     return None
 
-                self._device = upnpclient.Device(self.location)
+                self._device = dlna_registry.get_device(self.location)
+                if self._device is None:
+                    log.error(f"[DlnaDev] Failed to connect to device {self.location}")
+                    return None
                 log.info(f"[DlnaDev] Connected to device: {self._device.friendly_name} at {self.location}")
             except Exception as e:
                 log.error(f"[DlnaDev] Failed to connect to device {self.location}: {e}")
                 return None
         return self._device
 
+    def _reset_device(self) -> None:
+        """丢弃缓存的设备描述与服务对象，下次调用重新拉取。"""
+        dlna_registry.invalidate(self.location)
+        self._device = None
+        self._av_transport = None
+        self._rendering_control = None
+
     def _get_av_transport(self) -> Optional[Any]:
         """获取 AVTransport 服务"""
         device = self._get_device()
@@ -231,6 +417,8 @@ class DlnaDev(DeviceBase):
             log.info(f"[DlnaDev] Set media URI: {media_url} (original: {url})")
         except Exception as e:
             log.error(f"[DlnaDev] Failed to set URI: {e}")
+            # 缓存的描述可能已失效（设备重启/控制地址变化），下次播放重新拉取
+            self._reset_device()
             return -1, f"Failed to set URI: {str(e)}"
 
         try:
@@ -10,11 +10,14 @@ patch_fake_useragent()
 import asyncio
 import json
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 from miservice import MiAccount, MiNAService
+from miservice.miaccount import get_random
 from miservice.miiocommand import miio_command, MiIOService
 
 # Monkey-patch: 修复 aiohttp follow 302 后 cookie 丢失导致登录失败的问题
@@ -73,11 +76,13 @@ async def _patched_mi_request(self, sid, url, data, headers, relogin=True):
 MiAccount.mi_request = _patched_mi_request
 
 from core.config import app_logger, config
-from core.tools.async_util import run_async
+from core.tools.async_util import AsyncLoopThread
 from core.utils import convert_to_http_url, format_time_str
 
 log = app_logger
 
+_T = TypeVar("_T")
+
 # 从环境变量读取小米账号信息，如果没有则使用默认值
 DEFAULT_MI_USERNAME = config.MI_USER
 DEFAULT_MI_PASSWORD = config.MI_PASS
@@ -86,6 +91,17 @@ DEFAULT_MI_PASSWORD = config.MI_PASS
 TOKEN_FILE = os.path.join(str(Path.home()), ".mi.token")
 
 print(f'Token file {TOKEN_FILE}')
+
+# serviceToken 主动刷新间隔（秒），提前于过期用 passToken 轻量续期
+_TOKEN_REFRESH_INTERVAL = 12 * 3600
+# 刷新检查周期（秒）
+_TOKEN_CHECK_INTERVAL = 600
+# 需要维护的登录 sid：MiNA（播放/音量）与 MiIO（属性读取）
+_TOKEN_SIDS = ("micoapi", "xiaomiio")
+# 每个账号的连接池上限
+_POOL_LIMIT = 8
+
+
 def _device_to_dict(device: Dict[str, Any]) -> Dict[str, str]:
     """将 Device 对象转换为字典"""
     try:
@@ -102,21 +118,231 @@ def _device_to_dict(device: Dict[str, Any]) -> Dict[str, str]:
         return {}
 
 
-async def _get_device_did_async(username: str, password: str, device_id: str) -> Tuple[int, str]:
-    session = None
+def _is_login_error(e: Exception) -> bool:
+    error_str = str(e)
+    return "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str
+
+
+class _MiNAService(MiNAService):
+    """支持自定义服务地址的 MiNAService（用于测试/代理）。"""
+
+    def __init__(self, account: MiAccount, base_url: str = "https://api2.mina.mi.com"):
+        super().__init__(account)
+        self.base_url = base_url.rstrip("/")
+
+    async def mina_request(self, uri, data=None):
+        request_id = "app_ios_" + get_random(30)
+        if data is not None:
+            data["requestId"] = request_id
+        else:
+            uri += "&requestId=" + request_id
+        headers = {
+            "User-Agent": "MiHome/6.0.103 (com.xiaomi.mihome; build:6.0.103.1; iOS 14.4.0) Alamofire/6.0.103 MICO/iOSApp/appStore/6.0.103"
+        }
+        return await self.account.mi_request("micoapi", self.base_url + uri, data, headers)
+
+
+class MiClient:
+    """单个小米账号的常驻客户端。
+
+    - 独立常驻事件循环线程，aiohttp session（连接池 keep-alive）与 MiAccount 登录态跨调用复用；
+    - token 缓存在 TOKEN_FILE，后台定期用 passToken 主动续期 serviceToken；
+    - 按操作记录命令耗时/错误数，见 get_stats。
+    """
+
+    def __init__(self,
+                 username: str,
+                 password: str,
+                 token_file: str = TOKEN_FILE,
+                 mina_base_url: Optional[str] = None,
+                 miio_base_url: Optional[str] = None,
+                 refresh_interval: float = _TOKEN_REFRESH_INTERVAL) -> None:
+        self.username = username
+        self.password = password
+        self.token_file = token_file
+        self.mina_base_url = mina_base_url
+        self.miio_base_url = miio_base_url
+        self.refresh_interval = refresh_interval
+
+        self._runner = AsyncLoopThread(f"mi-client-{username[:3]}")
+        self._session: Optional[ClientSession] = None
+        self._account: Optional[MiAccount] = None
+        self._mina: Optional[MiNAService] = None
+        self._miio: Optional[MiIOService] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refreshed_at: Dict[str, float] = {}
+        self._seen_tokens: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._token_refreshes = 0
+
+    async def _ensure_services(self) -> Tuple[MiNAService, MiIOService]:
+        """在常驻 loop 内懒加载 session / 账号 / 服务对象。"""
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(connector=TCPConnector(limit=_POOL_LIMIT, keepalive_timeout=60))
+            self._account = MiAccount(self._session, self.username, self.password, self.token_file)
+            self._mina = _MiNAService(self._account, self.mina_base_url) if self.mina_base_url else MiNAService(
+                self._account)
+            miio = MiIOService(self._account)
+            if self.miio_base_url:
+                miio.server = self.miio_base_url.rstrip("/")
+            self._miio = miio
+            loaded_at = os.path.getmtime(self.token_file) if os.path.isfile(self.token_file) else time.time()
+            self._refreshed_at = {sid: loaded_at for sid in _TOKEN_SIDS}
+            self._remember_tokens()
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+        assert self._mina is not None and self._miio is not None
+        return self._mina, self._miio
+
+    def _token(self) -> Optional[Dict[str, Any]]:
+        """当前账号的 token 字典（miservice 未登录时 token 不是 dict）。"""
+        token = self._account.token if self._account else None
+        return token if isinstance(token, dict) else None
+
+    def _remember_tokens(self) -> None:
+        """记录当前 serviceToken；被动重登录（401）换了 token 时同样视为已续期。"""
+        token = self._token()
+        if not token:
+            return
+        for sid in _TOKEN_SIDS:
+            if sid in token:
+                value = token[sid][1]
+                if self._seen_tokens.get(sid) not in (None, value):
+                    self._refreshed_at[sid] = time.time()
+                self._seen_tokens[sid] = value
+
+    async def refresh_tokens(self, force: bool = False) -> int:
+        """续期到期（或 force 时全部）的 serviceToken，返回续期成功的 sid 数。"""
+        await self._ensure_services()
+        account = self._account
+        assert account is not None
+        self._remember_tokens()
+        refreshed = 0
+        for sid in _TOKEN_SIDS:
+            token = self._token()
+            if not token or sid not in token:
+                continue
+            if not force and time.time() - self._refreshed_at.get(sid, 0) < self.refresh_interval:
+                continue
+            backup = dict(token)
+            if await account.login(sid):
+                self._refreshed_at[sid] = time.time()
+                self._token_refreshes += 1
+                refreshed += 1
+                log.info(f"[MiClient] Token refreshed: {sid}")
+            else:
+                # login 失败会清空 token 文件；旧 token 可能仍有效，恢复后等下次检查
+                account.token = backup
+                if account.token_store:
+                    account.token_store.save_token(backup)
+                log.warning(f"[MiClient] Token refresh failed: {sid}")
+        self._remember_tokens()
+        return refreshed
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(_TOKEN_CHECK_INTERVAL, self.refresh_interval))
+            try:
+                await self.refresh_tokens()
+            except Exception as e:
+                log.warning(f"[MiClient] Token refresh error: {e}")
+
+    def call(self, op: str, func: Callable[[MiNAService, MiIOService], Awaitable[_T]], timeout: float = 10.0) -> _T:
+        """在常驻 loop 上执行 func(mina, miio) 并等待结果，记录耗时。"""
+
+        async def _run() -> _T:
+            mina, miio = await self._ensure_services()
+            try:
+                return await func(mina, miio)
+            finally:
+                self._remember_tokens()
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = self._runner.submit(_run(), timeout=timeout)
+            ok = True
+            return result
+        finally:
+            self._record(op, (time.perf_counter() - start) * 1000, ok)
+
+    def _record(self, op: str, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            item = self._stats.setdefault(op, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0})
+            item["count"] += 1
+            if not ok:
+                item["errors"] += 1
+            item["total_ms"] += elapsed_ms
+            item["max_ms"] = max(item["max_ms"], elapsed_ms)
+            item["last_ms"] = elapsed_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命令耗时统计（毫秒）与 token 状态。"""
+        with self._lock:
+            ops = {
+                op: {**item, "avg_ms": item["total_ms"] / item["count"] if item["count"] else 0.0}
+                for op, item in self._stats.items()
+            }
+        now = time.time()
+        return {
+            "username": self.username[:3] + "***",
+            "ops": ops,
+            "token_refreshes": self._token_refreshes,
+            "token_age": {sid: round(now - ts, 1) for sid, ts in self._refreshed_at.items()},
+        }
+
+    def close(self) -> None:
+        """关闭 session 并停止事件循环。"""
+
+        async def _close():
+            if self._refresh_task is not None:
+                self._refresh_task.cancel()
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        if self._runner.is_running():
+            try:
+                self._runner.submit(_close(), timeout=5.0)
+            except Exception as e:
+                log.warning(f"[MiClient] Close error: {e}")
+        self._runner.stop()
+        self._session = None
+
+
+_clients: Dict[str, MiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_mi_client(username: Optional[str] = None, password: Optional[str] = None) -> MiClient:
+    """获取（或创建）账号对应的常驻 MiClient。"""
+    username = username or DEFAULT_MI_USERNAME
+    password = password or DEFAULT_MI_PASSWORD
+    with _clients_lock:
+        client = _clients.get(username)
+        if client is None or client.password != password:
+            if client is not None:
+                client.close()
+            client = MiClient(username, password)
+            _clients[username] = client
+        return client
+
+
+def get_mi_client_stats() -> List[Dict[str, Any]]:
+    """所有常驻 MiClient 的统计信息。"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return [c.get_stats() for c in clients]
+
+
+def _get_device_did(client: MiClient, device_id: str) -> Tuple[int, str]:
     try:
-        session = ClientSession()
-        account = MiAccount(session, username, password, TOKEN_FILE)
-        mina_service = MiNAService(account)
-        device_list = await mina_service.device_list()
-        for device in device_list:
+        device_list = client.call("device_list", lambda mina, _: mina.device_list(), timeout=5.0)
+        for device in device_list or []:
             if device['deviceID'] == device_id:
                 return 0, device['miotDID']
     except Exception as e:
         log.error(f"[MiDevice] Get device did error: {e}")
-    finally:
-        if session:
-            await session.close()
     return -1, "设备未找到"
 
 
@@ -145,12 +371,15 @@ class MiDevice(DeviceBase):
         self.password = password or DEFAULT_MI_PASSWORD
 
     @staticmethod
-    async def scan_devices(username: Optional[str] = None, password: Optional[str] = None) -> List[Dict[str, str]]:
+    def scan_devices(username: Optional[str] = None,
+                     password: Optional[str] = None,
+                     timeout: float = 7.0) -> List[Dict[str, str]]:
         """扫描小米设备
 
         Args:
             username (Optional[str]): 小米账号用户名（可选，使用默认值）
             password (Optional[str]): 小米账号密码（可选，使用默认值）
+            timeout (float): 超时时间（秒）
 
         Returns:
             List[Dict[str, str]]: 设备列表
@@ -171,20 +400,15 @@ class MiDevice(DeviceBase):
         try:
             MiDevice.scanning = True
             log.info(f"[MiDevice] Starting scan with username: {username[:3]}***")
-            async with ClientSession() as session:
-                account = MiAccount(
-                    session,
-                    username,
-                    password,
-                    TOKEN_FILE,
-                )
-                mina_service = MiNAService(account)
-                result = await mina_service.device_list()
-                # log.info(f"[MiDevice] Device list: {result}")
-                device_list = [_device_to_dict(device) for device in result]
-                log.info(f"[MiDevice] Found {len(device_list)} devices")
+            result = get_mi_client(username, password).call("device_list",
+                                                           lambda mina, _: mina.device_list(),
+                                                           timeout=timeout)
+            device_list = [_device_to_dict(device) for device in result or []]
+            log.info(f"[MiDevice] Found {len(device_list)} devices")
             return device_list
-
+        except asyncio.TimeoutError:
+            log.error(f"[MiDevice] Scan timeout after {timeout}s")
+            return []
         except Exception as e:
             # 捕获 gevent LoopExit 异常（可能由 fake_useragent 的线程池操作引起）
             import gevent
@@ -193,8 +417,7 @@ class MiDevice(DeviceBase):
                 return []
 
             # 检查是否是登录失败
-            error_str = str(e)
-            if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
+            if _is_login_error(e):
                 log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确。错误: {e}")
             else:
                 log.error(f"[MiDevice] Scan error: {e}")
@@ -202,8 +425,8 @@ class MiDevice(DeviceBase):
         finally:
             MiDevice.scanning = False
 
-    def _create_account(self, session: ClientSession) -> MiAccount:
-        return MiAccount(session, self.username, self.password, TOKEN_FILE)
+    def _client(self) -> MiClient:
+        return get_mi_client(self.username, self.password)
 
     # ========== 统一设备接口 ==========
     def play(self, url: str) -> Tuple[int, str]:
@@ -215,49 +438,30 @@ class MiDevice(DeviceBase):
         Returns:
             Tuple[int, str]: (code, msg)。code=0 表示成功。
         """
+        media_url = convert_to_http_url(url)
 
-        async def _play_async():
-            session = None
+        async def _play(mina: MiNAService, _miio: MiIOService):
             try:
-                media_url = convert_to_http_url(url)
-                # 获取 MiNAService 对象
-                session = ClientSession()
-                account = self._create_account(session)
-                mina_service = MiNAService(account)
-                await mina_service.play_by_url(self.device_id, media_url)
-                return 0, "ok"
+                await mina.play_by_url(self.device_id, media_url)
             except Exception as e:
-                # 捕获 gevent LoopExit 异常（可能由 fake_useragent 的线程池操作引起）
+                # 捕获 gevent LoopExit 异常（可能由 fake_useragent 的线程池操作引起），重试一次
                 import gevent
-                if isinstance(e, gevent.exceptions.LoopExit):
-                    log.warning(f"[MiDevice] Play: gevent LoopExit (可忽略), 重试播放")
-                    # 重试一次
-                    try:
-                        await mina_service.play_by_url(self.device_id, media_url)
-                        return 0, "ok"
-                    except Exception as e2:
-                        log.error(f"[MiDevice] Play retry error: {e2}")
-                        return -1, f"播放失败: {str(e2)}"
-
-                error_str = str(e)
-                if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
-                    log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
-                    return -1, "登录验证失败，请检查账号密码是否正确"
-
-                log.error(f"[MiDevice] Play error: {e}")
-                return -1, f"播放失败: {str(e)}"
-            finally:
-                if session:
-                    await session.close()
+                if not isinstance(e, gevent.exceptions.LoopExit):
+                    raise
+                log.warning(f"[MiDevice] Play: gevent LoopExit (可忽略), 重试播放")
+                await mina.play_by_url(self.device_id, media_url)
 
         try:
-            return run_async(_play_async(), timeout=20.0)
+            self._client().call("play", _play, timeout=20.0)
+            return 0, "ok"
         except Exception as e:
-            # 捕获 gevent LoopExit 异常
             import gevent
             if isinstance(e, gevent.exceptions.LoopExit):
                 log.warning(f"[MiDevice] Play: gevent LoopExit (可忽略)")
                 return -1, "播放失败: gevent LoopExit"
+            if _is_login_error(e):
+                log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
+                return -1, "登录验证失败，请检查账号密码是否正确"
             log.error(f"[MiDevice] Play error: {e}")
             return -1, f"播放失败: {str(e)}"
 
@@ -268,30 +472,17 @@ class MiDevice(DeviceBase):
             Tuple[int, str]: (code, msg)。code=0 表示成功。
         """
 
-        async def _stop_async():
-            session = None
-            try:
-                # 获取 MiNAService 对象
-                session = ClientSession()
-                account = self._create_account(session)
-                mina_service = MiNAService(account)
-                await mina_service.player_pause(self.device_id)
-                await mina_service.player_stop(self.device_id)
-                return 0, "ok"
-            except Exception as e:
-                error_str = str(e)
-                if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
-                    log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
-                    return -1, "登录验证失败，请检查账号密码是否正确"
-                log.error(f"[MiDevice] Stop error: {e}")
-                return -1, f"停止失败: {str(e)}"
-            finally:
-                if session:
-                    await session.close()
+        async def _stop(mina: MiNAService, _miio: MiIOService):
+            await mina.player_pause(self.device_id)
+            await mina.player_stop(self.device_id)
 
         try:
-            return run_async(_stop_async(), timeout=10.0)
+            self._client().call("stop", _stop, timeout=10.0)
+            return 0, "ok"
         except Exception as e:
+            if _is_login_error(e):
+                log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
+                return -1, "登录验证失败，请检查账号密码是否正确"
             log.error(f"[MiDevice] Stop error: {e}")
             return -1, f"停止失败: {str(e)}"
 
@@ -301,125 +492,45 @@ class MiDevice(DeviceBase):
         Returns:
             Tuple[int, Dict[str, Any]]: (code, status_dict)。code=0 表示成功。
         """
-
-        async def _get_status_async():
-            session = None
-            try:
-                # 获取 MiNAService 对象
-                session = ClientSession()
-                account = self._create_account(session)
-                _service = MiIOService(account)
-                result = await miio_command(_service, self.device_did, '2-1,3-1,3-2')
-                volume = result[0]  # 获取音量，确保始终有音量值
-                state = 'PLAYING' if result[1] == 1 else 'STOPPED'
-                state_code = result[1]
-                return 0, {
-                        "state": state,
-                        "state_code": state_code,
-                        "status": 'OK',
-                        "track": 0,
-                        "duration": "00:00:00",
-                        "position": "00:00:00",
-                        "volume": volume  # 确保音量始终返回
-                    }
-            # try:
-            #     # 获取 MiNAService 对象
-            #     session = ClientSession()
-            #     account = self._create_account(session)
-            #     mina_service = MiNAService(account)
-            #     ret = await mina_service.player_get_status(self.device_id)
-            #     if ret['code'] != 0:
-            #         return -1, {"error": ret['message']}
-            #     log.info(f"[MiDevice] Get status: {ret}")
-            #     info = json.loads(ret['data']['info'])
-            #     state = 'STOPPED' if info.get('status') == 2 else 'PLAYING'
-            #     state_code = info.get('status')
-            #     volume = info.get('volume', 0)  # 获取音量，确保始终有音量值
-
-            #     # 安全访问 play_song_detail，如果不存在或为空则返回基本状态（包含音量）
-            #     play_song_detail = info.get('play_song_detail')
-            #     if not play_song_detail or not isinstance(play_song_detail, dict) or len(play_song_detail) == 0:
-            #         # 如果没有播放详情，返回基本状态（确保包含音量）
-            #         return 0, {
-            #             "state": state,
-            #             "state_code": state_code,
-            #             "status": 'OK',
-            #             "track": 0,
-            #             "duration": "00:00:00",
-            #             "position": "00:00:00",
-            #             "volume": volume  # 确保音量始终返回
-            #         }
-
-            #     duration = format_time_str(play_song_detail['duration'] /
-            #                                1000) if play_song_detail.get('duration') else '00:00:00'
-            #     track_list = info.get('track_list', [])
-            #     audio_id = play_song_detail.get('audio_id')
-            #     position = play_song_detail.get('position', 0)  # 播放位置 单位：毫秒
-
-            #     track = 0
-            #     if audio_id and track_list:
-            #         try:
-            #             track = track_list.index(audio_id) + 1
-            #         except ValueError:
-            #             track = 0
-
-            #     return 0, {
-            #         "state": state,  # PLAYING, STOPPED
-            #         "state_code": state_code,
-            #         "status": 'OK',  # OK, ERROR
-            #         "track": track,  # 当前曲目索引（从1开始）
-            #         "duration": duration,  # 总时长，格式如 "00:03:45"
-            #         "position": format_time_str(position / 1000),  # 已播放时长，格式如 "00:01:30"
-            #         "volume": volume  # 音量
-            #     }
-            except Exception as e:
-                error_str = str(e)
-                if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
-                    log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
-                    return -1, {"error": "登录验证失败，请检查账号密码是否正确"}
-                log.error(f"[MiDevice] Get status error: {e}")
-                return -1, {"error": f"获取播放状态信息失败: {str(e)}"}
-            finally:
-                if session:
-                    await session.close()
-
         try:
-            return run_async(_get_status_async(), timeout=5.0)
+            result = self._client().call("get_status",
+                                         lambda _mina, miio: miio_command(miio, self.device_did, '2-1,3-1,3-2'),
+                                         timeout=5.0)
+            volume = result[0]  # 获取音量，确保始终有音量值
+            state = 'PLAYING' if result[1] == 1 else 'STOPPED'
+            state_code = result[1]
+            return 0, {
+                "state": state,
+                "state_code": state_code,
+                "status": 'OK',
+                "track": 0,
+                "duration": "00:00:00",
+                "position": "00:00:00",
+                "volume": volume  # 确保音量始终返回
+            }
         except Exception as e:
+            if _is_login_error(e):
+                log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
+                return -1, {"error": "登录验证失败，请检查账号密码是否正确"}
             log.error(f"[MiDevice] Get status error: {e}")
             return -1, {"error": f"获取播放状态信息失败: {str(e)}"}
 
     # ========== 设备功能接口 ==========
-    def get_volume(self) -> Tuple[int, int]:
+    def get_volume(self) -> Tuple[int, Any]:
         """获取小米设备的音量。
 
         Returns:
-            Tuple[int, int]: (code, volume)。code=0 表示成功。
+            Tuple[int, Any]: (code, volume)。code=0 表示成功，失败时第二项为 {"error": msg}。
         """
-
-        async def _get_volume_async():
-            session = None
-            try:
-                # 获取 MiNAService 对象
-                session = ClientSession()
-                account = self._create_account(session)
-                _service = MiIOService(account)
-                result = await miio_command(_service, self.device_did, '2-1')
-                return 0, result[0]
-            except Exception as e:
-                error_str = str(e)
-                if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
-                    log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
-                    return -1, {"error": "登录验证失败，请检查账号密码是否正确"}
-                log.error(f"[MiDevice] Get status error: {e}")
-                return -1, {"error": f"获取播放状态信息失败: {str(e)}"}
-            finally:
-                if session:
-                    await session.close()
-
         try:
-            return run_async(_get_volume_async(), timeout=5.0)
+            result = self._client().call("get_volume",
+                                         lambda _mina, miio: miio_command(miio, self.device_did, '2-1'),
+                                         timeout=5.0)
+            return 0, result[0]
         except Exception as e:
+            if _is_login_error(e):
+                log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
+                return -1, {"error": "登录验证失败，请检查账号密码是否正确"}
             log.error(f"[MiDevice] Get volume error: {e}")
             return -1, {"error": f"获取音量失败: {str(e)}"}
 
@@ -432,32 +543,17 @@ class MiDevice(DeviceBase):
         Returns:
             Tuple[int, str]: (code, msg)。code=0 表示成功。
         """
-
-        async def _set_volume_async():
-            session = None
-            try:
-                # 获取 MiNAService 对象
-                session = ClientSession()
-                account = self._create_account(session)
-                mina_service = MiNAService(account)
-                await mina_service.player_set_volume(self.device_id, volume)
-                return 0, "ok"
-            except Exception as e:
-                error_str = str(e)
-                if "Login failed" in error_str or "登录验证失败" in error_str or "70016" in error_str:
-                    log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
-                    return -1, "登录验证失败，请检查账号密码是否正确"
-                log.error(f"[MiDevice] Set volume error: {e}")
-                return -1, f"设置音量失败: {str(e)}"
-            finally:
-                if session:
-                    await session.close()
-
         try:
-            return run_async(_set_volume_async(), timeout=5.0)
+            self._client().call("set_volume",
+                                lambda mina, _miio: mina.player_set_volume(self.device_id, volume),
+                                timeout=5.0)
+            return 0, "ok"
         except Exception as e:
+            if _is_login_error(e):
+                log.error(f"[MiDevice] 登录验证失败，请检查账号密码是否正确: {e}")
+                return -1, "登录验证失败，请检查账号密码是否正确"
             log.error(f"[MiDevice] Set volume error: {e}")
-            return -1, -1
+            return -1, f"设置音量失败: {str(e)}"
 
     def get_device_did(self) -> Tuple[int, str]:
         """获取小米设备的设备ID。
@@ -465,16 +561,12 @@ class MiDevice(DeviceBase):
         Returns:
             Tuple[int, str]: (code, did)。code=0 表示成功。
         """
-        try:
-            if self.device_did is None:
-                code, self.device_did = run_async(_get_device_did_async(self.username, self.password, self.device_id),
-                                                  timeout=5.0)
-                if code != 0:
-                    return code, "设备未找到"
-            return 0, self.device_did
-        except Exception as e:
-            log.error(f"[MiDevice] Get device did error: {e}")
-            return -1, "设备未找到"
+        if self.device_did is None:
+            code, did = _get_device_did(self._client(), self.device_id)
+            if code != 0:
+                return code, "设备未找到"
+            self.device_did = did
+        return 0, self.device_did
 
 
 # 同步包装函数（用于在Flask路由中使用）
@@ -485,10 +577,7 @@ def scan_devices_sync(timeout: float = 5.0) -> List[Dict[str, str]]:
     try:
         username = os.getenv("MI_USER", DEFAULT_MI_USERNAME)
         password = os.getenv("MI_PASS", DEFAULT_MI_PASSWORD)
-        return run_async(MiDevice.scan_devices(username, password), timeout=timeout + 2.0)
-    except asyncio.TimeoutError:
-        log.error(f"[MiDevice] Scan timeout after {timeout + 2.0}s")
-        return []
+        return MiDevice.scan_devices(username, password, timeout=timeout + 2.0)
     except Exception as e:
         log.error(f"[MiDevice] Scan error: {e}")
         return []
@@ -0,0 +1,14 @@
+from core.db import db_obj
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class MaterialStat(db_obj.Model):
+    """素材观看时长：每个 (素材, 用户) 一行，按秒原子累加；t_material.statistics 由此表派生。"""
+    __tablename__ = 't_material_stat'
+    material_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    user_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    seconds: Mapped[int] = mapped_column(default=0, nullable=False)
+    dt: Mapped[str] = mapped_column(default='', nullable=False)
+
+    def to_dict(self):
+        return {"material_id": self.material_id, "user_id": self.user_id, "seconds": self.seconds, "dt": self.dt}
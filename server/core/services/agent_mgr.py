@@ -8,12 +8,30 @@ from core.api.types import AgentConfigBody, AgentHeartbeatData
 from core.device.agent import DeviceAgent
 from core.config import app_logger
 from core.services.playlist_mgr import playlist_mgr
+from core.tools.timing_wheel import TimingWheel
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
 # 心跳超时时间（秒）
 HEARTBEAT_TIMEOUT = 60
 
+# 心跳超时时间轮：槽位数与每槽时长（秒），一圈覆盖 HEARTBEAT_TIMEOUT
+HEARTBEAT_WHEEL_SLOTS = 64
+HEARTBEAT_WHEEL_TICK = 1.0
+
+# RTT 指数滑动平均系数
+RTT_EWMA_ALPHA = 0.2
+
+# 增量心跳可携带的设备信息字段及其缺省值
+DELTA_FIELDS_DEFAULT = {
+    'name': str,
+    'actions': list,
+    'config': dict,
+    'keyboard': dict,
+}
+DELTA_FIELDS = frozenset(DELTA_FIELDS_DEFAULT)
+
 BUTTON_MAP = {
     "F13": ("B1", "play"),
     "F14": ("B1", "stop"),
@@ -30,37 +48,75 @@ class AgentMgr:
     def __init__(self) -> None:
         self._agents: Dict[str, DeviceAgent] = {}  # {agent_id: DeviceAgent}
         self._devices: Dict[str, Dict[str, Any]] = {}  # {agent_id: {'heartbeat_time': timestamp, 'agent_id': str}}
+        # 心跳超时检测：按截止时间落入时间轮，清理时只检查到期槽位
+        self._liveness: TimingWheel[str] = TimingWheel(slots=HEARTBEAT_WHEEL_SLOTS, tick=HEARTBEAT_WHEEL_TICK)
 
     def _cleanup_expired_devices(self) -> None:
-        """懒清理：清理过期设备"""
+        """懒清理：推进时间轮，清理过期设备"""
         current_time = time.time()
-        expired_devices = []
-        for agent_id, device_info in self._devices.items():
+        for agent_id in self._liveness.expire(current_time):
+            device_info = self._devices.get(agent_id)
+            if not device_info:
+                continue
             heartbeat_time = device_info.get('heartbeat_time', 0)
             if current_time - heartbeat_time > HEARTBEAT_TIMEOUT:
-                expired_devices.append(agent_id)
-
-        for agent_id in expired_devices:
-            self.remove_agent(agent_id)
-            log.info(f"[AgentMgr] 移除过期设备: {agent_id}")
-
-    def handle_heartbeat(self, client_ip: str, data: AgentHeartbeatData):
+                self.remove_agent(agent_id)
+                log.info(f"[AgentMgr] 移除过期设备: {agent_id}")
+            else:
+                # 时间轮按 tick 取整，未真正超时的重新排期
+                self._liveness.schedule(agent_id, heartbeat_time + HEARTBEAT_TIMEOUT + HEARTBEAT_WHEEL_TICK)
+
+    def _touch(self, agent_id: str, current_time: float, data: AgentHeartbeatData) -> None:
+        """刷新心跳时间、序号与 RTT"""
+        device_info = self._devices[agent_id]
+        device_info['heartbeat_time'] = current_time
+        if data.seq is not None:
+            device_info['seq'] = data.seq
+        if data.rtt_ms is not None:
+            rtt_avg = device_info.get('rtt_avg_ms')
+            device_info['rtt_ms'] = data.rtt_ms
+            device_info['rtt_avg_ms'] = round(data.rtt_ms if rtt_avg is None else
+                                              rtt_avg + RTT_EWMA_ALPHA * (data.rtt_ms - rtt_avg), 2)
+        self._liveness.schedule(agent_id, current_time + HEARTBEAT_TIMEOUT)
+
+    def handle_heartbeat(self, client_ip: str, data: AgentHeartbeatData) -> Optional[Dict[str, Any]]:
         """处理并注册设备的周期性心跳。
 
         如果设备是首次上报，则为其创建并注册一个新的 Agent 实例；
         否则，更新其心跳时间及设备信息。
 
+        增量心跳（``data.full`` 为 False）只携带变化的字段，未携带的字段保持不变。
+        若增量无法应用（设备未注册，或序号不连续导致可能丢失了变更），
+        返回 None，调用方应通知 Agent 下次发送全量心跳。
+
         Args:
             data (AgentHeartbeatData): 上报数据
         Returns:
-            Dict[str, Any]: 更新或创建后的设备信息字典。
+            Optional[Dict[str, Any]]: 更新或创建后的设备信息字典；需要全量同步时返回 None。
         """
         current_time = time.time()
         # 先清理过期设备
         self._cleanup_expired_devices()
 
         agent_id = client_ip
-        if agent_id not in self._devices:
+        device_info = self._devices.get(agent_id)
+        if not data.full:
+            if device_info is None:
+                log.info(f"[AgentMgr] 未注册设备发送增量心跳，要求全量同步: {agent_id}")
+                return None
+            last_seq = device_info.get('seq')
+            gap = data.seq is not None and last_seq is not None and data.seq != last_seq + 1
+            self._touch(agent_id, current_time, data)
+            # 增量字段均为绝对值，直接覆盖
+            for field in data.model_fields_set & DELTA_FIELDS:
+                device_info[field] = getattr(data, field) or DELTA_FIELDS_DEFAULT[field]()
+            if gap:
+                log.info(f"[AgentMgr] 心跳序号不连续 {last_seq} -> {data.seq}，要求全量同步: {agent_id}")
+                return None
+            log.debug(f"[AgentMgr] 增量心跳: {agent_id}, fields={sorted(data.model_fields_set & DELTA_FIELDS)}")
+            return device_info
+
+        if device_info is None:
             # 注册新设备
             self._agents[agent_id] = DeviceAgent(address=data.address, name=data.name)
             self._devices[agent_id] = {
@@ -73,16 +129,17 @@ class AgentMgr:
                 'config': data.config or {},
                 'keyboard': data.keyboard or {},
             }
+            self._touch(agent_id, current_time, data)
 
             log.info(
                 f"[AgentMgr] 注册新设备: {data.address}, name={data.name}, actions={data.actions}, keyboard={data.keyboard}")
         else:
             # 更新心跳时间和设备信息
-            self._devices[agent_id]['heartbeat_time'] = current_time
-            self._devices[agent_id]['name'] = data.name
-            self._devices[agent_id]['actions'] = data.actions or []
-            self._devices[agent_id]['config'] = data.config or {}
-            self._devices[agent_id]['keyboard'] = data.keyboard or {}
+            self._touch(agent_id, current_time, data)
+            device_info['name'] = data.name
+            device_info['actions'] = data.actions or []
+            device_info['config'] = data.config or {}
+            device_info['keyboard'] = data.keyboard or {}
             log.debug(f"[agent_id] 更新设备心跳: {agent_id}")
         return self._devices[agent_id]
 
@@ -108,6 +165,7 @@ class AgentMgr:
         """
         self._devices.pop(agent_id, None)
         self._agents.pop(agent_id, None)
+        self._liveness.cancel(agent_id)
 
     def get_all_agents(self, action: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
         """获取所有已注册的设备列表。
@@ -190,4 +248,4 @@ class AgentMgr:
 
 
 # 全局实例
-agent_mgr = AgentMgr()
+agent_mgr = mgr_registry.register('agent_mgr', AgentMgr)
@@ -0,0 +1,203 @@
+"""
+认证缓存：已验证的 access token 与登录用户身份。
+
+- TokenCache：按 token 的 sha256 缓存验签 / 解码结果，到 token 的 exp 自动失效。
+  进程内 LRU + Redis Hash（多进程 / 重启后共享）；Redis key 含 JWT 密钥指纹，更换密钥后旧缓存自然失效。
+  命中时直接写入 flask_jwt_extended 的请求上下文，get_jwt() / get_jwt_identity() 照常可用。
+- UserCache：按用户名缓存登录所需的身份（id / name / admin / 密码摘要），
+  只存密码的 sha256 摘要，不存原值；/user/update、/setData、/delData 修改 t_user 时按 id 失效。
+
+Redis 不可用时退化为不缓存，不影响认证本身。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, get_jwt_header, get_jwt_request_location, verify_jwt_in_request
+
+from core.config import app_logger
+from core.db import rds_mgr
+from core.tools.metrics import registry
+
+log = app_logger
+
+TOKEN_CACHE_LOCAL_MAX = 2048
+TOKEN_CACHE_SHARED_MAX = 5000  # Redis Hash 超过该数量时清理已过期的条目
+TOKEN_CACHE_MAX_TTL = 24 * 3600  # 无 exp 的 token 最多缓存（秒）
+TOKEN_RDS_KEY_PREFIX = 'auth:jwt:'
+USER_RDS_KEY = 'auth:user'
+
+_AUTH_CACHE = registry.counter('auth_cache_total', '认证缓存查询次数', ('cache', 'result'))
+
+Verified = Tuple[Dict[str, Any], Dict[str, Any]]  # (jwt_header, jwt_claims)
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def _bearer_token() -> Optional[str]:
+    """从 Authorization 头取出 token（与 JWT_HEADER_TYPE 一致），没有时返回 None。"""
+    header = request.headers.get(current_app.config.get('JWT_HEADER_NAME', 'Authorization')) or ''
+    header_type = current_app.config.get('JWT_HEADER_TYPE', 'Bearer')
+    parts = header.split()
+    if len(parts) == 2 and parts[0] == header_type:
+        return parts[1]
+    return None
+
+
+class TokenCache:
+    """已验证 access token 的两级缓存（进程内 LRU + Redis Hash）。"""
+
+    def __init__(self, local_max: int = TOKEN_CACHE_LOCAL_MAX, shared_max: int = TOKEN_CACHE_SHARED_MAX) -> None:
+        self.local_max = local_max
+        self.shared_max = shared_max
+        self._local: OrderedDict[str, Tuple[float, Verified]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rds_key() -> str:
+        secret = str(current_app.config.get('JWT_SECRET_KEY') or '')
+        return TOKEN_RDS_KEY_PREFIX + _digest(secret)[:12]
+
+    def get(self, token: str) -> Optional[Verified]:
+        key = _digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._local.move_to_end(key)
+                    _AUTH_CACHE.labels('token', 'hit_local').inc()
+                    return entry[1]
+                del self._local[key]
+        raw: Any = None  # rds_mgr.hget 返回 bytes / str / None
+        try:
+            raw = rds_mgr.hget(self._rds_key(), key)
+        except Exception as e:
+            log.debug(f"[AuthCache] 读取共享 token 缓存失败: {e}")
+        if raw:
+            item = json.loads(raw)
+            if item['exp'] > now:
+                verified = (item['header'], item['claims'])
+                self._put_local(key, item['exp'], verified)
+                _AUTH_CACHE.labels('token', 'hit_shared').inc()
+                return verified
+        _AUTH_CACHE.labels('token', 'miss').inc()
+        return None
+
+    def put(self, token: str, header: Dict[str, Any], claims: Dict[str, Any]) -> None:
+        now = time.time()
+        exp = min(float(claims.get('exp') or now + TOKEN_CACHE_MAX_TTL), now + TOKEN_CACHE_MAX_TTL)
+        if exp <= now:
+            return
+        key = _digest(token)
+        self._put_local(key, exp, (header, claims))
+        try:
+            rds_key = self._rds_key()
+            rds_mgr.hset(rds_key, key, json.dumps({'exp': exp, 'header': header, 'claims': claims}))
+            if rds_mgr.hlen(rds_key) > self.shared_max:
+                self._prune_shared(rds_key, now)
+        except Exception as e:
+            log.debug(f"[AuthCache] 写入共享 token 缓存失败: {e}")
+
+    def _put_local(self, key: str, exp: float, verified: Verified) -> None:
+        with self._lock:
+            self._local[key] = (exp, verified)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max:
+                self._local.popitem(last=False)
+
+    @staticmethod
+    def _prune_shared(rds_key: str, now: float) -> None:
+        expired = [k for k, v in rds_mgr.hgetall(rds_key).items() if json.loads(v).get('exp', 0) <= now]
+        if expired:
+            rds_mgr.hdel(rds_key, *expired)
+            log.info(f"[AuthCache] 清理过期 token 缓存 {len(expired)} 条")
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+class UserCache:
+    """登录用户身份缓存（Redis Hash，用户名 → 身份与密码摘要）。"""
+
+    @staticmethod
+    def pwd_digest(pwd: Optional[str]) -> Optional[str]:
+        return None if pwd is None else _digest(str(pwd))
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        raw: Any = None
+        try:
+            raw = rds_mgr.hget(USER_RDS_KEY, name)
+        except Exception as e:
+            log.debug(f"[AuthCache] 读取用户缓存失败: {e}")
+        _AUTH_CACHE.labels('user', 'hit' if raw else 'miss').inc()
+        return json.loads(raw) if raw else None
+
+    def put(self, name: str, user_id: int, admin: int, pwd: Optional[str]) -> Dict[str, Any]:
+        item = {'id': user_id, 'name': name, 'admin': admin, 'pwd_digest': self.pwd_digest(pwd)}
+        try:
+            rds_mgr.hset(USER_RDS_KEY, name, json.dumps(item, ensure_ascii=False))
+        except Exception as e:
+            log.debug(f"[AuthCache] 写入用户缓存失败: {e}")
+        return item
+
+    def invalidate(self, user_id: Any) -> int:
+        """按用户 id 失效（改名后旧用户名也一并清除）。"""
+        try:
+            names = [name for name, raw in rds_mgr.hgetall(USER_RDS_KEY).items()
+                     if str(json.loads(raw).get('id')) == str(user_id)]
+            return rds_mgr.hdel(USER_RDS_KEY, *names) if names else 0
+        except Exception as e:
+            log.warning(f"[AuthCache] 用户缓存失效失败 user_id={user_id}: {e}")
+            return 0
+
+    def clear(self) -> None:
+        try:
+            names = list(rds_mgr.hgetall(USER_RDS_KEY))
+            if names:
+                rds_mgr.hdel(USER_RDS_KEY, *names)
+        except Exception as e:
+            log.warning(f"[AuthCache] 清空用户缓存失败: {e}")
+
+    @staticmethod
+    def check_password(item: Dict[str, Any], password: str) -> bool:
+        """与 auth_login 原逻辑一致：库中密码为空、明文相等或 MD5 相等均视为通过。"""
+        stored = item.get('pwd_digest')
+        if stored is None:
+            return True
+        md5 = hashlib.md5(password.encode('utf-8')).hexdigest()
+        return stored in (_digest(password), _digest(md5))
+
+
+def verify_jwt_cached() -> None:
+    """带缓存的 verify_jwt_in_request：Authorization 头中的 token 验证通过后缓存到 exp。
+
+    命中缓存时按 verify_jwt_in_request 的方式写入请求上下文；未命中或 token 不在请求头中时走原验证。
+    验证失败抛出与 verify_jwt_in_request 相同的异常。
+    """
+    token = _bearer_token() if request.method != 'OPTIONS' else None  # OPTIONS 由 verify_jwt_in_request 直接放行
+    if token:
+        cached = token_cache.get(token)
+        if cached is not None:
+            header, claims = cached
+            g._jwt_extended_jwt_user = {'loaded_user': None}
+            g._jwt_extended_jwt_header = header
+            g._jwt_extended_jwt = claims
+            g._jwt_extended_jwt_location = 'headers'
+            return
+    verify_jwt_in_request()
+    if token and get_jwt_request_location() == 'headers':
+        token_cache.put(token, get_jwt_header(), get_jwt())
+
+
+token_cache = TokenCache()
+user_cache = UserCache()
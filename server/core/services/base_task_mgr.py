@@ -2,6 +2,7 @@ import json
 import os
 import random
 import string
+import weakref
 from abc import ABC, abstractmethod
 from readerwriterlock import rwlock
 from dataclasses import asdict, dataclass
@@ -11,10 +12,16 @@ from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar,
 from core.config import (TASK_STATUS_FAILED, TASK_STATUS_PENDING, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS,
                          app_logger)
 from core.tools.async_util import run_in_background
+from core.tools.metrics import registry
 from core.utils import ensure_directory, FileInfo
 
 log = app_logger
 
+_TASKS_GAUGE = registry.gauge('task_mgr_tasks', '各任务管理器按状态统计的任务数', ('mgr', 'status'))
+_STOP_REQUESTS_GAUGE = registry.gauge('task_mgr_stop_requests', '各任务管理器待处理的停止请求数', ('mgr',))
+# 已创建的任务管理器（弱引用，实例销毁后自动移除）
+_task_mgrs: 'weakref.WeakSet[BaseTaskMgr]' = weakref.WeakSet()
+
 
 class TaskProgress(TypedDict):
     total: int
@@ -46,6 +53,7 @@ class BaseTaskMgr(ABC, Generic[TTask]):
         self._base_dir = base_dir
         ensure_directory(self._base_dir)
         self._load_history_tasks()
+        _task_mgrs.add(self)
 
     def _now_ts(self) -> float:
         return datetime.now().timestamp()
@@ -248,3 +256,19 @@ class BaseTaskMgr(ABC, Generic[TTask]):
             self._save_all_tasks()
             log.info(f"[{self.__class__.__name__}] 创建任务: {tid}, 名称: {task.name}")
             return 0, '任务创建成功', tid
+
+
+def _collect_task_metrics() -> None:
+    """抓取时统计各任务管理器的任务状态分布。"""
+    _TASKS_GAUGE.clear()
+    _STOP_REQUESTS_GAUGE.clear()
+    for mgr in list(_task_mgrs):
+        name = mgr.__class__.__name__
+        with mgr._task_lock.gen_rlock():
+            statuses = [task.status for task in mgr._tasks.values()]
+        for status in statuses:
+            _TASKS_GAUGE.labels(name, status).inc()
+        _STOP_REQUESTS_GAUGE.labels(name).inc(len(mgr._stop_flags))
+
+
+registry.add_collector(_collect_task_metrics)
@@ -1,19 +1,28 @@
 """
 蓝牙设备管理器
 """
+from __future__ import annotations
+
 import asyncio
 import os
 import shutil
-from typing import Any, Dict, List, Optional, Tuple, Mapping
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Mapping
 
 from gevent import spawn
 import subprocess
-from bleak import BleakClient, BleakScanner
-from bleak.backends.scanner import AdvertisementData
 
 from core.device.bluetooth import BluetoothDev
 from core.tools.async_util import run_async
 from core.config import app_logger
+from core.tools.lazy import lazy_import, mgr_registry
+
+if TYPE_CHECKING:
+    import bleak
+    from bleak import BleakClient
+    from bleak.backends.scanner import AdvertisementData
+else:
+    # bleak 依赖 dbus 等系统组件，首次扫描/连接时再加载
+    bleak = lazy_import('bleak')
 
 log = app_logger
 
@@ -227,7 +236,7 @@ class BluetoothMgr:
             log.info(f"[BLUETOOTH] Starting BLE scan (timeout: {timeout}s)")
 
             # 使用 return_adv=True 获取设备和广告数据
-            devices_dict = await BleakScanner.discover(timeout=timeout, return_adv=True)
+            devices_dict = await bleak.BleakScanner.discover(timeout=timeout, return_adv=True)
             device_list = []
 
             for device, advertisement_data in devices_dict.values():
@@ -289,7 +298,7 @@ class BluetoothMgr:
                 return {"code": 0, "msg": "Already connected", "data": self.devices[address_upper].to_dict()}
 
             log.info(f"[BLUETOOTH] Connecting to device: {address_upper}")
-            client = BleakClient(address_upper)
+            client = bleak.BleakClient(address_upper)
             await client.connect()
 
             if address_upper not in self.devices:
@@ -524,4 +533,4 @@ class BluetoothMgr:
 
 
 # 全局实例
-bluetooth_mgr = BluetoothMgr()
+bluetooth_mgr = mgr_registry.register('bluetooth_mgr', BluetoothMgr)
@@ -12,6 +12,8 @@ from typing import Any, Dict, Optional, Tuple
 
 import core.db.rds_mgr as rds_mgr
 from core.config import app_logger
+from core.tools.cache import cache_registry
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
@@ -20,6 +22,19 @@ _BUILD_STATUS_KEY = 'browser:build:status'
 _TS_FMT = '%Y-%m-%d %H:%M:%S'
 _DEFAULT_BUILD_PATH = '/mnt/data/project/linxi-browser'
 _LOG_FILE = '/tmp/browser-build.log'
+_CONFIG_CACHE_TTL = 60
+
+# 浏览器端轮询配置；save_config 与 /setRdsData 写入时失效
+_config_cache = cache_registry.namespace('browser_config', ttl=_CONFIG_CACHE_TTL, maxsize=1, rds_keys=(_REDIS_KEY,))
+
+
+def _load_config_from_redis() -> Dict[str, Any]:
+    raw = rds_mgr.get_str(_REDIS_KEY)
+    if raw:
+        parsed = json.loads(raw)
+        if isinstance(parsed, dict):
+            return parsed
+    return {}
 
 
 class BrowserMgr:
@@ -28,13 +43,9 @@ class BrowserMgr:
     # ---------- 配置管理 ----------
 
     def load_config(self) -> Dict[str, Any]:
-        """从 Redis 加载浏览器配置"""
+        """从 Redis 加载浏览器配置（进程内缓存，返回副本供调用方修改）"""
         try:
-            raw = rds_mgr.get_str(_REDIS_KEY)
-            if raw:
-                parsed = json.loads(raw)
-                if isinstance(parsed, dict):
-                    return parsed
+            return dict(_config_cache.get('config', _load_config_from_redis))
         except Exception as e:
             log.warning(f"[BrowserMgr] 从 Redis 加载配置失败: {e}")
         return {}
@@ -44,6 +55,7 @@ class BrowserMgr:
         try:
             rds_mgr.set(_REDIS_KEY, json.dumps(
                 config_data, ensure_ascii=False))
+            _config_cache.invalidate()
             return True
         except Exception as e:
             log.error(f"[BrowserMgr] 保存配置到 Redis 失败: {e}")
@@ -261,4 +273,4 @@ class BrowserMgr:
 
 
 # 全局单例
-browser_mgr = BrowserMgr()
+browser_mgr = mgr_registry.register('browser_mgr', BrowserMgr)
@@ -8,6 +8,7 @@ import urllib.parse
 from typing import Any, Dict, List
 
 from core.config import app_logger, config
+from core.tools.lazy import mgr_registry
 from core.utils import get_media_duration
 
 log = app_logger
@@ -338,4 +339,4 @@ class FileMgr:
 
 
 # 单例实例
-file_mgr = FileMgr()
+file_mgr = mgr_registry.register('file_mgr', FileMgr)
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Optional
 import core.db.rds_mgr as rds_mgr
 from core.config import app_logger
 from core.db.db_mgr import db_mgr
+from core.tools.lazy import mgr_registry
 from core.utils import fmt_ts
 
 log = app_logger
@@ -581,4 +582,4 @@ class LotteryMgr:
         }
 
 
-lottery_mgr = LotteryMgr()
+lottery_mgr = mgr_registry.register('lottery_mgr', LotteryMgr)
@@ -12,6 +12,8 @@ from core.utils import (
     get_media_duration,
     validate_and_normalize_path,
 )
+from core.tools.file_serving import OpenFileCache
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
@@ -22,6 +24,8 @@ class MediaMgr:
     def __init__(self) -> None:
         """初始化，读取默认媒体根目录。"""
         self.default_base_dir = config.DEFAULT_BASE_DIR
+        # 已校验路径 + 打开 fd 的短期缓存：拖动进度时的大量 Range 请求不再重复 stat/open
+        self._open_files = OpenFileCache()
 
     def get_duration(self, file_path: str) -> dict[str, Any]:
         """获取媒体文件时长（ffprobe）。
@@ -51,32 +55,43 @@ class MediaMgr:
             log.error(f"Error getting media duration: {e}")
             return _err(f"Error: {e}")
 
-    def prepare_serve_file(self, filepath: str) -> dict[str, Any]:
-        """校验媒体文件并返回下发所需的 path 与 MIME。
+    def open_serve_file(self, filepath: str) -> dict[str, Any]:
+        """校验并打开媒体文件（经打开文件缓存），返回可直接交给 ``serve_file`` 的条目。
 
         Args:
             filepath: URL 中的文件路径
 
         Returns:
-            成功: {"code": 0, "data": {"path": str, "mimetype": str}}
+            成功: {"code": 0, "data": {"file": CachedFile}}（引用由 ``serve_file`` 在响应结束时释放）
             失败: {"code": -1, "msg": str, "http_status": int}（供路由层 abort）
         """
+        filepath = _normalize_serve_path(filepath)
         try:
-            filepath = filepath.replace("../", "").replace("..\\", "")
-            if not filepath.startswith("/"):
-                filepath = "/" + filepath
-
-            if not os.path.isfile(filepath):
-                log.warning(f"[MEDIA] File not found: {filepath}")
-                return {**_err("File not found"), "http_status": 404}
-
-            ext = os.path.splitext(filepath)[1].lower()
-            mimetype = MIMETYPE_MAP.get(ext, "application/octet-stream")
-            log.info(f"[MEDIA] Serving file: {filepath} (MIME: {mimetype})")
-            return _ok({"path": filepath, "mimetype": mimetype})
+            entry = self._open_files.acquire(filepath, _mimetype_for(filepath))
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            log.warning(f"[MEDIA] File not found: {filepath}")
+            return {**_err("File not found"), "http_status": 404}
+        except PermissionError as e:
+            log.warning(f"[MEDIA] Permission denied: {filepath}, {e}")
+            return {**_err("Permission denied"), "http_status": 403}
         except Exception as e:
-            log.error(f"[MEDIA] Error preparing file {filepath}: {e}")
+            log.error(f"[MEDIA] Error opening file {filepath}: {e}")
             return {**_err(str(e)), "http_status": 500}
+        log.debug(f"[MEDIA] Serving file: {filepath} (MIME: {entry.mimetype})")
+        return _ok({"file": entry})
+
+
+def _normalize_serve_path(filepath: str) -> str:
+    """过滤 URL 路径中的 ``../``，并补齐前导 ``/``。"""
+    filepath = filepath.replace("../", "").replace("..\\", "")
+    if not filepath.startswith("/"):
+        filepath = "/" + filepath
+    return filepath
+
+
+def _mimetype_for(filepath: str) -> str:
+    ext = os.path.splitext(filepath)[1].lower()
+    return MIMETYPE_MAP.get(ext, "application/octet-stream")
 
 
-media_mgr = MediaMgr()
+media_mgr = mgr_registry.register('media_mgr', MediaMgr)
@@ -13,6 +13,7 @@ from typing import List, Optional, Tuple
 from werkzeug.utils import secure_filename
 
 from core.config import PIC_BASE_DIR, _SERVER_ROOT, app_logger
+from core.tools.lazy import mgr_registry
 from core.utils import ensure_directory, get_unique_filepath, is_allowed_image_file
 
 log = app_logger
@@ -167,4 +168,4 @@ class PicMgr:
         return cache_path, 'image/png'
 
 
-pic_mgr = PicMgr()
+pic_mgr = mgr_registry.register('pic_mgr', PicMgr)
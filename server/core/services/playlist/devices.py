@@ -1,4 +1,8 @@
-"""播放列表与设备实例的绑定（设备映射、单条刷新、音量、状态查询、停止）。"""
+"""播放列表与设备实例的绑定（设备映射、单条刷新、音量、状态查询、停止）。
+
+播放进度由 ``PlaybackClock`` 本地外推：``read_progress(pid, max_age=N)`` 在 N 秒内同步过时直接返回外推值，
+不再向设备发 ``get_status``。
+"""
 
 import sys
 from typing import Any, Callable, Dict, Optional, Tuple
@@ -7,6 +11,7 @@ from core.device import create_device
 from core.config import app_logger
 from core.utils import time_to_seconds
 from core.services.playlist.constants import DEVICE_TYPES
+from core.services.playlist.playback_clock import DRIFT_TOLERANCE, PlaybackClock
 
 log = app_logger
 _LOG = "[PlaylistDevices]"
@@ -21,6 +26,10 @@ class PlaylistDevices:
 
     def __init__(self, device_map: Optional[Dict[str, Any]] = None) -> None:
         self._device_map: Dict[str, Any] = device_map if device_map is not None else {}
+        # 播放时钟与设备映射分开保存：refresh_all 重建设备对象时不丢失正在播放的进度
+        self._clocks: Dict[str, PlaybackClock] = {}
+        # 已下发的音量 {playlist_id: volume}，音量未变化时 play 不再多一次设备往返；设备条目替换时失效
+        self._applied_volumes: Dict[str, Any] = {}
 
     # ---------- dict-like 读 ----------
 
@@ -43,13 +52,63 @@ class PlaylistDevices:
 
     def __setitem__(self, playlist_id: str, entry: Dict[str, Any]) -> None:
         self._device_map[playlist_id] = entry
+        self._applied_volumes.pop(playlist_id, None)
 
     def clear(self) -> None:
         self._device_map.clear()
+        self._applied_volumes.clear()
 
     def pop(self, playlist_id: str, default: Any = None) -> Any:
+        self._clocks.pop(playlist_id, None)
+        self._applied_volumes.pop(playlist_id, None)
         return self._device_map.pop(playlist_id, default)
 
+    # ---------- 播放时钟 ----------
+
+    def clock(self, playlist_id: str) -> Optional[PlaybackClock]:
+        return self._clocks.get(playlist_id)
+
+    def mark_playing(self, playlist_id: str, duration_seconds: float) -> None:
+        """向设备发出 play 后调用：时钟从 0 开始外推，等待下一次同步确认。"""
+        clock = self._clocks.get(playlist_id)
+        if clock is None:
+            clock = self._clocks[playlist_id] = PlaybackClock()
+        clock.restart(duration_seconds)
+
+    def reset_playback(self, playlist_id: str) -> None:
+        """停止播放后调用：丢弃播放时钟与音量缓存（下次开始播放时重新下发音量）。"""
+        self._clocks.pop(playlist_id, None)
+        self._applied_volumes.pop(playlist_id, None)
+
+    def observe(self, playlist_id: str, status: Dict[str, Any]) -> Tuple[str, int]:
+        """用设备状态（``get_status`` 结果或外部上报的播放事件）校准时钟，返回 ``(state, remaining_seconds)``。
+
+        duration/position 解析失败时记 warning 并返回 ``(state, 0)``，不更新时钟；
+        未带 position 时只更新状态，位置按外推值继续（不把时钟拨回 0）。
+        """
+        state = status.get("state", "")
+        duration_str = status.get("duration", "00:00:00")
+        position_str = status.get("position")
+        try:
+            duration = time_to_seconds(duration_str)
+            position = time_to_seconds(position_str) if position_str else None
+        except (ValueError, AttributeError) as e:
+            log.warning(
+                f"{_LOG} 计算 remaining 失败: {playlist_id}, "
+                f"duration={duration_str}, position={position_str}, {e}"
+            )
+            return state, 0
+        clock = self._clocks.get(playlist_id)
+        if clock is None:
+            clock = self._clocks[playlist_id] = PlaybackClock()
+        if position is None:
+            clock.set_state(state, duration)
+            return state, int(clock.remaining_at())
+        drift = clock.observe(state, position, duration)
+        if abs(drift) > DRIFT_TOLERANCE:
+            log.info(f"{_LOG} 播放进度漂移 {drift:+.1f}s: {playlist_id}, state={state}, position={position_str}")
+        return state, max(0, duration - position)
+
     # ---------- 全量 / 单条刷新 ----------
 
     def refresh_all(
@@ -105,12 +164,19 @@ class PlaylistDevices:
 
     # ---------- 与设备的通用 I/O ----------
 
-    def read_progress(self, playlist_id: str) -> Tuple[str, int]:
+    def read_progress(self, playlist_id: str, max_age: float = 0.0) -> Tuple[str, int]:
         """读设备进度。返回 ``(state, remaining_seconds)``；设备不存在 / get_status 失败 / 异常时返回 ``("", 0)``
         （状态空串、剩余 0 秒——调用方对状态比较与 ``remaining >= N`` 判断都会自然落到「无需等待」分支）。
 
+        Args:
+            playlist_id: 播放列表 ID。
+            max_age: 时钟在 max_age 秒内与设备同步过时直接返回外推值；默认 0 表示总是查询设备。
+
         remaining 已 clip 到 ``>= 0``；duration/position 解析失败时记 warning 并返回 0。
         """
+        clock = self._clocks.get(playlist_id)
+        if max_age > 0 and clock is not None and clock.is_fresh(max_age):
+            return clock.state, int(round(clock.remaining_at()))
         device = self.get_obj(playlist_id)
         if device is None:
             return "", 0
@@ -127,19 +193,7 @@ class PlaylistDevices:
         if not isinstance(status, dict):
             log.warning(f"{_LOG} get_status code=0 但 status 非 dict: {playlist_id}, status={status!r}")
             return "", 0
-
-        state = status.get("state", "")
-        duration_str = status.get("duration", "00:00:00")
-        position_str = status.get("position", "00:00:00")
-        try:
-            remaining = max(0, time_to_seconds(duration_str) - time_to_seconds(position_str))
-        except (ValueError, AttributeError) as e:
-            log.warning(
-                f"{_LOG} 计算 remaining 失败: {playlist_id}, "
-                f"duration={duration_str}, position={position_str}, {e}"
-            )
-            remaining = 0
-        return state, remaining
+        return self.observe(playlist_id, status)
 
     def safe_stop(self, playlist_id: str) -> Tuple[int, str]:
         """吞异常的 stop。设备不存在视为 no-op 成功 ``(0, "")``；异常返 ``(-1, str(e))``；否则透传设备的 (code, msg)。
@@ -156,18 +210,31 @@ class PlaylistDevices:
             log.warning(f"{_LOG} stop error: {playlist_id}, {e}")
             return -1, str(e)
 
+    def sync_volume(self, playlist_id: str, device: Any, playlist_data: Dict[str, Any]) -> None:
+        """同 ``apply_volume``，但该设备上已成功下发过相同音量时跳过（切歌不再重复 set_volume）。"""
+        device_volume = playlist_data.get("device_volume")
+        if device_volume is None:
+            return
+        if playlist_id in self._applied_volumes and self._applied_volumes[playlist_id] == device_volume:
+            return
+        if self.apply_volume(playlist_id, device, playlist_data):
+            self._applied_volumes[playlist_id] = device_volume
+        else:
+            self._applied_volumes.pop(playlist_id, None)
+
     @staticmethod
-    def apply_volume(playlist_id: str, device: Any, playlist_data: Dict[str, Any]) -> None:
-        """若播放列表配置了 ``device_volume`` 且设备支持 ``set_volume``，则下发音量。"""
+    def apply_volume(playlist_id: str, device: Any, playlist_data: Dict[str, Any]) -> bool:
+        """若播放列表配置了 ``device_volume`` 且设备支持 ``set_volume``，则下发音量；返回是否下发成功。"""
         device_volume = playlist_data.get("device_volume")
         if device_volume is None or not hasattr(device, "set_volume"):
-            return
+            return False
         try:
             code, msg = device.set_volume(device_volume)
         except Exception as e:
             log.warning(f"{_LOG} Set device volume error: id={playlist_id}, {e}")
-            return
+            return False
         if code == 0:
             log.info(f"{_LOG} Set device volume to {device_volume} for playlist {playlist_id}")
-        else:
-            log.warning(f"{_LOG} Set device volume failed: id={playlist_id}, code={code}, msg={msg}")
+            return True
+        log.warning(f"{_LOG} Set device volume failed: id={playlist_id}, code={code}, msg={msg}")
+        return False
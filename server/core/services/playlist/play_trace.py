@@ -0,0 +1,41 @@
+"""播放链路分阶段耗时追踪。
+
+``PlaylistMgr.play`` 的同步阶段（准备、音量、device.play）与后台阶段（时长探测、定时器、持久化）
+各记一次耗时：写入 ``playlist_play_stage_seconds{stage}`` 直方图，并在阶段结束时输出一行汇总日志。
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from core.tools.metrics import registry as metrics_registry
+
+_PLAY_STAGE_SECONDS = metrics_registry.histogram(
+    "playlist_play_stage_seconds", "播放列表 play 各阶段耗时（秒）", ("stage",))
+
+
+class PlayTrace:
+    """单次 play 的阶段耗时记录。"""
+
+    __slots__ = ("playlist_id", "_stages")
+
+    def __init__(self, playlist_id: str) -> None:
+        self.playlist_id = playlist_id
+        self._stages: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stages.append((name, elapsed))
+            _PLAY_STAGE_SECONDS.labels(name).observe(elapsed)
+
+    def stages(self) -> List[Tuple[str, float]]:
+        return list(self._stages)
+
+    def summary(self) -> str:
+        """``prepare=1ms volume=0ms device_play=230ms ...``"""
+        return " ".join(f"{name}={elapsed * 1000:.0f}ms" for name, elapsed in self._stages)
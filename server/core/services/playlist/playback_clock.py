@@ -0,0 +1,114 @@
+"""设备播放进度时钟。
+
+按设备（播放列表）维护「最后一次已知状态」，播放中按本地单调时钟外推当前位置，
+不再每次都向 DLNA / 小米设备发 ``get_status``：
+
+- 同步点：向设备发 play 后（位置 0，尚未与设备确认）、轮询 ``get_status`` 成功、或外部上报播放事件；
+- 外推：``PLAYING`` 状态下 ``position + (now - anchor)``，并 clip 到 ``[0, duration]``；其他状态位置不动；
+- 自适应同步间隔：首次确认用 ``FIRST_SYNC_DELAY``；外推与设备一致时拉长到 ``MAX_SYNC_INTERVAL``，
+  出现漂移（缓冲、拖动进度、设备时长与元数据不符）时缩短到 ``MIN_SYNC_INTERVAL``；
+  始终在预计结束前 ``END_LEAD`` 秒安排最后一次同步，供切歌定时器校准；
+- 暂停 / 未知状态按 ``IDLE_SYNC_INTERVAL`` 同步，用于发现恢复播放。
+"""
+
+import time
+from typing import Optional
+
+STATE_PLAYING = "PLAYING"
+STATE_STOPPED = "STOPPED"
+
+FIRST_SYNC_DELAY = 5.0
+MIN_SYNC_INTERVAL = 5.0
+MAX_SYNC_INTERVAL = 300.0
+IDLE_SYNC_INTERVAL = 30.0
+END_LEAD = 10.0
+# 切歌定时器触发时，时钟在该时间内同步过则直接使用外推值（覆盖最后一次 END_LEAD 同步）
+FRESH_MAX_AGE = END_LEAD + MIN_SYNC_INTERVAL
+# 外推位置与设备上报位置之差在此范围内视为无漂移（秒；设备位置只精确到秒）
+DRIFT_TOLERANCE = 2.0
+# 暂停时切歌定时器的重查间隔；恢复播放由 IDLE_SYNC_INTERVAL 的进度同步发现并重新校准定时器
+PAUSED_RECHECK_INTERVAL = MAX_SYNC_INTERVAL
+
+
+class PlaybackClock:
+    """单个设备的播放时钟；时间参数均为 ``time.monotonic()`` 秒。"""
+
+    __slots__ = ("state", "position", "duration", "anchor", "synced_at", "drift")
+
+    def __init__(self, state: str = "", position: float = 0.0, duration: float = 0.0,
+                 now: Optional[float] = None) -> None:
+        self.state = state
+        self.position = float(position)
+        self.duration = float(duration)
+        self.anchor = time.monotonic() if now is None else now
+        self.synced_at: Optional[float] = None  # 最后一次与设备确认的时间；None 表示尚未确认
+        self.drift = 0.0  # 最后一次确认时「设备位置 - 外推位置」
+
+    def position_at(self, now: Optional[float] = None) -> float:
+        """外推 now 时刻的播放位置（秒）。"""
+        now = time.monotonic() if now is None else now
+        position = self.position
+        if self.state == STATE_PLAYING:
+            position += max(0.0, now - self.anchor)
+        if self.duration > 0:
+            position = min(position, self.duration)
+        return max(0.0, position)
+
+    def remaining_at(self, now: Optional[float] = None) -> float:
+        """外推 now 时刻的剩余时长（秒）；时长未知时返回 0。"""
+        if self.duration <= 0:
+            return 0.0
+        return max(0.0, self.duration - self.position_at(now))
+
+    def restart(self, duration: float, now: Optional[float] = None) -> None:
+        """向设备发出 play 后调用：从 0 开始外推，等待设备确认。"""
+        self.state = STATE_PLAYING
+        self.position = 0.0
+        self.duration = float(duration or 0)
+        self.anchor = time.monotonic() if now is None else now
+        self.synced_at = None
+        self.drift = 0.0
+
+    def observe(self, state: str, position: float, duration: float = 0.0,
+                now: Optional[float] = None) -> float:
+        """用设备上报的状态校准时钟，返回本次漂移（秒，正数表示设备比外推更靠后）。"""
+        now = time.monotonic() if now is None else now
+        predicted = self.position_at(now)
+        drift = float(position) - predicted if self.state == STATE_PLAYING and state == STATE_PLAYING else 0.0
+        self.state = state
+        self.position = float(position)
+        if duration and duration > 0:
+            self.duration = float(duration)
+        self.anchor = now
+        self.synced_at = now
+        self.drift = drift
+        return drift
+
+    def set_state(self, state: str, duration: float = 0.0, now: Optional[float] = None) -> None:
+        """只有状态、没有位置的上报：位置按外推值继续，不算作一次进度确认。"""
+        now = time.monotonic() if now is None else now
+        self.position = self.position_at(now)
+        self.state = state
+        if duration and duration > 0:
+            self.duration = float(duration)
+        self.anchor = now
+
+    def is_fresh(self, max_age: float, now: Optional[float] = None) -> bool:
+        """max_age 秒内与设备确认过。"""
+        if self.synced_at is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self.synced_at <= max_age
+
+    def next_sync_delay(self, now: Optional[float] = None) -> Optional[float]:
+        """下一次与设备同步前的等待秒数；返回 None 表示本曲目无需再同步（交给切歌定时器）。"""
+        now = time.monotonic() if now is None else now
+        if self.state != STATE_PLAYING:
+            return IDLE_SYNC_INTERVAL
+        until_final = self.remaining_at(now) - END_LEAD
+        if until_final < MIN_SYNC_INTERVAL:
+            return None
+        if self.synced_at is None:
+            return min(FIRST_SYNC_DELAY, until_final)
+        interval = MIN_SYNC_INTERVAL if abs(self.drift) > DRIFT_TOLERANCE else MAX_SYNC_INTERVAL
+        return min(interval, until_final)
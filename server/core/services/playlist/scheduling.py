@@ -4,6 +4,7 @@
 
 - cron 自动触发播放 + 孤儿清理
 - 单文件结束后切下一首的 file_timer
+- 按播放时钟自适应间隔与设备同步进度、校准 file_timer 的 progress sync
 - 单次推播文件到时停设备的 on-device timer
 - 播放列表整体时长限制 timer
 - 30s 一次的 duration guard
@@ -17,12 +18,13 @@
 import datetime
 import sys
 from datetime import timedelta
-from typing import Any, Callable, Dict, Set, Tuple
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 import gevent
 from gevent import spawn
 
 from core.config import app_logger
+from core.services.playlist.playback_clock import DRIFT_TOLERANCE, STATE_PLAYING, STATE_STOPPED
 from core.services.scheduler_mgr import scheduler_mgr
 
 log = app_logger
@@ -36,6 +38,7 @@ class PlaylistScheduling:
     _FILE_ON_DEVICE_TIMER_PREFIX = "playlist_file_on_device_timer_"
     _DURATION_TIMER_PREFIX = "playlist_duration_timer_"
     _STOP_VERIFY_PREFIX = "playlist_stop_verify_"
+    _PROGRESS_SYNC_PREFIX = "playlist_progress_sync_"
     _GUARD_JOB_ID = "playlist_duration_guard"
 
     def __init__(
@@ -58,6 +61,7 @@ class PlaylistScheduling:
         self._on_file_timer_fire = on_file_timer_fire
 
         self._file_timers: Dict[str, str] = {}
+        self._file_timer_run_dates: Dict[str, datetime.datetime] = {}
         self._file_on_device_timers: Dict[str, str] = {}
         self._playlist_duration_timers: Dict[str, str] = {}
         self._scheduled_play_start_times: Dict[str, datetime.datetime] = {}
@@ -231,13 +235,14 @@ class PlaylistScheduling:
     # ===== 孤儿清理 =====
 
     def cleanup_orphaned_jobs(self, valid_ids: Set[str]) -> None:
-        """清理 APScheduler 上所有不属于 valid_ids 的 prefix 任务，以及自有 4 个 dict 中的孤儿。"""
+        """清理 APScheduler 上所有不属于 valid_ids 的 prefix 任务，以及自有状态 dict 中的孤儿。"""
         job_prefixes = [
             (self._CRON_PREFIX, "定时任务"),
             (self._FILE_TIMER_PREFIX, "文件定时器"),
             (self._FILE_ON_DEVICE_TIMER_PREFIX, "单次推播文件定时器"),
             (self._DURATION_TIMER_PREFIX, "播放列表时长定时器"),
             (self._STOP_VERIFY_PREFIX, "停止验证任务"),
+            (self._PROGRESS_SYNC_PREFIX, "进度同步任务"),
         ]
         for job in scheduler_mgr.get_all_jobs():
             for prefix, name in job_prefixes:
@@ -251,6 +256,7 @@ class PlaylistScheduling:
         for state_dict in (
             self._scheduled_play_start_times,
             self._file_timers,
+            self._file_timer_run_dates,
             self._file_on_device_timers,
             self._playlist_duration_timers,
         ):
@@ -273,6 +279,8 @@ class PlaylistScheduling:
         scheduler_mgr.add_date_job(
             func=__play_next_task, job_id=job_id, run_date=run_date)
         self._file_timers[id] = job_id
+        self._file_timer_run_dates[id] = run_date
+        self.schedule_progress_sync(id)
         playlist_raw = self._playlist_raw_provider()
         p_data = playlist_raw.get(id)
         if p_data is not None:
@@ -374,6 +382,66 @@ class PlaylistScheduling:
         log.info(
             f"[PlaylistScheduling] 启动播放列表时长定时器: {id} - {p_name}, 将在 {duration_minutes} 分钟后停止播放")
 
+    # ===== progress sync =====
+
+    def schedule_progress_sync(self, id: str) -> None:
+        """按播放时钟安排下一次与设备的进度同步；时钟不存在或本曲目无需再同步时取消。"""
+        job_id = f"{self._PROGRESS_SYNC_PREFIX}{id}"
+        clock = self._devices_provider().clock(id)
+        delay = clock.next_sync_delay() if clock is not None else None
+        if delay is None or id not in self._file_timers:
+            if scheduler_mgr.get_job(job_id):
+                scheduler_mgr.remove_job(job_id)
+            return
+
+        def _progress_sync_task(pid=id) -> None:
+            try:
+                self.reconcile_progress(pid)
+            except Exception as e:
+                log.error(f"[PlaylistScheduling] 进度同步异常: {pid}, {e}", exc_info=True)
+
+        self.schedule_one_shot(job_id, delay, _progress_sync_task)
+
+    def reconcile_progress(self, id: str, status: Optional[Dict[str, Any]] = None) -> None:
+        """与设备同步进度并校准切歌定时器。
+
+        Args:
+            id: 播放列表 ID。
+            status: 设备主动上报的状态（与 ``get_status`` 同结构）；None 时查询设备。
+
+        - 设备已确认在播、此次报告 STOPPED：曲目提前结束，立即切下一首；
+        - 播放中且按时钟推算的结束时间与 file_timer 相差超过容差：按新的结束时间重排 file_timer；
+        - 查询失败：保留原 file_timer，按时钟间隔稍后重试。
+        """
+        if id not in self._playing_playlists_provider() or id not in self._file_timers:
+            return
+        devices = self._devices_provider()
+        clock = devices.clock(id)
+        confirmed_playing = clock is not None and clock.synced_at is not None and clock.state == STATE_PLAYING
+        if status is not None:
+            state, remaining = devices.observe(id, status)
+        else:
+            state, remaining = devices.read_progress(id)
+
+        if state == STATE_STOPPED and confirmed_playing:
+            p_name = self._playlist_raw_provider().get(id, {}).get("name", "未知播放列表")
+            log.info(f"[PlaylistScheduling] 设备已提前结束当前文件，立即切下一首: {id} - {p_name}")
+            self.clear_file_timer(id)
+            self._on_file_timer_fire(id)
+            return
+
+        scheduled = self._file_timer_run_dates.get(id)
+        if state == STATE_PLAYING and remaining > 0 and scheduled is not None:
+            # 与 play() 一致：提前 1s 切歌，避免设备放完后自动重播
+            target = datetime.datetime.now() + timedelta(seconds=max(remaining - 1, 1))
+            if abs((target - scheduled).total_seconds()) > DRIFT_TOLERANCE:
+                log.info(
+                    f"[PlaylistScheduling] 按设备进度校准文件定时器: {id}, "
+                    f"原计划 {scheduled:%H:%M:%S}, 新计划 {target:%H:%M:%S}")
+                self.start_file_timer(id, max(remaining - 1, 1))
+                return
+        self.schedule_progress_sync(id)
+
     def schedule_one_shot(self, job_id: str, delay_seconds: float, func: Callable[..., Any]) -> None:
         """通用一次性任务（如 stop 后的 verify）。会先 idempotent 清掉同名旧任务。"""
         if scheduler_mgr.get_job(job_id):
@@ -384,14 +452,18 @@ class PlaylistScheduling:
     # ===== timer 清理 =====
 
     def clear_all_for(self, id: str) -> None:
-        """清掉该 playlist 的全部调度状态（4 个 timer + start time），用于 stop/cleanup。"""
-        self._drop_timer(self._file_timers, id)
+        """清掉该 playlist 的全部调度状态（4 个 timer + 进度同步 + start time），用于 stop/cleanup。"""
+        self.clear_file_timer(id)
         self._drop_timer(self._file_on_device_timers, id)
         self._drop_timer(self._playlist_duration_timers, id)
         self._scheduled_play_start_times.pop(id, None)
 
     def clear_file_timer(self, id: str) -> None:
         self._drop_timer(self._file_timers, id)
+        self._file_timer_run_dates.pop(id, None)
+        sync_job_id = f"{self._PROGRESS_SYNC_PREFIX}{id}"
+        if scheduler_mgr.get_job(sync_job_id):
+            scheduler_mgr.remove_job(sync_job_id)
 
     def clear_file_on_device_timer(self, id: str) -> None:
         self._drop_timer(self._file_on_device_timers, id)
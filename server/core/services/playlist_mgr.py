@@ -13,8 +13,12 @@ from core.services.playlist.constants import _TS
 from core.services.playlist.devices import PlaylistDevices
 from core.services.playlist.duration_fetch import DurationFetcher
 from core.services.playlist.format_convert import PlaylistFormatConvert
+from core.services.playlist.play_trace import PlayTrace
+from core.services.playlist.playback_clock import (FIRST_SYNC_DELAY, FRESH_MAX_AGE, PAUSED_RECHECK_INTERVAL,
+                                                   STATE_PLAYING, STATE_STOPPED)
 from core.services.playlist.repository import PlaylistRepository
 from core.services.playlist.scheduling import PlaylistScheduling
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
@@ -52,6 +56,7 @@ class PlaylistMgr:
         self._play_state = {}  # 播放状态跟踪 {playlist_id: {'in_pre_files': bool, 'pre_index': int, 'file_index': int}}
         self._needs_reload = False  # 标记是否需要重新从 RDS 加载
         self._rds_save_queue = Queue()  # Redis 保存操作队列（用于从线程传递到 gevent 环境）
+        self._play_seq: Dict[str, int] = {}  # 每次 play / stop 递增，用于作废过期的 play 后台阶段
         self._last_play_sent_at = {}  # 向设备发送 play 的时间 {playlist_id: datetime}，用于停止时判断是否需延迟再发 stop
         # P1: RDS 读写迁出到 PlaylistRepository。用 provider 避免 _playlist_raw 重赋值导致引用过期。
         self._repo = PlaylistRepository(
@@ -370,6 +375,8 @@ class PlaylistMgr:
     def _cleanup_play_state(self, id: str) -> None:
         """清理播放状态。"""
         self._scheduling.clear_all_for(id)
+        self._devices.reset_playback(id)
+        self._play_seq[id] = self._play_seq.get(id, 0) + 1  # 作废尚未完成的后台阶段
         self._playing_playlists.discard(id)
         self._play_state.pop(id, None)
         playlist_data = self._playlist_raw.get(id)
@@ -389,8 +396,9 @@ class PlaylistMgr:
         1) 先播放当天的 pre_files（来自 pre_lists）；
         2) 再从 playlist[current_index] 开始播放。
 
-        该方法会与设备层交互（set_volume/play），并根据文件时长启动文件定时器；
-        若配置了播放列表时长限制，也会启动时长定时器。
+        同步阶段只与设备交互（音量变化时 set_volume，然后 play）后立即返回；
+        时长探测、文件定时器、播放列表时长定时器与持久化在后台 ``_finish_play`` 中完成，
+        各阶段耗时记录到 ``PlayTrace``。
 
         Args:
             id: 播放列表 ID。
@@ -424,19 +432,22 @@ class PlaylistMgr:
 
         log.info(f"[PlaylistMgr] play: id={id}, force={force}, file={file_path}")
 
-        # 获取并更新文件时长
-        file_duration_seconds = self._duration_fetcher.update_file_duration(file_path, file_item)
-
         device = self._devices.get_obj(id)
         if device is None:
             # 正常路径下 _validate_playlist 已保证设备存在；这里防御 validate→get 之间的极端竞态。
             return -1, "设备不存在或未初始化"
-        self._devices.apply_volume(id, device, playlist_data)
 
-        code, msg = device.play(file_path)
+        # 同步阶段只做设备必需的往返：音量（仅在变化时下发，避免以旧音量起播）+ play
+        trace = PlayTrace(id)
+        with trace.stage("volume"):
+            self._devices.sync_volume(id, device, playlist_data)
+        with trace.stage("device_play"):
+            code, msg = device.play(file_path)
+        # 播放起点：后台阶段按探测耗时扣减文件定时器，避免慢 ffprobe 把切歌时间整体推后
+        started_at = time.monotonic()
 
         if code != 0:
-            log.warning(f"[PlaylistMgr] play failed: id={id}, code={code}, msg={msg}")
+            log.warning(f"[PlaylistMgr] play failed: id={id}, code={code}, msg={msg}, {trace.summary()}")
             return code, msg
 
         # 记录向设备发送 play 的时间，供停止时判断是否需延迟再发 stop（设备加载中可能忽略第一次 stop）
@@ -447,21 +458,62 @@ class PlaylistMgr:
         playlist_data['isPlaying'] = True
         playlist_data["play_in_pre_files"] = bool(play_state["in_pre_files"])
         playlist_data["play_pre_index"] = int(play_state["pre_index"])
-        spawn(self._repo.save, swallow_errors=True)
         self._scheduling.clear_file_timer(id)
 
-        # 启动文件定时器
-        if file_duration_seconds and file_duration_seconds > 0:
-            # 这个地方少1s，避免设备播放完成后自动重播导致重复播放
-            self._scheduling.start_file_timer(id, max(file_duration_seconds - 1, 3))
+        # 播放时钟从 0 开始外推，由 progress sync 按自适应间隔与设备确认；时长未知时由后台阶段补齐
+        self._devices.mark_playing(id, file_item.get("duration") or 0)
 
-        # 启动播放列表时长限制定时器（内部 idempotent，自管理 _scheduled_play_start_times）
-        playlist_duration_minutes = playlist_data.get("schedule", {}).get("duration", 0)
-        if playlist_duration_minutes > 0:
-            self._scheduling.start_playlist_duration_timer(id, playlist_duration_minutes)
+        # 时长探测 / 定时器 / 持久化放到后台；切歌或停止会递增序号，旧的后台阶段自动放弃
+        seq = self._play_seq.get(id, 0) + 1
+        self._play_seq[id] = seq
+        spawn(self._finish_play, id, seq, file_path, file_item, playlist_data, started_at, trace)
+        log.info(f"[PlaylistMgr] play started: id={id}, {trace.summary()}")
 
         return 0, "播放成功"
 
+    def _is_current_play(self, id: str, seq: int) -> bool:
+        return self._play_seq.get(id) == seq
+
+    def _finish_play(self, id: str, seq: int, file_path: str, file_item: Dict[str, Any],
+                     playlist_data: Dict[str, Any], started_at: float, trace: PlayTrace) -> None:
+        """play 的后台阶段：列表时长定时器、文件时长探测（可能是 ffprobe）、切歌定时器、持久化。
+
+        每个阶段前检查序号，用户已切歌 / 停止时放弃剩余阶段（已在跑的 ffprobe 结果仍会写回 file_item 备用）。
+        切歌定时器从 ``started_at``（device.play 返回时的 monotonic 时间）起算，扣除探测等后台耗时。
+        """
+        try:
+            # 后台阶段开始前已停止：不能再启动列表时长定时器，否则遗留的定时器会提前结束该列表的下一次播放
+            if not self._is_current_play(id, seq):
+                log.info(f"[PlaylistMgr] play 后台阶段已取消（已切歌或停止）: id={id}, {trace.summary()}")
+                return
+
+            # 列表时长定时器不依赖文件时长，先启动，避免 ffprobe 耗时推迟计时起点（内部 idempotent）
+            playlist_duration_minutes = playlist_data.get("schedule", {}).get("duration", 0)
+            if playlist_duration_minutes > 0:
+                with trace.stage("playlist_timer"):
+                    self._scheduling.start_playlist_duration_timer(id, playlist_duration_minutes)
+
+            with trace.stage("duration"):
+                file_duration_seconds = self._duration_fetcher.update_file_duration(file_path, file_item)
+            if not self._is_current_play(id, seq):
+                log.info(f"[PlaylistMgr] play 后台阶段已取消（已切歌或停止）: id={id}, {trace.summary()}")
+                return
+
+            if file_duration_seconds and file_duration_seconds > 0:
+                with trace.stage("file_timer"):
+                    clock = self._devices.clock(id)
+                    if clock is not None and clock.duration <= 0:
+                        clock.duration = float(file_duration_seconds)
+                    # 这个地方少1s，避免设备播放完成后自动重播导致重复播放；再扣掉起播后已经过去的时间
+                    elapsed = time.monotonic() - started_at
+                    self._scheduling.start_file_timer(id, max(file_duration_seconds - 1 - elapsed, 3))
+
+            with trace.stage("persist"):
+                self._repo.save(swallow_errors=True)
+            log.info(f"[PlaylistMgr] play 后台阶段完成: id={id}, {trace.summary()}")
+        except Exception as e:
+            log.error(f"[PlaylistMgr] play 后台阶段异常: id={id}, {e}, {trace.summary()}", exc_info=True)
+
     def play_file_on_device(self, playlist_id: str, file_uri: str) -> tuple[int, str]:
         """在指定播放列表绑定的设备上播放指定文件（单次推播，不改变列表播放状态）。
 
@@ -769,11 +821,42 @@ class PlaylistMgr:
         else:
             return -1, f"不支持的操作: {action}"
 
+    def report_playback_status(self, playlist_id: str, status: Dict[str, Any]) -> tuple[int, str]:
+        """设备主动上报播放状态（事件）：校准播放时钟并立即对齐切歌定时器，无需等待下一次同步。
+
+        Args:
+            playlist_id: 播放列表 ID。
+            status: 与设备 ``get_status`` 相同结构的状态 ``{"state", "duration", "position"}``。
+
+        Returns:
+            (code, msg)。code=0 表示成功。
+        """
+        if playlist_id not in self._devices:
+            return -1, "设备不存在或未初始化"
+        if playlist_id in self._playing_playlists:
+            self._scheduling.reconcile_progress(playlist_id, status)
+        else:
+            self._devices.observe(playlist_id, status)
+        return 0, "ok"
+
     def _on_file_timer_fire(self, pid: str) -> None:
-        """文件播放结束定时器触发：根据设备进度微调后切下一首。"""
-        state, remaining = self._devices.read_progress(pid)
-        # 设备已停 → 直接切；仍在播 → 让它把当前文件放完再切，上限 5s 防卡死。
-        if state != "STOPPED" and remaining >= 2:
+        """文件播放结束定时器触发：根据播放时钟（必要时查询设备）微调后切下一首。"""
+        # 最后一次 progress sync 在结束前 END_LEAD 秒，时钟仍新鲜时不再查询设备
+        state, remaining = self._devices.read_progress(pid, max_age=FRESH_MAX_AGE)
+        # 设备已停 → 直接切；仍在播 → 让它把当前文件放完再切。
+        if state != STATE_STOPPED and remaining >= 2:
+            clock = self._devices.clock(pid)
+            # 位置仍在开头视为设备已自动重播，不再顺延
+            replayed = clock is None or clock.position_at() < FIRST_SYNC_DELAY
+            if state != STATE_PLAYING and remaining > 5 and not replayed:
+                # 暂停中剩余时长不会减少：不按剩余时长反复触发，低频重查；恢复播放后由进度同步校准定时器
+                log.info(f"[PlaylistMgr] 设备暂停中（{state}），{PAUSED_RECHECK_INTERVAL:.0f}s 后再检查: {pid}")
+                self._scheduling.start_file_timer(pid, PAUSED_RECHECK_INTERVAL)
+                return
+            if remaining > 5 and not replayed:
+                log.info(f"[PlaylistMgr] 设备进度落后于文件定时器，按剩余 {remaining}s 重新安排切歌: {pid}")
+                self._scheduling.start_file_timer(pid, remaining - 1)
+                return
             time.sleep(min(remaining, 5))
 
         self._scheduling.clear_file_timer(pid)
@@ -971,4 +1054,4 @@ class PlaylistMgr:
 
 
 # 全局实例
-playlist_mgr = PlaylistMgr()
+playlist_mgr = mgr_registry.register('playlist_mgr', PlaylistMgr, eager=True)
@@ -3,15 +3,19 @@
 负责管理和执行后台 cron 定时任务
 """
 import logging
+import threading
+import time
 from apscheduler.schedulers.gevent import GeventScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.date import DateTrigger
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.events import (EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED,
+                                EVENT_JOB_SUBMITTED)
 from apscheduler.executors.gevent import GeventExecutor
 from datetime import datetime
-from typing import Callable, Optional, Any, List
+from typing import Callable, Dict, Optional, Any, List
 from core.config import app_logger
+from core.tools.metrics import registry
 from core.utils import convert_standard_cron_weekday_to_apscheduler
 
 log = app_logger
@@ -19,6 +23,15 @@ log = app_logger
 # 设置 APScheduler 的日志级别为 WARNING，减少任务执行的 INFO 日志
 logging.getLogger('apscheduler').setLevel(logging.WARNING)
 
+# 任务执行耗时桶（秒）：定时任务从毫秒级到数分钟不等
+JOB_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_JOB_DURATION = registry.histogram('scheduler_job_duration_seconds', '定时任务执行耗时（秒）', ('job',),
+                                   buckets=JOB_DURATION_BUCKETS)
+_JOB_RUNS = registry.counter('scheduler_job_runs_total', '定时任务执行次数', ('job', 'result'))
+_JOB_MISFIRES = registry.counter('scheduler_job_misfires_total', '定时任务错过执行或因实例数上限被跳过的次数',
+                                 ('job', 'reason'))
+
 
 class SchedulerMgr:
     """
@@ -53,8 +66,14 @@ class SchedulerMgr:
                 'misfire_grace_time': 300,  # 允许任务错过执行时间后 5 分钟内仍可执行（避免因文件定时器等阻塞导致时长定时器被丢弃）
             })
 
+        # 任务提交时间（job_id -> perf_counter），用于计算执行耗时；max_instances=1 保证同一任务只有一个在执行
+        self._job_started: Dict[str, float] = {}
+        self._job_started_lock = threading.Lock()
+
         # 添加任务执行监听器
+        self.scheduler.add_listener(self._job_submitted_listener, EVENT_JOB_SUBMITTED)
         self.scheduler.add_listener(self._job_executed_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        self.scheduler.add_listener(self._job_missed_listener, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
 
         self._initialized = True
         log.info("任务调度器初始化成功 (使用 GeventScheduler)")
@@ -289,12 +308,29 @@ class SchedulerMgr:
         for job in jobs:
             log.info(f"  - ID: {job.id}, 名称: {job.name}, 下次执行时间: {job.next_run_time}")
 
+    def _job_submitted_listener(self, event: Any) -> None:
+        """任务提交监听器：记录开始时间。"""
+        with self._job_started_lock:
+            self._job_started[event.job_id] = time.perf_counter()
+
+    def _job_missed_listener(self, event: Any) -> None:
+        """任务错过执行 / 因实例数上限被跳过的监听器。"""
+        reason = 'missed' if event.code == EVENT_JOB_MISSED else 'max_instances'
+        _JOB_MISFIRES.labels(event.job_id, reason).inc()
+        log.warning(f"定时任务未执行: {event.job_id}, 原因: {reason}, 计划时间: {event.scheduled_run_time}")
+
     def _job_executed_listener(self, event: Any) -> None:
         """任务执行监听器。
 
         Args:
             event: 事件对象。
         """
+        with self._job_started_lock:
+            started = self._job_started.pop(event.job_id, None)
+        if started is not None:
+            _JOB_DURATION.labels(event.job_id).observe(time.perf_counter() - started)
+        _JOB_RUNS.labels(event.job_id, 'error' if event.exception else 'success').inc()
+
         if event.exception:
             # 捕获 gevent 相关的异常，避免影响线程池 worker
             import gevent
@@ -4,6 +4,7 @@ from typing import Any, Dict, List, Optional, TypedDict
 
 from core.config import app_logger
 from core.db.db_mgr import db_mgr
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
@@ -227,4 +228,4 @@ class StatsMgr:
         return data.get('name', f'分类{cate_id}')
 
 
-stats_mgr = StatsMgr()
+stats_mgr = mgr_registry.register('stats_mgr', StatsMgr)
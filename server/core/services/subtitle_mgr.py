@@ -17,7 +17,8 @@ from core.config import (
     config,
 )
 from core.services.base_task_mgr import BaseTaskMgr, TaskBase
-from core.subtitles import AssrtError, WhisperError, assrt_client, transcribe_to_sidecar
+from core.subtitles import AssrtError, WhisperError, assrt_client, subtitle_index, transcribe_to_sidecar
+from core.subtitles.subtitle_index import SUBTITLE_EXTS
 from core.tools.async_util import run_in_background
 from core.utils import (
     _err,
@@ -26,11 +27,10 @@ from core.utils import (
     subtitle_lang_from_path,
     validate_and_normalize_path,
 )
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
-_SUBTITLE_SUFFIXES = ("", ".zh", ".chs", ".cht", ".en", ".eng")
-_SUBTITLE_EXTS = (".vtt", ".srt")
 _RECOGNIZE_TASK_DIR = os.path.join(MEDIA_BASE_DIR, "subtitle_recognize")
 _RECOGNIZE_TASK_RETENTION_SEC = 24 * 3600  # 终态任务记录保留 1 天
 
@@ -158,6 +158,8 @@ class SubtitleRecognizeMgr(BaseTaskMgr[SubtitleRecognizeTask]):
                         out = transcribe_to_sidecar(video_path, language=language)
                         outcome_path = str(out.get("path") or "")
                         outcome_success = True
+                        if outcome_path:
+                            subtitle_index.record(video_path, outcome_path)
                     except Exception as e:
                         outcome_error = str(e)
                         (log.warning if isinstance(e, WhisperError) else log.error)(
@@ -263,10 +265,11 @@ class SubtitleRecognizeMgr(BaseTaskMgr[SubtitleRecognizeTask]):
 
 
 class SubtitleMgr:
-    """ASSRT 搜索 / sidecar 字幕；识别见 ``recognize`` 队列。"""
+    """ASSRT 搜索 / sidecar 字幕（经 ``index`` 缓存目录清单与内容哈希）；识别见 ``recognize`` 队列。"""
 
     def __init__(self) -> None:
         self.default_base_dir = config.DEFAULT_BASE_DIR
+        self.index = subtitle_index
         self.recognize = SubtitleRecognizeMgr()
 
     def resolve_subtitles(self, video_path: str) -> dict[str, Any]:
@@ -279,28 +282,16 @@ class SubtitleMgr:
             if not normalized_video:
                 return _err(error_msg or "Invalid video_path")
 
-            tracks: list[dict[str, Any]] = []
-            last_dot = normalized_video.rfind(".")
-            if last_dot > 0:
-                base = normalized_video[:last_dot]
-                candidates = [f"{base}{suffix}{ext}" for suffix in _SUBTITLE_SUFFIXES for ext in _SUBTITLE_EXTS]
-                for candidate in candidates:
-                    ext = os.path.splitext(candidate)[1].lower()
-                    if ext not in _SUBTITLE_EXTS:
-                        continue
-                    normalized, _ = validate_and_normalize_path(
-                        candidate,
-                        self.default_base_dir,
-                        must_be_file=True,
-                    )
-                    if not normalized or not os.path.isfile(normalized):
-                        continue
-                    tracks.append({
-                        "path": normalized,
-                        "label": subtitle_label_from_path(normalized),
-                        "lang": subtitle_lang_from_path(normalized),
-                        "ext": ext.lstrip("."),
-                    })
+            # 同目录 sidecar 优先，其次是按内容哈希记录过的字幕（视频改名 / 复制后仍可用）
+            paths = self.index.sidecars(normalized_video)
+            paths += [p for p in self.index.known_subtitles(normalized_video)
+                      if p not in paths and os.path.splitext(p)[1].lower() in SUBTITLE_EXTS]
+            tracks: list[dict[str, Any]] = [{
+                "path": path,
+                "label": subtitle_label_from_path(path),
+                "lang": subtitle_lang_from_path(path),
+                "ext": os.path.splitext(path)[1].lstrip(".").lower(),
+            } for path in paths]
 
             return _ok({"tracks": tracks})
         except Exception as e:
@@ -369,6 +360,7 @@ class SubtitleMgr:
             log.error(f"[SUBTITLE] download failed: {e}")
             return _err(f"download subtitle failed: {e}")
 
+        self.index.record(normalized, result["path"])
         return _ok({
             "video_path": normalized,
             **result,
@@ -378,4 +370,4 @@ class SubtitleMgr:
         })
 
 
-subtitle_mgr = SubtitleMgr()
+subtitle_mgr = mgr_registry.register('subtitle_mgr', SubtitleMgr, eager=True)
@@ -8,52 +8,67 @@
 某 user_id 无配置 = 该层不限制。
 
 全局配置存 Redis：task:block_time:global
+
+配置按原始 JSON 编译为按星期索引的时段表（CompiledBlockTime），
+每个用户的判定缓存到下一个时段边界；配置变化即对应新的编译结果。
 """
 from __future__ import annotations
 
 import json
-import time
-from datetime import datetime
-from typing import Any, Dict, Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from core.config import app_logger
 from core.db import rds_mgr
+from core.tools.cache import cache_registry
 
 log = app_logger
 
 GLOBAL_BLOCK_TIME_RDS_TABLE = "task:block_time"
 GLOBAL_BLOCK_TIME_RDS_ID = "global"
 _GLOBAL_CACHE_TTL_SEC = 30
-
-_UNCACHED = object()
-_global_cache_config: Any = _UNCACHED
-_global_cache_at: float = 0.0
+_COMPILED_CACHE_MAX = 256
+DAY_SECONDS = 24 * 3600
 
 
 def global_block_time_redis_key() -> str:
     return f"{GLOBAL_BLOCK_TIME_RDS_TABLE}:{GLOBAL_BLOCK_TIME_RDS_ID}"
 
 
+# 全局配置：(解析结果, 编译结果)；/setRdsData 写入该 key 时失效
+_global_cache = cache_registry.namespace('block_time_global', ttl=_GLOBAL_CACHE_TTL_SEC, maxsize=1,
+                                         rds_keys=(global_block_time_redis_key(),))
+# 编译结果按原始 JSON 缓存，配置变化即对应新的 key
+_compiled_cache = cache_registry.namespace('block_time_compiled', maxsize=_COMPILED_CACHE_MAX)
+
+
 def invalidate_global_block_time_cache() -> None:
     """清除全局配置进程内缓存（测试或写入后可选调用）。"""
-    global _global_cache_config, _global_cache_at
-    _global_cache_config, _global_cache_at = _UNCACHED, 0.0
+    _global_cache.invalidate()
 
 
-def get_global_block_time_config(*, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
-    """从 Redis 读取全局 block_time，解析后缓存（30s TTL）。"""
-    global _global_cache_config, _global_cache_at
-    now_mono = time.monotonic()
-    if not force_refresh and _global_cache_config is not _UNCACHED and now_mono - _global_cache_at < _GLOBAL_CACHE_TTL_SEC:
-        return _global_cache_config
+def _load_global_block_time() -> Tuple[Optional[Dict[str, Any]], Optional["CompiledBlockTime"]]:
     try:
         raw = rds_mgr.get_str(global_block_time_redis_key())
     except Exception as e:
         log.warning(f"读取全局 block_time 失败: {e}")
         raw = ""
-    _global_cache_config = parse_block_time_config(raw)
-    _global_cache_at = now_mono
-    return _global_cache_config
+    return parse_block_time_config(raw), compile_block_time(raw)
+
+
+def get_global_block_time_config(*, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+    """从 Redis 读取全局 block_time，解析后缓存（30s TTL）。"""
+    if force_refresh:
+        _global_cache.invalidate()
+    return _global_cache.get('global', _load_global_block_time)[0]
+
+
+def get_global_block_time_compiled(*, force_refresh: bool = False) -> Optional["CompiledBlockTime"]:
+    """全局 block_time 的编译结果（与 get_global_block_time_config 共用 30s 缓存）。"""
+    if force_refresh:
+        _global_cache.invalidate()
+    return _global_cache.get('global', _load_global_block_time)[1]
 
 
 def parse_block_time_config(block_time_raw: Any) -> Optional[Dict[str, Any]]:
@@ -80,35 +95,111 @@ def _get_user_entry(config: Optional[Dict[str, Any]], user_id: int) -> Optional[
     return entry if isinstance(entry, dict) else None
 
 
-def _slot_matches(slot: Dict[str, Any], wd: int, t) -> bool:
-    weekdays = slot.get("weekdays") or []
-    if weekdays and wd not in weekdays:
-        return False
+def _slot_bounds(slot: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """时段起止（当天秒数）；格式无效返回 None。"""
     start_s, end_s = slot.get("start"), slot.get("end")
     if not start_s or not end_s:
-        return False
-    start = end = None
+        return None
     for fmt in ("%H:%M:%S", "%H:%M"):
         try:
             start = datetime.strptime(start_s, fmt).time()
             end = datetime.strptime(end_s, fmt).time()
-            break
-        except ValueError:
+        except (TypeError, ValueError):
             continue
-    if start is None or end is None:
-        return False
-    return (start <= t < end) if start <= end else (t >= start or t < end)
+        return (start.hour * 3600 + start.minute * 60 + start.second,
+                end.hour * 3600 + end.minute * 60 + end.second)
+    return None
+
+
+class CompiledEntry:
+    """单个用户 block_time 条目的编译结果：按星期（0=周日）索引的半开时段区间。"""
+
+    def __init__(self, entry: Dict[str, Any]) -> None:
+        block_type = entry.get("type") or "blacklist"
+        self.whitelist = block_type == "whitelist"
+        slots = entry.get("whitelist" if self.whitelist else "blacklist") or []
+        # 空白名单 = 不限制
+        self.always_open = self.whitelist and not slots
+        by_day: List[List[Tuple[int, int]]] = [[] for _ in range(7)]
+        for slot in slots:
+            if not isinstance(slot, dict):
+                continue
+            bounds = _slot_bounds(slot)
+            if bounds is None:
+                continue
+            start, end = bounds
+            # 跨零点时段（start > end）在同一星期内拆成两段，与逐条判断的语义一致
+            intervals = [(start, end)] if start <= end else [(start, DAY_SECONDS), (0, end)]
+            weekdays = slot.get("weekdays") or []
+            for wd in range(7):
+                if weekdays and wd not in weekdays:
+                    continue
+                by_day[wd].extend(iv for iv in intervals if iv[0] < iv[1])
+        self.by_day: Tuple[Tuple[Tuple[int, int], ...], ...] = tuple(tuple(sorted(day)) for day in by_day)
+
+    def state(self, now: datetime) -> Tuple[bool, datetime]:
+        """(是否禁用, 判定有效期截止时刻)；截止于下一个时段边界或当天结束。"""
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.always_open:
+            return False, midnight + timedelta(days=1)
+        t = (now - midnight).total_seconds()
+        intervals = self.by_day[(now.weekday() + 1) % 7]
+        in_slot = any(start <= t < end for start, end in intervals)
+        boundary = min((b for iv in intervals for b in iv if b > t), default=DAY_SECONDS)
+        blocked = not in_slot if self.whitelist else in_slot
+        return blocked, midnight + timedelta(seconds=boundary)
+
+
+class CompiledBlockTime:
+    """block_time 配置的编译结果，附带按用户缓存的判定（有效至下一个时段边界）。
+
+    配置变化时原始 JSON 不同，``compile_block_time`` 返回新的对象，旧判定自然失效。
+    """
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        self._entries: Dict[int, CompiledEntry] = {}
+        for key, entry in config.items():
+            if isinstance(entry, dict) and str(key).isdigit():
+                self._entries[int(key)] = CompiledEntry(entry)
+        self._decisions: Dict[int, Tuple[bool, datetime, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def has_entry(self, user_id: int) -> bool:
+        return user_id > 0 and user_id in self._entries
+
+    def is_blocked(self, user_id: int, now: datetime) -> Optional[bool]:
+        """该用户当前是否禁用；无此用户配置返回 None（该层不限制）。"""
+        if not self.has_entry(user_id):
+            return None
+        with self._lock:
+            cached = self._decisions.get(user_id)
+        if cached and cached[1] <= now < cached[2]:
+            return cached[0]
+        blocked, until = self._entries[user_id].state(now)
+        with self._lock:
+            self._decisions[user_id] = (blocked, now, until)
+        return blocked
+
+
+def _config_cache_key(block_time_raw: Any) -> Optional[str]:
+    if isinstance(block_time_raw, str):
+        return block_time_raw
+    if isinstance(block_time_raw, dict):
+        return json.dumps(block_time_raw, sort_keys=True, ensure_ascii=False)
+    return None
 
 
-def _is_blocked_by_entry(entry: Dict[str, Any], now: datetime) -> bool:
-    block_type = entry.get("type") or "blacklist"
-    slots = entry.get("whitelist" if block_type == "whitelist" else "blacklist") or []
-    if block_type == "whitelist" and not slots:
-        return False
+def compile_block_time(block_time_raw: Any) -> Optional[CompiledBlockTime]:
+    """解析并编译 block_time 配置（按原始 JSON 缓存）；无效或空配置返回 None。"""
+    key = _config_cache_key(block_time_raw)
+    if key is None:
+        return None
+
+    def _compile() -> Optional[CompiledBlockTime]:
+        config = parse_block_time_config(block_time_raw)
+        return CompiledBlockTime(config) if config else None
 
-    wd, t = (now.weekday() + 1) % 7, now.time()
-    in_slot = any(_slot_matches(slot, wd, t) for slot in slots if isinstance(slot, dict))
-    return not in_slot if block_type == "whitelist" else in_slot
+    return _compiled_cache.get(key, _compile)
 
 
 def is_global_block_time_now(
@@ -121,10 +212,8 @@ def is_global_block_time_now(
     now = now or datetime.now()
     if date_str != now.strftime("%Y-%m-%d"):
         return False
-    entry = _get_user_entry(get_global_block_time_config(), user_id)
-    if not entry:
-        return False
-    return _is_blocked_by_entry(entry, now)
+    compiled = get_global_block_time_compiled()
+    return bool(compiled and compiled.is_blocked(user_id, now))
 
 
 def is_in_block_time_now(
@@ -138,7 +227,5 @@ def is_in_block_time_now(
     now = now or datetime.now()
     if date_str != now.strftime("%Y-%m-%d"):
         return False
-    entry = _get_user_entry(parse_block_time_config(block_time_raw), user_id)
-    if not entry:
-        return False
-    return _is_blocked_by_entry(entry, now)
+    compiled = compile_block_time(block_time_raw)
+    return bool(compiled and compiled.is_blocked(user_id, now))
@@ -0,0 +1,194 @@
+"""素材时长回填队列。
+
+视频素材缺少 duration 时，由这里统一用 ffprobe 探测并回写 t_material：
+- 同一素材 ID 排队或探测中时不重复提交（刷新风暴只会产生一次探测）；
+- 探测在原生线程中执行，同时运行的 worker 不超过 ``workers``；
+- 探测失败的素材在 ``retry_after`` 秒内不再提交，避免坏文件被反复 ffprobe；
+- 启动时在后台扫描整张 t_material，提前补齐缺失的时长。
+
+进度通过 ``stats()``（``/material/duration/backfill``）与 /metrics 输出。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple, cast
+
+from flask import Flask, current_app, has_app_context
+
+from core.config import app_logger
+from core.config.const import DEFAULT_BASE_DIR
+from core.db.db_mgr import db_mgr
+from core.tools.metrics import registry
+from core.utils import get_media_duration, validate_and_normalize_path
+
+log = app_logger
+
+TABLE_MATERIAL = 't_material'
+MATERIAL_TYPE_VIDEO = 1
+
+BACKFILL_WORKERS = 2  # 同时运行的 ffprobe 上限
+BACKFILL_RETRY_AFTER = 600  # 探测失败后多久允许重新提交（秒）
+SWEEP_PAGE_SIZE = 200
+
+_BACKFILL_RESULTS = registry.counter('material_duration_backfill_total', '素材时长回填次数',
+                                     ('result',))
+_BACKFILL_QUEUE = registry.gauge('material_duration_backfill_queue', '素材时长回填队列中（含探测中）的素材数')
+
+
+class DurationBackfill:
+    """素材时长回填队列：按素材 ID 去重，限制并发探测数。"""
+
+    def __init__(self,
+                 workers: int = BACKFILL_WORKERS,
+                 retry_after: float = BACKFILL_RETRY_AFTER) -> None:
+        self.workers = workers
+        self.retry_after = retry_after
+        self._app: Optional[Flask] = None
+        self._lock = threading.Lock()
+        self._queue: Deque[Tuple[int, str]] = deque()
+        self._pending: Set[int] = set()  # 排队中 + 探测中
+        self._failed_at: Dict[int, float] = {}
+        self._running = 0
+        self._stats: Dict[str, int] = {'submitted': 0, 'deduplicated': 0, 'filled': 0, 'failed': 0}
+        self._sweep: Dict[str, Any] = {'running': False, 'scanned': 0, 'missing': 0, 'finished_at': None}
+
+    def init(self, app: Flask) -> None:
+        self._app = app
+
+    def _resolve_app(self) -> Optional[Flask]:
+        if self._app is None and has_app_context():
+            self._app = cast(Any, current_app)._get_current_object()
+        return self._app
+
+    # ---------- 队列 ----------
+
+    def submit(self, material_id: int, path: str) -> bool:
+        """提交回填；已在队列中、探测中或近期失败时返回 False。"""
+        if not material_id or not path:
+            return False
+        app = self._resolve_app()
+        if app is None:
+            log.warning(f"[Backfill] 未初始化应用，忽略素材 {material_id}")
+            return False
+        with self._lock:
+            failed_at = self._failed_at.get(material_id)
+            if material_id in self._pending or (failed_at and time.monotonic() - failed_at < self.retry_after):
+                self._stats['deduplicated'] += 1
+                _BACKFILL_RESULTS.labels('deduplicated').inc()
+                return False
+            self._pending.add(material_id)
+            self._queue.append((material_id, path))
+            self._stats['submitted'] += 1
+            start_worker = self._running < self.workers
+            if start_worker:
+                self._running += 1
+        if start_worker:
+            threading.Thread(target=self._worker, args=(app,), daemon=True).start()
+        return True
+
+    def _worker(self, app: Flask) -> None:
+        """取队列直到为空后退出；worker 数由 submit 控制。"""
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._running -= 1
+                    return
+                material_id, path = self._queue.popleft()
+            try:
+                with app.app_context():
+                    ok = self._fill(material_id, path)
+            except Exception as e:
+                log.error(f"[Backfill] 回填素材 {material_id} 时长失败: {e}")
+                ok = False
+            with self._lock:
+                self._pending.discard(material_id)
+                if ok:
+                    self._failed_at.pop(material_id, None)
+                    self._stats['filled'] += 1
+                else:
+                    self._failed_at[material_id] = time.monotonic()
+                    self._stats['failed'] += 1
+            _BACKFILL_RESULTS.labels('filled' if ok else 'failed').inc()
+
+    @staticmethod
+    def _fill(material_id: int, path: str) -> bool:
+        p, _ = validate_and_normalize_path(path, DEFAULT_BASE_DIR, must_be_file=True)
+        duration = get_media_duration(p) if p else None
+        if not duration:
+            log.warning(f"[Backfill] 无法获取素材 {material_id} 时长: {path}")
+            return False
+        res = db_mgr.set_data(TABLE_MATERIAL, {'id': material_id, 'duration': duration})
+        return res.get('code') == 0
+
+    # ---------- 启动扫描 ----------
+
+    def sweep(self) -> int:
+        """分页扫描 t_material，把缺少时长的视频素材全部提交到队列；返回提交数。"""
+        app = self._resolve_app()
+        if app is None:
+            return 0
+        with self._lock:
+            if self._sweep['running']:
+                return 0
+            self._sweep.update(running=True, scanned=0, missing=0, finished_at=None)
+        submitted = 0
+        try:
+            with app.app_context():
+                page = 1
+                while True:
+                    res = db_mgr.get_list(TABLE_MATERIAL,
+                                          page_num=page,
+                                          page_size=SWEEP_PAGE_SIZE,
+                                          fields=['id', 'duration', 'path'],
+                                          conditions={'type': MATERIAL_TYPE_VIDEO})
+                    if res.get('code') != 0:
+                        log.warning(f"[Backfill] 扫描素材失败: {res.get('msg')}")
+                        break
+                    rows = (res.get('data') or {}).get('data') or []
+                    missing = [r for r in rows if not r.get('duration') and r.get('path')]
+                    with self._lock:
+                        self._sweep['scanned'] += len(rows)
+                        self._sweep['missing'] += len(missing)
+                    submitted += sum(1 for r in missing if self.submit(r['id'], r['path']))
+                    if len(rows) < SWEEP_PAGE_SIZE:
+                        break
+                    page += 1
+        finally:
+            with self._lock:
+                self._sweep.update(running=False, finished_at=time.time())
+        log.info(f"[Backfill] 启动扫描完成: 扫描 {self._sweep['scanned']} 个视频素材，提交 {submitted} 个")
+        return submitted
+
+    def start(self, app: Flask) -> None:
+        """记录应用并在后台执行启动扫描。"""
+        self.init(app)
+        threading.Thread(target=self.sweep, daemon=True).start()
+
+    # ---------- 指标 ----------
+
+    def queue_size(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                'queued': len(self._queue),
+                'in_flight': len(self._pending) - len(self._queue),
+                'workers': self._running,
+                'sweep': dict(self._sweep),
+            }
+
+
+duration_backfill = DurationBackfill()
+
+
+def _collect_backfill_metrics() -> None:
+    _BACKFILL_QUEUE.set(duration_backfill.queue_size())
+
+
+registry.add_collector(_collect_backfill_metrics)
@@ -6,17 +6,16 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, cast
-
-from flask import current_app
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from core.config import app_logger
-from core.config.const import DEFAULT_BASE_DIR
 from core.db.db_mgr import db_mgr
-from core.tools.async_util import run_in_background
-from core.utils import fmt_ts, get_media_duration, validate_and_normalize_path, _ok, _err
-from .block_time import is_global_block_time_now, parse_block_time_config, _get_user_entry, _is_blocked_by_entry
+from core.tools.lazy import mgr_registry
+from core.utils import fmt_ts, _ok, _err
+from .block_time import CompiledBlockTime, compile_block_time, get_global_block_time_compiled
+from .duration_backfill import duration_backfill
+from .material_stats import material_stats
 
 log = app_logger
 
@@ -25,6 +24,10 @@ TABLE_TASK = 't_task'
 TABLE_MATERIAL_CATEGORY = 't_material_category'
 TABLE_UNLIMIT = 't_material_unlimit'
 
+MATERIAL_STATUS_FIELDS = ['id', 'type', 'duration', 'statistics', 'path']
+MATERIAL_STATUS_BATCH_MAX = 200  # 批量查询素材状态的上限
+UNLIMIT_SCAN_MAX = 1000  # 单个用户生效中的不限时记录读取上限
+
 
 class MaterialMgr:
     """素材管理器"""
@@ -35,37 +38,106 @@ class MaterialMgr:
     LOCK_CODE_DURATION = 3  # 视频观看时长超限
 
     @staticmethod
-    def _get_active_unlimit(user_id: int,
-                            material_id: int = 0,
-                            task_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
-        """检查用户是否存在有效的不限时记录。"""
+    def _load_active_unlimits(user_id: int) -> List[Dict[str, Any]]:
+        """一次查询用户所有生效中的不限时记录（用户级 + 素材级）。"""
         try:
-            now_iso = fmt_ts()
-            base = {
-                'user_id': user_id,
-                'status': 'approved',
-                'expires_at': {
-                    '>': now_iso
-                },
-            }
-            # 1/2=用户级不限时
-            r = db_mgr.get_list(TABLE_UNLIMIT, page_size=1, conditions={
-                                **base, 'lock_code': {'in': [1, 2]}})
-            if r.get('code') == 0 and r.get('data', {}).get('data'):
-                return r['data']['data'][0]
-            # 3=素材级不限时，需匹配素材和任务
             r = db_mgr.get_list(TABLE_UNLIMIT,
-                                page_size=1,
+                                page_size=UNLIMIT_SCAN_MAX,
                                 conditions={
-                                    **base, 'lock_code': 3,
-                                    'material_id': material_id,
-                                    'task_id': task_id
+                                    'user_id': user_id,
+                                    'status': 'approved',
+                                    'expires_at': {
+                                        '>': fmt_ts()
+                                    },
                                 })
-            if r.get('code') == 0 and r.get('data', {}).get('data'):
-                return r['data']['data'][0]
+            if r.get('code') == 0:
+                return (r.get('data') or {}).get('data') or []
+        except Exception as e:
+            log.warning(f"查询不限时记录失败: user={user_id}, {e}")
+        return []
+
+    @staticmethod
+    def _match_unlimit(unlimits: List[Dict[str, Any]],
+                       material_id: int,
+                       task_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """1/2=用户级不限时优先；3=素材级不限时，需匹配素材和任务。"""
+        for row in unlimits:
+            if row.get('lock_code') in (1, 2):
+                return row
+        for row in unlimits:
+            if row.get('lock_code') == 3 and row.get('material_id') == material_id and row.get('task_id') == task_id:
+                return row
+        return None
+
+    @staticmethod
+    def _get_active_unlimit(user_id: int,
+                            material_id: int = 0,
+                            task_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """检查用户是否存在有效的不限时记录。"""
+        return MaterialMgr._match_unlimit(MaterialMgr._load_active_unlimits(user_id), material_id, task_id)
+
+    @staticmethod
+    def _get_task_block_time(task_id: Optional[int]) -> Optional[CompiledBlockTime]:
+        """任务级 block_time 编译结果；无任务或无配置返回 None。"""
+        if not task_id or task_id <= 0:
             return None
-        except Exception:
+        task_res = db_mgr.get_data(TABLE_TASK, task_id, 'block_time')
+        if task_res.get('code') != 0 or not task_res.get('data'):
             return None
+        return compile_block_time(task_res['data'].get('block_time', '{}'))
+
+    @staticmethod
+    def _block_time_lock(user_id: int, task_block: Optional[CompiledBlockTime], now: datetime) -> Optional[Dict[str, Any]]:
+        """禁用时段锁定（与素材无关）：任务有此用户的配置则以任务为准，否则回退到全局配置。"""
+        if task_block is not None and task_block.has_entry(user_id):
+            if task_block.is_blocked(user_id, now):
+                return {"lock": MaterialMgr.LOCK_CODE_TASK_BLOCK, "reason": "当前处于任务禁用时段"}
+            return None
+        global_block = get_global_block_time_compiled()
+        if global_block is not None and global_block.is_blocked(user_id, now):
+            return {"lock": MaterialMgr.LOCK_CODE_GLOBAL_BLOCK, "reason": "当前处于全局禁用时段"}
+        return None
+
+    @staticmethod
+    def _evaluate_status(user_id: int,
+                         material_id: int,
+                         mat: Dict[str, Any],
+                         unlimits: List[Dict[str, Any]],
+                         block_lock: Optional[Dict[str, Any]],
+                         task_id: Optional[int]) -> Dict[str, Any]:
+        """根据已查询的数据计算单个素材的锁定状态（不再访问数据库）。"""
+        material_duration = mat.get('duration')
+
+        # 0. 有效的不限时记录——通过审批后应无视所有锁定
+        if MaterialMgr._match_unlimit(unlimits, material_id, task_id):
+            return {"lock": MaterialMgr.LOCK_CODE_NONE, "duration": material_duration, "unlimit": True}
+
+        # 1. 禁用时段（任务配置优先于全局）
+        if block_lock:
+            return dict(block_lock)
+
+        # 非视频类型不检查时长锁定
+        if mat.get('type') != 1:
+            return {"lock": MaterialMgr.LOCK_CODE_NONE}
+
+        if not material_duration:
+            path = mat.get('path')
+            if path:
+                duration_backfill.submit(material_id, path)
+            return {"lock": MaterialMgr.LOCK_CODE_NONE}
+
+        stats = mat.get('statistics') or {}
+        if isinstance(stats, str):
+            stats = json.loads(stats)
+        # statistics 由 t_material_stat 定时刷新，加上尚未写入的增量
+        user_stats = int(stats.get(str(user_id), 0) or 0) + material_stats.pending_seconds(material_id, user_id)
+        if user_stats >= float(material_duration) * 1.2:
+            return {
+                "lock": MaterialMgr.LOCK_CODE_DURATION,
+                "reason": "观看时长超限 " + str(user_stats) + "s",
+                "duration": material_duration
+            }
+        return {"lock": MaterialMgr.LOCK_CODE_NONE, "duration": material_duration}
 
     def delete_material_category(self, category_id: int, delete_materials: bool = False) -> Dict[str, Any]:
         """删除素材分类（文件夹）"""
@@ -175,85 +247,66 @@ class MaterialMgr:
         优先级：任务级 block_time 配置优先于全局配置。
         """
         try:
-            now = datetime.now()
-            date_str = now.strftime('%Y-%m-%d')
-
-            # 先查询素材基本信息（type, duration, path），后续多种检查都可能用到
             res = db_mgr.get_data(
                 TABLE_MATERIAL, material_id, 'type,duration,statistics,path')
             if res.get('code') != 0:
                 return _err("素材不存在", {"lock": MaterialMgr.LOCK_CODE_NONE})
 
-            mat = res['data']
-            material_duration = mat.get('duration')
-
-            # 0. 优先检查是否存在有效的不限时记录——通过审批后应无视所有锁定
-            active_unlimit = MaterialMgr._get_active_unlimit(
-                user_id, material_id, task_id)
-            if active_unlimit:
-                return _ok({"lock": MaterialMgr.LOCK_CODE_NONE, "duration": material_duration, "unlimit": True})
-
-            # 1. 检查任务级 block_time（任务配置优先于全局）
-            if task_id and task_id > 0:
-                task_res = db_mgr.get_data(TABLE_TASK, task_id, 'block_time')
-                if task_res.get('code') == 0 and task_res.get('data'):
-                    block_time_raw = task_res['data'].get('block_time', '{}')
-                    config = parse_block_time_config(block_time_raw)
-                    task_entry = _get_user_entry(config, user_id)
-                    if task_entry is not None:
-                        # 任务有此用户的 block_time 配置 → 以任务配置为准
-                        if _is_blocked_by_entry(task_entry, now):
-                            return _ok({"lock": MaterialMgr.LOCK_CODE_TASK_BLOCK, "reason": "当前处于任务禁用时段"})
-                    else:
-                        # 任务无此用户的配置 → 回退到全局检查
-                        if is_global_block_time_now(date_str, user_id, now=now):
-                            return _ok({"lock": MaterialMgr.LOCK_CODE_GLOBAL_BLOCK, "reason": "当前处于全局禁用时段"})
-                else:
-                    # 任务无 block_time 配置 → 回退到全局检查
-                    if is_global_block_time_now(date_str, user_id, now=now):
-                        return _ok({"lock": MaterialMgr.LOCK_CODE_GLOBAL_BLOCK, "reason": "当前处于全局禁用时段"})
-            else:
-                # 无 task_id → 只检查全局
-                if is_global_block_time_now(date_str, user_id, now=now):
-                    return _ok({"lock": MaterialMgr.LOCK_CODE_GLOBAL_BLOCK, "reason": "当前处于全局禁用时段"})
-
-            # 非视频类型不检查时长锁定
-            if mat.get('type') != 1:
-                return _ok({"lock": MaterialMgr.LOCK_CODE_NONE})
-
-            if not material_duration:
-                path = mat.get('path')
-                if path:
-                    app = cast(Any, current_app)._get_current_object()
-                    mid = material_id
-
-                    def _fetch(fp=path, m_id=mid):
-                        with app.app_context():
-                            p, _ = validate_and_normalize_path(
-                                fp, DEFAULT_BASE_DIR, must_be_file=True)
-                            d = get_media_duration(p) if p else None
-                            if d:
-                                db_mgr.set_data(TABLE_MATERIAL, {
-                                                'id': m_id, 'duration': d})
-
-                    run_in_background(_fetch)
-                return _ok({"lock": MaterialMgr.LOCK_CODE_NONE})
-
-            stats = mat.get('statistics') or {}
-            if isinstance(stats, str):
-                stats = json.loads(stats)
-            user_stats = int(stats.get(str(user_id), 0) or 0)
-            if user_stats >= float(material_duration) * 1.2:
-                return _ok({
-                    "lock": MaterialMgr.LOCK_CODE_DURATION,
-                    "reason": "观看时长超限 " + str(user_stats) + "s",
-                    "duration": material_duration
-                })
-            return _ok({"lock": MaterialMgr.LOCK_CODE_NONE, "duration": material_duration})
+            unlimits = MaterialMgr._load_active_unlimits(user_id)
+            block_lock = None
+            if not MaterialMgr._match_unlimit(unlimits, material_id, task_id):
+                block_lock = MaterialMgr._block_time_lock(
+                    user_id, MaterialMgr._get_task_block_time(task_id), datetime.now())
+            return _ok(MaterialMgr._evaluate_status(user_id, material_id, res['data'], unlimits, block_lock, task_id))
         except Exception as e:
             log.error(f"获取素材状态失败: material_id={material_id}, {e}")
             return _err(f"获取失败: {str(e)}", {"lock": MaterialMgr.LOCK_CODE_NONE})
 
+    def get_materials_status(self,
+                             user_id: int,
+                             material_ids: List[int],
+                             task_id: Optional[int] = None) -> Dict[str, Any]:
+        """批量获取素材锁定状态，查询次数与素材数量无关。
+
+        素材信息、不限时记录、任务 block_time 各查询一次；全局 block_time 走进程内缓存。
+        返回 ``{"statuses": {素材ID: 状态}}``，状态结构同 get_material_status；不存在的素材
+        返回 ``{"lock": 0, "missing": True}``。
+        """
+        ids = list(dict.fromkeys(material_ids))
+        if len(ids) > MATERIAL_STATUS_BATCH_MAX:
+            return _err(f"单次最多查询 {MATERIAL_STATUS_BATCH_MAX} 个素材")
+        if not ids:
+            return _ok({"statuses": {}})
+        try:
+            res = db_mgr.get_list(TABLE_MATERIAL,
+                                  page_size=len(ids),
+                                  fields=MATERIAL_STATUS_FIELDS,
+                                  conditions={'id': {'in': ids}})
+            if res.get('code') != 0:
+                return _err(f"查询失败: {res.get('msg')}")
+            materials = {row.get('id'): row for row in (res.get('data') or {}).get('data') or []}
+
+            unlimits = MaterialMgr._load_active_unlimits(user_id)
+            block_lock = MaterialMgr._block_time_lock(
+                user_id, MaterialMgr._get_task_block_time(task_id), datetime.now())
+
+            statuses: Dict[str, Dict[str, Any]] = {}
+            for mid in ids:
+                mat = materials.get(mid)
+                if mat is None:
+                    statuses[str(mid)] = {"lock": MaterialMgr.LOCK_CODE_NONE, "missing": True}
+                    continue
+                try:
+                    statuses[str(mid)] = MaterialMgr._evaluate_status(
+                        user_id, mid, mat, unlimits, block_lock, task_id)
+                except Exception as e:
+                    log.error(f"获取素材状态失败: material_id={mid}, {e}")
+                    statuses[str(mid)] = {"lock": MaterialMgr.LOCK_CODE_NONE}
+            return _ok({"statuses": statuses})
+        except Exception as e:
+            log.error(f"批量获取素材状态失败: user={user_id}, {e}")
+            return _err(f"获取失败: {str(e)}")
+
     def apply_unlimit(
         self,
         user_id: int,
@@ -463,4 +516,4 @@ class MaterialMgr:
             return _err(f"操作失败: {str(e)}")
 
 
-material_mgr = MaterialMgr()
+material_mgr = mgr_registry.register('material_mgr', MaterialMgr)
@@ -0,0 +1,223 @@
+"""素材观看时长统计。
+
+观看时长存放在窄表 t_material_stat (material_id, user_id, seconds)，代替读改写整个
+t_material.statistics JSON：
+- ``add`` 只在内存中按 (素材, 用户) 累加，心跳请求不再访问数据库；
+- ``flush`` 定时把累加值用 ``INSERT ... ON CONFLICT DO UPDATE SET seconds = seconds + excluded.seconds``
+  批量写入，多个进程 / 并发心跳不会丢失增量；写入失败时增量合并回内存，下次重试；
+- 兼容旧读者：同一事务内按窄表重算被更新素材的 t_material.statistics（``{"用户ID": 秒}``），
+  另提供视图 v_material_statistics (id, statistics)；
+- 首次建表时把已有的 t_material.statistics 导入窄表。
+
+锁定判定读取 t_material.statistics 后加上 ``pending_seconds``（尚未写入的增量），不受刷新间隔影响。
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from flask import Flask, current_app, has_app_context
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.dialects.sqlite import insert
+
+from core.config import app_logger
+from core.db import db_obj
+from core.models.material_stat import MaterialStat
+from core.tools.metrics import registry
+from core.utils import fmt_ts
+
+log = app_logger
+
+TABLE_MATERIAL = 't_material'
+VIEW_MATERIAL_STATISTICS = 'v_material_statistics'
+FLUSH_INTERVAL = 10  # 内存累加值写入数据库的间隔（秒）
+MIGRATE_PAGE_SIZE = 500
+
+_STATS_FLUSHED = registry.counter('material_stats_flushed_total', '写入 t_material_stat 的 (素材, 用户) 增量条数',
+                                  ('result',))
+_STATS_PENDING = registry.gauge('material_stats_pending', '内存中尚未写入的 (素材, 用户) 增量条数')
+
+# 通过 metadata 取 Table（声明式模型的 __table__ 在类型层面没有 insert/create）
+_STAT_TABLE = MaterialStat.metadata.tables[MaterialStat.__tablename__]
+
+# json_group_object 的键为字符串用户 ID，与旧 statistics 结构一致
+_STATISTICS_JSON = "json_group_object(CAST(user_id AS TEXT), seconds)"
+_REFRESH_STATISTICS = text(
+    f"UPDATE {TABLE_MATERIAL} SET statistics = "
+    f"(SELECT {_STATISTICS_JSON} FROM t_material_stat WHERE material_id = {TABLE_MATERIAL}.id) "
+    "WHERE id IN :ids").bindparams(bindparam('ids', expanding=True))
+_SELECT_STATS = text("SELECT material_id, user_id, seconds FROM t_material_stat "
+                     "WHERE material_id IN :ids").bindparams(bindparam('ids', expanding=True))
+
+
+class MaterialStats:
+    """素材观看时长的内存累加与定时批量写入。"""
+
+    def __init__(self, flush_interval: int = FLUSH_INTERVAL) -> None:
+        self.flush_interval = flush_interval
+        self._app: Optional[Flask] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[Tuple[int, int], int] = {}
+        self._table_ready = False
+
+    def _resolve_app(self) -> Optional[Flask]:
+        if self._app is None and has_app_context():
+            self._app = cast(Any, current_app)._get_current_object()
+        return self._app
+
+    # ---------- 累加 ----------
+
+    def add(self, material_id: int, user_id: int, seconds: int) -> None:
+        """累加观看时长（只写内存）。"""
+        if not material_id or not seconds or user_id is None:
+            return
+        self._resolve_app()
+        key = (int(material_id), int(user_id))
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + int(seconds)
+
+    def pending_seconds(self, material_id: int, user_id: int) -> int:
+        """尚未写入数据库的观看时长。"""
+        with self._lock:
+            return self._pending.get((int(material_id), int(user_id)), 0)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # ---------- 写入 ----------
+
+    def flush(self) -> int:
+        """把内存中的增量写入 t_material_stat 并刷新对应素材的 statistics，返回写入条数。"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception as e:
+                db_obj.session.rollback()
+                with self._lock:
+                    for key, seconds in batch.items():
+                        self._pending[key] = self._pending.get(key, 0) + seconds
+                _STATS_FLUSHED.labels('failed').inc(len(batch))
+                log.error(f"[MaterialStats] 写入观看时长失败，{len(batch)} 条增量保留到下次: {e}")
+                return 0
+            _STATS_FLUSHED.labels('ok').inc(len(batch))
+            return len(batch)
+
+    def _write(self, batch: Dict[Tuple[int, int], int]) -> None:
+        self.ensure_table()
+        dt = fmt_ts()
+        stmt = insert(_STAT_TABLE)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_STAT_TABLE.c.material_id, _STAT_TABLE.c.user_id],
+            set_={'seconds': _STAT_TABLE.c.seconds + stmt.excluded.seconds, 'dt': stmt.excluded.dt},
+        )
+        rows = [{'material_id': m, 'user_id': u, 'seconds': s, 'dt': dt} for (m, u), s in batch.items()]
+        db_obj.session.execute(stmt, rows)
+        db_obj.session.execute(_REFRESH_STATISTICS, {'ids': sorted({m for m, _ in batch})})
+        db_obj.session.commit()
+
+    # ---------- 读取 ----------
+
+    def get_statistics(self, material_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """按窄表（加上未写入的增量）返回 ``{素材ID: {"用户ID": 秒}}``。"""
+        ids = sorted({int(i) for i in material_ids})
+        result: Dict[int, Dict[str, int]] = {i: {} for i in ids}
+        if not ids:
+            return result
+        self.ensure_table()
+        rows = db_obj.session.execute(_SELECT_STATS, {'ids': ids}).fetchall()
+        for material_id, user_id, seconds in rows:
+            result[material_id][str(user_id)] = seconds
+        with self._lock:
+            for (material_id, user_id), seconds in self._pending.items():
+                if material_id in result:
+                    stats = result[material_id]
+                    stats[str(user_id)] = stats.get(str(user_id), 0) + seconds
+        return result
+
+    # ---------- 建表与迁移 ----------
+
+    def ensure_table(self) -> None:
+        """创建 t_material_stat 与兼容视图；首次建表时导入已有的 t_material.statistics。"""
+        if self._table_ready:
+            return
+        engine = db_obj.engine
+        created = not inspect(engine).has_table(MaterialStat.__tablename__)
+        if created:
+            _STAT_TABLE.create(engine, checkfirst=True)
+        db_obj.session.execute(text(
+            f"CREATE VIEW IF NOT EXISTS {VIEW_MATERIAL_STATISTICS} AS "
+            f"SELECT material_id AS id, {_STATISTICS_JSON} AS statistics "
+            "FROM t_material_stat GROUP BY material_id"))
+        db_obj.session.commit()
+        self._table_ready = True
+        if created:
+            self._migrate()
+
+    def _migrate(self) -> None:
+        if not inspect(db_obj.engine).has_table(TABLE_MATERIAL):
+            return
+        imported = 0
+        last_id = 0
+        dt = fmt_ts()
+        while True:
+            rows = db_obj.session.execute(
+                text(f"SELECT id, statistics FROM {TABLE_MATERIAL} WHERE id > :last "
+                     "AND statistics IS NOT NULL AND statistics NOT IN ('', '{}') ORDER BY id LIMIT :n"),
+                {'last': last_id, 'n': MIGRATE_PAGE_SIZE}).fetchall()
+            if not rows:
+                break
+            values = []
+            for material_id, raw in rows:
+                last_id = material_id
+                try:
+                    stats = json.loads(raw)
+                except ValueError:
+                    log.warning(f"[MaterialStats] 素材 {material_id} 的 statistics 不是合法 JSON，跳过迁移")
+                    continue
+                for user_key, seconds in (stats or {}).items():
+                    if str(user_key).lstrip('-').isdigit() and seconds:
+                        values.append({'material_id': material_id, 'user_id': int(user_key),
+                                       'seconds': int(seconds), 'dt': dt})
+            if values:
+                db_obj.session.execute(_STAT_TABLE.insert(), values)
+                imported += len(values)
+            db_obj.session.commit()
+        log.info(f"[MaterialStats] 已从 t_material.statistics 导入 {imported} 条观看时长")
+
+    # ---------- 启动 ----------
+
+    def _flush_job(self) -> None:
+        app = self._resolve_app()
+        if app is None or not self.pending_count():
+            return
+        with app.app_context():
+            self.flush()
+
+    def start(self, app: Flask) -> None:
+        """建表 / 迁移，并注册定时写入与退出时写入。"""
+        from core.services.scheduler_mgr import scheduler_mgr
+
+        self._app = app
+        with app.app_context():
+            self.ensure_table()
+        scheduler_mgr.add_interval_job(self._flush_job, 'material_stats_flush', seconds=self.flush_interval)
+        atexit.register(self._flush_job)
+
+
+material_stats = MaterialStats()
+
+
+def _collect_stats_metrics() -> None:
+    _STATS_PENDING.set(material_stats.pending_count())
+
+
+registry.add_collector(_collect_stats_metrics)
@@ -4,15 +4,27 @@ import json
 from datetime import date, timedelta
 from typing import Any, Dict
 
+from core.tools.cache import cache_registry
 
 _EMPTY_REST_DAYS: Dict[str, Any] = {"weekdays": [], "dates": [], "work_dates": []}
+_REST_DAYS_CACHE_MAX = 512
+
+# 按原始 JSON 缓存解析结果（任务列表 / 日历每次请求都会对同一批任务重复解析）
+_rest_days_cache = cache_registry.namespace('rest_days', maxsize=_REST_DAYS_CACHE_MAX)
 
 
 def parse_rest_days(rest_days_raw: Any) -> Dict[str, Any]:
     """
     rest_days 存库为 JSON string（或在写路径/内存中为 dict）。
     这里做一次 parse，让后续计算都基于 dict，避免循环里反复 json.loads。
+    字符串输入的结果按原文缓存并在调用方之间共享，只读使用。
     """
+    if rest_days_raw and isinstance(rest_days_raw, str):
+        return _rest_days_cache.get(rest_days_raw, lambda: _parse_rest_days(rest_days_raw))
+    return _parse_rest_days(rest_days_raw)
+
+
+def _parse_rest_days(rest_days_raw: Any) -> Dict[str, Any]:
     if not rest_days_raw:
         return dict(_EMPTY_REST_DAYS)
     rule = json.loads(rest_days_raw) if isinstance(rest_days_raw, str) else rest_days_raw
@@ -9,6 +9,7 @@ import json
 
 from core.config import app_logger
 from core.db.db_mgr import db_mgr
+from core.tools.lazy import mgr_registry
 from core.utils import _ok, _err, fmt_ts
 from .rest_days import parse_rest_days, is_rest_day, get_workday_index, end_date_by_work_duration
 
@@ -493,4 +494,4 @@ class TaskMgr:
             return False, [f'日程{todo_id}' for todo_id in todo_ids]
 
 
-task_mgr = TaskMgr()
+task_mgr = mgr_registry.register('task_mgr', TaskMgr)
@@ -15,6 +15,7 @@ from core.db import db_obj
 from core.db.db_mgr import db_mgr
 from core.tools import serialize_data, serialize_object_list
 from core.types.todo_data import ScheduleData, ScheduleSave, Subtask
+from core.tools.lazy import mgr_registry
 
 log = app_logger
 
@@ -500,4 +501,4 @@ class TodoMgr:
             log.error(f"[TodoMgr] 更新用户积分异常: {e}", exc_info=True)
 
 
-todo_mgr = TodoMgr()
+todo_mgr = mgr_registry.register('todo_mgr', TodoMgr)
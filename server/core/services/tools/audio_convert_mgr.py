@@ -18,6 +18,7 @@ from core.config import (
     config,
 )
 from core.services.base_task_mgr import BaseTaskMgr, FileInfo, TaskBase, TaskProgress
+from core.tools.lazy import mgr_registry
 from core.utils import get_media_duration, get_unique_filepath, run_subprocess_safe
 
 log = app_logger
@@ -434,4 +435,4 @@ class AudioConvertMgr(BaseTaskMgr[AudioConvertTask]):
     _expected_output_path = _mp3_path
 
 
-audio_convert_mgr = AudioConvertMgr()
+audio_convert_mgr = mgr_registry.register('audio_convert_mgr', AudioConvertMgr)
@@ -9,15 +9,17 @@ import subprocess
 from dataclasses import asdict, dataclass
 
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any, cast
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Any, TypedDict, cast
 
 from core.services.base_task_mgr import BaseTaskMgr, FileInfo, TaskBase
 
 from core.config import app_logger
-from core.config import (ALLOWED_AUDIO_EXTENSIONS, MEDIA_BASE_DIR, FFMPEG_PATH, FFMPEG_TIMEOUT, get_media_task_dir,
+from core.config import (ALLOWED_AUDIO_EXTENSIONS, MEDIA_BASE_DIR, FFMPEG_PATH, get_media_task_dir,
                          get_media_task_result_dir, TASK_STATUS_PENDING, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS,
                          TASK_STATUS_FAILED)
 
+from core.tools.ffmpeg_runner import FfmpegCancelled, FfmpegProgress, run_ffmpeg
+from core.tools.lazy import mgr_registry
 from core.utils import ensure_directory as ensure_directory, get_media_duration, run_subprocess_safe
 
 # 音频合并任务目录（任务存档和最终文件保存在 base 目录）
@@ -28,12 +30,29 @@ log = app_logger
 AudioFileItem = FileInfo
 
 
+class MergeProgress(TypedDict):
+    percent: int  # 整体进度 0-100
+    processed_seconds: float  # 已合并的音频时长（秒，按各步骤输入时长加权）
+    total_seconds: float  # 需合并的音频总时长（秒；分层合并时含中间层）
+    speed: Optional[float]  # ffmpeg 处理速度（相对实时的倍数）
+    step: int  # 当前 ffmpeg 步骤（从 1 开始）
+    steps: int  # ffmpeg 步骤总数（分层合并时大于 1）
+
+
+class _MergeStep(NamedTuple):
+    """一次 ffmpeg concat：inputs 合并为 output，duration 为输入时长之和。"""
+    inputs: List[str]
+    output: str
+    duration: float
+
+
 @dataclass
 class AudioMergeTask(TaskBase):
     """音频合成任务"""
     files: List[AudioFileItem]
     result_file: Optional[str] = None  # 结果文件路径
     result_duration: Optional[float] = None  # 结果文件时长（秒）
+    progress: Optional[MergeProgress] = None  # 合并进度
 
 
 class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
@@ -42,6 +61,8 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
     TASK_META_FILE = 'tasks.json'  # 任务元数据文件名
     MERGED_FILENAME = 'merged.mp3'  # 合并后的文件名
     FFMPEG_DURATION_TIMEOUT = 10  # 获取文件时长的超时时间（秒）
+    MERGE_TIER_SIZE = 100  # 单个 ffmpeg 进程最多合并的输入数，超出时分层合并
+    MERGE_TMP_DIRNAME = 'merge_tmp'  # 任务目录下存放 concat 列表与中间文件的临时目录
 
     # 编译正则表达式以提高性能
     _DURATION_PATTERN = re.compile(r'Duration:\s*(\d{2}):(\d{2}):(\d{2})\.(\d{2})')
@@ -272,7 +293,8 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
     def start_task(self, task_id: str) -> Tuple[int, str]:
         """开始音频合并任务。
 
-        此方法会启动一个后台线程来执行 ffmpeg 合并操作。
+        此方法会启动一个后台线程来执行 ffmpeg 合并操作；进度写入任务的 progress，
+        可通过 stop_task 中途停止（终止 ffmpeg 并清理临时文件）。
 
         Args:
             task_id (str): 任务 ID。
@@ -292,7 +314,16 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
                 return -1, "任务中没有文件"
 
             def runner(t: AudioMergeTask) -> None:
-                result_file, result_duration = self._merge_audio_files(task_id, t.files)
+                t.progress = None
+                try:
+                    result_file, result_duration = self._merge_audio_files(task_id, t.files)
+                except FfmpegCancelled:
+                    t.status = TASK_STATUS_FAILED
+                    t.error_message = "任务已被停止"
+                    t.result_file = None
+                    t.result_duration = None
+                    log.info(f"[AudioMerge] 任务 {task_id} 已停止")
+                    return
                 if result_file:
                     t.result_file = result_file
                     if result_duration is None:
@@ -305,6 +336,7 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
                 else:
                     t.status = TASK_STATUS_FAILED
                     t.error_message = "合成失败"
+                    t.result_file = None
                     t.result_duration = None
                     log.error(f"[AudioMerge] 任务 {task_id} 合成失败")
 
@@ -367,10 +399,96 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
             return fallback_duration
         return self._get_file_duration_with_ffmpeg(result_file)
 
+    def _resolve_input_durations(self, task_id: str, files: List[AudioFileItem]) -> Optional[List[float]]:
+        """取各输入文件时长：优先用添加文件时缓存的 duration，缺失的探测一次并写回任务。
+
+        Returns:
+            各文件时长列表；任一文件无法获取时长时返回 None（结果时长改为合并后探测）。
+        """
+        durations: List[float] = []
+        probed = False
+        for file_info in files:
+            duration = file_info.get('duration')
+            if duration is None:
+                path = file_info.get('path')
+                duration = get_media_duration(path) if path else None
+                if duration is None:
+                    return None
+                file_info['duration'] = duration
+                probed = True
+            durations.append(float(duration))
+        if probed:
+            task = self._get_task(task_id)
+            if task:
+                self._save_task_and_update_time(task)
+        return durations
+
+    def _plan_merge_steps(self, inputs: List[Tuple[str, float]], tmp_dir: str,
+                          result_file: str) -> List[_MergeStep]:
+        """规划合并步骤：输入超过 MERGE_TIER_SIZE 时先分组合并为中间文件，逐层收敛到最终文件。
+
+        单个 ffmpeg 进程的输入数被限制在 MERGE_TIER_SIZE 以内，控制 concat 列表与打开文件的规模。
+        """
+        ext = os.path.splitext(self.MERGED_FILENAME)[1]
+        steps: List[_MergeStep] = []
+        level = 0
+        while len(inputs) > self.MERGE_TIER_SIZE:
+            next_inputs: List[Tuple[str, float]] = []
+            for start in range(0, len(inputs), self.MERGE_TIER_SIZE):
+                chunk = inputs[start:start + self.MERGE_TIER_SIZE]
+                if len(chunk) == 1:
+                    next_inputs.append(chunk[0])
+                    continue
+                output = os.path.join(tmp_dir, f"tier{level}_{start // self.MERGE_TIER_SIZE}{ext}")
+                duration = sum(d for _, d in chunk)
+                steps.append(_MergeStep([p for p, _ in chunk], output, duration))
+                next_inputs.append((output, duration))
+            inputs = next_inputs
+            level += 1
+        steps.append(_MergeStep([p for p, _ in inputs], result_file, sum(d for _, d in inputs)))
+        return steps
+
+    def _set_progress(self, task_id: str, progress: MergeProgress, save: bool = False) -> None:
+        """更新任务的合并进度（仅在步骤切换时落盘）。"""
+        with self._task_lock.gen_wlock():
+            task = self._get_task(task_id)
+            if not task:
+                return
+            task.progress = progress
+            if save:
+                self._save_task_and_update_time(task)
+
+    def _run_concat(self, task_id: str, step: _MergeStep, list_path: str,
+                    on_progress: Callable[[FfmpegProgress], None]) -> bool:
+        """用 concat demuxer 执行一个合并步骤，返回是否成功；停止请求时抛出 FfmpegCancelled。"""
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in step.inputs:
+                escaped = path.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmds = [
+            FFMPEG_PATH, '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy',
+            '-y', step.output
+        ]
+        log.info(f"[AudioMerge] 执行 ffmpeg 命令: {' '.join(cmds)}")
+        try:
+            returncode, stderr = run_ffmpeg(cmds, on_progress=on_progress,
+                                            should_stop=lambda: self._should_stop(task_id))
+        except TimeoutError:
+            log.error(f"[AudioMerge] ffmpeg 执行超时")
+            return False
+
+        if returncode == 0 and os.path.exists(step.output):
+            return True
+        error_msg = stderr if returncode != 0 else '文件不存在'
+        log.error(f"[AudioMerge] ffmpeg 执行失败: {error_msg}")
+        return False
+
     def _merge_audio_files(self, task_id: str, files: List[AudioFileItem]) -> Tuple[Optional[str], Optional[float]]:
         """使用 ffmpeg 合并音频文件。
 
-        如果只有一个文件，则直接复制。否则，使用 ffmpeg 的 concat demuxer 合并。
+        如果只有一个文件，则直接复制。否则，使用 ffmpeg 的 concat demuxer 合并：输入过多时分层合并，
+        ffmpeg 进程受监督运行，按 ``-progress`` 实时更新任务进度；结果时长由各输入的缓存时长求和得出。
 
         Args:
             task_id: 任务 ID。
@@ -378,10 +496,15 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
 
         Returns:
             Tuple[Optional[str], Optional[float]]: (结果文件路径, 时长秒)，失败则返回 (None, None)。
+
+        Raises:
+            FfmpegCancelled: 收到停止请求（临时文件与不完整的结果文件已清理）。
         """
         if not files:
             return None, None
 
+        tmp_dir: Optional[str] = None
+        result_file: Optional[str] = None
         try:
             result_dir = get_media_task_result_dir(task_id)
             result_file = os.path.join(result_dir, self.MERGED_FILENAME)
@@ -395,49 +518,76 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
                 duration = self._get_result_duration(result_file, files[0].get('duration'))
                 return result_file, duration
 
-            # 创建文件列表文件（用于 ffmpeg concat）
-            file_list_path = os.path.join(get_media_task_dir(task_id), 'file_list.txt')
-            with open(file_list_path, 'w', encoding='utf-8') as f:
-                for file_info in files:
-                    raw_path = file_info.get('path')
-                    if not raw_path:
-                        return None, None
-                    file_path = raw_path.replace("'", "'\\''")
-                    f.write(f"file '{file_path}'\n")
-
-            # 使用 ffmpeg 合并
-            cmds = [
-                FFMPEG_PATH, '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', file_list_path, '-c', 'copy',
-                '-y', result_file
-            ]
-
-            log.info(f"[AudioMerge] 执行 ffmpeg 命令: {' '.join(cmds)}")
-            # 使用公共方法安全地运行 subprocess，避免 gevent 与 asyncio 冲突
-            try:
-                returncode, _, stderr = run_subprocess_safe(cmds, timeout=FFMPEG_TIMEOUT)
-            except TimeoutError:
-                log.error(f"[AudioMerge] ffmpeg 执行超时")
+            paths = [file_info.get('path') for file_info in files]
+            if not all(paths):
                 return None, None
-            except Exception as e:
-                log.error(f"[AudioMerge] ffmpeg 执行失败: {e}")
-                return None, None
-
-            if returncode == 0 and os.path.exists(result_file):
-                # 从 ffmpeg 输出中解析时长，如果失败则使用 ffmpeg 快速获取
-                duration = self._parse_duration_from_ffmpeg_output(stderr)
-                duration = self._get_result_duration(result_file, duration)
-                return result_file, duration
-
-            error_msg = stderr if returncode != 0 else '文件不存在'
-            log.error(f"[AudioMerge] ffmpeg 执行失败: {error_msg}")
-            return None, None
-
+            durations = self._resolve_input_durations(task_id, files)
+            total_known = durations is not None
+
+            tmp_dir = os.path.join(get_media_task_dir(task_id), self.MERGE_TMP_DIRNAME)
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir, exist_ok=True)
+            inputs = list(zip(cast(List[str], paths), durations or [0.0] * len(paths)))
+            steps = self._plan_merge_steps(inputs, tmp_dir, result_file)
+            total_seconds = sum(step.duration for step in steps)
+            done_seconds = 0.0
+
+            for index, step in enumerate(steps):
+                if self._should_stop(task_id):
+                    raise FfmpegCancelled("任务已被停止")
+
+                def on_progress(p: FfmpegProgress, index: int = index, base: float = done_seconds,
+                                step_duration: float = step.duration) -> None:
+                    processed = base + min(p.out_time, step_duration) if total_known else 0.0
+                    if total_known and total_seconds > 0:
+                        percent = int(processed * 100 / total_seconds)
+                    else:
+                        percent = index * 100 // len(steps)
+                    self._set_progress(task_id, MergeProgress(
+                        percent=min(percent, 99), processed_seconds=round(processed, 2),
+                        total_seconds=round(total_seconds, 2), speed=p.speed, step=index + 1, steps=len(steps)))
+
+                self._set_progress(task_id, MergeProgress(
+                    percent=int(done_seconds * 100 / total_seconds) if total_seconds > 0 else index * 100 // len(steps),
+                    processed_seconds=round(done_seconds, 2), total_seconds=round(total_seconds, 2), speed=None,
+                    step=index + 1, steps=len(steps)), save=True)
+                list_path = os.path.join(tmp_dir, f'file_list_{index}.txt')
+                if not self._run_concat(task_id, step, list_path, on_progress):
+                    self._remove_file_quietly(result_file)
+                    return None, None
+                done_seconds += step.duration
+                # 中间文件的输入已合并完毕，尽早释放磁盘
+                for path in step.inputs:
+                    if os.path.dirname(path) == tmp_dir:
+                        self._remove_file_quietly(path)
+
+            self._set_progress(task_id, MergeProgress(
+                percent=100, processed_seconds=round(total_seconds, 2), total_seconds=round(total_seconds, 2),
+                speed=None, step=len(steps), steps=len(steps)), save=True)
+            duration = self._get_result_duration(result_file, round(steps[-1].duration, 3) if total_known else None)
+            return result_file, duration
+
+        except FfmpegCancelled:
+            log.info(f"[AudioMerge] 任务 {task_id} 已停止，清理临时文件")
+            if result_file:
+                self._remove_file_quietly(result_file)
+            raise
         except (FileNotFoundError, subprocess.TimeoutExpired) as e:
             log.error(f"[AudioMerge] ffmpeg 执行失败: {e}")
             return None, None
         except Exception as e:
             log.error(f"[AudioMerge] 合并音频文件失败: {e}")
             return None, None
+        finally:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _remove_file_quietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """获取指定任务的详细信息。
@@ -475,6 +625,9 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
         tasks.sort(key=lambda x: x.get('create_time', 0), reverse=True)
         return tasks
 
+    def _should_request_stop_before_delete(self, _task: AudioMergeTask) -> bool:
+        return True
+
     def _before_delete_task(self, task: AudioMergeTask) -> None:
         task_dir = get_media_task_dir(task.task_id)
         if os.path.exists(task_dir):
@@ -482,4 +635,4 @@ class AudioMergeMgr(BaseTaskMgr[AudioMergeTask]):
 
 
 # 创建全局实例
-audio_merge_mgr = AudioMergeMgr()
+audio_merge_mgr = mgr_registry.register('audio_merge_mgr', AudioMergeMgr)
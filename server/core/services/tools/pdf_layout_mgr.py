@@ -2,26 +2,41 @@
 PDF 排版管理服务
 提供 PDF 文件上传、排版处理、列表、下载等功能
 采用任务模式，每个文件对应一个任务，支持异步排版处理
+
+骑缝排版在源文档内原地完成：每个源页只生成一次 Form XObject，由对开页按引用放置，
+不复制页面内容；保存时 qpdf 从源文件按需读取并顺序写出，内存占用与页数基本无关。
 """
 import os
-from typing import Optional, Tuple, Any, Protocol
+from typing import TYPE_CHECKING, Callable, Optional, Tuple, Any, Protocol, TypedDict
 from dataclasses import dataclass
 
 from werkzeug.utils import secure_filename
 
 from core.services.base_task_mgr import BaseTaskMgr, FileInfo, TaskBase
 
-from pikepdf import Pdf
-
-import pikepdf
-
 from core.config import app_logger
 from core.config import (PDF_LAYOUT_BASE_DIR, PDF_LAYOUT_UPLOAD_DIR, PDF_LAYOUT_OUTPUT_DIR,
-                         TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS, TASK_STATUS_UPLOADED)
+                         TASK_STATUS_FAILED, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS, TASK_STATUS_UPLOADED)
+from core.tools.async_util import run_blocking
+from core.tools.lazy import lazy_import, mgr_registry
 from core.utils import ensure_directory, get_file_info, get_unique_filepath, is_allowed_pdf_file
 
+if TYPE_CHECKING:
+    import pikepdf
+else:
+    # pikepdf 较重，首次处理 PDF 时再加载
+    pikepdf = lazy_import('pikepdf')
+
 log = app_logger
 
+# 同步生成骑缝 PDF 的超时时间（秒）
+LAYOUT_SYNC_TIMEOUT = 600
+# 预览默认/最大对开页数
+PREVIEW_SPREADS = 4
+PREVIEW_MAX_SPREADS = 20
+# 排版阶段占整体进度的比例（其余为写文件阶段）
+_LAYOUT_PHASE_PERCENT = 30
+
 
 class FileLike(Protocol):
 
@@ -32,6 +47,17 @@ class FileLike(Protocol):
 PdfLayoutFileInfo = FileInfo
 
 
+class LayoutProgress(TypedDict):
+    phase: str  # layout / save / done
+    total: int  # 对开页总数
+    processed: int  # 已排版的对开页数
+    percent: int  # 整体进度 0-100
+
+
+# 进度回调：(phase, processed, total)；save 阶段 processed/total 为百分比
+ProgressCallback = Callable[[str, int, int], None]
+
+
 @dataclass
 class PdfLayoutTask(TaskBase):
     """PDF 排版任务"""
@@ -41,6 +67,7 @@ class PdfLayoutTask(TaskBase):
     output_info: Optional[PdfLayoutFileInfo] = None
     fill_configs: Optional[list[int]] = None
     is_saddle_stitch: bool = False
+    progress: Optional[LayoutProgress] = None
 
 
 class PdfLayoutMgr(BaseTaskMgr[PdfLayoutTask]):
@@ -61,6 +88,11 @@ class PdfLayoutMgr(BaseTaskMgr[PdfLayoutTask]):
         output_filename = f"{base_name}_layout{ext}"
         return os.path.join(PDF_LAYOUT_OUTPUT_DIR, output_filename)
 
+    def _get_preview_path(self, task_id: str) -> str:
+        """获取排版预览文件路径"""
+        base_name, ext = os.path.splitext(task_id)
+        return os.path.join(PDF_LAYOUT_OUTPUT_DIR, f"{base_name}_preview{ext}")
+
     def _update_output_file_info(self, task: PdfLayoutTask) -> None:
         """更新任务的输出文件信息"""
         output_path = self._get_output_path(task.task_id)
@@ -191,7 +223,7 @@ class PdfLayoutMgr(BaseTaskMgr[PdfLayoutTask]):
 
     def _before_delete_task(self, task: PdfLayoutTask) -> None:
         """删除关联的上传文件和输出文件。"""
-        paths_to_delete = [task.uploaded_path, task.output_path]
+        paths_to_delete = [task.uploaded_path, task.output_path, self._get_preview_path(task.task_id)]
         for path in paths_to_delete:
             if path and os.path.exists(path):
                 try:
@@ -222,8 +254,57 @@ class PdfLayoutMgr(BaseTaskMgr[PdfLayoutTask]):
             )
             return 0, "填充配置已保存"
 
-    def generate_layout(self, task_id: str) -> Tuple[int, str]:
-        """生成骑缝排版 PDF（使用已保存的 fill_configs）。"""
+    def _set_progress(self, task_id: str, phase: str, processed: int, total: int, save: bool = False) -> None:
+        """更新任务的排版进度（仅在阶段切换时落盘）。"""
+        if phase == 'layout':
+            percent = processed * _LAYOUT_PHASE_PERCENT // max(total, 1)
+        elif phase == 'save':
+            percent = _LAYOUT_PHASE_PERCENT + processed * (100 - _LAYOUT_PHASE_PERCENT) // 100
+        else:
+            percent = 100
+        with self._task_lock.gen_wlock():
+            task = self._get_task(task_id)
+            if not task:
+                return
+            progress = task.progress or LayoutProgress(phase=phase, total=0, processed=0, percent=0)
+            save = save or progress['phase'] != phase
+            progress['phase'] = phase
+            progress['percent'] = percent
+            if phase == 'layout':
+                progress['total'] = total
+                progress['processed'] = processed
+            task.progress = progress
+            if save:
+                self._save_task_and_update_time(task)
+
+    def _run_layout(self, task_id: str, input_path: str, output_path: str, fill_configs: list[int]) -> None:
+        """生成骑缝 PDF 并更新任务输出信息，失败时抛出异常。"""
+
+        def on_progress(phase: str, processed: int, total: int) -> None:
+            self._set_progress(task_id, phase, processed, total)
+
+        spreads = _write_saddle_stitch(input_path, output_path, fill_configs, on_progress=on_progress)
+        output_info = get_file_info(output_path)
+        if not output_info:
+            raise Exception("无法获取输出文件信息")
+
+        with self._task_lock.gen_wlock():
+            task = self._get_task(task_id)
+            if task:
+                task.output_path = output_path
+                task.output_info = output_info
+                task.progress = LayoutProgress(phase='done', total=spreads, processed=spreads, percent=100)
+                self._save_task_and_update_time(task)
+        log.info(f"[PDF 排版] 骑缝 PDF 生成成功: {output_path}, 对开页 {spreads}")
+
+    def generate_layout(self, task_id: str, background: bool = False) -> Tuple[int, str]:
+        """生成骑缝排版 PDF（使用已保存的 fill_configs）。
+
+        Args:
+            task_id: 任务 ID
+            background: True 时提交后台任务立即返回，通过任务的 progress 查看进度；
+                False 时在工作线程中生成并等待完成
+        """
         with self._task_lock.gen_wlock():
             task, err = self._get_task_or_err(task_id)
             if not task:
@@ -232,55 +313,69 @@ class PdfLayoutMgr(BaseTaskMgr[PdfLayoutTask]):
             if not task.uploaded_path or not os.path.exists(task.uploaded_path):
                 return -1, "上传文件不存在"
 
-            fill_configs = task.fill_configs or []
-            output_path = self._get_output_path(task.task_id)
-
-        try:
-            with pikepdf.open(task.uploaded_path) as pdf:
-                total_pages = len(pdf.pages)
-                effective = _build_effective_pages(total_pages, fill_configs)
-                spreads = _generate_saddle_stitch_spreads(len(effective))
-
-                out = Pdf.new()
-                # 获取原始页尺寸
-                ref_rect = pikepdf.Rectangle(pdf.pages[0].mediabox)
-                pw = float(ref_rect.width)
-                ph = float(ref_rect.height)
-
-                for left_idx, right_idx in spreads:
-                    # 每个 spread 合并为一页（两页左右拼接）
-                    merge_page = out.add_blank_page(page_size=(2 * pw, ph))
+            if task.status == TASK_STATUS_PROCESSING:
+                return -1, "任务正在处理中，请稍候"
 
-                    left_pn = effective[left_idx - 1]
-                    right_pn = effective[right_idx - 1]
-
-                    if left_pn > 0:
-                        src = pdf.pages[left_pn - 1]
-                        merge_page.add_overlay(
-                            src, pikepdf.Rectangle(0, 0, pw, ph))
+            input_path = task.uploaded_path
+            fill_configs = list(task.fill_configs or [])
+            output_path = self._get_output_path(task.task_id)
+            if not background:
+                # 同步路径同样占住 processing 状态，重入检查才能覆盖两种调用方式
+                task.status = TASK_STATUS_PROCESSING
+                task.error_message = None
+                self._save_task_and_update_time(task)
 
-                    if right_pn > 0:
-                        src = pdf.pages[right_pn - 1]
-                        merge_page.add_overlay(
-                            src, pikepdf.Rectangle(pw, 0, 2 * pw, ph))
+        if background:
+            self._run_task_async(task_id, lambda t: self._run_layout(task_id, input_path, output_path, fill_configs))
+            return 0, "骑缝排版任务已提交，正在后台处理"
 
-                out.save(output_path)
+        try:
+            # pikepdf 为 CPU 密集的原生调用，放到原生线程执行，避免阻塞 gevent hub
+            run_blocking(lambda: self._run_layout(task_id, input_path, output_path, fill_configs),
+                         timeout=LAYOUT_SYNC_TIMEOUT)
 
             with self._task_lock.gen_wlock():
                 task2, _ = self._get_task_or_err(task_id)
                 if task2:
-                    task2.output_path = output_path
-                    task2.output_info = get_file_info(output_path)
                     task2.status = TASK_STATUS_SUCCESS
                     self._save_task_and_update_time(task2)
 
-            log.info(f"[PDF 排版] 骑缝 PDF 生成成功: {output_path}")
             return 0, "骑缝 PDF 已生成"
 
         except Exception as e:
             log.error(f"[PDF 排版] 生成骑缝 PDF 失败: {e}")
+            with self._task_lock.gen_wlock():
+                task3, _ = self._get_task_or_err(task_id)
+                if task3:
+                    task3.status = TASK_STATUS_FAILED
+                    task3.error_message = str(e)
+                    self._save_task_and_update_time(task3)
             return -1, f"生成骑缝 PDF 失败: {str(e)}"
 
+    def generate_preview(self, task_id: str, spreads: int = PREVIEW_SPREADS) -> Tuple[int, str, Optional[str]]:
+        """生成前 N 个对开页的骑缝预览 PDF，返回预览文件名（位于输出目录）。"""
+        spreads = max(1, min(spreads, PREVIEW_MAX_SPREADS))
+        with self._task_lock.gen_rlock():
+            task, err = self._get_task_or_err(task_id)
+            if not task:
+                return -1, err, None
+            if not task.uploaded_path or not os.path.exists(task.uploaded_path):
+                return -1, "上传文件不存在", None
+            input_path = task.uploaded_path
+            fill_configs = list(task.fill_configs or [])
+            preview_path = self._get_preview_path(task.task_id)
+
+        try:
+            ensure_directory(PDF_LAYOUT_OUTPUT_DIR)
+            count = run_blocking(lambda: _write_saddle_stitch(input_path, preview_path, fill_configs,
+                                                              max_spreads=spreads),
+                                 timeout=LAYOUT_SYNC_TIMEOUT)
+            log.info(f"[PDF 排版] 预览生成成功: {preview_path}, 对开页 {count}")
+            return 0, "预览已生成", os.path.basename(preview_path)
+        except Exception as e:
+            log.error(f"[PDF 排版] 生成预览失败: {e}")
+            return -1, f"生成预览失败: {str(e)}", None
+
 
 # ---- 算法辅助函数（与前端对齐） ----
 
@@ -302,6 +397,66 @@ def _build_effective_pages(total_pages: int, insert_at: list[int]) -> list[int]:
     return pages
 
 
+def _write_saddle_stitch(input_path: str,
+                         output_path: str,
+                         fill_configs: list[int],
+                         max_spreads: Optional[int] = None,
+                         on_progress: Optional[ProgressCallback] = None) -> int:
+    """生成骑缝对开页并写出到新文档，返回对开页数。
+
+    每个源页只转换一次 Form XObject 并复制到输出文档（缓存复用），对开页按引用放置；
+    输出为全新文档，不携带源文档的书签、页标签、表单等指向原始页面的目录项。
+    先写入临时文件再替换，避免下载到未写完的文件。
+    """
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with pikepdf.open(input_path) as pdf, pikepdf.Pdf.new() as out:
+            source_count = len(pdf.pages)
+            effective = _build_effective_pages(source_count, fill_configs)
+            spreads = _generate_saddle_stitch_spreads(len(effective))
+            if max_spreads is not None:
+                spreads = spreads[:max_spreads]
+
+            # 获取原始页尺寸
+            ref_rect = pikepdf.Rectangle(pdf.pages[0].mediabox)
+            pw = float(ref_rect.width)
+            ph = float(ref_rect.height)
+            left_rect = pikepdf.Rectangle(0, 0, pw, ph)
+            right_rect = pikepdf.Rectangle(pw, 0, 2 * pw, ph)
+
+            forms: dict[int, pikepdf.Object] = {}  # 源页码 -> 输出文档中的 Form XObject
+
+            def form_of(page_no: int) -> pikepdf.Object:
+                form = forms.get(page_no)
+                if form is None:
+                    # copy_foreign 对同一源文档共享的字体、图片等资源只复制一次
+                    form = out.copy_foreign(pdf.make_indirect(pdf.pages[page_no - 1].as_form_xobject()))
+                    forms[page_no] = form
+                return form
+
+            for index, (left_idx, right_idx) in enumerate(spreads):
+                # 每个 spread 合并为一页（两页左右拼接）
+                merge_page = out.add_blank_page(page_size=(2 * pw, ph))
+                left_pn = effective[left_idx - 1]
+                right_pn = effective[right_idx - 1]
+                if left_pn > 0:
+                    merge_page.add_overlay(form_of(left_pn), left_rect)
+                if right_pn > 0:
+                    merge_page.add_overlay(form_of(right_pn), right_rect)
+                if on_progress:
+                    on_progress('layout', index + 1, len(spreads))
+
+            if on_progress:
+                out.save(tmp_path, progress=lambda percent: on_progress('save', percent, 100))
+            else:
+                out.save(tmp_path)
+        os.replace(tmp_path, output_path)
+        return len(spreads)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def _generate_saddle_stitch_spreads(effective_count: int) -> list[tuple[int, int]]:
     """生成骑缝对开页索引序列（1-based）。"""
     spreads: list[tuple[int, int]] = []
@@ -311,4 +466,4 @@ def _generate_saddle_stitch_spreads(effective_count: int) -> list[tuple[int, int
     return spreads
 
 
-pdf_layout_mgr = PdfLayoutMgr()
+pdf_layout_mgr = mgr_registry.register('pdf_layout_mgr', PdfLayoutMgr)
@@ -4,20 +4,25 @@ PDF 管理服务
 采用任务模式，每个文件对应一个任务，支持异步解密处理
 """
 import os
-from typing import Optional, Tuple, Any, Protocol
+from typing import TYPE_CHECKING, Optional, Tuple, Any, Protocol
 from dataclasses import dataclass
 
 from werkzeug.utils import secure_filename
 
 from core.services.base_task_mgr import BaseTaskMgr, FileInfo, TaskBase
 
-import pikepdf
-
 from core.config import app_logger
 from core.config import (PDF_BASE_DIR, PDF_UPLOAD_DIR, PDF_UNLOCK_DIR, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS,
                          TASK_STATUS_UPLOADED)
+from core.tools.lazy import lazy_import, mgr_registry
 from core.utils import ensure_directory, get_file_info, get_unique_filepath, is_allowed_pdf_file
 
+if TYPE_CHECKING:
+    import pikepdf
+else:
+    # pikepdf 较重，首次处理 PDF 时再加载
+    pikepdf = lazy_import('pikepdf')
+
 log = app_logger
 
 
@@ -200,4 +205,4 @@ class PdfMgr(BaseTaskMgr[PdfTask]):
                     log.error(f"[PDF] 删除文件失败 {path}: {e}")
 
 
-pdf_mgr = PdfMgr()
+pdf_mgr = mgr_registry.register('pdf_mgr', PdfMgr)
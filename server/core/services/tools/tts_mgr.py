@@ -32,11 +32,12 @@ from core.services.base_task_mgr import BaseTaskMgr, TaskBase
 from core.tools.async_util import run_in_background
 from core.tts.tts_ali import TTSClient
 from core.utils import cleanup_temp_files, ensure_directory, get_media_duration
-from core.ai.ocr_ali import OCRAli
+from core.ai.ocr_pipeline import ocr_pipeline
 from core.ai.txt_ali import TxtAli
+from core.tools.lazy import mgr_registry
 
-# 延迟导入 OCR 客户端，避免循环依赖
-_ocr_client = OCRAli()
+# OCR 走带缓存与分块并发的流水线（后端仍为 OCRAli）
+_ocr_client = ocr_pipeline
 _txt_client = TxtAli()
 
 log = app_logger
@@ -1083,4 +1084,4 @@ class TTSMgr(BaseTaskMgr[TTSTask]):
             log.error(f"[TTSMgr] 分析文章任务 {task_id} 异常: {e}", exc_info=True)
 
 
-tts_mgr = TTSMgr()
+tts_mgr = mgr_registry.register('tts_mgr', TTSMgr)
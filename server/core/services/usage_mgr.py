@@ -4,7 +4,6 @@
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, Optional
 
 from sqlalchemy import text
@@ -12,6 +11,8 @@ from sqlalchemy import text
 from core.config import app_logger
 from core.db import db_obj
 from core.db.db_mgr import db_mgr
+from core.services.task.material_stats import material_stats
+from core.tools.lazy import mgr_registry
 from core.utils import fmt_ts
 
 log = app_logger
@@ -62,7 +63,8 @@ class UsageMgr:
                 return result
 
             if out_key:
-                self._update_material_statistics(out_key, user_id, duration)
+                # 观看时长在内存累加，定时批量写入 t_material_stat（见 material_stats）
+                material_stats.add(out_key, user_id, duration)
 
             return result
 
@@ -70,40 +72,6 @@ class UsageMgr:
             log.error(f"[UsageMgr] 添加使用记录异常: {e}", exc_info=True)
             return {"code": -1, "msg": f'error: {str(e)}'}
 
-    def _update_material_statistics(
-        self,
-        material_id: int,
-        user_id: int,
-        duration: int,
-    ) -> None:
-        """累加素材观看时长到 t_material.statistics，key 为 user_id，value 为观看时长（秒）。"""
-        try:
-            material_result = db_mgr.get_data('t_material', material_id, 'statistics')
-            if material_result.get('code') != 0 or not material_result.get('data'):
-                log.warning(f"[UsageMgr] 素材不存在，跳过统计更新: material_id={material_id}")
-                return
-
-            raw_statistics = material_result['data'].get('statistics') or '{}'
-            statistics = json.loads(raw_statistics)
-
-            user_key = str(user_id)
-            statistics[user_key] = int(statistics.get(user_key, 0) or 0) + duration
-
-            update_result = db_mgr.set_data('t_material', {
-                'id': material_id,
-                'statistics': json.dumps(statistics, ensure_ascii=False),
-            })
-            if update_result.get('code') != 0:
-                log.error(
-                    f"[UsageMgr] 更新素材统计失败: material_id={material_id}, "
-                    f"msg={update_result.get('msg')}"
-                )
-        except Exception as e:
-            log.error(
-                f"[UsageMgr] 更新素材统计异常: material_id={material_id}, error={e}",
-                exc_info=True,
-            )
-
     def get_usage_list(
         self,
         page_num: int = 1,
@@ -315,4 +283,4 @@ class UsageMgr:
             return {"code": -1, "msg": f'error: {str(e)}'}
 
 
-usage_mgr = UsageMgr()
+usage_mgr = mgr_registry.register('usage_mgr', UsageMgr)
@@ -1,12 +1,15 @@
-"""字幕：ASSRT 在线搜索、Whisper 本地识别。"""
+"""字幕：ASSRT 在线搜索、Whisper 本地识别、本地字幕索引。"""
 
 from core.subtitles.assrt_client import AssrtClient, AssrtError, client as assrt_client
+from core.subtitles.subtitle_index import SubtitleIndex, subtitle_index
 from core.subtitles.whisper_client import WhisperError, transcribe_to_sidecar
 
 __all__ = [
     "AssrtClient",
     "AssrtError",
     "assrt_client",
+    "SubtitleIndex",
+    "subtitle_index",
     "WhisperError",
     "transcribe_to_sidecar",
 ]
@@ -8,13 +8,19 @@ from __future__ import annotations
 import json
 import os
 import re
-from typing import Any
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
 from urllib.parse import urlencode
 
 from core.config import config
 from core.tools.async_util import http_get_bytes
 
 _PER_PAGE = 15
+SEARCH_CACHE_TTL = 6 * 3600  # 有结果的搜索缓存时长（秒）
+SEARCH_NEGATIVE_TTL = 30 * 60  # 无结果的搜索（负缓存）缓存时长（秒）
+SEARCH_CACHE_MAX = 256
 _TEXT_EXTS = (".srt", ".vtt", ".ass", ".ssa")
 _DESC_EN = re.compile(r"英|english", re.I)
 _DESC_ZH = re.compile(r"[简繁中]|国语|chs|cht", re.I)
@@ -152,7 +158,67 @@ def _page_payload(subs: list[Any], page: int, want: set[str]) -> dict[str, Any]:
     }
 
 
+# 搜索请求提供方：(path, params) -> 响应 JSON；默认走 ASSRT HTTP 接口，测试可注入假实现
+SearchProvider = Callable[[str, dict[str, Any]], dict[str, Any]]
+
+
+class _SearchCache:
+    """搜索结果 TTL 缓存（键为请求参数，值为语言过滤前的原始 subs 列表）。"""
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list[Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[list[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, subs: list[Any]) -> None:
+        ttl = SEARCH_CACHE_TTL if subs else SEARCH_NEGATIVE_TTL
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, subs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
 class AssrtClient:
+    """ASSRT 客户端；搜索结果按请求参数缓存（无结果的搜索短期负缓存，错误不缓存）。"""
+
+    def __init__(self, provider: Optional[SearchProvider] = None) -> None:
+        self._provider = provider
+        self._search_cache = _SearchCache()
+
+    def _get(self, path: str, params: dict[str, Any]) -> dict[str, Any]:
+        return (self._provider or _http_get)(path, params)
+
+    def _search(self, params: dict[str, Any]) -> list[Any]:
+        key = tuple(sorted(params.items()))
+        subs = self._search_cache.get(key)
+        if subs is not None:
+            return subs
+        data = self._get("/v1/sub/search", params)
+        block = data.get("sub")
+        if not isinstance(block, dict):
+            raise AssrtError("ASSRT 搜索响应缺少 sub")
+        subs = _subs_from_block(block)
+        self._search_cache.put(key, subs)
+        return subs
+
+    def clear_cache(self) -> None:
+        self._search_cache.clear()
 
     def search_by_query(
         self,
@@ -165,18 +231,15 @@ class AssrtClient:
         if len(q) < 3:
             raise AssrtError("搜索关键词至少 3 个字符")
         page = max(1, page)
-        data = _http_get("/v1/sub/search", {
+        subs = self._search({
             "q": q,
             "pos": (page - 1) * _PER_PAGE,
             "cnt": _PER_PAGE,
         })
-        block = data.get("sub")
-        if not isinstance(block, dict):
-            raise AssrtError("ASSRT 搜索响应缺少 sub")
         return {
             "mode": "text",
             "query": q,
-            **_page_payload(_subs_from_block(block), page, _want_langs(languages)),
+            **_page_payload(subs, page, _want_langs(languages)),
         }
 
     def search_by_filename(
@@ -194,20 +257,17 @@ class AssrtClient:
         if len(q) < 3:
             raise AssrtError("搜索关键词至少 3 个字符")
         page = max(1, page)
-        data = _http_get("/v1/sub/search", {
+        subs = self._search({
             "q": q,
             "pos": (page - 1) * _PER_PAGE,
             "cnt": _PER_PAGE,
             "is_file": 1,
             "no_muxer": 1,
         })
-        block = data.get("sub")
-        if not isinstance(block, dict):
-            raise AssrtError("ASSRT 搜索响应缺少 sub")
         return {
             "mode": "hash",
             "filename": name,
-            **_page_payload(_subs_from_block(block), page, _want_langs(languages)),
+            **_page_payload(subs, page, _want_langs(languages)),
         }
 
     def download_to_sidecar(
@@ -221,7 +281,7 @@ class AssrtClient:
         if not sid:
             raise AssrtError("字幕 id 不能为空")
 
-        data = _http_get("/v1/sub/detail", {"id": sid})
+        data = self._get("/v1/sub/detail", {"id": sid})
         block = data.get("sub")
         if not isinstance(block, dict):
             raise AssrtError("ASSRT 详情响应缺少 sub")
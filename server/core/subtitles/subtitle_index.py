@@ -0,0 +1,194 @@
+"""本地字幕索引：视频路径 / 内容哈希 → 已知字幕文件。
+
+- 目录清单缓存：按目录 mtime 缓存文件名集合，目录未变化时 resolve 不再逐个 stat 候选 sidecar；
+  没有字幕的视频同样命中缓存（负缓存）。目录内新增 / 删除 / 改名文件都会更新目录 mtime，缓存自动失效；
+  刚修改过（mtime 距今不足 ``RACY_WINDOW``）的目录不缓存，避免同一时间戳粒度内的后续变更被漏掉。
+- 内容哈希：视频大小 + 首尾各 64KB 的 sha1，按 (path, size, mtime) 缓存。下载 / 识别得到的字幕按哈希
+  记录到存储（默认 rds_mgr，可通过 ``store`` 注入），视频改名或复制到其他目录后仍能找到已知字幕。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Protocol, Tuple
+
+from core.config import app_logger
+from core.db import rds_mgr
+
+log = app_logger
+
+SUBTITLE_SUFFIXES = ("", ".zh", ".chs", ".cht", ".en", ".eng")
+SUBTITLE_EXTS = (".vtt", ".srt")
+
+_INDEX_RDS_KEY = 'subtitle:index'
+RACY_WINDOW = 2.0  # 目录 mtime 距今小于该秒数时不缓存清单
+HASH_CHUNK = 64 * 1024
+MAX_DIRS = 512
+MAX_HASHES = 2048
+MAX_SUBS_PER_HASH = 8
+
+
+class IndexStore(Protocol):
+    """字幕索引的持久化存储（rds_mgr 模块即满足该接口）。"""
+
+    def get_str(self, key: str) -> str:
+        ...
+
+    def set(self, key: str, value: Any) -> bool:
+        ...
+
+
+def sidecar_candidates(video_path: str) -> List[str]:
+    """视频同目录下可能的 sidecar 字幕路径（按优先级）。"""
+    last_dot = video_path.rfind(".")
+    if last_dot <= 0:
+        return []
+    base = video_path[:last_dot]
+    return [f"{base}{suffix}{ext}" for suffix in SUBTITLE_SUFFIXES for ext in SUBTITLE_EXTS]
+
+
+def content_hash(path: str, size: int) -> str:
+    """文件大小 + 首尾 HASH_CHUNK 字节的 sha1（不读全文件）。"""
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(HASH_CHUNK))
+        if size > HASH_CHUNK:
+            f.seek(max(HASH_CHUNK, size - HASH_CHUNK))
+            digest.update(f.read(HASH_CHUNK))
+    return digest.hexdigest()
+
+
+class SubtitleIndex:
+    """sidecar 目录清单缓存 + 内容哈希字幕索引。"""
+
+    def __init__(self, racy_window: float = RACY_WINDOW, store: Optional[IndexStore] = None) -> None:
+        self.racy_window = racy_window
+        self._store: IndexStore = store if store is not None else rds_mgr
+        self._lock = threading.Lock()
+        self._dirs: OrderedDict[str, Tuple[int, FrozenSet[str]]] = OrderedDict()
+        self._hashes: OrderedDict[Tuple[str, int, int], str] = OrderedDict()
+        self._known: Optional[Dict[str, List[str]]] = None  # 内容哈希 → 字幕路径，首次使用时从 store 加载
+        self.dir_scans = 0
+        self.hash_reads = 0
+
+    # ---------- 目录清单 ----------
+
+    def _list_dir(self, directory: str) -> FrozenSet[str]:
+        """目录内的普通文件名（不跟随符号链接，与 validate_and_normalize_path 一致）。"""
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return frozenset()
+        with self._lock:
+            cached = self._dirs.get(directory)
+            if cached and cached[0] == st.st_mtime_ns:
+                self._dirs.move_to_end(directory)
+                return cached[1]
+        try:
+            with os.scandir(directory) as it:
+                names = frozenset(e.name for e in it if e.is_file(follow_symlinks=False))
+        except OSError:
+            return frozenset()
+        self.dir_scans += 1
+        if time.time() - st.st_mtime_ns / 1e9 >= self.racy_window:
+            with self._lock:
+                self._dirs[directory] = (st.st_mtime_ns, names)
+                self._dirs.move_to_end(directory)
+                while len(self._dirs) > MAX_DIRS:
+                    self._dirs.popitem(last=False)
+        return names
+
+    def sidecars(self, video_path: str) -> List[str]:
+        """视频同目录下实际存在的 sidecar 字幕（按优先级）。"""
+        names = self._list_dir(os.path.dirname(video_path))
+        return [p for p in sidecar_candidates(video_path) if os.path.basename(p) in names]
+
+    # ---------- 内容哈希 ----------
+
+    def _load_known(self) -> Dict[str, List[str]]:
+        with self._lock:
+            if self._known is not None:
+                return self._known
+        try:
+            raw = self._store.get_str(_INDEX_RDS_KEY)
+            data = json.loads(raw) if raw else {}
+        except Exception as e:
+            log.warning(f"[SUBTITLE] 加载字幕索引失败: {e}")
+            data = {}
+        known = {h: [p for p in paths if isinstance(p, str)]
+                 for h, paths in (data or {}).items() if isinstance(paths, list)}
+        with self._lock:
+            if self._known is None:
+                self._known = known
+            return self._known
+
+    def _save_known(self) -> None:
+        with self._lock:
+            data = json.dumps(self._known or {}, ensure_ascii=False)
+        try:
+            self._store.set(_INDEX_RDS_KEY, data)
+        except Exception as e:
+            log.warning(f"[SUBTITLE] 保存字幕索引失败: {e}")
+
+    def video_hash(self, video_path: str) -> Optional[str]:
+        """视频内容哈希；文件未变化（size / mtime）时直接返回缓存值。"""
+        try:
+            st = os.stat(video_path)
+        except OSError:
+            return None
+        key = (video_path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(key)
+            if cached:
+                self._hashes.move_to_end(key)
+                return cached
+        try:
+            digest = content_hash(video_path, st.st_size)
+        except OSError as e:
+            log.warning(f"[SUBTITLE] 计算视频哈希失败 {video_path}: {e}")
+            return None
+        self.hash_reads += 1
+        with self._lock:
+            self._hashes[key] = digest
+            while len(self._hashes) > MAX_HASHES:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def known_subtitles(self, video_path: str) -> List[str]:
+        """按内容哈希记录过的字幕（已删除的文件会从索引中移除）。"""
+        known = self._load_known()
+        if not known:
+            return []
+        digest = self.video_hash(video_path)
+        if not digest:
+            return []
+        with self._lock:
+            paths = list(known.get(digest, ()))
+        alive = [p for p in paths if os.path.isfile(p)]
+        if len(alive) != len(paths):
+            with self._lock:
+                if alive:
+                    known[digest] = alive
+                else:
+                    known.pop(digest, None)
+            self._save_known()
+        return alive
+
+    def record(self, video_path: str, subtitle_path: str) -> None:
+        """记录视频内容对应的字幕文件（下载 / 识别成功后调用）。"""
+        digest = self.video_hash(video_path)
+        if not digest:
+            return
+        known = self._load_known()
+        with self._lock:
+            paths = [p for p in known.get(digest, []) if p != subtitle_path]
+            known[digest] = [subtitle_path, *paths][:MAX_SUBS_PER_HASH]
+        self._save_known()
+
+
+subtitle_index = SubtitleIndex()
@@ -11,11 +11,6 @@ from core.config import app_logger, config
 from core.tools.async_util import run_blocking
 from core.utils import run_subprocess_safe
 
-try:
-    from faster_whisper import WhisperModel  # type: ignore[import-untyped]
-except ImportError:
-    WhisperModel = None  # type: ignore[misc, assignment]
-
 log = app_logger
 
 _ZH_LANGS = frozenset({"zh", "chs", "cht", "chi", "zho"})
@@ -61,7 +56,10 @@ def _sidecar_path(video_path: str, language: str) -> str:
 def _whisper_transcribe_sync(wav_path: str, language: str) -> str:
     """在后台线程内同步执行 Whisper（勿在 gevent worker 主线程直接调用）。"""
     global _whisper_model
-    if WhisperModel is None:
+    try:
+        # faster_whisper 会拉起 ctranslate2 / onnxruntime，首次识别时再加载，避免拖慢启动
+        from faster_whisper import WhisperModel  # type: ignore[import-untyped]
+    except ImportError:
         raise WhisperError("未安装 faster-whisper，请执行: pip install faster-whisper")
     model_dir = (config.WHISPER_MODEL_DIR or "").strip()
     if not model_dir or not os.path.isdir(model_dir):
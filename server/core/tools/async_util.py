@@ -8,8 +8,10 @@
 选用指南：
 - run_in_background：点火即走，不关心返回值（如任务状态异步写库）。
 - run_blocking：纯 CPU/本地 IO（无 requests/ssl）。
+- run_blocking_many：多个独立阻塞调用并行执行（限制并发数），按输入顺序返回结果。
 - http_get_bytes：对外 HTTPS（ASSRT 等）；使用 urllib（gevent patch ssl 后可用，勿 subprocess/requests）。
 - run_async：在子线程跑 asyncio 协程；主线程用 gevent 轮询等待，避免 join 卡死整个 hub（蓝牙/Mi 等）。
+- AsyncLoopThread：常驻事件循环线程，适合需要跨调用复用 aiohttp session / 登录态的客户端（Mi 等）。
 """
 from __future__ import annotations
 
@@ -17,7 +19,7 @@ import asyncio
 import threading
 import time
 from queue import Empty, Queue
-from typing import Any, Callable, Coroutine, Optional, TypeVar
+from typing import Any, Callable, Coroutine, List, Optional, Sequence, TypeVar
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
@@ -106,6 +108,46 @@ def run_blocking(func: Callable[[], _T], timeout: Optional[float] = None) -> _T:
     return _poll_worker_thread(thread, result_q, error_q, wait)
 
 
+def run_blocking_many(funcs: Sequence[Callable[[], _T]],
+                      max_workers: int = 4,
+                      timeout: Optional[float] = None) -> List[_T]:
+    """原生线程并行执行多个阻塞调用（同时最多 max_workers 个），按输入顺序返回结果。
+
+    等待方式同 run_blocking（hub 轮询）；任一调用抛出异常时，待全部结束后抛出第一个异常。
+    """
+    if not funcs:
+        return []
+    wait = timeout if timeout is not None else 30.0
+    results: List[Any] = [None] * len(funcs)
+    errors: List[Optional[BaseException]] = [None] * len(funcs)
+    indexes = iter(range(len(funcs)))
+    lock = threading.Lock()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                i = next(indexes, None)
+            if i is None:
+                return
+            try:
+                results[i] = funcs[i]()
+            except BaseException as exc:
+                errors[i] = exc
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(max_workers, len(funcs)))]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + wait + 1.0
+    while any(thread.is_alive() for thread in threads):
+        if time.time() > deadline:
+            raise TimeoutError(f"操作超时 ({wait}s)")
+        gevent_sleep(0.01)
+    for error in errors:
+        if error is not None:
+            raise error
+    return results
+
+
 def http_request_bytes(
     method: str,
     url: str,
@@ -168,3 +210,66 @@ def run_async(coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
     except TimeoutError as e:
         log.warning("[async_util] 协程任务超时 (%ss)，线程仍在运行", wait)
         raise asyncio.TimeoutError(f"Operation timed out after {wait} seconds") from e
+
+
+class AsyncLoopThread:
+    """常驻事件循环线程。
+
+    run_async 每次新建线程 + 事件循环，aiohttp session 等绑定 loop 的对象无法跨调用复用；
+    本类在一个守护线程里常驻一个 loop，submit 提交协程后同样用 gevent 轮询等待结果。
+    """
+
+    def __init__(self, name: str = "async-loop"):
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """返回（必要时启动）常驻事件循环。"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def worker() -> None:
+                    asyncio.set_event_loop(loop)
+                    ready.set()
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=worker, name=self._name, daemon=True)
+                self._thread.start()
+                ready.wait(5.0)
+                self._loop = loop
+            return self._loop
+
+    def is_running(self) -> bool:
+        return self._loop is not None and self._loop.is_running()
+
+    def spawn(self, coroutine: Coroutine) -> "asyncio.Future[Any]":
+        """提交协程到常驻 loop，不等待结果，返回 concurrent Future。"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)  # pyright: ignore[reportReturnType]
+
+    def submit(self, coroutine: Coroutine[Any, Any, _T], timeout: Optional[float] = None) -> _T:
+        """提交协程到常驻 loop 并等待结果（gevent 轮询，不阻塞 hub）。"""
+        wait = timeout if timeout is not None else 10.0
+        future = asyncio.run_coroutine_threadsafe(asyncio.wait_for(coroutine, timeout=wait), self.loop)
+        deadline = time.time() + wait + 1.0
+        while not future.done():
+            if time.time() > deadline:
+                future.cancel()
+                log.warning("[async_util] %s 协程任务超时 (%ss)", self._name, wait)
+                raise asyncio.TimeoutError(f"Operation timed out after {wait} seconds")
+            gevent_sleep(0.005)
+        try:
+            return future.result()
+        except asyncio.TimeoutError as e:
+            raise asyncio.TimeoutError(f"Operation timed out after {wait} seconds") from e
+
+    def stop(self) -> None:
+        """停止事件循环（线程随之退出）。"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
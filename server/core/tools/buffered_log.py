@@ -0,0 +1,227 @@
+"""
+缓冲日志写入与访问日志采样。
+
+- ``BufferedLogHandler``：QueueHandler 式的环形缓冲。``emit`` 只把 LogRecord 放进内存 deque，
+  由后台 OS 线程批量交给目标 handler（格式化 + 写盘 + 轮转都在后台线程）；请求路径不再碰磁盘，
+  也不会在 gevent 下因写盘阻塞 hub。缓冲满时丢弃最旧的记录并计数（log_buffer_dropped_total）；
+  进程退出时 atexit 写完剩余记录。
+- ``AccessLogSampler``：按路径前缀对高频轮询接口 / 静态文件只记录 1/N，
+  非 2xx/3xx 响应与慢请求始终记录；被采样跳过的条数计入 access_log_sampled_total。
+- ``GeventAccessSampleFilter``：同一采样规则作用于 gevent WSGIServer 的访问日志行。
+
+使用示例：
+```python
+# 把 logger 上已有的文件 handler 换成缓冲写入（多个 logger 共享同一 handler 时只包装一次）
+buffer_logger_handlers([logging.getLogger("app.access")], name="access")
+
+sampler = AccessLogSampler.from_rules("/api/material/status:10,/web/:20")
+if sampler.should_log("/api/material/status", 200, 3.2):
+    ...
+```
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import re
+import threading
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.tools.metrics import registry
+
+DEFAULT_BUFFER_CAPACITY = 10000
+DEFAULT_FLUSH_INTERVAL = 1.0  # 秒
+DEFAULT_FLUSH_BATCH = 500  # 积累到该条数时提前唤醒写线程
+SLOW_REQUEST_MS = 1000.0  # 慢请求始终记录
+
+_DROPPED = registry.counter('log_buffer_dropped_total', '日志缓冲区满时丢弃的记录数', ('handler',))
+_WRITE_ERRORS = registry.counter('log_buffer_write_errors_total', '日志后台写入失败次数', ('handler',))
+_PENDING = registry.gauge('log_buffer_pending', '日志缓冲区中待写入的记录数', ('handler',))
+_SAMPLED = registry.counter('access_log_sampled_total', '访问日志因采样被跳过的条数', ('rule',))
+
+_handlers: List['BufferedLogHandler'] = []
+
+
+class BufferedLogHandler(logging.Handler):
+    """环形缓冲 + 后台写线程：目标 handler 只在写线程中调用。"""
+
+    def __init__(self,
+                 target: logging.Handler,
+                 name: str = 'default',
+                 capacity: int = DEFAULT_BUFFER_CAPACITY,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_batch: int = DEFAULT_FLUSH_BATCH) -> None:
+        """
+        Args:
+            target: 实际写入的 handler（如 TimedRotatingFileHandler），格式化器设置在它上面
+            name: 指标标签
+            capacity: 缓冲上限（条），满时丢弃最旧的记录
+            flush_interval: 写线程最长等待间隔（秒）
+            flush_batch: 缓冲积累到该条数时提前唤醒写线程
+        """
+        super().__init__()
+        self.target = target
+        self.name = name
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._buffer: Deque[logging.LogRecord] = deque(maxlen=capacity)
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.dropped = 0
+        _handlers.append(self)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Handler.handle 已持有 self.lock，emit 之间互斥
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+            _DROPPED.labels(self.name).inc()
+        self._buffer.append(record)
+        if self._thread is None:
+            self._start()
+        if len(self._buffer) >= self.flush_batch:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f'log-writer-{self.name}', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+
+    def _drain(self) -> int:
+        written = 0
+        while True:
+            try:
+                record = self._buffer.popleft()
+            except IndexError:
+                break
+            try:
+                self.target.handle(record)
+            except Exception:
+                _WRITE_ERRORS.labels(self.name).inc()
+            written += 1
+        if written:
+            try:
+                self.target.flush()
+            except Exception:
+                _WRITE_ERRORS.labels(self.name).inc()
+        return written
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def flush(self) -> None:
+        """立即写出缓冲中的全部记录（调用线程中执行）。"""
+        self._drain()
+
+    def close(self) -> None:
+        self._stopped = True
+        self._wake.set()
+        self._drain()
+        self.target.close()
+        super().close()
+
+
+def _flush_all() -> None:
+    for handler in list(_handlers):
+        try:
+            handler.flush()
+        except Exception:
+            pass
+
+
+def _collect_buffer_metrics() -> None:
+    for handler in _handlers:
+        _PENDING.labels(handler.name).set(handler.pending())
+
+
+atexit.register(_flush_all)
+registry.add_collector(_collect_buffer_metrics)
+
+
+def buffer_logger_handlers(loggers: Iterable[logging.Logger],
+                           name: str,
+                           capacity: int = DEFAULT_BUFFER_CAPACITY,
+                           flush_interval: float = DEFAULT_FLUSH_INTERVAL) -> List[BufferedLogHandler]:
+    """把 loggers 上的 handler 替换为缓冲写入；同一个 handler 只包装一次，已包装的跳过。"""
+    wrapped: Dict[int, BufferedLogHandler] = {}
+    for logger in loggers:
+        for i, handler in enumerate(list(logger.handlers)):
+            if isinstance(handler, BufferedLogHandler):
+                continue
+            buffered = wrapped.get(id(handler))
+            if buffered is None:
+                buffered = BufferedLogHandler(handler, name=name, capacity=capacity, flush_interval=flush_interval)
+                wrapped[id(handler)] = buffered
+            logger.handlers[i] = buffered
+    return list(wrapped.values())
+
+
+class AccessLogSampler:
+    """按路径前缀采样访问日志：每条规则每 N 条记录 1 条，异常状态码与慢请求始终记录。"""
+
+    def __init__(self, rules: List[Tuple[str, int]], slow_ms: float = SLOW_REQUEST_MS) -> None:
+        # 长前缀优先匹配
+        self.rules = sorted(((prefix, n) for prefix, n in rules if n > 1), key=lambda r: -len(r[0]))
+        self.slow_ms = slow_ms
+        self._counters: Dict[str, Iterator[int]] = {prefix: count() for prefix, _ in self.rules}
+
+    @classmethod
+    def from_rules(cls, raw: str, slow_ms: float = SLOW_REQUEST_MS) -> 'AccessLogSampler':
+        """解析 ``"/api/material/status:10,/web/:20"``；格式错误的条目忽略。"""
+        rules = []
+        for item in (raw or '').split(','):
+            prefix, sep, n = item.strip().rpartition(':')
+            if sep and prefix and n.isdigit():
+                rules.append((prefix, int(n)))
+        return cls(rules, slow_ms)
+
+    def fork(self) -> 'AccessLogSampler':
+        """同样的规则、独立的计数器；供另一路日志使用，避免两路共用计数导致各自只记录 1/2N。"""
+        return AccessLogSampler(self.rules, self.slow_ms)
+
+    def should_log(self, path: str, status: int, elapsed_ms: Optional[float] = None) -> bool:
+        if not self.rules:
+            return True
+        if status >= 400 or (elapsed_ms is not None and elapsed_ms >= self.slow_ms):
+            return True
+        for prefix, n in self.rules:
+            if path.startswith(prefix):
+                # 第 1、N+1、2N+1... 条记录；itertools.count 的 next 在 CPython 下原子
+                if next(self._counters[prefix]) % n == 0:
+                    return True
+                _SAMPLED.labels(prefix).inc()
+                return False
+        return True
+
+
+# gevent pywsgi 访问日志：'<ip> - - [<time>] "GET /path HTTP/1.1" 200 123 0.001234'
+_GEVENT_LINE_RE = re.compile(r'"[A-Z]+ (\S+) [^"]*" (\d{3}) \S+ ([\d.]+)')
+
+
+class GeventAccessSampleFilter(logging.Filter):
+    """对 gevent WSGIServer 的访问日志行应用 AccessLogSampler（无法解析的行照常记录）。
+
+    同一请求会同时出现在 Flask 访问日志与 gevent 访问日志中，这里 fork 出独立计数器，
+    传入与 Flask 侧相同的 sampler 时两路仍各自按 1/N 采样。
+    """
+
+    def __init__(self, sampler: AccessLogSampler) -> None:
+        super().__init__()
+        self.sampler = sampler.fork()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        m = _GEVENT_LINE_RE.search(record.getMessage())
+        if not m:
+            return True
+        return self.sampler.should_log(m.group(1), int(m.group(2)), float(m.group(3)) * 1000)
@@ -0,0 +1,296 @@
+"""
+进程内共享缓存：按命名空间配置 TTL 与容量，单飞加载，写入方显式失效，命中 / 加载统计。
+
+- 命名空间：``cache_registry.namespace(name, ttl, maxsize)``，各自独立的 TTL（None 表示不过期）与 LRU 容量；
+- 单飞加载：同一 key 未命中时只有一个调用方执行 loader，其余调用方轮询等待其结果
+  （与 lazy 相同，time.sleep 在 gevent 下会让出，不用真实线程锁阻塞 hub）；loader 抛出的异常不缓存，
+  等待方收到同一异常；
+- 失效：写入方调用 ``namespace.invalidate(key)``；通过通用接口写 Redis 的路径调用
+  ``cache_registry.invalidate_rds_key(key)``，失效绑定了该 Redis key 的命名空间。
+  加载过程中发生失效时，加载结果只返回给本次调用方，不写入缓存；
+- 统计：命中 / 未命中 / 合并等待 / 加载次数与耗时，``cache_registry.stats()``（/cache/stats）与 /metrics 输出。
+
+只在本进程内生效：多进程部署时其他进程依赖 TTL 过期。
+
+使用示例：
+```python
+from core.tools.cache import cache_registry
+
+_config_cache = cache_registry.namespace('browser_config', ttl=60, maxsize=1, rds_keys=('browser:config',))
+
+def load_config():
+    return _config_cache.get('config', _load_from_redis)
+
+def save_config(data):
+    rds_mgr.set('browser:config', json.dumps(data))
+    _config_cache.invalidate()
+```
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from core.tools.lazy import _caller_id
+from core.tools.metrics import registry
+
+T = TypeVar("T")
+
+DEFAULT_MAXSIZE = 1024
+# 等待其他调用方加载完成时的轮询间隔（秒）
+_WAIT_INTERVAL = 0.005
+# 加载耗时桶（秒）：Redis / SQLite 读取为毫秒级
+LOAD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+_ALL: Any = object()
+
+_CACHE_REQUESTS = registry.counter('cache_requests_total', '进程内缓存查询次数', ('namespace', 'result'))
+_CACHE_LOAD_SECONDS = registry.histogram('cache_load_seconds', '进程内缓存加载耗时（秒）', ('namespace',),
+                                         buckets=LOAD_BUCKETS)
+_CACHE_EVICTIONS = registry.counter('cache_evictions_total', '进程内缓存淘汰条数', ('namespace', 'reason'))
+_CACHE_ENTRIES = registry.gauge('cache_entries', '进程内缓存当前条数', ('namespace',))
+
+
+class _Flight:
+    """一次进行中的加载：完成后 done=True，value / error 二选一。"""
+
+    __slots__ = ('owner', 'done', 'value', 'error')
+
+    def __init__(self) -> None:
+        self.owner = _caller_id()
+        self.done = False
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class CacheNamespace:
+    """单个命名空间：TTL + LRU 容量 + 单飞加载（线程 / greenlet 安全）。"""
+
+    def __init__(self, name: str, ttl: Optional[float] = None, maxsize: int = DEFAULT_MAXSIZE) -> None:
+        """
+        Args:
+            name: 命名空间名称（指标标签）
+            ttl: 条目存活时间（秒），None 表示只在容量淘汰或显式失效时移除
+            maxsize: 最多条目数，超出时淘汰最久未使用的
+        """
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Tuple[Optional[float], Any]] = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        # 每次失效递增；加载开始后发生过失效的结果不写入缓存
+        self._generation = 0
+        self._stats: Dict[str, float] = {
+            'hits': 0, 'misses': 0, 'coalesced': 0, 'loads': 0, 'load_errors': 0,
+            'load_seconds': 0.0, 'load_seconds_max': 0.0, 'evictions': 0, 'invalidations': 0,
+        }
+        self._m_hit = _CACHE_REQUESTS.labels(name, 'hit')
+        self._m_miss = _CACHE_REQUESTS.labels(name, 'miss')
+        self._m_coalesced = _CACHE_REQUESTS.labels(name, 'coalesced')
+        self._m_load = _CACHE_LOAD_SECONDS.labels(name)
+
+    # ---------- 读取 ----------
+
+    def get(self, key: Hashable, loader: Callable[[], T], ttl: Optional[float] = None) -> T:
+        """返回缓存值；未命中或已过期时单飞调用 loader 加载并缓存。
+
+        Args:
+            key: 缓存 key
+            loader: 无参加载函数；抛出的异常不缓存，原样抛给本次所有等待方
+            ttl: 覆盖命名空间的 TTL（仅对本次加载的结果生效）
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._data.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._m_hit.inc()
+                    return entry[1]
+                del self._data[key]
+                self._evicted('expired')
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self._stats['misses'] += 1
+                self._m_miss.inc()
+            else:
+                self._stats['coalesced'] += 1
+                self._m_coalesced.inc()
+        if not owner:
+            return self._wait(flight)
+        return self._load(key, flight, loader, generation, self.ttl if ttl is None else ttl)
+
+    def _load(self, key: Hashable, flight: _Flight, loader: Callable[[], T], generation: int,
+              ttl: Optional[float]) -> T:
+        start = time.perf_counter()
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._stats['load_errors'] += 1
+                self._flights.pop(key, None)
+                flight.error = e
+                flight.done = True
+            raise
+        elapsed = time.perf_counter() - start
+        self._m_load.observe(elapsed)
+        with self._lock:
+            self._stats['loads'] += 1
+            self._stats['load_seconds'] += elapsed
+            self._stats['load_seconds_max'] = max(self._stats['load_seconds_max'], elapsed)
+            if generation == self._generation:
+                self._store(key, value, ttl)
+            self._flights.pop(key, None)
+            flight.value = value
+            flight.done = True
+        return value
+
+    def _wait(self, flight: _Flight) -> Any:
+        if flight.owner == _caller_id():
+            raise RuntimeError(f"缓存 {self.name} 的 loader 递归加载了同一个 key")
+        while not flight.done:
+            time.sleep(_WAIT_INTERVAL)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """只读缓存（不加载、不计入统计）；不存在或已过期时返回 default。"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or (entry[0] is not None and entry[0] <= time.monotonic()):
+            return default
+        return entry[1]
+
+    # ---------- 写入与失效 ----------
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """直接写入（写入方已持有最新值时，省去一次加载）。"""
+        with self._lock:
+            self._generation += 1
+            self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (None if ttl is None else time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evicted('capacity')
+
+    def _evicted(self, reason: str) -> None:
+        self._stats['evictions'] += 1
+        _CACHE_EVICTIONS.labels(self.name, reason).inc()
+
+    def invalidate(self, key: Hashable = _ALL) -> int:
+        """失效单个 key（不传时清空整个命名空间），返回移除的条目数。"""
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            if key is _ALL:
+                removed = len(self._data)
+                self._data.clear()
+            else:
+                removed = 1 if key in self._data else 0
+                self._data.pop(key, None)
+        return removed
+
+    # ---------- 统计 ----------
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            size = len(self._data)
+            loading = len(self._flights)
+        lookups = s['hits'] + s['misses'] + s['coalesced']
+        return {
+            'ttl': self.ttl,
+            'maxsize': self.maxsize,
+            'size': size,
+            'loading': loading,
+            'hits': int(s['hits']),
+            'misses': int(s['misses']),
+            'coalesced': int(s['coalesced']),
+            'hit_ratio': round(s['hits'] / lookups, 4) if lookups else None,
+            'loads': int(s['loads']),
+            'load_errors': int(s['load_errors']),
+            'load_ms_avg': round(s['load_seconds'] / s['loads'] * 1000, 3) if s['loads'] else None,
+            'load_ms_max': round(s['load_seconds_max'] * 1000, 3),
+            'evictions': int(s['evictions']),
+            'invalidations': int(s['invalidations']),
+        }
+
+
+class CacheRegistry:
+    """命名空间注册表：按名称取得 / 创建命名空间，Redis key 到命名空间的失效绑定。"""
+
+    def __init__(self) -> None:
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self._rds_bindings: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self,
+                  name: str,
+                  ttl: Optional[float] = None,
+                  maxsize: int = DEFAULT_MAXSIZE,
+                  rds_keys: Iterable[str] = ()) -> CacheNamespace:
+        """取得命名空间（不存在时按参数创建）。
+
+        Args:
+            name: 命名空间名称
+            ttl: 条目存活时间（秒），None 表示不过期
+            maxsize: 最多条目数
+            rds_keys: 该命名空间缓存的 Redis key；invalidate_rds_key 命中时清空整个命名空间
+        """
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                ns = self._namespaces[name] = CacheNamespace(name, ttl, maxsize)
+            for rds_key in rds_keys:
+                bound = self._rds_bindings.setdefault(rds_key, [])
+                if name not in bound:
+                    bound.append(name)
+            return ns
+
+    def get(self, name: str) -> Optional[CacheNamespace]:
+        with self._lock:
+            return self._namespaces.get(name)
+
+    def invalidate(self, name: str, key: Hashable = _ALL) -> int:
+        """失效指定命名空间的 key（不传 key 时清空），命名空间不存在时返回 0。"""
+        ns = self.get(name)
+        return ns.invalidate(key) if ns is not None else 0
+
+    def invalidate_rds_key(self, rds_key: str) -> List[str]:
+        """Redis key 被写入后调用：清空绑定了该 key 的命名空间，返回被清空的命名空间。"""
+        with self._lock:
+            names = list(self._rds_bindings.get(rds_key, ()))
+        for name in names:
+            self.invalidate(name)
+        return names
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            namespaces = list(self._namespaces.values())
+        return {ns.name: ns.stats() for ns in namespaces}
+
+
+cache_registry = CacheRegistry()
+
+
+def _collect_cache_metrics() -> None:
+    for name, ns in list(cache_registry._namespaces.items()):
+        _CACHE_ENTRIES.labels(name).set(len(ns))
+
+
+registry.add_collector(_collect_cache_metrics)
@@ -0,0 +1,222 @@
+"""
+受监督的 ffmpeg 进程：解析 ``-progress`` 输出实时上报进度，支持中途取消与卡死检测。
+
+gevent 下 subprocess 被 patch（见 ``core.utils.run_subprocess_safe``），这里沿用 os.system 方案：
+shell 先把自身 pid 写入 pid 文件再 ``exec`` ffmpeg（pid 不变），os.system 在工作线程里等待退出；
+调用线程轮询 ``-progress`` 文件与停止标记，取消 / 卡死时按 pid 发信号。
+
+只应在原生线程（如 BaseTaskMgr 的任务 runner）中调用：等待用的是 threading.Event。
+"""
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import FFMPEG_TIMEOUT, app_logger
+from core.utils import run_subprocess_safe
+
+log = app_logger
+
+PROGRESS_POLL_INTERVAL = 0.5  # 轮询 -progress 文件 / 停止标记的间隔（秒）
+KILL_GRACE = 3.0  # SIGTERM 后等待退出的时间，超时再 SIGKILL（秒）
+
+
+@dataclass
+class FfmpegProgress:
+    """``-progress`` 输出中的一个完整块。"""
+    out_time: float = 0.0  # 已输出的媒体时长（秒）
+    speed: Optional[float] = None  # 处理速度（相对实时的倍数）；ffmpeg 输出 N/A 时为 None
+    total_size: int = 0  # 已写出字节数
+    done: bool = False  # progress=end
+
+
+class FfmpegCancelled(Exception):
+    """ffmpeg 因停止请求被终止。"""
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value.strip().rstrip('x'))
+    except ValueError:
+        return None
+
+
+def _parse_out_time(fields: Dict[str, str]) -> float:
+    # out_time_ms 实际单位也是微秒（ffmpeg 历史遗留），优先 out_time_us
+    for key in ('out_time_us', 'out_time_ms'):
+        value = _parse_float(fields.get(key))
+        if value is not None and value >= 0:
+            return value / 1_000_000
+    hms = fields.get('out_time', '')
+    try:
+        hours, minutes, seconds = hms.split(':')
+        return max(0.0, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+    except ValueError:
+        return 0.0
+
+
+def progress_from_fields(fields: Dict[str, str]) -> FfmpegProgress:
+    """把一个 ``key=value`` 块转换为 FfmpegProgress。"""
+    total_size = _parse_float(fields.get('total_size'))
+    return FfmpegProgress(out_time=_parse_out_time(fields),
+                          speed=_parse_float(fields.get('speed')),
+                          total_size=int(total_size) if total_size else 0,
+                          done=fields.get('progress') == 'end')
+
+
+class ProgressReader:
+    """增量读取 ``-progress`` 文件，每次 poll 返回新出现的最后一个完整块。"""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._offset = 0
+        self._pending = ''
+        self._fields: Dict[str, str] = {}
+
+    def poll(self) -> Optional[FfmpegProgress]:
+        try:
+            with open(self._path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data:
+            return None
+        self._offset += len(data)
+        *lines, self._pending = (self._pending + data.decode('utf-8', errors='replace')).split('\n')
+        latest = None
+        for line in lines:
+            key, sep, value = line.strip().partition('=')
+            if not sep:
+                continue
+            self._fields[key] = value
+            if key == 'progress':
+                latest = progress_from_fields(self._fields)
+                self._fields = {}
+        return latest
+
+
+def _read_pid(pid_path: str) -> Optional[int]:
+    try:
+        with open(pid_path, 'r', encoding='utf-8') as f:
+            text = f.read().strip()
+        return int(text) if text.isdigit() else None
+    except OSError:
+        return None
+
+
+def _terminate(pid_path: str, done: threading.Event) -> None:
+    """SIGTERM，KILL_GRACE 内未退出则 SIGKILL；等待 os.system 返回。"""
+    pid = _read_pid(pid_path)
+    deadline = time.monotonic() + KILL_GRACE
+    while pid is None and not done.is_set() and time.monotonic() < deadline:
+        # shell 尚未写入 pid（刚启动）
+        done.wait(0.05)
+        pid = _read_pid(pid_path)
+    if pid is None or done.is_set():
+        return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            return
+        if done.wait(KILL_GRACE):
+            return
+    log.warning(f"[FFMPEG] 进程 {pid} 在 SIGKILL 后仍未退出")
+
+
+def run_ffmpeg(cmd: List[str],
+               on_progress: Optional[Callable[[FfmpegProgress], None]] = None,
+               should_stop: Optional[Callable[[], bool]] = None,
+               stall_timeout: float = FFMPEG_TIMEOUT,
+               poll_interval: float = PROGRESS_POLL_INTERVAL) -> Tuple[int, str]:
+    """运行 ffmpeg 并监督其进度。
+
+    Args:
+        cmd: 完整命令，``cmd[0]`` 为 ffmpeg 可执行文件；``-progress`` 等参数由本函数插入。
+        on_progress: 每解析到新的进度块时回调（在调用线程中执行）。
+        should_stop: 返回 True 时终止进程并抛出 FfmpegCancelled。
+        stall_timeout: 输出进度在该时间内没有推进则视为卡死，终止进程并抛出 TimeoutError。
+            按「无进展」而非总时长计时，长时间合并不会被误杀。
+        poll_interval: 轮询间隔（秒）。
+
+    Returns:
+        (returncode, stderr)；进程被信号终止时 returncode 为负数。
+
+    Raises:
+        FfmpegCancelled: 收到停止请求。
+        TimeoutError: 进度卡死超过 stall_timeout。
+    """
+    if sys.platform == 'win32':
+        # Windows 无 exec / 信号语义：退回一次性执行，不上报进度、不支持中途取消
+        returncode, _, stderr = run_subprocess_safe(cmd, timeout=stall_timeout)
+        return returncode, stderr
+
+    work_dir = tempfile.mkdtemp(prefix='ffmpeg_')
+    progress_path = os.path.join(work_dir, 'progress')
+    stderr_path = os.path.join(work_dir, 'stderr')
+    pid_path = os.path.join(work_dir, 'pid')
+    full_cmd = [cmd[0], '-nostdin', '-nostats', '-progress', progress_path, *cmd[1:]]
+    shell_cmd = (f"echo $$ > {shlex.quote(pid_path)}; "
+                 f"exec {' '.join(shlex.quote(arg) for arg in full_cmd)} "
+                 f"< /dev/null 2> {shlex.quote(stderr_path)}")
+
+    result: Dict[str, object] = {}
+    done = threading.Event()
+
+    def _wait() -> None:
+        try:
+            result['status'] = os.system(shell_cmd)
+        except Exception as e:
+            result['error'] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=_wait, daemon=True).start()
+    reader = ProgressReader(progress_path)
+    last_out_time = -1.0
+    last_advance = time.monotonic()
+    try:
+        while not done.wait(poll_interval):
+            progress = reader.poll()
+            now = time.monotonic()
+            if progress is not None:
+                if progress.out_time > last_out_time:
+                    last_out_time = progress.out_time
+                    last_advance = now
+                if on_progress:
+                    on_progress(progress)
+            if should_stop and should_stop():
+                log.info(f"[FFMPEG] 收到停止请求，终止进程: {cmd[0]}")
+                _terminate(pid_path, done)
+                raise FfmpegCancelled("ffmpeg 已被停止")
+            if now - last_advance > stall_timeout:
+                _terminate(pid_path, done)
+                raise TimeoutError(f"ffmpeg 进度超过 {stall_timeout}s 无进展")
+
+        progress = reader.poll()
+        if progress is not None and on_progress:
+            on_progress(progress)
+        error = result.get('error')
+        if isinstance(error, Exception):
+            raise error
+        status = result.get('status')
+        returncode = os.waitstatus_to_exitcode(status) if isinstance(status, int) else -1
+        try:
+            with open(stderr_path, 'r', encoding='utf-8', errors='replace') as f:
+                stderr = f.read()
+        except OSError:
+            stderr = ''
+        return returncode, stderr
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,422 @@
+"""
+静态大文件下发：打开文件缓存、HTTP Range / 多段 Range、条件请求与 gevent 下的 sendfile 零拷贝。
+
+- ``OpenFileCache``：缓存「已校验路径 -> 打开的只读 fd + stat + ETag」，在 ttl 内复用，
+  过期后用一次 ``os.stat`` 复核（inode/size/mtime 变化则重新打开）；LRU 淘汰，淘汰时等正在下发的响应释放后再关闭 fd；
+- ``serve_file``：生成 Flask Response，支持 ``Range``（单段 206 / 多段 multipart/byteranges）、``If-Range``、
+  ``If-None-Match`` / ``If-Modified-Since``（304）与 HEAD；
+- 响应体 ``FileRangeBody`` 用 ``os.pread`` 分块读取（共享 fd，无 seek 竞争）；
+  在 gevent WSGIServer 上配合 ``make_sendfile_handler`` 时改为 ``os.sendfile`` 零拷贝写 socket，
+  socket 不可写时 ``wait_write`` 让出，不阻塞 hub。
+
+使用示例：
+```python
+from core.tools.file_serving import OpenFileCache, serve_file
+
+cache = OpenFileCache()
+entry = cache.acquire("/media/movie.mp4", "video/mp4")
+return serve_file(entry, request)  # 响应结束时自动 release
+```
+"""
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Any, Iterator, List, Optional, Tuple
+
+from flask import Request, Response
+from werkzeug.http import parse_date, parse_etags
+
+from core.config import app_logger
+
+log = app_logger
+
+# pread 回退路径的读取块大小
+READ_CHUNK = 256 * 1024
+# 单个请求最多返回的 Range 段数；超过时按完整文件返回，防止构造大量小段放大开销
+MAX_RANGES = 16
+# 相邻两段间隔小于该值时合并为一段（少一个 multipart 头反而更省）
+RANGE_MERGE_GAP = 80
+
+_HAS_SENDFILE = hasattr(os, "sendfile")
+
+
+class CachedFile:
+    """缓存中的一个打开文件；通过 ``OpenFileCache.acquire`` 获取，用完 ``release``。"""
+
+    __slots__ = ("path", "fd", "size", "mtime", "ino", "etag", "last_modified", "mimetype", "checked_at",
+                 "last_used", "_refs", "_evicted", "_cache")
+
+    def __init__(self, path: str, fd: int, st: os.stat_result, mimetype: str, cache: "OpenFileCache") -> None:
+        self.path = path
+        self.fd = fd
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.ino = st.st_ino
+        self.etag = f"{st.st_mtime_ns:x}-{st.st_size:x}-{st.st_ino:x}"
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.mimetype = mimetype
+        self.checked_at = time.monotonic()
+        self.last_used = self.checked_at
+        self._refs = 0
+        self._evicted = False
+        self._cache = cache
+
+    def matches(self, st: os.stat_result) -> bool:
+        return (st.st_ino, st.st_size, st.st_mtime) == (self.ino, self.size, self.mtime)
+
+    def pread(self, offset: int, count: int) -> bytes:
+        return os.pread(self.fd, count, offset)
+
+    def release(self) -> None:
+        self._cache._release(self)
+
+
+class OpenFileCache:
+    """已校验路径与打开 fd 的短期缓存（线程 / greenlet 安全）。"""
+
+    def __init__(self, max_entries: int = 64, ttl: float = 5.0, idle_timeout: float = 60.0) -> None:
+        """
+        Args:
+            max_entries: 最多缓存的打开文件数
+            ttl: 复用期（秒），超过后用一次 stat 复核文件是否变化
+            idle_timeout: 空闲超过该时间的条目在下次写入缓存时关闭
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.idle_timeout = idle_timeout
+        self._entries: "OrderedDict[str, CachedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, path: str, mimetype: str) -> CachedFile:
+        """返回 path 对应的打开文件（引用计数 +1）；文件不存在或不是普通文件时抛 FileNotFoundError / OSError。"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry.checked_at < self.ttl:
+                self._entries.move_to_end(path)
+                entry._refs += 1
+                entry.last_used = now
+                self.hits += 1
+                return entry
+
+        # 未命中或需要复核：stat / open 在锁外执行
+        st = os.stat(path)
+        if entry is not None and entry.matches(st):
+            with self._lock:
+                if self._entries.get(path) is entry:
+                    entry.checked_at = now
+                    entry.last_used = now
+                    entry._refs += 1
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        try:
+            fresh = CachedFile(path, fd, os.fstat(fd), mimetype, self)
+        except Exception:
+            os.close(fd)
+            raise
+        with self._lock:
+            self.misses += 1
+            fresh._refs += 1
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._evict(old)
+            self._entries[path] = fresh
+            self._sweep(now)
+        return fresh
+
+    def _sweep(self, now: float) -> None:
+        while len(self._entries) > self.max_entries:
+            _, old = self._entries.popitem(last=False)
+            self._evict(old)
+        for key in [k for k, e in self._entries.items() if now - e.last_used > self.idle_timeout and e._refs == 0]:
+            self._evict(self._entries.pop(key))
+
+    def _evict(self, entry: CachedFile) -> None:
+        entry._evicted = True
+        if entry._refs == 0:
+            _close(entry)
+
+    def _release(self, entry: CachedFile) -> None:
+        with self._lock:
+            entry._refs -= 1
+            if entry._refs == 0 and entry._evicted:
+                _close(entry)
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """移除指定路径（或全部）的缓存条目。"""
+        with self._lock:
+            keys = [path] if path is not None else list(self._entries)
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._evict(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _close(entry: CachedFile) -> None:
+    try:
+        os.close(entry.fd)
+    except OSError:
+        pass
+
+
+# ==================== Range / 条件请求 ====================
+
+
+def parse_ranges(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """解析 ``Range: bytes=...``，返回合并后的 ``[(start, end_exclusive), ...]``。
+
+    Returns:
+        None: 没有 Range、语法无法识别或段数过多（按完整文件返回）；
+        []: 语法正确但全部不可满足（返回 416）。
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges: List[Tuple[int, int]] = []
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+    for part in parts:
+        first, sep, last = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                if suffix > 0 and size > 0:
+                    ranges.append((max(0, size - suffix), size))
+                continue
+            start = int(first)
+            end = int(last) + 1 if last else None
+        except ValueError:
+            return None
+        if start < 0 or (end is not None and end <= start):
+            # last-byte-pos < first-byte-pos：语法无效，忽略整个 Range 头
+            return None
+        if start < size:
+            ranges.append((start, size if end is None else min(end, size)))
+    if not ranges:
+        return []
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + RANGE_MERGE_GAP:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _not_modified(entry: CachedFile, request: Request) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etags.star_tag or etags.contains_weak(entry.etag)
+    since = parse_date(request.headers.get("If-Modified-Since"))
+    return since is not None and int(entry.mtime) <= since.timestamp()
+
+
+def _if_range_ok(entry: CachedFile, request: Request) -> bool:
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    value = value.strip()
+    if value.startswith('"') or value.startswith("W/"):
+        # If-Range 只接受强校验
+        return value == f'"{entry.etag}"'
+    date = parse_date(value)
+    return date is not None and int(entry.mtime) <= date.timestamp()
+
+
+# ==================== 响应体 ====================
+
+
+class FileRangeBody:
+    """WSGI 响应体：依次输出 ``segments`` 中的 (前缀字节, offset, count)。
+
+    普通服务器上按块 pread 迭代；``make_sendfile_handler`` 生成的 handler 识别该类型后改用 sendfile。
+    close() 时释放缓存引用（WSGI 服务器在响应结束后调用）。
+    """
+
+    def __init__(self, entry: CachedFile, segments: List[Tuple[bytes, int, int]], trailer: bytes = b"") -> None:
+        self.entry = entry
+        self.segments = segments
+        self.trailer = trailer
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for prefix, offset, count in self.segments:
+            if prefix:
+                yield prefix
+            end = offset + count
+            while offset < end:
+                data = self.entry.pread(offset, min(READ_CHUNK, end - offset))
+                if not data:
+                    raise OSError(f"文件在下发过程中被截断: {self.entry.path}")
+                offset += len(data)
+                yield data
+        if self.trailer:
+            yield self.trailer
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.entry.release()
+
+
+def serve_file(entry: CachedFile, request: Request, max_age: int = 0) -> Response:
+    """按请求头生成文件响应（200 / 206 / 304 / 416），响应结束时释放 entry。
+
+    Args:
+        entry: ``OpenFileCache.acquire`` 返回的条目（所有权转移给响应）
+        request: 当前请求
+        max_age: Cache-Control max-age（秒）；0 表示每次都需要条件请求复核
+    """
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{entry.etag}"',
+        "Last-Modified": entry.last_modified,
+        "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache",
+    }
+    size = entry.size
+
+    if request.method in ("GET", "HEAD") and _not_modified(entry, request):
+        entry.release()
+        return Response(status=304, headers=headers)
+
+    ranges = parse_ranges(request.headers.get("Range"), size) if _if_range_ok(entry, request) else None
+    if ranges == []:
+        entry.release()
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    trailer = b""
+    if ranges is None:
+        status = 200
+        segments = [(b"", 0, size)]
+        length = size
+        mimetype = entry.mimetype
+    elif len(ranges) == 1:
+        status = 206
+        start, end = ranges[0]
+        segments = [(b"", start, end - start)]
+        length = end - start
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        mimetype = entry.mimetype
+    else:
+        status = 206
+        boundary = uuid.uuid4().hex
+        segments = []
+        for start, end in ranges:
+            part_header = (f"\r\n--{boundary}\r\nContent-Type: {entry.mimetype}\r\n"
+                           f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n").encode("latin-1")
+            segments.append((part_header, start, end - start))
+        trailer = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        length = sum(len(prefix) + count for prefix, _, count in segments) + len(trailer)
+        mimetype = f"multipart/byteranges; boundary={boundary}"
+
+    if request.method == "HEAD":
+        entry.release()
+        response = Response(status=status, headers=headers, mimetype=mimetype)
+        response.content_length = length
+        return response
+
+    body = FileRangeBody(entry, segments, trailer)
+    response = Response(body, status=status, headers=headers, mimetype=mimetype, direct_passthrough=True)
+    response.content_length = length
+    return response
+
+
+# ==================== gevent sendfile ====================
+
+
+def sendfile_all(sock: Any, fd: int, offset: int, count: int) -> int:
+    """用 os.sendfile 把 fd[offset:offset+count] 写入 gevent socket；socket 不可写时协作式等待。"""
+    from gevent.socket import wait_write
+
+    out = sock.fileno()
+    timeout = sock.gettimeout()
+    sent_total = 0
+    while count > 0:
+        try:
+            sent = os.sendfile(out, fd, offset, count)
+        except BlockingIOError:
+            wait_write(out, timeout=timeout)
+            continue
+        if sent == 0:
+            raise OSError("sendfile 提前结束：文件被截断")
+        offset += sent
+        count -= sent
+        sent_total += sent
+    return sent_total
+
+
+def _set_cork(sock: Any, on: bool) -> None:
+    """Linux TCP_CORK + TCP_NODELAY（同 nginx tcp_nopush + tcp_nodelay）。
+
+    cork 期间响应头、multipart 分隔与文件数据合并成满包；取消 cork 后剩余不足一包的数据
+    在 NODELAY 下立即发出，不等客户端的延迟 ACK。其他平台或非 TCP socket 忽略。
+    """
+    cork = getattr(socket, "TCP_CORK", None)
+    if cork is None:
+        return
+    try:
+        if on:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, cork, 1 if on else 0)
+    except OSError:
+        pass
+
+
+def make_sendfile_handler(base: Any) -> Any:
+    """基于 gevent WSGIHandler（或其子类，如 WebSocketHandler）生成支持 sendfile 的 handler 类。"""
+
+    class SendfileHandler(base):
+
+        def process_result(self) -> None:
+            body = self.result
+            if not _HAS_SENDFILE or not isinstance(body, FileRangeBody) or self.code in (204, 304):
+                return super().process_result()
+            # 响应头、multipart 分隔与文件数据分多次写出；不 cork 的话小响应会卡在 Nagle 与
+            # 客户端延迟 ACK 上（每请求约 40ms）
+            _set_cork(self.socket, True)
+            try:
+                # 先发送响应头（Content-Length 已设置，不会走 chunked）
+                self.write(b"")
+                if self.response_use_chunked:  # pragma: no cover - 防御：缺少 Content-Length 时退回迭代
+                    for data in body:
+                        self.write(data)
+                    self._sendall(b"0\r\n\r\n")
+                    return
+                for prefix, offset, count in body.segments:
+                    if prefix:
+                        self._sendall(prefix)
+                    if count:
+                        self.response_length += sendfile_all(self.socket, body.entry.fd, offset, count)
+                if body.trailer:
+                    self._sendall(body.trailer)
+            finally:
+                _set_cork(self.socket, False)
+
+    SendfileHandler.__name__ = f"Sendfile{base.__name__}"
+    return SendfileHandler
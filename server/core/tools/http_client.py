@@ -0,0 +1,386 @@
+"""
+连接池化的 HTTP 客户端（keep-alive + 超时 + 重试 + 限流 + 熔断 + 耗时统计）。
+
+- 基于 requests.Session + HTTPAdapter，同一 host 复用 TCP 连接（免去重复的 TLS 握手）；
+- pool_maxsize 限制每个 host 的连接数，pool_block=True 时超出的请求排队等待空闲连接，
+  同时控制多个 agent 时不会无限制地打开 socket；
+- 超时拆分为 (connect, read)，所有请求都带超时；``total_timeout`` 再限制含重试、退避在内的总耗时；
+- ``max_concurrency`` 限制同时进行的请求数，名额用非阻塞尝试 + sleep 轮询获取（gevent 下让出），
+  等待超过 ``queue_timeout`` 抛出 HttpClientBusy；
+- 连接阶段失败对所有方法重试；读超时/5xx 只对幂等方法（GET/HEAD/OPTIONS，或调用方声明
+  ``idempotent=True``）重试，避免重复执行命令；退避带随机抖动，避免多个请求同时重试；
+- 熔断：连续失败 ``breaker_threshold`` 次后打开，``breaker_cooldown`` 秒内直接抛出 CircuitOpenError，
+  之后放行一个试探请求，成功即恢复；
+- 按 "METHOD path" 统计次数、错误数、重试数与耗时；按客户端名称输出 /metrics 耗时直方图。
+
+使用示例：
+```python
+from core.tools.http_client import PooledHttpClient
+
+client = PooledHttpClient("agent")
+resp = client.request("GET", "http://192.168.50.184:8000/media/status")
+print(client.get_stats())
+
+with client.stream("POST", url, json=payload) as resp:
+    for line in client.iter_lines(resp):
+        ...
+```
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.config import app_logger
+from core.tools.metrics import registry
+
+log = app_logger
+
+# 幂等方法：读超时 / 5xx 时允许重试
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# 视为可重试的服务端状态码
+_RETRY_STATUS = frozenset({502, 503, 504})
+# 等待并发名额时的轮询间隔（秒）
+_SLOT_POLL_INTERVAL = 0.01
+
+# 请求耗时桶（秒）：内网 agent 毫秒级，大模型接口可达数十秒
+REQUEST_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_REQUEST_SECONDS = registry.histogram('http_client_request_seconds', 'HTTP 客户端请求耗时（秒，含重试）',
+                                      ('client', 'result'),
+                                      buckets=REQUEST_DURATION_BUCKETS)
+_REJECTED = registry.counter('http_client_rejected_total', 'HTTP 客户端未发出的请求数（并发已满 / 熔断）',
+                             ('client', 'reason'))
+
+TimeoutType = Union[float, Tuple[float, float]]
+
+
+class HttpClientBusy(requests.exceptions.RequestException):
+    """并发名额已满，且在等待时间内未获得名额（请求未发出）。"""
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断中，请求未发出。"""
+
+
+class _CircuitBreaker:
+    """连续失败计数熔断器：closed → open（冷却）→ half_open（放行一个试探请求）。"""
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> Tuple[bool, bool]:
+        """返回 (是否放行, 是否为半开状态的试探请求)。"""
+        if self.threshold <= 0:
+            return True, False
+        with self._lock:
+            if self._opened_at is None:
+                return True, False
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial:
+                return False, False
+            self._trial = True
+            return True, True
+
+    def release_trial(self) -> None:
+        """试探请求结束但没有 record（如抛出非 requests 异常）时释放试探名额，下一个请求重新试探。"""
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok: bool) -> None:
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if ok:
+                self._failures, self._opened_at, self._trial = 0, None, False
+                return
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at, self._trial = time.monotonic(), False
+
+
+class PooledHttpClient:
+    """带连接池、超时、重试、限流、熔断和耗时统计的 HTTP 客户端（线程/greenlet 安全）。"""
+
+    def __init__(self,
+                 name: str,
+                 pool_maxsize: int = 4,
+                 pool_connections: int = 16,
+                 connect_timeout: float = 3.0,
+                 read_timeout: float = 10.0,
+                 retries: int = 2,
+                 backoff: float = 0.2,
+                 jitter: float = 0.5,
+                 total_timeout: Optional[float] = None,
+                 max_concurrency: Optional[int] = None,
+                 queue_timeout: float = 10.0,
+                 breaker_threshold: int = 0,
+                 breaker_cooldown: float = 30.0) -> None:
+        """
+        Args:
+            name: 客户端名称（日志、指标用）
+            pool_maxsize: 每个 host 的最大连接数
+            pool_connections: 缓存的 host 连接池个数
+            connect_timeout: 默认连接超时（秒）
+            read_timeout: 默认读超时（秒）
+            retries: 最大重试次数
+            backoff: 重试退避基数（秒），第 n 次重试等待 backoff * 2**(n-1)，再乘以 [1-jitter, 1+jitter] 随机系数
+            jitter: 退避抖动比例（0 表示不抖动）
+            total_timeout: 默认总超时（秒，含重试与退避），None 表示不限制
+            max_concurrency: 同时进行的请求数上限，None 表示不限制
+            queue_timeout: 等待并发名额的最长时间（秒）
+            breaker_threshold: 连续失败多少次后熔断，0 表示不熔断
+            breaker_cooldown: 熔断持续时间（秒）
+        """
+        self.name = name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.jitter = jitter
+        self.total_timeout = total_timeout
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=True)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._breaker = _CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._in_flight = 0
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _timeout(self, timeout: Optional[TimeoutType], deadline: Optional[float] = None) -> Tuple[float, float]:
+        if timeout is None:
+            connect, read = self.connect_timeout, self.read_timeout
+        elif isinstance(timeout, tuple):
+            connect, read = timeout
+        else:
+            connect, read = min(self.connect_timeout, float(timeout)), float(timeout)
+        if deadline is not None:
+            remaining = max(0.001, deadline - time.monotonic())
+            connect, read = min(connect, remaining), min(read, remaining)
+        return connect, read
+
+    # ---------- 并发名额 / 熔断 ----------
+
+    def _acquire(self, endpoint: str, deadline: Optional[float]) -> bool:
+        """获取并发名额并通过熔断检查，返回是否为半开试探请求（需在 _release 时交还）。"""
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            wait_until = time.monotonic() + self.queue_timeout
+            if deadline is not None:
+                wait_until = min(wait_until, deadline)
+            while not self._slots.acquire(blocking=False):
+                if time.monotonic() >= wait_until:
+                    _REJECTED.labels(self.name, 'busy').inc()
+                    raise HttpClientBusy(f"{self.name} 并发已满（{self.max_concurrency}），等待超时: {endpoint}")
+                time.sleep(_SLOT_POLL_INTERVAL)
+        # 拿到名额后再判断熔断，避免半开状态的试探名额被排队中的请求占用
+        allowed, trial = self._breaker.allow()
+        if not allowed:
+            if self._slots is not None:
+                self._slots.release()
+            _REJECTED.labels(self.name, 'circuit_open').inc()
+            raise CircuitOpenError(f"{self.name} 熔断中，暂停请求: {endpoint}")
+        with self._lock:
+            self._in_flight += 1
+        return trial
+
+    def _release(self, trial: bool = False) -> None:
+        if trial:
+            self._breaker.release_trial()
+        with self._lock:
+            self._in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    # ---------- 请求 ----------
+
+    def request(self,
+                method: str,
+                url: str,
+                timeout: Optional[TimeoutType] = None,
+                retries: Optional[int] = None,
+                idempotent: Optional[bool] = None,
+                total_timeout: Optional[float] = None,
+                **kwargs: Any) -> requests.Response:
+        """发送请求；重试耗尽后抛出最后一次的 requests 异常（5xx 则返回最后一次响应）。
+
+        Args:
+            method: HTTP 方法
+            url: 完整 URL
+            timeout: 秒数（作为读超时）或 (connect, read)，默认使用客户端配置
+            retries: 覆盖默认重试次数
+            idempotent: 覆盖按方法判断的幂等性（如大模型生成类 POST 可声明为幂等以允许重试）
+            total_timeout: 覆盖默认总超时（秒）
+            **kwargs: 透传给 requests.Session.request（params/json/data/headers...）；
+                stream=True 时名额在返回前即释放，需要持有名额直到读完请用 stream()
+
+        Raises:
+            HttpClientBusy: 并发已满且等待超时
+            CircuitOpenError: 熔断中
+        """
+        endpoint, start, deadline = self._begin(method, url, total_timeout)
+        trial = self._acquire(endpoint, deadline)
+        try:
+            return self._send(method, url, endpoint, start, deadline, timeout, retries, idempotent, **kwargs)
+        finally:
+            self._release(trial)
+
+    @contextmanager
+    def stream(self,
+               method: str,
+               url: str,
+               timeout: Optional[TimeoutType] = None,
+               retries: Optional[int] = None,
+               idempotent: Optional[bool] = None,
+               total_timeout: Optional[float] = None,
+               **kwargs: Any) -> Iterator[requests.Response]:
+        """流式请求：持有并发名额直到退出 with 块，退出时关闭响应。参数同 request()。"""
+        endpoint, start, deadline = self._begin(method, url, total_timeout)
+        trial = self._acquire(endpoint, deadline)
+        try:
+            response = self._send(method, url, endpoint, start, deadline, timeout, retries, idempotent,
+                                  stream=True, **kwargs)
+            try:
+                response.deadline = deadline  # type: ignore[attr-defined]  # 供 iter_lines 使用
+                yield response
+            finally:
+                response.close()
+        finally:
+            self._release(trial)
+
+    @staticmethod
+    def iter_lines(response: requests.Response, chunk_size: int = 512) -> Iterator[bytes]:
+        """逐行读取流式响应；超过 stream() 的总超时抛出 requests.exceptions.Timeout。"""
+        deadline = getattr(response, 'deadline', None)
+        for line in response.iter_lines(chunk_size=chunk_size):
+            if deadline is not None and time.monotonic() > deadline:
+                raise requests.exceptions.Timeout("流式响应超过总超时")
+            yield line
+
+    def _begin(self, method: str, url: str, total_timeout: Optional[float]) -> Tuple[str, float, Optional[float]]:
+        endpoint = f"{method.upper()} {urlparse(url).path or '/'}"
+        total = self.total_timeout if total_timeout is None else total_timeout
+        start = time.monotonic()
+        return endpoint, start, (start + total if total else None)
+
+    def _send(self,
+              method: str,
+              url: str,
+              endpoint: str,
+              start: float,
+              deadline: Optional[float],
+              timeout: Optional[TimeoutType],
+              retries: Optional[int],
+              idempotent: Optional[bool],
+              **kwargs: Any) -> requests.Response:
+        method = method.upper()
+        max_retries = self.retries if retries is None else retries
+        if idempotent is None:
+            idempotent = method in _IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise requests.exceptions.Timeout(f"{self.name} 请求超过总超时: {endpoint}")
+                response = self._session.request(method, url, timeout=self._timeout(timeout, deadline), **kwargs)
+                if (idempotent and response.status_code in _RETRY_STATUS and attempt < max_retries
+                        and self._sleep_backoff(attempt + 1, deadline)):
+                    response.close()
+                    attempt += 1
+                    continue
+                self._record(endpoint, start, attempt, ok=response.status_code < 500)
+                return response
+            except requests.exceptions.ConnectionError as e:
+                # ConnectTimeout 是 ConnectionError 的子类：连接未建立，任何方法都可安全重试
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout) or _is_connect_error(e)
+                if not retryable or attempt >= max_retries or not self._sleep_backoff(attempt + 1, deadline):
+                    self._record(endpoint, start, attempt, ok=False)
+                    raise
+            except requests.exceptions.Timeout:
+                if not idempotent or attempt >= max_retries or not self._sleep_backoff(attempt + 1, deadline):
+                    self._record(endpoint, start, attempt, ok=False)
+                    raise
+            except requests.exceptions.RequestException:
+                self._record(endpoint, start, attempt, ok=False)
+                raise
+            attempt += 1
+            log.debug(f"[HttpClient] {self.name} retry {attempt}/{max_retries}: {method} {url}")
+
+    def _sleep_backoff(self, attempt: int, deadline: Optional[float] = None) -> bool:
+        """退避等待；等待后已超过总超时则不等待并返回 False（不再重试）。"""
+        delay = self.backoff * (2 ** (attempt - 1))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _record(self, endpoint: str, start: float, retries: int, ok: bool) -> None:
+        elapsed = time.monotonic() - start
+        elapsed_ms = elapsed * 1000
+        self._breaker.record(ok)
+        _REQUEST_SECONDS.labels(self.name, 'ok' if ok else 'error').observe(elapsed)
+        with self._lock:
+            item = self._stats.setdefault(endpoint, {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0
+            })
+            item["count"] += 1
+            item["retries"] += retries
+            if not ok:
+                item["errors"] += 1
+            item["total_ms"] += elapsed_ms
+            item["max_ms"] = max(item["max_ms"], elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """按 "METHOD path" 返回请求统计（耗时单位毫秒）。"""
+        with self._lock:
+            return {
+                endpoint: {**item, "avg_ms": item["total_ms"] / item["count"] if item["count"] else 0.0}
+                for endpoint, item in self._stats.items()
+            }
+
+    def get_state(self) -> Dict[str, Any]:
+        """当前并发数与熔断状态。"""
+        with self._lock:
+            in_flight = self._in_flight
+        return {"in_flight": in_flight, "max_concurrency": self.max_concurrency, "circuit": self._breaker.state}
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def _is_connect_error(e: requests.exceptions.ConnectionError) -> bool:
+    """连接被拒绝/无法建立（请求尚未发出）时返回 True。"""
+    text = str(e)
+    return "NewConnectionError" in text or "Connection refused" in text or "Failed to establish" in text
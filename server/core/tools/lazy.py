@@ -0,0 +1,248 @@
+"""
+延迟加载工具：按需导入的可选依赖、首次使用时创建的管理器单例，以及启动耗时统计。
+
+- ``lazy_import(name)``：返回模块代理，首次访问属性时才真正 import；依赖缺失时在使用处抛 ImportError，
+  不影响服务启动（pikepdf / bleak / dashscope / upnpclient 等较重的可选依赖）；
+- ``mgr_registry.register(name, factory)``：返回管理器代理，首次访问属性时调用 factory 创建实例，
+  记录创建耗时；``eager=True`` 的管理器由 ``create_app`` 调用 ``init_eager()`` 在启动时创建
+  （构造函数里注册定时任务/启动 worker 的管理器）；
+- ``StartupProfiler``：``STARTUP_PROFILE=1`` 时记录各启动阶段（蓝图模块导入、初始化步骤）与管理器创建耗时并输出到日志。
+
+创建过程不持锁等待：同一时刻只有一个调用方执行 factory，其他线程/greenlet 轮询等待（time.sleep 在 gevent 下会让出），
+避免真实线程锁阻塞 gevent hub。
+
+使用示例：
+```python
+from core.tools.lazy import lazy_import, mgr_registry
+
+pikepdf = lazy_import("pikepdf")
+pdf_mgr = mgr_registry.register("pdf_mgr", PdfMgr)
+pdf_mgr.list_tasks()  # 首次访问时创建 PdfMgr
+```
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, cast
+
+from core.config import app_logger
+
+log = app_logger
+
+T = TypeVar("T")
+
+# 等待其他调用方完成创建时的轮询间隔（秒）
+_WAIT_INTERVAL = 0.005
+
+try:
+    from greenlet import getcurrent as _current_greenlet
+except ImportError:  # pragma: no cover - gevent 环境必然存在 greenlet
+    _current_greenlet = None
+
+
+def _caller_id() -> Tuple[int, int]:
+    """当前线程 + greenlet 标识，用于识别创建过程中的循环依赖。"""
+    glet = id(_current_greenlet()) if _current_greenlet is not None else 0
+    return threading.get_ident(), glet
+
+
+class _LazyValue:
+    """只创建一次的值；创建失败时下次访问重试。"""
+
+    __slots__ = ("name", "_factory", "_value", "_ready", "_creator", "_lock", "init_ms")
+
+    def __init__(self, name: str, factory: Callable[[], Any]) -> None:
+        self.name = name
+        self._factory = factory
+        self._value: Any = None
+        self._ready = False
+        self._creator: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.init_ms: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self) -> Any:
+        if self._ready:
+            return self._value
+        me = _caller_id()
+        while True:
+            with self._lock:
+                if self._ready:
+                    return self._value
+                if self._creator is None:
+                    self._creator = me
+                    break
+                if self._creator == me:
+                    raise RuntimeError(f"{self.name} 创建过程中存在循环依赖")
+            time.sleep(_WAIT_INTERVAL)
+        try:
+            start = time.perf_counter()
+            value = self._factory()
+            self.init_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._value = value
+                self._ready = True
+            return value
+        finally:
+            with self._lock:
+                self._creator = None
+
+
+class LazyProxy:
+    """对象代理：属性读写都转发给首次访问时创建的实例。"""
+
+    __slots__ = ("_lazy_value",)
+
+    def __init__(self, value: _LazyValue) -> None:
+        object.__setattr__(self, "_lazy_value", value)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._lazy_value.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._lazy_value.get(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._lazy_value.get(), name)
+
+    def __repr__(self) -> str:
+        lazy = self._lazy_value
+        if lazy.ready:
+            return repr(lazy.get())
+        return f"<lazy {lazy.name} (未创建)>"
+
+
+class _LazyModule(ModuleType):
+    """模块代理：首次访问属性时 import 真实模块。"""
+
+    def __init__(self, name: str, on_load: Optional[Callable[[ModuleType], None]] = None) -> None:
+        super().__init__(name)
+
+        def _load() -> ModuleType:
+            module = importlib.import_module(name)
+            if on_load is not None:
+                on_load(module)
+            return module
+
+        object.__setattr__(self, "_lazy_value", _LazyValue(name, _load))
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return getattr(self._lazy_value.get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._lazy_value.get(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._lazy_value.get(), name)
+
+    def __repr__(self) -> str:
+        state = "已加载" if self._lazy_value.ready else "未加载"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str, on_load: Optional[Callable[[ModuleType], None]] = None) -> Any:
+    """返回延迟导入的模块代理。
+
+    Args:
+        name: 模块名（可带点号，如 ``core.device.mi_device``）
+        on_load: 模块首次加载后的回调（如设置 SDK 的全局配置）
+    """
+    return _LazyModule(name, on_load)
+
+
+class ManagerRegistry:
+    """管理器注册表：按名称登记 factory，首次使用时创建并记录耗时。"""
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, _LazyValue] = {}
+        self._eager: List[str] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], T], eager: bool = False) -> T:
+        """登记管理器并返回代理（类型上等同于实例）。
+
+        Args:
+            name: 管理器名称（如 ``playlist_mgr``）
+            factory: 创建实例的可调用对象（通常就是类本身）
+            eager: 是否在 ``init_eager()`` 时创建（构造函数有启动期副作用的管理器）
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = _LazyValue(name, factory)
+                self._entries[name] = entry
+                if eager:
+                    self._eager.append(name)
+        return cast(T, LazyProxy(entry))
+
+    def get(self, name: str) -> Any:
+        """返回管理器实例（必要时创建）。"""
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"未注册的管理器: {name}")
+        return entry.get()
+
+    def is_initialized(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return bool(entry and entry.ready)
+
+    def init_eager(self) -> None:
+        """创建所有 eager 管理器；单个失败只记录日志，不影响启动。"""
+        for name in list(self._eager):
+            try:
+                self.get(name)
+            except Exception as e:
+                log.error(f"[Lazy] 管理器 {name} 初始化失败: {e}", exc_info=True)
+
+    def init_times(self) -> Dict[str, float]:
+        """已创建管理器的创建耗时（毫秒）。"""
+        return {name: entry.init_ms for name, entry in self._entries.items() if entry.init_ms is not None}
+
+
+mgr_registry = ManagerRegistry()
+
+
+class StartupProfiler:
+    """启动耗时统计；未启用时 step() 只是空上下文。"""
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._start = time.perf_counter()
+        self._steps: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._steps.append((name, (time.perf_counter() - start) * 1000))
+
+    def steps(self) -> List[Tuple[str, float]]:
+        return list(self._steps)
+
+    def report(self) -> Optional[str]:
+        """输出启动耗时报表（按耗时倒序）；未启用时返回 None。"""
+        if not self.enabled:
+            return None
+        total_ms = (time.perf_counter() - self._start) * 1000
+        lines = [f"[Startup] create_app 总耗时 {total_ms:.1f}ms"]
+        for name, ms in sorted(self._steps, key=lambda item: item[1], reverse=True):
+            lines.append(f"  {ms:8.1f}ms  {name}")
+        for name, ms in sorted(mgr_registry.init_times().items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  {ms:8.1f}ms  mgr {name}")
+        report = "\n".join(lines)
+        log.info(report)
+        return report
@@ -0,0 +1,317 @@
+"""
+日志文件读取器：从文件末尾按块倒序读取、稀疏时间索引与跨轮转文件过滤。
+
+- 尾部读取：从 EOF 按 block_size 倒序 seek，只读取返回结果需要的数据，内存与耗时与结果条数成正比；
+- 记录：以时间戳开头的行开始一条记录，后续无时间戳的行（如 Traceback）归属上一条记录；
+- 稀疏索引：每 index_interval 字节记录一个检查点 (offset, 时间戳)，只需 seek 并读取少量数据即可建立，
+  对正在写入的文件增量扩展；时间范围查询先二分定位再读取，复杂度 O(结果)；
+- 轮转文件：兼容 TimedRotatingFileHandler 的 ``app.log.YYYY-MM-DD`` 命名，按新到旧依次读取；
+- 压缩归档：``app.log.YYYY-MM-DD.gz`` 按 ``.idx`` 中的 member 索引读取（见 core.config.log_archive），
+  时间范围之外的 member 不解压，每次只解压一个 member；
+- 分页：返回游标 ``{"file", "offset"}``，下一页从该位置继续向前读取（压缩文件的 offset 为原文偏移）。
+
+使用示例：
+```python
+from core.tools.log_reader import LogReader
+
+reader = LogReader("logs/app.log")
+page = reader.query(limit=200, level="ERROR", keyword="timeout")
+for record in page["lines"]:
+    print(record)
+older = reader.query(limit=200, cursor=page["next"])
+```
+"""
+from __future__ import annotations
+
+import bisect
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from core.config.log_archive import (is_archive, load_archive_index, read_member, rotated_files,
+                                     scan_archive_index)
+
+# 日志行时间戳（logging 默认 asctime：2024-01-01 12:00:00,123；访问日志无毫秒）
+_TS_RE = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+# 日志级别：时间戳后的 [LEVEL]
+_LEVEL_RE = re.compile(rb'^\S+ \S+ \[([A-Z]+)\]')
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_INDEX_INTERVAL = 256 * 1024
+# 建立检查点时每次读取的数据量
+_PROBE_SIZE = 8 * 1024
+# 最近解压的 member 缓存个数（翻页时通常连续读取同一个 member）
+_MEMBER_CACHE_SIZE = 4
+
+
+class _FileIndex:
+    """单个文件的稀疏索引：检查点偏移升序，时间戳单调不减。"""
+
+    __slots__ = ("inode", "indexed_size", "offsets", "timestamps")
+
+    def __init__(self, inode: int) -> None:
+        self.inode = inode
+        self.indexed_size = 0
+        self.offsets: List[int] = []
+        self.timestamps: List[bytes] = []
+
+
+class LogReader:
+    """按块倒序读取日志文件，支持分页、时间范围、级别与关键字过滤（线程安全）。"""
+
+    def __init__(self,
+                 path: str,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 index_interval: int = DEFAULT_INDEX_INTERVAL) -> None:
+        """
+        Args:
+            path: 当前日志文件路径（轮转文件为 ``path.YYYY-MM-DD``）
+            block_size: 倒序读取的块大小（字节）
+            index_interval: 稀疏索引检查点间隔（字节）
+        """
+        self.path = path
+        self.block_size = block_size
+        self.index_interval = index_interval
+        self._indexes: Dict[str, _FileIndex] = {}
+        self._archive_indexes: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._members: OrderedDict[Tuple[str, int], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def files(self) -> List[str]:
+        """返回当前文件与轮转文件（含压缩归档），按新到旧排序。"""
+        rotated = [path for _, path in reversed(rotated_files(self.path))]
+        files = [self.path] if os.path.exists(self.path) else []
+        return files + rotated
+
+    # ==================== 倒序读取 ====================
+
+    def _iter_lines_backward(self, f, end: int) -> Iterator[Tuple[int, bytes]]:
+        """从 end 向前逐行读取，返回 (行首偏移, 行内容)。"""
+        pos = end
+        rest = b''
+        while pos > 0:
+            size = min(self.block_size, pos)
+            pos -= size
+            f.seek(pos)
+            chunk = f.read(size) + rest
+            parts = chunk.split(b'\n')
+            rest = parts[0]
+            offset = pos + len(rest) + 1
+            starts = []
+            for part in parts[1:]:
+                starts.append(offset)
+                offset += len(part) + 1
+            for i in range(len(parts) - 1, 0, -1):
+                if parts[i]:
+                    yield starts[i - 1], parts[i]
+        if rest:
+            yield 0, rest
+
+    def _iter_records_backward(self, f, end: int) -> Iterator[Tuple[int, Optional[bytes], bytes]]:
+        """从 end 向前逐条读取记录，返回 (记录起始偏移, 时间戳, 记录内容)。"""
+        pending: List[bytes] = []
+        for offset, line in self._iter_lines_backward(f, end):
+            match = _TS_RE.match(line)
+            if match:
+                pending.append(line)
+                pending.reverse()
+                yield offset, match.group(1), b'\n'.join(pending)
+                pending = []
+            else:
+                pending.append(line)
+        if pending:
+            pending.reverse()
+            yield 0, None, b'\n'.join(pending)
+
+    # ==================== 稀疏索引 ====================
+
+    def _probe(self, f, offset: int, size: int) -> Optional[Tuple[int, bytes]]:
+        """从 offset 之后找到第一条带时间戳的行，返回 (行首偏移, 时间戳)。"""
+        pos = offset
+        f.seek(pos)
+        if pos > 0:
+            # 跳过不完整的行
+            line = f.readline()
+            pos += len(line)
+        while pos < size:
+            line = f.readline()
+            if not line:
+                break
+            match = _TS_RE.match(line)
+            if match:
+                return pos, match.group(1)
+            pos += len(line)
+            if pos - offset > self.index_interval:
+                break
+        return None
+
+    def _get_index(self, path: str, f) -> _FileIndex:
+        """获取（必要时增量扩展）文件的稀疏索引。"""
+        stat = os.fstat(f.fileno())
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is None or index.inode != stat.st_ino or stat.st_size < index.indexed_size:
+                index = _FileIndex(stat.st_ino)
+                self._indexes[path] = index
+            next_offset = index.offsets[-1] + self.index_interval if index.offsets else 0
+            while next_offset < stat.st_size:
+                probe = self._probe(f, next_offset, stat.st_size)
+                if probe is None:
+                    if next_offset + self.index_interval < stat.st_size:
+                        # 该区间没有带时间戳的行（如超长 Traceback），跳到下一个区间
+                        next_offset += self.index_interval
+                        continue
+                    # 文件尾部数据不足一个完整记录，下次再索引
+                    break
+                if not index.offsets or probe[0] > index.offsets[-1]:
+                    index.offsets.append(probe[0])
+                    index.timestamps.append(probe[1])
+                next_offset = max(probe[0], next_offset) + self.index_interval
+            index.indexed_size = stat.st_size
+            return index
+
+    def _end_offset_for(self, path: str, f, until: bytes, size: int) -> int:
+        """返回一个偏移，该偏移之后的记录时间戳都大于 until。"""
+        index = self._get_index(path, f)
+        i = bisect.bisect_right(index.timestamps, until)
+        if i < len(index.offsets):
+            return index.offsets[i]
+        return size
+
+    # ==================== 压缩归档 ====================
+
+    def _archive_index(self, path: str) -> Dict[str, Any]:
+        """压缩文件的 member 索引（按 mtime 缓存）；没有 .idx 时整体扫描一次。"""
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._archive_indexes.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        index = load_archive_index(path) or scan_archive_index(path)
+        with self._lock:
+            self._archive_indexes[path] = (mtime, index)
+        return index
+
+    def _member_data(self, path: str, f, member: List[Any]) -> bytes:
+        key = (path, member[0])
+        with self._lock:
+            data = self._members.get(key)
+            if data is not None:
+                self._members.move_to_end(key)
+                return data
+        data = read_member(f, member)
+        with self._lock:
+            self._members[key] = data
+            while len(self._members) > _MEMBER_CACHE_SIZE:
+                self._members.popitem(last=False)
+        return data
+
+    def _iter_archive_backward(self, path: str, f, end: int, until: Optional[bytes],
+                               since: Optional[bytes]) -> Iterator[Tuple[int, Optional[bytes], bytes]]:
+        """按 member 从新到旧读取压缩文件，返回的偏移为原文偏移；跳过时间范围之外的 member。"""
+        for member in reversed(self._archive_index(path)["members"]):
+            raw_offset, raw_length, first_ts, last_ts = member[2], member[3], member[4], member[5]
+            if raw_offset >= end:
+                continue
+            if until is not None and first_ts is not None and first_ts.encode() > until:
+                continue
+            if since is not None and last_ts is not None and last_ts.encode() < since:
+                return
+            data = io.BytesIO(self._member_data(path, f, member))
+            for offset, ts, record in self._iter_records_backward(data, min(end - raw_offset, raw_length)):
+                yield raw_offset + offset, ts, record
+
+    def _raw_size(self, path: str) -> int:
+        """文件原文大小（压缩文件取索引中的原文长度）。"""
+        if is_archive(path):
+            return int(self._archive_index(path)["raw_size"])
+        return os.path.getsize(path)
+
+    # ==================== 查询 ====================
+
+    def query(self,
+              limit: int = 200,
+              cursor: Optional[Dict[str, Any]] = None,
+              keyword: Optional[str] = None,
+              level: Optional[str] = None,
+              since: Optional[str] = None,
+              until: Optional[str] = None) -> Dict[str, Any]:
+        """
+        从新到旧返回最多 limit 条记录。
+
+        Args:
+            limit: 最多返回的记录数
+            cursor: 上一页返回的 next 游标 ``{"file": 路径, "offset": 偏移}``，从该位置继续向前读取
+            keyword: 子串过滤（区分大小写）
+            level: 日志级别过滤（如 ERROR），逗号分隔多个
+            since: 起始时间（含），格式 ``YYYY-MM-DD HH:MM:SS``，可只给前缀
+            until: 结束时间（含），格式同上；给前缀时包含该前缀覆盖的整个时间段
+
+        Returns:
+            ``{"lines": [记录...], "next": 游标或 None}``
+        """
+        since_key = since.encode() if since else None
+        # 前缀语义：until="2024-01-01 12" 包含 12 点整个小时
+        until_key = until.encode() + b'\xff' if until else None
+        keyword_key = keyword.encode() if keyword else None
+        levels = {item.strip().upper().encode() for item in level.split(',') if item.strip()} if level else None
+
+        files = self.files()
+        start_file = cursor.get("file") if cursor else None
+        if start_file is not None:
+            if start_file not in files:
+                return {"lines": [], "next": None}
+            files = files[files.index(start_file):]
+
+        lines: List[str] = []
+        for path in files:
+            try:
+                f = open(path, "rb")
+            except OSError:
+                continue
+            with f:
+                archive = is_archive(path)
+                size = self._raw_size(path) if archive else os.fstat(f.fileno()).st_size
+                end = size
+                if cursor and path == start_file:
+                    end = min(int(cursor.get("offset", size)), size)
+                if archive:
+                    records = self._iter_archive_backward(path, f, end, until_key, since_key)
+                else:
+                    if until_key is not None:
+                        end = min(end, self._end_offset_for(path, f, until_key, size))
+                    records = self._iter_records_backward(f, end)
+                for offset, ts, record in records:
+                    if ts is not None:
+                        if until_key is not None and ts > until_key:
+                            continue
+                        if since_key is not None and ts < since_key:
+                            # 记录按时间排序，更早的文件也不会命中
+                            return {"lines": lines, "next": None}
+                    if levels is not None:
+                        match = _LEVEL_RE.match(record)
+                        if not match or match.group(1) not in levels:
+                            continue
+                    if keyword_key is not None and keyword_key not in record:
+                        continue
+                    lines.append(record.decode("utf-8", errors="replace"))
+                    if len(lines) >= limit:
+                        next_cursor = {"file": path, "offset": offset} if offset > 0 else self._next_file(path)
+                        return {"lines": lines, "next": next_cursor}
+        return {"lines": lines, "next": None}
+
+    def _next_file(self, path: str) -> Optional[Dict[str, Any]]:
+        """当前文件已读完时，指向下一个更早的文件。"""
+        files = self.files()
+        if path in files:
+            i = files.index(path)
+            if i + 1 < len(files):
+                older = files[i + 1]
+                try:
+                    return {"file": older, "offset": self._raw_size(older)}
+                except (OSError, ValueError):
+                    return None
+        return None
@@ -0,0 +1,328 @@
+"""
+进程内指标注册表（Counter / Gauge / Histogram），按 Prometheus 文本格式输出。
+
+- 记录开销低：``labels(...)`` 返回的子指标按标签元组缓存，热路径只有一次 dict 查找和一次无竞争加锁；
+- Histogram 只在对应桶上计数（bisect 定位），渲染时再累加为 ``le`` 累计值；
+- 采集回调（collector）只在渲染时执行，用于线程数、greenlet 数、任务数等瞬时值，平时零开销；
+- 标签值应为有限集合（路由模板、操作名等），不要使用原始 URL 或 ID。
+
+使用示例：
+```python
+from core.tools.metrics import registry
+
+calls = registry.counter("demo_calls_total", "调用次数", ("op",))
+latency = registry.histogram("demo_seconds", "耗时（秒）", ("op",))
+calls.labels("get").inc()
+latency.labels("get").observe(0.012)
+print(registry.render())
+```
+"""
+from __future__ import annotations
+
+import bisect
+import gc
+import math
+import threading
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from core.config import app_logger
+
+log = app_logger
+
+# 文本格式的 Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 默认延迟桶（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _fmt_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+# ==================== 子指标（单个标签组合） ====================
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counter 只能增加")
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # 最后一个为 +Inf 桶
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """返回 (累计桶计数, 总和)，累计桶最后一项即总次数。"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = []
+        running = 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total
+
+
+# ==================== 指标 ====================
+
+
+C = TypeVar("C")
+
+
+class _Metric(Generic[C]):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, C] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def _get_child(self, values: LabelValues) -> C:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际传入 {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def labels(self, *values: object) -> C:
+        """返回标签组合对应的子指标（按顺序传入标签值，结果会缓存）。"""
+        return self._get_child(tuple(str(v) for v in values))
+
+    def clear(self) -> None:
+        """清空所有标签组合（采集回调重新填充前调用）。"""
+        with self._lock:
+            self._children = {}
+
+    def _items(self) -> List[Tuple[LabelValues, C]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], Sequence[str], float]]:
+        """返回 (样本名, 标签名, 标签值, 值)。"""
+        for values, child in self._items():
+            yield self.name, self.labelnames, values, child.get()  # type: ignore[attr-defined]
+
+
+class Counter(_Metric[_CounterChild]):
+    """只增计数器。"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """无标签计数器加 amount。"""
+        self._get_child(()).inc(amount)
+
+
+class Gauge(_Metric[_GaugeChild]):
+    """可增可减的瞬时值。"""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """设置无标签 Gauge 的值。"""
+        self._get_child(()).set(value)
+
+
+class Histogram(_Metric[_HistogramChild]):
+    """分桶直方图（含 _bucket / _sum / _count）。"""
+
+    kind = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        bounds = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+        if not bounds:
+            raise ValueError("Histogram 至少需要一个有限桶")
+        self.buckets = bounds
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """无标签直方图记录一个观测值。"""
+        self._get_child(()).observe(value)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], Sequence[str], float]]:
+        names = self.labelnames + ("le",)
+        for values, child in self._items():
+            cumulative, total = child.snapshot()
+            for bound, count in zip(self.buckets + (math.inf,), cumulative):
+                yield f"{self.name}_bucket", names, values + (_fmt_value(bound),), count
+            yield f"{self.name}_sum", self.labelnames, values, total
+            yield f"{self.name}_count", self.labelnames, values, cumulative[-1]
+
+
+# ==================== 注册表 ====================
+
+
+class MetricsRegistry:
+    """指标注册表：同名指标重复注册时返回已有实例。"""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"指标 {metric.name} 已以不同类型或标签注册")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore[return-value]
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """注册采集回调：在 render() 时执行，用于刷新瞬时 Gauge。"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self) -> None:
+        """执行所有采集回调（单个回调失败不影响其他指标）。"""
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                log.warning(f"[Metrics] 采集回调失败 {getattr(collector, '__name__', collector)}: {e}")
+
+    def render(self) -> str:
+        """按 Prometheus 文本格式输出全部指标。"""
+        self.collect()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, names, values, value in metric.samples():
+                lines.append(f"{sample_name}{_fmt_labels(names, values)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ==================== 运行时指标 ====================
+
+_THREADS = registry.gauge("process_threads", "当前 Python 线程数")
+_GREENLETS = registry.gauge("gevent_greenlets", "当前存活的 greenlet 数")
+
+
+def _count_greenlets() -> int:
+    try:
+        from greenlet import greenlet
+    except ImportError:
+        return 0
+    # 用 type() 而不是 isinstance：LocalProxy 等代理对象访问 __class__ 可能抛异常
+    return sum(1 for obj in gc.get_objects() if issubclass(type(obj), greenlet))
+
+
+def _collect_runtime() -> None:
+    _THREADS.set(threading.active_count())
+    # 遍历 gc 对象有一定开销，只在抓取时执行
+    _GREENLETS.set(_count_greenlets())
+
+
+registry.add_collector(_collect_runtime)
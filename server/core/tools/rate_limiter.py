@@ -29,16 +29,27 @@ else:
 # 阻塞获取令牌（最多等待 5 秒）
 if limiter.try_acquire(1, timeout=5):
     print("获取成功")
+
+# 混合限流器：从 Redis 桶批量租借令牌到本地，Redis 不可用时降级为本地令牌桶
+hybrid = HybridRateLimiter('my-limiter', rate=100, interval=1)
+if hybrid.try_acquire(1):
+    print("获取成功")
+print(hybrid.get_stats())
 ```
 """
 
+import threading
 import time
 from enum import Enum
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 
 import redis
 
 import core.db.rds_mgr as rds_mgr
+from core.config import app_logger
+from core.tools.async_util import run_in_background
+
+log = app_logger
 
 
 class RateType(Enum):
@@ -118,6 +129,51 @@ else
 end
 """
 
+# Lua 脚本：批量租借令牌（供 HybridRateLimiter 使用）
+# 与 TRY_ACQUIRE 共用同一数据结构，按"可用即取"的方式最多取走 batch 个令牌；
+# 可用令牌不足 minAmount 时不扣减，返回 0。未初始化返回 -1。
+LEASE_PERMITS_SCRIPT = """
+local rateName = KEYS[1]
+local batch = tonumber(ARGV[1])
+local minAmount = tonumber(ARGV[2])
+local currentTime = tonumber(ARGV[3])
+
+local rateData = redis.call('HMGET', rateName, 'rate', 'interval', 'counter', 'timestamp')
+local rate = tonumber(rateData[1])
+local interval = tonumber(rateData[2])
+local counter = tonumber(rateData[3])
+local timestamp = tonumber(rateData[4])
+
+if rate == nil or interval == nil then
+    return -1
+end
+
+local tokensToAdd = math.floor((currentTime - timestamp) * rate / interval)
+if tokensToAdd < 0 then
+    tokensToAdd = 0
+end
+local available = math.min(counter + tokensToAdd, rate)
+
+local leased = 0
+if available >= minAmount then
+    leased = math.min(batch, available)
+end
+
+if leased > 0 or tokensToAdd > 0 then
+    -- 桶未满时只推进已折算成令牌的时间，保留不足一个令牌的余量
+    local newTimestamp = currentTime
+    if counter + tokensToAdd < rate then
+        newTimestamp = timestamp + math.floor(tokensToAdd * interval / rate)
+    end
+    redis.call('HSET', rateName, 'counter', available - leased)
+    redis.call('HSET', rateName, 'timestamp', newTimestamp)
+end
+return leased
+"""
+
+# 获取耗时直方图的桶边界（毫秒）
+_LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
 
 class RedisRateLimiter:
     """
@@ -334,6 +390,285 @@ class RedisRateLimiter:
             raise RuntimeError(f"Failed to delete rate limiter: {e}")
 
 
+class _LocalTokenBucket:
+    """进程内令牌桶（线程安全），用于 Redis 不可用时的降级限流。"""
+
+    def __init__(self, rate: int, interval_ms: int):
+        self._rate = rate
+        self._interval_ms = interval_ms
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed_ms = (now - self._last) * 1000
+        self._last = now
+        self._tokens = min(float(self._rate), self._tokens + elapsed_ms * self._rate / self._interval_ms)
+
+    def try_take(self, amount: int) -> float:
+        """
+        尝试取走 amount 个令牌。
+
+        Returns:
+            float: 0 表示成功，否则为需要等待的秒数
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) * self._interval_ms / self._rate / 1000.0
+
+
+class HybridRateLimiter:
+    """
+    进程内令牌层 + Redis 令牌桶的混合限流器。
+
+    - 每次从 Redis 桶中批量租借 batch_size 个令牌到本地，本地令牌耗尽前不访问 Redis；
+    - 本地余量低于 low_watermark 时在后台线程异步补充，避免请求路径上的 Redis 往返；
+    - 租来的令牌超过 lease_ttl 未用完即作废，防止长时间空闲后突发放量；
+    - Redis 出错时降级为纯本地令牌桶（同样的 rate/interval，按单机生效），
+      每隔 retry_interval 秒尝试恢复。
+
+    与 RedisRateLimiter 共用 Redis 数据结构，可与其他进程/Java Redisson 端共享同一限流器。
+    """
+
+    def __init__(self,
+                 name: str,
+                 rate: int,
+                 interval: int = 1,
+                 unit: RateIntervalUnit = RateIntervalUnit.SECONDS,
+                 rate_type: RateType = RateType.OVERALL,
+                 redis_client: Optional[redis.Redis] = None,
+                 batch_size: Optional[int] = None,
+                 low_watermark: Optional[int] = None,
+                 lease_ttl: Optional[float] = None,
+                 retry_interval: float = 5.0):
+        """
+        初始化混合限流器。
+
+        Args:
+            name: 限流器名称（Redis key）
+            rate: 每个时间窗口允许的请求数
+            interval: 时间窗口大小
+            unit: 时间窗口单位
+            rate_type: 限流类型
+            redis_client: Redis 客户端实例，默认使用 rds_mgr.rds
+            batch_size: 每次从 Redis 租借的令牌数，默认 rate 的 1/10（至少 1）
+            low_watermark: 本地余量低于该值时触发异步补充，默认 batch_size 的一半
+            lease_ttl: 租借令牌的有效期（秒），默认一个时间窗口
+            retry_interval: 降级后重试 Redis 的间隔（秒）
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self._rate = rate
+        self._interval_ms = RedisRateLimiter._convert_to_milliseconds(interval, unit)
+        self._rate_type = rate_type
+        self._batch_size = max(1, batch_size if batch_size is not None else rate // 10)
+        self._low_watermark = low_watermark if low_watermark is not None else self._batch_size // 2
+        self._lease_ttl = lease_ttl if lease_ttl is not None else self._interval_ms / 1000.0
+        self._retry_interval = retry_interval
+
+        self._local_bucket = _LocalTokenBucket(rate, self._interval_ms)
+        self._lock = threading.Lock()
+        self._leased = 0
+        self._lease_expire_at = 0.0
+        self._refilling = False
+        self._fallback_until = 0.0
+
+        self._stats = {
+            'acquired': 0,
+            'denied': 0,
+            'leases': 0,
+            'leased_permits': 0,
+            'expired_permits': 0,
+            'redis_errors': 0,
+            'fallback_acquired': 0,
+        }
+        self._latency_count = 0
+        self._latency_total_ms = 0.0
+        self._latency_max_ms = 0.0
+        self._latency_buckets = [0] * (len(_LATENCY_BUCKETS_MS) + 1)
+
+        self._redis: Optional[RedisRateLimiter] = None
+        self._lease_script = None
+        client = redis_client or rds_mgr.rds
+        if client is None:
+            # rds_mgr 处于本地 JSON 降级模式，没有可用的 Redis
+            self._fallback_until = float('inf')
+            log.warning('[RateLimiter] %s: Redis 未启用，使用本地令牌桶', name)
+            return
+        try:
+            self._redis = RedisRateLimiter(name, client)
+            self._lease_script = client.register_script(LEASE_PERMITS_SCRIPT)
+            self._redis.try_set_rate(rate_type, rate, interval, unit)
+        except (redis.RedisError, RuntimeError) as e:
+            self._enter_fallback(e)
+
+    def try_acquire(self, amount: int = 1, timeout: Optional[float] = None) -> bool:
+        """
+        尝试获取指定数量的令牌。
+
+        Args:
+            amount: 需要获取的令牌数量，默认为 1
+            timeout: 最长等待时间（秒），None 表示不等待
+
+        Returns:
+            bool: 获取成功返回 True，被限流返回 False
+        """
+        if amount <= 0:
+            raise ValueError("amount must be positive")
+        if amount > self._rate:
+            raise ValueError("amount must not exceed rate")
+
+        start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._try_take(amount)
+            if wait <= 0:
+                self._record(start, acquired=True)
+                return True
+            if deadline is None:
+                self._record(start, acquired=False)
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._record(start, acquired=False)
+                return False
+            time.sleep(max(0.001, min(wait, remaining, 0.1)))
+
+    def acquire(self, amount: int = 1) -> None:
+        """获取指定数量的令牌，阻塞直到成功。"""
+        self.try_acquire(amount, timeout=float('inf'))
+
+    def is_fallback(self) -> bool:
+        """当前是否处于本地降级模式。"""
+        return time.monotonic() < self._fallback_until
+
+    def get_stats(self) -> dict:
+        """
+        获取限流统计信息。
+
+        Returns:
+            dict: 获取/拒绝计数、租借与 Redis 错误计数、获取耗时（毫秒）直方图等
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats['local_permits'] = self._leased
+            count = self._latency_count
+            stats['latency_ms'] = {
+                'count': count,
+                'avg': self._latency_total_ms / count if count else 0.0,
+                'max': self._latency_max_ms,
+                'buckets': {
+                    **{str(b): n for b, n in zip(_LATENCY_BUCKETS_MS, self._latency_buckets)},
+                    '+Inf': self._latency_buckets[-1],
+                },
+            }
+        stats['fallback'] = self.is_fallback()
+        return stats
+
+    def _try_take(self, amount: int) -> float:
+        """取令牌，返回 0 表示成功，否则为建议等待的秒数。"""
+        if self.is_fallback():
+            wait = self._local_bucket.try_take(amount)
+            if wait <= 0:
+                with self._lock:
+                    self._stats['fallback_acquired'] += 1
+            return wait
+
+        if self._take_leased(amount):
+            self._maybe_refill_async()
+            return 0.0
+
+        # 本地余量不足：同步租借一批
+        self._lease(max(self._batch_size, amount), amount)
+        if self.is_fallback():
+            return self._try_take(amount)
+        if self._take_leased(amount):
+            self._maybe_refill_async()
+            return 0.0
+        # 按单个令牌的生成间隔等待
+        return self._interval_ms / self._rate / 1000.0
+
+    def _take_leased(self, amount: int) -> bool:
+        with self._lock:
+            if self._leased and time.monotonic() >= self._lease_expire_at:
+                self._stats['expired_permits'] += self._leased
+                self._leased = 0
+            if self._leased >= amount:
+                self._leased -= amount
+                return True
+            return False
+
+    def _maybe_refill_async(self) -> None:
+        with self._lock:
+            if self._refilling or self._leased > self._low_watermark:
+                return
+            self._refilling = True
+
+        def refill() -> None:
+            try:
+                self._lease(self._batch_size, 1)
+            finally:
+                with self._lock:
+                    self._refilling = False
+
+        run_in_background(refill)
+
+    def _run_lease(self, batch: int, min_amount: int, now_ms: int) -> int:
+        """执行租借脚本（同步 Redis 客户端，返回整数）。"""
+        assert self._lease_script is not None
+        result: Any = self._lease_script(keys=[self.name], args=[batch, min_amount, now_ms])
+        return int(result)
+
+    def _lease(self, batch: int, min_amount: int) -> None:
+        """从 Redis 桶租借最多 batch 个令牌，至少 min_amount 个才扣减。"""
+        assert self._redis is not None and self._lease_script is not None
+        now_ms = int(time.time() * 1000)
+        try:
+            leased = self._run_lease(batch, min_amount, now_ms)
+            if leased == -1:
+                # 配置被删除（如 reset/delete 或 Redis 重启），重新初始化后再租
+                self._redis.try_set_rate(self._rate_type, self._rate, self._interval_ms,
+                                         RateIntervalUnit.MILLISECONDS)
+                leased = self._run_lease(batch, min_amount, now_ms)
+        except (redis.RedisError, RuntimeError) as e:
+            self._enter_fallback(e)
+            return
+        if leased <= 0:
+            return
+        with self._lock:
+            self._leased += leased
+            self._lease_expire_at = time.monotonic() + self._lease_ttl
+            self._stats['leases'] += 1
+            self._stats['leased_permits'] += leased
+
+    def _enter_fallback(self, error: Exception) -> None:
+        with self._lock:
+            self._stats['redis_errors'] += 1
+            was_fallback = time.monotonic() < self._fallback_until
+            self._fallback_until = time.monotonic() + self._retry_interval
+        if not was_fallback:
+            log.warning('[RateLimiter] %s: Redis 不可用，降级为本地令牌桶 (%ss 后重试): %s', self.name,
+                        self._retry_interval, error)
+
+    def _record(self, start: float, acquired: bool) -> None:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        idx = len(_LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(_LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                idx = i
+                break
+        with self._lock:
+            self._stats['acquired' if acquired else 'denied'] += 1
+            self._latency_count += 1
+            self._latency_total_ms += elapsed_ms
+            self._latency_max_ms = max(self._latency_max_ms, elapsed_ms)
+            self._latency_buckets[idx] += 1
+
+
 # 便捷函数：创建限流器实例
 def create_rate_limiter(name: str,
                         rate: int,
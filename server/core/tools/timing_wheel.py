@@ -0,0 +1,102 @@
+"""
+哈希时间轮（Hashed Timing Wheel），用于大量 key 的超时检测。
+
+- 每个 key 按截止时间落入 ``deadline_tick % slots`` 槽位，刷新时只做 O(1) 的槽位迁移；
+- ``expire(now)`` 只扫描自上次推进以来经过的槽位，返回已到期的 key，
+  避免每次都遍历全部 key 比较时间戳；
+- 截止 tick 超过一圈时，key 会在槽位中保留到对应轮次才过期。
+
+使用示例：
+```python
+from core.tools.timing_wheel import TimingWheel
+
+wheel: TimingWheel[str] = TimingWheel(slots=64, tick=1.0)
+wheel.schedule("192.168.1.10", deadline=time.time() + 60)
+for key in wheel.expire(time.time()):
+    print("超时:", key)
+```
+"""
+from __future__ import annotations
+
+import math
+import threading
+from typing import Dict, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+
+
+class TimingWheel(Generic[K]):
+    """线程安全的哈希时间轮（按 key 类型参数化，如 ``TimingWheel[str]``）。"""
+
+    def __init__(self, slots: int = 64, tick: float = 1.0) -> None:
+        """
+        Args:
+            slots: 槽位数量
+            tick: 每个槽位代表的时间（秒）
+        """
+        if slots <= 0 or tick <= 0:
+            raise ValueError("slots 与 tick 必须大于 0")
+        self.slots = slots
+        self.tick = tick
+        self._wheel: List[Set[K]] = [set() for _ in range(slots)]
+        self._entries: Dict[K, Tuple[int, int]] = {}  # key -> (slot, deadline_tick)
+        self._overdue: Set[K] = set()  # 加入时已过期的 key，下次 expire 直接返回
+        self._current_tick: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(math.ceil(timestamp / self.tick))
+
+    def schedule(self, key: K, deadline: float) -> None:
+        """添加或刷新 key 的截止时间（时间戳，秒）。"""
+        deadline_tick = self._to_tick(deadline)
+        with self._lock:
+            self._discard(key)
+            if self._current_tick is not None and deadline_tick <= self._current_tick:
+                self._overdue.add(key)
+                return
+            slot = deadline_tick % self.slots
+            self._wheel[slot].add(key)
+            self._entries[key] = (slot, deadline_tick)
+
+    def cancel(self, key: K) -> None:
+        """移除 key。"""
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: K) -> None:
+        self._overdue.discard(key)
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._wheel[entry[0]].discard(key)
+
+    def expire(self, now: float) -> List[K]:
+        """推进时间轮到 now，返回并移除所有已到期的 key。"""
+        now_tick = int(math.floor(now / self.tick))
+        with self._lock:
+            expired = list(self._overdue)
+            self._overdue.clear()
+            if self._current_tick is None:
+                # 首次推进：扫描整圈，覆盖推进前已加入的 key
+                self._current_tick = now_tick - self.slots
+            steps = min(now_tick - self._current_tick, self.slots)
+            for i in range(1, steps + 1):
+                slot = (self._current_tick + i) % self.slots
+                bucket = self._wheel[slot]
+                due = [key for key in bucket if self._entries[key][1] <= now_tick]
+                for key in due:
+                    bucket.discard(key)
+                    del self._entries[key]
+                expired.extend(due)
+            if now_tick > self._current_tick:
+                self._current_tick = now_tick
+            return expired
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return key in self._entries or key in self._overdue
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries) + len(self._overdue)
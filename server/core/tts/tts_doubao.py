@@ -10,8 +10,7 @@
 import base64
 import uuid
 
-import requests
-
+from core.ai.transport import doubao_tts_client
 from core.config import config
 
 API_URL = config.DOUBAO_TTS_API_URL
@@ -58,7 +57,9 @@ def gen_tts(text: str, voice_id: str) -> bytes:
             "operation": "query",
         },
     }
-    with requests.post(API_URL, headers=headers, json=payloads) as r:
+    # reqid 每次生成，合成请求可安全重试
+    with doubao_tts_client.request("POST", API_URL, headers=headers, json=payloads, idempotent=True) as r:
+        r.raise_for_status()
         data = r.json()
         audio_bytes = base64.b64decode(data["data"])
         return audio_bytes
@@ -109,6 +109,18 @@ export async function startAudioMergeTask(
   return response.data;
 }
 
+/**
+ * 停止正在进行的音频合成任务
+ */
+export async function stopAudioMergeTask(
+  taskId: string
+): Promise<ApiResponse<{ message: string }>> {
+  const response = await api.post<ApiResponse<{ message: string }>>("/media/merge/stop", {
+    task_id: taskId,
+  });
+  return response.data;
+}
+
 /**
  * 重新排序音频合成任务文件
  */
@@ -126,6 +126,28 @@ export interface MediaTaskDetail extends MediaTask {
    * 错误消息
    */
   error_message?: string;
+  /**
+   * 合并进度（处理中实时更新）
+   */
+  progress?: MediaMergeProgress | null;
+}
+
+/**
+ * 音频合成进度
+ */
+export interface MediaMergeProgress {
+  /** 整体进度 0-100 */
+  percent: number;
+  /** 已合并的音频时长（秒） */
+  processed_seconds: number;
+  /** 需合并的音频总时长（秒；分层合并时含中间层） */
+  total_seconds: number;
+  /** ffmpeg 处理速度（相对实时的倍数） */
+  speed: number | null;
+  /** 当前 ffmpeg 步骤（从 1 开始） */
+  step: number;
+  /** ffmpeg 步骤总数 */
+  steps: number;
 }
 
 /**
@@ -68,6 +68,7 @@ if __name__ == '__main__':
         from werkzeug.middleware.shared_data import SharedDataMiddleware
         from gevent.pywsgi import WSGIServer
         from geventwebsocket.handler import WebSocketHandler
+        from core.tools.file_serving import make_sendfile_handler
 
         base_dir = os.path.dirname(os.path.abspath(__file__))
         static_app = SharedDataMiddleware(null_application, {'/': 'static'})
@@ -82,7 +83,7 @@ if __name__ == '__main__':
             application,
             log=gevent_access_logger,  # 使用 gevent.access 记录器
             error_log=log,  # 错误日志使用应用日志
-            handler_class=WebSocketHandler,
+            handler_class=make_sendfile_handler(WebSocketHandler),  # 媒体文件 Range 响应走 sendfile 零拷贝
         )
         env_info = 'production' if IS_PRODUCTION else 'development'
         log.info(f'Server started on http://{HOST}:{PORT} (using gevent, env={env_info})')
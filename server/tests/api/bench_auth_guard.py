@@ -0,0 +1,60 @@
+"""
+认证守卫基准：对比每请求 ``verify_jwt_in_request``（旧实现，每次验签 + 解码）
+与 ``verify_jwt_cached``（按 token 摘要缓存到 exp）的单请求开销。
+
+运行：python -m tests.api.bench_auth_guard [请求数]
+在同一个 Flask 应用里用 test_request_context 只执行守卫本身（不含路由与序列化），
+输出每请求微秒数；cached 模式首个请求验签并写缓存，其余命中进程内缓存。
+"""
+import sys
+import time
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, verify_jwt_in_request
+
+import core.services.auth_cache as auth_cache
+
+
+class _MemoryRds:
+    """基准只测守卫本身：共享缓存用内存 Hash 代替 Redis。"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+
+def _bench(app: Flask, guard, token: str, requests: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(requests):
+        with app.test_request_context("/api/playlist/status", headers=headers):
+            guard()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main(requests: int) -> None:
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "bench-secret-key-0123456789abcdef"
+    app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+    JWTManager(app)
+    auth_cache.rds_mgr = _MemoryRds()
+    with app.app_context():
+        token = create_access_token(identity='{"admin": 0, "id": 1, "name": "bench"}')
+
+    baseline = _bench(app, lambda: None, token, requests)
+    print(f"{'mode':>8} {'us/req':>8} {'guard us':>9}")
+    for mode, guard in (("verify", verify_jwt_in_request), ("cached", auth_cache.verify_jwt_cached)):
+        per_request = _bench(app, guard, token, requests)
+        print(f"{mode:>8} {per_request:>8.1f} {per_request - baseline:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,96 @@
+"""
+媒体文件下发基准：对比 ``send_file(conditional=True)``（旧实现，每请求 stat + open + 用户态读写）
+与 ``serve_file`` + 打开文件缓存 + sendfile handler 在 gevent 服务器上的表现。
+
+运行：python -m tests.api.bench_media_serve [文件MB] [Range请求数]
+服务端在独立子进程中运行（gevent WSGIServer），客户端用 keep-alive 的 http.client：
+- seek：拖动进度式的随机 64KB Range 请求，看单请求开销（req/s）；
+- full：完整下载若干次，看吞吐（MB/s）。
+"""
+import http.client
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+CHUNK = 64 * 1024
+FULL_ROUNDS = 5
+
+
+def _serve(mode: str, path: str, queue) -> None:
+    from flask import Flask, abort, request, send_file
+    from gevent.pywsgi import WSGIHandler, WSGIServer
+
+    from core.tools.file_serving import OpenFileCache, make_sendfile_handler, serve_file
+
+    app = Flask(__name__)
+    if mode == "send_file":
+        handler = WSGIHandler
+
+        @app.route("/f")
+        def _legacy():
+            if not os.path.isfile(path):
+                abort(404)
+            return send_file(path, mimetype="video/mp4", conditional=True)
+    else:
+        handler = make_sendfile_handler(WSGIHandler)
+        cache = OpenFileCache()
+
+        @app.route("/f")
+        def _cached():
+            return serve_file(cache.acquire(path, "video/mp4"), request)
+
+    server = WSGIServer(("127.0.0.1", 0), app, handler_class=handler, log=None)
+    server.start()
+    queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _fetch(conn: http.client.HTTPConnection, headers: dict) -> int:
+    conn.request("GET", "/f", headers=headers)
+    resp = conn.getresponse()
+    return len(resp.read())
+
+
+def _bench(port: int, size: int, requests: int):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(requests):
+        offset = rng.randrange(0, size - CHUNK)
+        assert _fetch(conn, {"Range": f"bytes={offset}-{offset + CHUNK - 1}"}) == CHUNK
+    seek = requests / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(FULL_ROUNDS):
+        assert _fetch(conn, {}) == size
+    full = FULL_ROUNDS * size / 1e6 / (time.perf_counter() - start)
+    conn.close()
+    return seek, full
+
+
+def main(size_mb: int, requests: int) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    size = size_mb * 1024 * 1024
+    print(f"{'mode':>10} {'seek req/s':>11} {'full MB/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "movie.mp4")
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        for mode in ("send_file", "cached"):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_serve, args=(mode, path, queue), daemon=True)
+            proc.start()
+            try:
+                seek, full = _bench(queue.get(), size, requests)
+            finally:
+                proc.terminate()
+                proc.join()
+            print(f"{mode:>10} {seek:>11.0f} {full:>10.0f}")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 64, args[1] if len(args) > 1 else 2000)
@@ -299,3 +299,11 @@ def test_agent_mock_exception(client, monkeypatch):
     )
     assert resp.status_code == 200
     assert resp.get_json()["code"] != 0
+
+
+def test_agent_http_stats(client, monkeypatch):
+    monkeypatch.setattr(agent_routes.agent_http_client, "get_stats", lambda: {"GET /media/status": {"count": 1}})
+    resp = client.get("/agent/http/stats")
+    body = resp.get_json()
+    assert body["code"] == 0
+    assert body["data"]["GET /media/status"]["count"] == 1
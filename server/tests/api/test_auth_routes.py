@@ -4,6 +4,15 @@ from unittest.mock import patch, MagicMock
 
 from core.api.auth_routes import auth_bp
 from core.models.user import User
+from core.services.auth_cache import user_cache
+
+
+@pytest.fixture(autouse=True)
+def _clear_user_cache():
+    # 各用例 mock 的用户不同，登录身份缓存需隔离
+    user_cache.clear()
+    yield
+    user_cache.clear()
 
 
 @pytest.fixture
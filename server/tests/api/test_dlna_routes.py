@@ -28,8 +28,9 @@ def client(app):
 def test_dlna_scan_default_timeout(client, monkeypatch):
     seen = {}
 
-    def fake_scan_devices_sync(timeout):
+    def fake_scan_devices_sync(timeout, force=False):
         seen["timeout"] = timeout
+        seen["force"] = force
         return [{"location": "http://dev"}]
 
     monkeypatch.setattr(dlna_routes, "scan_devices_sync", fake_scan_devices_sync)
@@ -40,10 +41,11 @@ def test_dlna_scan_default_timeout(client, monkeypatch):
     assert body["code"] == 0
     assert body["data"] == [{"location": "http://dev"}]
     assert seen["timeout"] == 5.0
+    assert seen["force"] is False
 
 
 def test_dlna_scan_custom_timeout(client, monkeypatch):
-    monkeypatch.setattr(dlna_routes, "scan_devices_sync", lambda timeout: [])
+    monkeypatch.setattr(dlna_routes, "scan_devices_sync", lambda timeout, force=False: [])
 
     resp = client.get("/dlna/scan?timeout=1.5")
     assert resp.status_code == 200
@@ -52,6 +54,15 @@ def test_dlna_scan_custom_timeout(client, monkeypatch):
     assert body["data"] == []
 
 
+def test_dlna_scan_force(client, monkeypatch):
+    seen = {}
+    monkeypatch.setattr(dlna_routes, "scan_devices_sync", lambda timeout, force=False: seen.update(force=force) or [])
+
+    resp = client.get("/dlna/scan?force=1")
+    assert resp.get_json()["code"] == 0
+    assert seen["force"] is True
+
+
 def test_dlna_volume_requires_location(client):
     resp = client.get("/dlna/volume")
     assert resp.status_code == 200
@@ -197,7 +208,7 @@ def test_dlna_stop_ok(client, monkeypatch):
 
 
 def test_dlna_scan_exception(client, monkeypatch):
-    monkeypatch.setattr(dlna_routes, "scan_devices_sync", lambda t: (_ for _ in ()).throw(RuntimeError("scan err")))
+    monkeypatch.setattr(dlna_routes, "scan_devices_sync", lambda t, force=False: (_ for _ in ()).throw(RuntimeError("scan err")))
     resp = client.get("/dlna/scan")
     assert resp.status_code == 200
     assert resp.get_json()["code"] != 0
@@ -90,29 +90,39 @@ def test_media_get_duration_generic_exception(client, monkeypatch):
 # region /media/files/<path:filepath>
 
 
-def test_serve_media_file_not_found(client, monkeypatch):
-    monkeypatch.setattr(media_routes.os.path, "exists", lambda p: False)
+def test_serve_media_file_not_found(client):
     resp = client.get("/media/files/nonexistent.mp3")
     assert resp.status_code == 404
 
 
-def test_serve_media_file_ok(client, monkeypatch):
-    monkeypatch.setattr(media_routes.os.path, "exists", lambda p: True)
-    monkeypatch.setattr(media_routes.os.path, "isfile", lambda p: True)
-    monkeypatch.setattr(media_routes, "send_file", lambda *a, **kw: "ok")
+def test_serve_media_file_ok(client, tmp_path):
+    f = tmp_path / "tmp.mp3"
+    f.write_bytes(b"0123456789")
 
-    resp = client.get("/media/files/tmp.mp3")
+    resp = client.get(f"/media/files{f}")
     assert resp.status_code == 200
+    assert resp.data == b"0123456789"
+    assert resp.mimetype == "audio/mpeg"
+    assert resp.headers["Accept-Ranges"] == "bytes"
 
 
-def test_serve_media_file_server_error(client, monkeypatch):
-    monkeypatch.setattr(media_routes.os.path, "exists", lambda p: True)
-    monkeypatch.setattr(media_routes.os.path, "isfile", lambda p: True)
+def test_serve_media_file_range_and_etag(client, tmp_path):
+    f = tmp_path / "tmp.mp3"
+    f.write_bytes(b"0123456789")
+
+    resp = client.get(f"/media/files{f}", headers={"Range": "bytes=2-4"})
+    assert resp.status_code == 206
+    assert resp.data == b"234"
 
+    resp = client.get(f"/media/files{f}", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_serve_media_file_server_error(client, monkeypatch):
     def raise_any(*a, **kw):
         raise RuntimeError("boom")
 
-    monkeypatch.setattr(media_routes, "send_file", raise_any)
+    monkeypatch.setattr(media_routes.media_mgr._open_files, "acquire", raise_any)
 
     resp = client.get("/media/files/tmp.mp3")
     assert resp.status_code == 500
@@ -122,18 +132,17 @@ def test_serve_media_file_strips_traversal_and_adds_slash(client, monkeypatch):
     """serve_media_file 会替换 ../ 并给无前导 / 的路径加 /"""
     seen_path = []
 
-    def fake_send_file(path, *a, **kw):
+    def fake_acquire(path, mimetype):
         seen_path.append(path)
-        return "ok"
+        raise FileNotFoundError(path)
 
-    monkeypatch.setattr(media_routes.os.path, "exists", lambda p: True)
-    monkeypatch.setattr(media_routes.os.path, "isfile", lambda p: True)
-    monkeypatch.setattr(media_routes, "send_file", fake_send_file)
+    monkeypatch.setattr(media_routes.media_mgr._open_files, "acquire", fake_acquire)
 
     resp = client.get("/media/files/foo/../bar.mp3")
-    assert resp.status_code == 200
+    assert resp.status_code == 404
     assert len(seen_path) == 1
     assert "../" not in seen_path[0]
+    assert seen_path[0].startswith("/")
     assert "foo/bar.mp3" in seen_path[0] or "bar.mp3" in seen_path[0]
 
 
@@ -462,6 +471,19 @@ def test_media_merge_delete_task_ok_and_err(client, monkeypatch):
     assert resp.get_json()["code"] != 0
 
 
+def test_media_merge_stop_task_ok_and_err(client, monkeypatch):
+    monkeypatch.setattr(media_routes.audio_merge_mgr, "stop_task", lambda task_id: (0, "ok"))
+    resp = client.post("/media/merge/stop", json={"task_id": "t"})
+    assert resp.get_json()["code"] == 0
+
+    monkeypatch.setattr(media_routes.audio_merge_mgr, "stop_task", lambda task_id: (-1, "任务未在处理中"))
+    resp = client.post("/media/merge/stop", json={"task_id": "t"})
+    assert resp.get_json()["code"] != 0
+
+    resp = client.post("/media/merge/stop", json={})
+    assert resp.get_json()["code"] != 0
+
+
 def test_media_merge_download_ok(client, monkeypatch):
     monkeypatch.setattr(media_routes.audio_merge_mgr, "get_task", lambda tid: {
         "status": "success",
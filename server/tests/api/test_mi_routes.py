@@ -32,7 +32,7 @@ def test_mi_scan_default_timeout(client, monkeypatch):
         seen["timeout"] = timeout
         return [{"deviceID": "d1"}]
 
-    monkeypatch.setattr(mi_routes, "scan_devices_sync", fake_scan_devices_sync)
+    monkeypatch.setattr(mi_routes.mi_device, "scan_devices_sync", fake_scan_devices_sync)
 
     resp = client.get("/mi/scan")
     assert resp.status_code == 200
@@ -43,7 +43,7 @@ def test_mi_scan_default_timeout(client, monkeypatch):
 
 
 def test_mi_scan_custom_timeout(client, monkeypatch):
-    monkeypatch.setattr(mi_routes, "scan_devices_sync", lambda timeout: [])
+    monkeypatch.setattr(mi_routes.mi_device, "scan_devices_sync", lambda timeout: [])
 
     resp = client.get("/mi/scan?timeout=1.2")
     assert resp.status_code == 200
@@ -53,7 +53,7 @@ def test_mi_scan_custom_timeout(client, monkeypatch):
 
 
 def test_mi_scan_exception(client, monkeypatch):
-    monkeypatch.setattr(mi_routes, "scan_devices_sync", lambda t: (_ for _ in ()).throw(RuntimeError("scan err")))
+    monkeypatch.setattr(mi_routes.mi_device, "scan_devices_sync", lambda t: (_ for _ in ()).throw(RuntimeError("scan err")))
     resp = client.get("/mi/scan")
     assert resp.status_code == 200
     assert resp.get_json()["code"] != 0
@@ -79,7 +79,7 @@ def test_mi_volume_get_ok(client, monkeypatch):
         def get_volume(self):
             return 0, 22
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.get("/mi/volume?device_id=d1&device_did=did1")
     assert resp.status_code == 200
@@ -98,7 +98,7 @@ def test_mi_volume_get_err(client, monkeypatch):
         def get_volume(self):
             return -1, "x"
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.get("/mi/volume?device_id=d1&device_did=did1")
     assert resp.status_code == 200
@@ -108,7 +108,7 @@ def test_mi_volume_get_err(client, monkeypatch):
 
 
 def test_mi_volume_post_requires_volume(client, monkeypatch):
-    monkeypatch.setattr(mi_routes, "MiDevice", lambda address, did: object())
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", lambda address, did: object())
 
     resp = client.post(
         "/mi/volume",
@@ -122,7 +122,7 @@ def test_mi_volume_post_requires_volume(client, monkeypatch):
 
 
 def test_mi_volume_post_volume_must_be_int(client, monkeypatch):
-    monkeypatch.setattr(mi_routes, "MiDevice", lambda address, did: object())
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", lambda address, did: object())
 
     resp = client.post(
         "/mi/volume",
@@ -140,7 +140,7 @@ def test_mi_volume_post_volume_must_be_int(client, monkeypatch):
 
 
 def test_mi_volume_post_range_check(client, monkeypatch):
-    monkeypatch.setattr(mi_routes, "MiDevice", lambda address, did: object())
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", lambda address, did: object())
 
     resp = client.post(
         "/mi/volume",
@@ -169,7 +169,7 @@ def test_mi_volume_post_ok(client, monkeypatch):
             assert volume == 50
             return 0, "ok"
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.post(
         "/mi/volume",
@@ -205,7 +205,7 @@ def test_mi_status_ok(client, monkeypatch):
         def get_status(self):
             return 0, {"state": "play"}
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.get("/mi/status?device_id=d1&device_did=did1")
     assert resp.status_code == 200
@@ -224,7 +224,7 @@ def test_mi_status_err_uses_error_field(client, monkeypatch):
         def get_status(self):
             return -1, {"error": "boom"}
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.get("/mi/status?device_id=d1&device_did=did1")
     assert resp.status_code == 200
@@ -243,7 +243,7 @@ def test_mi_status_err_non_dict_fallback_msg(client, monkeypatch):
         def get_status(self):
             return -1, "bad"
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.get("/mi/status?device_id=d1&device_did=did1")
     assert resp.status_code == 200
@@ -271,7 +271,7 @@ def test_mi_stop_ok(client, monkeypatch):
         def stop(self):
             return 0, "stopped"
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.post(
         "/mi/stop",
@@ -294,7 +294,7 @@ def test_mi_stop_exception_returns_err(client, monkeypatch):
         def stop(self):
             raise RuntimeError("boom")
 
-    monkeypatch.setattr(mi_routes, "MiDevice", FakeDev)
+    monkeypatch.setattr(mi_routes.mi_device, "MiDevice", FakeDev)
 
     resp = client.post(
         "/mi/stop",
@@ -305,3 +305,11 @@ def test_mi_stop_exception_returns_err(client, monkeypatch):
     body = resp.get_json()
     assert body["code"] != 0
     assert "boom" in body["msg"]
+
+
+def test_mi_client_stats(client, monkeypatch):
+    monkeypatch.setattr(mi_routes.mi_device, "get_mi_client_stats", lambda: [{"username": "abc***", "ops": {}}])
+    resp = client.get("/mi/client/stats")
+    body = resp.get_json()
+    assert body["code"] == 0
+    assert body["data"][0]["username"] == "abc***"
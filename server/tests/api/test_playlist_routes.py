@@ -227,6 +227,32 @@ def test_playlist_reload_exception(client, monkeypatch):
     assert resp.get_json()["code"] != 0
 
 
+def test_playlist_report_status_forwards_to_mgr(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(playlist_routes.playlist_mgr, "report_playback_status",
+                        lambda pid, status: calls.append((pid, status)) or (0, "ok"))
+
+    body = {"id": "p1", "state": "PLAYING", "position": "00:01:00", "duration": "00:04:00", "extra": 1}
+    resp = client.post("/playlist/reportStatus", data=json.dumps(body), content_type="application/json")
+
+    assert resp.get_json()["code"] == 0
+    assert calls == [("p1", {"state": "PLAYING", "position": "00:01:00", "duration": "00:04:00"})]
+
+
+def test_playlist_report_status_validates_and_reports_errors(client, monkeypatch):
+    monkeypatch.setattr(playlist_routes.playlist_mgr, "report_playback_status", lambda pid, status: (-1, "设备不存在"))
+
+    resp = client.post("/playlist/reportStatus", data=json.dumps({"state": "PLAYING"}), content_type="application/json")
+    assert resp.get_json()["code"] != 0
+    resp = client.post("/playlist/reportStatus", data=json.dumps({"id": "p1"}), content_type="application/json")
+    assert resp.get_json()["code"] != 0
+    resp = client.post("/playlist/reportStatus", data=json.dumps({"id": "p1", "state": "STOPPED"}),
+                       content_type="application/json")
+    body = resp.get_json()
+    assert body["code"] != 0
+    assert "设备不存在" in body["msg"]
+
+
 def test_playlist_verify_requires_id(client):
     resp = client.post("/playlist/verify", data=json.dumps({}), content_type="application/json")
     assert resp.status_code == 200
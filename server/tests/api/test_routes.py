@@ -63,23 +63,65 @@ def test_natapp_ok(client, monkeypatch):
     assert "hello" in resp.get_data(as_text=True)
 
 
-def test_server_log_ok(client, monkeypatch):
+def test_server_log_ok(client, monkeypatch, tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text("2024-01-01 00:00:00,000 [INFO] [x.py:1] a\n"
+                        "2024-01-01 00:00:01,000 [INFO] [x.py:1] b\n")
+    monkeypatch.setattr(routes, "app_log_reader", routes.LogReader(str(log_file)))
+    rendered = {}
+    monkeypatch.setattr(routes, "render_template", lambda *a, **kw: rendered.update(kw) or "ok")
 
-    class DummyFile:
+    resp = client.get('/log')
+    assert resp.status_code == 200
+    assert rendered["log_content"].splitlines()[0].endswith("b")
 
-        def __enter__(self):
-            return self
 
-        def __exit__(self, exc_type, exc, tb):
-            return False
+def test_server_log_query_paging(client, monkeypatch, tmp_path):
+    log_file = tmp_path / "app.log"
+    log_file.write_text("".join(f"2024-01-01 00:00:0{i},000 [{'ERROR' if i % 2 else 'INFO'}] [x.py:1] m{i}\n"
+                                for i in range(6)))
+    monkeypatch.setattr(routes, "app_log_reader", routes.LogReader(str(log_file)))
 
-        def readlines(self):
-            return ["a\n", "b\n"]
+    body = client.get('/log/query?limit=2&level=ERROR').get_json()
+    assert body["code"] == 0
+    assert [line[-2:] for line in body["data"]["lines"]] == ["m5", "m3"]
 
-    monkeypatch.setattr(builtins, "open", lambda *a, **kw: DummyFile())
-    monkeypatch.setattr(routes, "render_template", lambda *a, **kw: "ok")
+    cursor = body["data"]["next"]
+    body = client.get(f'/log/query?limit=2&level=ERROR&file={cursor["file"]}&offset={cursor["offset"]}').get_json()
+    assert [line[-2:] for line in body["data"]["lines"]] == ["m1"]
+    assert body["data"]["next"] is None
 
-    resp = client.get('/log')
+    body = client.get('/log/query?file=/etc/passwd&offset=0').get_json()
+    assert body["code"] == -1
+
+
+def test_metrics_local_only(client):
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.content_type.startswith('text/plain; version=0.0.4')
+    text = resp.get_data(as_text=True)
+    assert '# TYPE process_threads gauge' in text
+    assert '# TYPE db_calls_total counter' in text
+
+    resp = client.get('/metrics', environ_overrides={'REMOTE_ADDR': '10.0.0.8'})
+    assert resp.status_code == 403
+    resp = client.get('/metrics', headers={'X-Forwarded-For': '10.0.0.8'})
+    assert resp.status_code == 403
+
+
+def test_metrics_rejects_spoofed_forwarded_for(client):
+    # 客户端自带的 X-Forwarded-For 被 nginx 追加真实对端后，只有最后一跳可信
+    resp = client.get('/metrics', headers={'X-Forwarded-For': '127.0.0.1, 10.0.0.8'})
+    assert resp.status_code == 403
+    resp = client.get('/metrics', headers={'X-Real-IP': '10.0.0.8', 'X-Forwarded-For': '127.0.0.1'})
+    assert resp.status_code == 403
+    # 非可信代理直连时忽略转发头
+    resp = client.get('/metrics',
+                      headers={'X-Forwarded-For': '127.0.0.1', 'X-Real-IP': '127.0.0.1'},
+                      environ_overrides={'REMOTE_ADDR': '10.0.0.8'})
+    assert resp.status_code == 403
+    # 经可信代理转发的本机请求仍放行
+    resp = client.get('/metrics', headers={'X-Forwarded-For': '10.0.0.8, 127.0.0.1'})
     assert resp.status_code == 200
 
 
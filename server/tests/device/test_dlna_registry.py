@@ -0,0 +1,110 @@
+"""DlnaRegistry 单元测试：缓存命中、并行拉取、TTL 与持久化。"""
+
+import json
+
+import fakeredis
+import pytest
+
+import core.db.rds_mgr as rds_mgr
+import core.device.dlna as dlna
+from core.device.dlna import DlnaDev, DlnaRegistry
+
+
+class FakeUpnpDevice:
+    fetches = []
+
+    def __init__(self, location):
+        FakeUpnpDevice.fetches.append(location)
+        self.location = location
+        self.friendly_name = f"TV {location[-1]}"
+        self.device_type = "urn:schemas-upnp-org:device:MediaRenderer:1"
+        self.manufacturer = "ACME"
+        self.model_name = "R1"
+        self.services = []
+
+
+@pytest.fixture(autouse=True)
+def fake_env(monkeypatch):
+    monkeypatch.setattr(rds_mgr, "rds", fakeredis.FakeRedis())
+    monkeypatch.setattr(rds_mgr, "_local_store", None)
+    monkeypatch.setattr(rds_mgr, "is_local_fallback", False)
+    FakeUpnpDevice.fetches = []
+    monkeypatch.setattr(dlna.upnpclient, "Device", FakeUpnpDevice)
+
+
+@pytest.fixture
+def locations(monkeypatch):
+    found = {"http://10.0.0.1:80/desc", "http://10.0.0.2:80/desc"}
+    monkeypatch.setattr(dlna, "_discover_locations", lambda timeout: set(found))
+    return found
+
+
+def test_refresh_fetches_descriptions_once_within_ttl(locations):
+    registry = DlnaRegistry(ttl=3600)
+
+    devices = registry.refresh()
+    assert {d["location"] for d in devices} == locations
+    assert sorted(FakeUpnpDevice.fetches) == sorted(locations)
+
+    registry.refresh()
+    assert len(FakeUpnpDevice.fetches) == 2
+
+
+def test_refresh_refetches_after_ttl(locations):
+    registry = DlnaRegistry(ttl=0)
+    registry.refresh()
+    registry.refresh()
+    assert len(FakeUpnpDevice.fetches) == 4
+
+
+def test_list_devices_served_from_memory(locations, monkeypatch):
+    registry = DlnaRegistry(scan_max_age=60)
+    registry.refresh()
+
+    monkeypatch.setattr(dlna, "_discover_locations", lambda timeout: pytest.fail("should not rescan"))
+    devices = registry.list_devices()
+    assert len(devices) == 2
+    assert all("last_seen" not in d for d in devices)
+
+
+def test_list_hides_offline_renderers_but_keeps_them_resolvable(locations, monkeypatch):
+    registry = DlnaRegistry(online_window=600)
+    registry.refresh()
+
+    gone = "http://10.0.0.2:80/desc"
+    locations.discard(gone)
+    clock = [dlna.time.time() + 900]
+    monkeypatch.setattr(dlna.time, "time", lambda: clock[0])
+    devices = registry.refresh()
+
+    assert {d["location"] for d in devices} == locations
+    assert registry.get_device(gone) is not None  # 7 天内仍可按 location 解析，不重新拉取
+    assert len(FakeUpnpDevice.fetches) == 2
+
+
+def test_registry_survives_restart_and_warms_up(locations):
+    DlnaRegistry().refresh()
+    persisted = json.loads(rds_mgr.get_str("dlna:registry"))
+    assert set(persisted) == locations
+
+    FakeUpnpDevice.fetches = []
+    restarted = DlnaRegistry()
+    restarted.load()
+    assert {d["location"] for d in restarted.list_cached()} == locations
+
+    restarted.warm_up()
+    assert sorted(FakeUpnpDevice.fetches) == sorted(locations)
+
+
+def test_dlna_dev_uses_registry_cache(locations, monkeypatch):
+    registry = DlnaRegistry()
+    registry.refresh()
+    monkeypatch.setattr(dlna, "dlna_registry", registry)
+
+    dev = DlnaDev("http://10.0.0.1:80/desc")
+    assert dev._get_device() is not None
+    assert len(FakeUpnpDevice.fetches) == 2
+
+    registry.invalidate("http://10.0.0.1:80/desc")
+    assert DlnaDev("http://10.0.0.1:80/desc")._get_device() is not None
+    assert len(FakeUpnpDevice.fetches) == 3
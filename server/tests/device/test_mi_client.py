@@ -0,0 +1,135 @@
+"""MiClient 会话复用测试：本地 mock MiNA 服务端。"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+from aiohttp import web
+
+import core.device.mi_device as mi_device
+from core.device.mi_device import MiClient, MiDevice
+
+
+class _MockMiNA:
+    """在独立线程中运行的 MiNA 接口 mock，记录请求与客户端连接端口。"""
+
+    def __init__(self):
+        self.requests = []
+        self.peers = set()
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+
+    async def _device_list(self, request):
+        self._record(request, None)
+        return web.json_response({"code": 0, "data": [{"deviceID": "d1", "miotDID": "m1", "hardware": "LX01"}]})
+
+    async def _ubus(self, request):
+        form = await request.post()
+        self._record(request, dict(form))
+        return web.json_response({"code": 0, "data": {"code": 0}})
+
+    def _record(self, request, form):
+        self.requests.append({"path": request.path, "form": form, "cookies": dict(request.cookies)})
+        self.peers.add(request.transport.get_extra_info("peername")[1])
+
+    def start(self):
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            app = web.Application()
+            app.router.add_get("/admin/v2/device_list", self._device_list)
+            app.router.add_post("/remote/ubus", self._ubus)
+            runner = self._runner = web.AppRunner(app)
+            self._loop.run_until_complete(runner.setup())
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            self._started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        self._started.wait(5)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+@pytest.fixture
+def mock_mina():
+    server = _MockMiNA()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def mi_client(mock_mina, tmp_path, monkeypatch):
+    token_file = tmp_path / "mi.token"
+    token_file.write_text(json.dumps({
+        "deviceId": "DEV",
+        "userId": "u1",
+        "passToken": "pass",
+        "micoapi": ["sec", "tok-1"],
+    }))
+
+    logins = []
+
+    async def fake_login(self, sid):
+        logins.append(sid)
+        return False
+
+    monkeypatch.setattr(mi_device.MiAccount, "login", fake_login)
+    client = MiClient("user", "pwd", token_file=str(token_file),
+                      mina_base_url=f"http://127.0.0.1:{mock_mina.port}")
+    monkeypatch.setitem(mi_device._clients, "user", client)
+    client.logins = logins
+    yield client
+    client.close()
+
+
+def test_mi_device_reuses_session_and_token(mi_client, mock_mina):
+    device = MiDevice(address="d1", did="m1", username="user", password="pwd")
+
+    assert device.play("http://127.0.0.1/a.mp3") == (0, "ok")
+    assert device.set_volume(30) == (0, "ok")
+    assert device.stop() == (0, "ok")
+    assert device.play("http://127.0.0.1/b.mp3") == (0, "ok")
+
+    paths = [r["path"] for r in mock_mina.requests]
+    # 硬件型号只在第一次播放时查询
+    assert paths.count("/admin/v2/device_list") == 1
+    assert paths.count("/remote/ubus") == 5
+    assert all(r["cookies"]["serviceToken"] == "tok-1" for r in mock_mina.requests)
+    assert mi_client.logins == []
+    # keep-alive：所有请求复用同一连接
+    assert len(mock_mina.peers) == 1
+
+    stats = mi_client.get_stats()
+    assert stats["ops"]["play"]["count"] == 2
+    assert stats["ops"]["stop"]["count"] == 1
+    assert stats["ops"]["set_volume"]["errors"] == 0
+
+
+def test_mi_scan_devices_uses_client(mi_client, mock_mina):
+    devices = MiDevice.scan_devices("user", "pwd", timeout=5.0)
+    assert devices[0]["deviceID"] == "d1"
+    assert devices[0]["miotDID"] == "m1"
+
+
+def test_refresh_tokens_keeps_token_on_failure(mi_client):
+    refreshed = mi_client._runner.submit(mi_client.refresh_tokens(force=True), timeout=5.0)
+
+    assert refreshed == 0
+    assert mi_client.logins == ["micoapi"]
+    assert mi_client._account.token["micoapi"] == ["sec", "tok-1"]
+    with open(mi_client.token_file) as f:
+        assert json.load(f)["micoapi"] == ["sec", "tok-1"]
+
+
+def test_refresh_tokens_skips_fresh_tokens(mi_client):
+    refreshed = mi_client._runner.submit(mi_client.refresh_tokens(), timeout=5.0)
+    assert refreshed == 0
+    assert mi_client.logins == []
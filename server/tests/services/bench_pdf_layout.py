@@ -0,0 +1,93 @@
+"""
+骑缝排版基准：生成测试 PDF，对比逐页 add_overlay（旧实现）与 Form XObject 原地排版的
+耗时与峰值内存（每 100 页）。
+
+运行：python -m tests.services.bench_pdf_layout [页数 ...]
+每个用例在独立子进程中执行，峰值内存为 VmHWM（清零后）相对起始 VmRSS 的增量（仅 Linux）。
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import pikepdf
+
+from core.services.tools.pdf_layout_mgr import (_build_effective_pages, _generate_saddle_stitch_spreads,
+                                                _write_saddle_stitch)
+
+
+def _make_pdf(path: str, pages: int) -> None:
+    pdf = pikepdf.Pdf.new()
+    font = pdf.make_indirect(pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1,
+                                                BaseFont=pikepdf.Name.Helvetica))
+    for i in range(1, pages + 1):
+        page = pdf.add_blank_page(page_size=(595, 842))
+        page.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        body = " ".join(f"{x} {y} 4 4 re f" for x in range(40, 560, 8) for y in range(80, 760, 40))
+        page.Contents = pdf.make_stream(f"BT /F1 36 Tf 60 780 Td (Page {i}) Tj ET 0 0 1 rg {body}".encode())
+    pdf.save(path)
+
+
+def _overlay_layout(input_path: str, output_path: str) -> None:
+    """旧实现：新建文档，每个源页 add_overlay 一次。"""
+    with pikepdf.open(input_path) as pdf:
+        effective = _build_effective_pages(len(pdf.pages), [])
+        out = pikepdf.Pdf.new()
+        ref = pikepdf.Rectangle(pdf.pages[0].mediabox)
+        pw, ph = float(ref.width), float(ref.height)
+        for left_idx, right_idx in _generate_saddle_stitch_spreads(len(effective)):
+            page = out.add_blank_page(page_size=(2 * pw, ph))
+            for pn, rect in ((effective[left_idx - 1], pikepdf.Rectangle(0, 0, pw, ph)),
+                             (effective[right_idx - 1], pikepdf.Rectangle(pw, 0, 2 * pw, ph))):
+                if pn > 0:
+                    page.add_overlay(pdf.pages[pn - 1], rect)
+        out.save(output_path)
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _run_case(mode: str, input_path: str, output_path: str, queue) -> None:
+    # 清零峰值 RSS（VmHWM），只统计排版过程中的增长
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    base = _status_kb("VmRSS")
+    start = time.perf_counter()
+    if mode == "overlay":
+        _overlay_layout(input_path, output_path)
+    elif mode == "preview":
+        _write_saddle_stitch(input_path, output_path, [], max_spreads=4)
+    else:
+        _write_saddle_stitch(input_path, output_path, [])
+    elapsed = time.perf_counter() - start
+    peak_kb = _status_kb("VmHWM") - base
+    queue.put((elapsed, peak_kb))
+
+
+def main(sizes) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'pages':>6} {'mode':>8} {'seconds':>9} {'s/100p':>8} {'peakMB':>8} {'MB/100p':>8} {'outMB':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in sizes:
+            src = os.path.join(tmp, f"src_{pages}.pdf")
+            _make_pdf(src, pages)
+            for mode in ("overlay", "xobject", "preview"):
+                out = os.path.join(tmp, f"out_{pages}_{mode}.pdf")
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_case, args=(mode, src, out, queue))
+                proc.start()
+                elapsed, peak_kb = queue.get()
+                proc.join()
+                per = 100 / pages
+                print(f"{pages:>6} {mode:>8} {elapsed:>9.2f} {elapsed * per:>8.3f} {peak_kb / 1024:>8.1f} "
+                      f"{peak_kb / 1024 * per:>8.2f} {os.path.getsize(out) / 1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 400, 1600])
@@ -169,3 +169,58 @@ def test_get_agent(agent_mgr):
 
     with pytest.raises(KeyError):
         agent_mgr.get_agent('non-existent-ip')
+
+
+def test_delta_heartbeat_updates_only_sent_fields(agent_mgr):
+    """Delta heartbeats keep fields they do not carry and record seq/RTT."""
+    client_ip = '6.6.6.6'
+    agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(
+        address=f'{client_ip}:80', name='Dev', actions=['keyboard'], keyboard={'connected': True}, seq=1
+    ))
+
+    device_info = agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(
+        address=f'{client_ip}:80', full=False, seq=2, rtt_ms=12.5, keyboard={'connected': False}
+    ))
+
+    assert device_info is not None
+    assert device_info['name'] == 'Dev'
+    assert device_info['actions'] == ['keyboard']
+    assert device_info['keyboard'] == {'connected': False}
+    assert device_info['seq'] == 2
+    assert device_info['rtt_ms'] == 12.5
+
+
+def test_delta_heartbeat_requires_full_sync(agent_mgr):
+    """Unknown agents and sequence gaps ask the agent for a full heartbeat."""
+    client_ip = '7.7.7.7'
+    assert agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(
+        address=f'{client_ip}:80', full=False, seq=5
+    )) is None
+    assert client_ip not in agent_mgr._devices
+
+    agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(address=f'{client_ip}:80', seq=5))
+    assert agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(
+        address=f'{client_ip}:80', full=False, seq=7
+    )) is None
+    # 心跳仍视为存活
+    assert client_ip in agent_mgr._devices
+    assert agent_mgr._devices[client_ip]['seq'] == 7
+
+
+@patch('core.services.agent_mgr.time.time')
+def test_heartbeat_refresh_keeps_device_alive(mock_time, agent_mgr):
+    """Refreshed heartbeats reschedule liveness in the timing wheel."""
+    client_ip = '8.8.4.4'
+    mock_time.return_value = 1000
+    agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(address=f'{client_ip}:80'))
+
+    mock_time.return_value = 1050
+    agent_mgr.handle_heartbeat(client_ip, AgentHeartbeatData(address=f'{client_ip}:80', full=False))
+
+    mock_time.return_value = 1000 + HEARTBEAT_TIMEOUT + 5
+    agent_mgr._cleanup_expired_devices()
+    assert client_ip in agent_mgr._devices
+
+    mock_time.return_value = 1050 + HEARTBEAT_TIMEOUT + 2
+    agent_mgr._cleanup_expired_devices()
+    assert client_ip not in agent_mgr._devices
@@ -1,10 +1,11 @@
 import os
 import json
 import pytest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
 
 from core.config import TASK_STATUS_FAILED, TASK_STATUS_PENDING, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS
 from core.services.tools.audio_merge_mgr import AudioMergeMgr, AudioFileItem
+from core.tools.ffmpeg_runner import FfmpegCancelled, FfmpegProgress
 from typing import List
 
 
@@ -303,31 +304,65 @@ def test_merge_audio_files_no_files_returns_none(merge_mgr: AudioMergeMgr):
     assert dur is None
 
 
-@patch('builtins.open', new_callable=mock_open)
-@patch('core.services.tools.audio_merge_mgr.run_subprocess_safe')
-@patch('os.path.exists', return_value=True)
-@patch('core.services.tools.audio_merge_mgr.get_media_task_result_dir')
-def test_merge_audio_files_multiple_files(mock_get_result_dir, mock_exists, mock_run_subprocess, mock_file_open,
-                                          merge_mgr: AudioMergeMgr, tmp_path):
-    mock_get_result_dir.return_value = str(tmp_path)
-    mock_run_subprocess.return_value = (0, '', '')
-    files: List[AudioFileItem] = [{'path': 'a.mp3'}, {'path': 'b.mp3'}]
+@pytest.fixture
+def merge_dirs(monkeypatch, tmp_path):
+    """任务目录与结果目录指向 tmp_path。"""
+    task_dir = tmp_path / 'task'
+    result_dir = task_dir / 'result'
+    result_dir.mkdir(parents=True)
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.get_media_task_dir', lambda tid: str(task_dir))
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.get_media_task_result_dir', lambda tid: str(result_dir))
+    return task_dir, result_dir
 
-    result_file, _ = merge_mgr._merge_audio_files('task1', files)
 
-    assert mock_run_subprocess.call_count == 2
-    assert result_file is not None
+def _concat_inputs(cmds: List[str]) -> List[str]:
+    list_path = cmds[cmds.index('-i') + 1]
+    with open(list_path, encoding='utf-8') as f:
+        return [line[len("file '"):-len("'\n")] for line in f]
 
 
-@patch('builtins.open', new_callable=mock_open)
-@patch('core.services.tools.audio_merge_mgr.run_subprocess_safe')
-@patch('os.path.exists', return_value=False)
-@patch('core.services.tools.audio_merge_mgr.get_media_task_result_dir')
-def test_merge_audio_files_returncode_0_but_missing_result(mock_get_result_dir, mock_exists, mock_run_subprocess,
-                                                           mock_file_open, merge_mgr: AudioMergeMgr, tmp_path):
-    mock_get_result_dir.return_value = str(tmp_path)
-    mock_run_subprocess.return_value = (0, '', '')
-    files: List[AudioFileItem] = [{'path': 'a.mp3'}, {'path': 'b.mp3'}]
+def test_merge_audio_files_multiple_files(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    task_dir, result_dir = merge_dirs
+    seen = []
+
+    def fake_run_ffmpeg(cmds, on_progress=None, should_stop=None):
+        seen.append(_concat_inputs(cmds))
+        on_progress(FfmpegProgress(out_time=15.0, speed=20.0))
+        open(cmds[-1], 'wb').close()
+        return 0, ''
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', fake_run_ffmpeg)
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 10.0}, {'path': "b'.mp3", 'duration': 20.5}]
+
+    result_file, duration = merge_mgr._merge_audio_files('task1', files)
+
+    assert result_file == str(result_dir / 'merged.mp3')
+    assert duration == 30.5  # 由缓存的输入时长求和，不再探测结果文件
+    assert seen == [['a.mp3', "b'\\''.mp3"]]
+    assert not (task_dir / AudioMergeMgr.MERGE_TMP_DIRNAME).exists()
+
+
+def test_merge_audio_files_probes_missing_duration_once(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    probes = []
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.get_media_duration',
+                        lambda p: probes.append(p) or 5.0)
+
+    def fake_run_ffmpeg(cmds, on_progress=None, should_stop=None):
+        open(cmds[-1], 'wb').close()
+        return 0, ''
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', fake_run_ffmpeg)
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 10.0}, {'path': 'b.mp3'}]
+
+    _, duration = merge_mgr._merge_audio_files('task1', files)
+    assert duration == 15.0
+    assert probes == ['b.mp3']
+    assert files[1]['duration'] == 5.0
+
+
+def test_merge_audio_files_returncode_0_but_missing_result(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', lambda cmds, **kw: (0, ''))
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 1.0}, {'path': 'b.mp3', 'duration': 1.0}]
 
     result_file, dur = merge_mgr._merge_audio_files('task1', files)
 
@@ -335,14 +370,9 @@ def test_merge_audio_files_returncode_0_but_missing_result(mock_get_result_dir,
     assert dur is None
 
 
-@patch('builtins.open', new_callable=mock_open)
-@patch('core.services.tools.audio_merge_mgr.run_subprocess_safe', return_value=(1, '', 'ffmpeg error'))
-@patch('os.path.exists', return_value=False)
-@patch('core.services.tools.audio_merge_mgr.get_media_task_result_dir')
-def test_merge_audio_files_returncode_nonzero(mock_get_result_dir, mock_exists, mock_run_subprocess, mock_file_open,
-                                              merge_mgr: AudioMergeMgr, tmp_path):
-    mock_get_result_dir.return_value = str(tmp_path)
-    files: List[AudioFileItem] = [{'path': 'a.mp3'}, {'path': 'b.mp3'}]
+def test_merge_audio_files_returncode_nonzero(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', lambda cmds, **kw: (1, 'ffmpeg error'))
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 1.0}, {'path': 'b.mp3', 'duration': 1.0}]
 
     result_file, dur = merge_mgr._merge_audio_files('task1', files)
 
@@ -350,13 +380,12 @@ def test_merge_audio_files_returncode_nonzero(mock_get_result_dir, mock_exists,
     assert dur is None
 
 
-@patch('builtins.open', new_callable=mock_open)
-@patch('core.services.tools.audio_merge_mgr.run_subprocess_safe', side_effect=TimeoutError('t'))
-@patch('core.services.tools.audio_merge_mgr.get_media_task_result_dir')
-def test_merge_audio_files_timeout(mock_get_result_dir, mock_run_subprocess, mock_file_open, merge_mgr: AudioMergeMgr,
-                                   tmp_path):
-    mock_get_result_dir.return_value = str(tmp_path)
-    files: List[AudioFileItem] = [{'path': 'a.mp3'}, {'path': 'b.mp3'}]
+def test_merge_audio_files_timeout(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    def stalled(cmds, **kw):
+        raise TimeoutError('t')
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', stalled)
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 1.0}, {'path': 'b.mp3', 'duration': 1.0}]
 
     result_file, dur = merge_mgr._merge_audio_files('task1', files)
 
@@ -364,13 +393,12 @@ def test_merge_audio_files_timeout(mock_get_result_dir, mock_run_subprocess, moc
     assert dur is None
 
 
-@patch('builtins.open', new_callable=mock_open)
-@patch('core.services.tools.audio_merge_mgr.run_subprocess_safe', side_effect=RuntimeError('boom'))
-@patch('core.services.tools.audio_merge_mgr.get_media_task_result_dir')
-def test_merge_audio_files_run_subprocess_exception(mock_get_result_dir, mock_run_subprocess, mock_file_open,
-                                                    merge_mgr: AudioMergeMgr, tmp_path):
-    mock_get_result_dir.return_value = str(tmp_path)
-    files: List[AudioFileItem] = [{'path': 'a.mp3'}, {'path': 'b.mp3'}]
+def test_merge_audio_files_run_ffmpeg_exception(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    def boom(cmds, **kw):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', boom)
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 1.0}, {'path': 'b.mp3', 'duration': 1.0}]
 
     result_file, dur = merge_mgr._merge_audio_files('task1', files)
 
@@ -378,6 +406,114 @@ def test_merge_audio_files_run_subprocess_exception(mock_get_result_dir, mock_ru
     assert dur is None
 
 
+def test_merge_audio_files_tiers_large_merges(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    """输入超过 MERGE_TIER_SIZE 时分层合并，每个 ffmpeg 进程的输入数受限，进度按总工作量推进。"""
+    task_dir, result_dir = merge_dirs
+    monkeypatch.setattr(AudioMergeMgr, 'MERGE_TIER_SIZE', 3)
+    _, _, tid = merge_mgr.create_task('n')
+    runs = []
+    percents = []
+
+    def fake_run_ffmpeg(cmds, on_progress=None, should_stop=None):
+        inputs = _concat_inputs(cmds)
+        assert len(inputs) <= 3
+        runs.append((inputs, cmds[-1]))
+        on_progress(FfmpegProgress(out_time=1.0))
+        percents.append(merge_mgr.get_task(tid)['progress']['percent'])
+        open(cmds[-1], 'wb').close()
+        return 0, ''
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', fake_run_ffmpeg)
+    files: List[AudioFileItem] = [{'path': f'{i}.mp3', 'duration': 2.0} for i in range(7)]
+
+    result_file, duration = merge_mgr._merge_audio_files(tid, files)
+
+    assert duration == 14.0
+    # 总工作量 = 第一层 12 秒 + 最终层 14 秒
+    assert percents == [1 * 100 // 26, 7 * 100 // 26, 13 * 100 // 26]
+    assert result_file == str(result_dir / 'merged.mp3')
+    tmp_dir = str(task_dir / AudioMergeMgr.MERGE_TMP_DIRNAME)
+    # 7 个输入 → 第一层 [0-2]、[3-5]、6 直接进入下一层 → 最终合并 3 个
+    assert [r[0] for r in runs[:2]] == [['0.mp3', '1.mp3', '2.mp3'], ['3.mp3', '4.mp3', '5.mp3']]
+    assert runs[2][0] == [f'{tmp_dir}/tier0_0.mp3', f'{tmp_dir}/tier0_1.mp3', '6.mp3']
+    assert runs[2][1] == result_file
+    assert not os.path.exists(tmp_dir)
+
+
+def test_merge_audio_files_reports_progress(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    _, _, tid = merge_mgr.create_task('n')
+    snapshots = []
+
+    def fake_run_ffmpeg(cmds, on_progress=None, should_stop=None):
+        on_progress(FfmpegProgress(out_time=7.5, speed=30.0))
+        snapshots.append(dict(merge_mgr.get_task(tid)['progress']))
+        open(cmds[-1], 'wb').close()
+        return 0, ''
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', fake_run_ffmpeg)
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 10.0}, {'path': 'b.mp3', 'duration': 20.0}]
+
+    merge_mgr._merge_audio_files(tid, files)
+
+    assert snapshots == [{'percent': 25, 'processed_seconds': 7.5, 'total_seconds': 30.0, 'speed': 30.0,
+                          'step': 1, 'steps': 1}]
+    assert merge_mgr.get_task(tid)['progress']['percent'] == 100
+
+
+def test_merge_audio_files_cancel_cleans_up(monkeypatch, merge_mgr: AudioMergeMgr, merge_dirs):
+    task_dir, result_dir = merge_dirs
+
+    def cancelled(cmds, on_progress=None, should_stop=None):
+        open(cmds[-1], 'wb').close()  # 不完整的输出
+        assert should_stop() is True
+        raise FfmpegCancelled('stopped')
+
+    files: List[AudioFileItem] = [{'path': 'a.mp3', 'duration': 1.0}, {'path': 'b.mp3', 'duration': 1.0}]
+
+    def stop_during_run(cmds, **kw):
+        merge_mgr._stop_flags['task1'] = True
+        return cancelled(cmds, **kw)
+
+    monkeypatch.setattr('core.services.tools.audio_merge_mgr.run_ffmpeg', stop_during_run)
+    with pytest.raises(FfmpegCancelled):
+        merge_mgr._merge_audio_files('task1', files)
+
+    assert not (result_dir / 'merged.mp3').exists()
+    assert not (task_dir / AudioMergeMgr.MERGE_TMP_DIRNAME).exists()
+
+
+def test_start_task_runner_marks_stopped(monkeypatch, merge_mgr: AudioMergeMgr):
+    def cancelled(task_id, files):
+        raise FfmpegCancelled('stopped')
+
+    monkeypatch.setattr(merge_mgr, '_merge_audio_files', cancelled)
+
+    def fake_run_task_async(task_id, runner):
+        t = merge_mgr._get_task(task_id)
+        assert t is not None
+        t.status = TASK_STATUS_PROCESSING
+        runner(t)
+
+    monkeypatch.setattr(merge_mgr, '_run_task_async', fake_run_task_async)
+    _, _, tid = merge_mgr.create_task('n')
+    t = merge_mgr._get_task(tid)
+    t.files.append({'name': 'a.mp3', 'path': '/tmp/a.mp3', 'size': 1, 'duration': 1.0, 'index': 0})
+
+    assert merge_mgr.start_task(tid)[0] == 0
+    task = merge_mgr.get_task(tid)
+    assert task['status'] == TASK_STATUS_FAILED
+    assert task['error_message'] == '任务已被停止'
+
+
+def test_delete_processing_task_requests_stop(merge_mgr: AudioMergeMgr):
+    _, _, tid = merge_mgr.create_task('n')
+    merge_mgr._get_task(tid).status = TASK_STATUS_PROCESSING
+
+    code, msg = merge_mgr.delete_task(tid)
+    assert code == -1
+    assert merge_mgr._should_stop(tid)
+
+
 def test_merge_audio_files_outer_exception_returns_none(monkeypatch, merge_mgr: AudioMergeMgr):
     monkeypatch.setattr('core.services.tools.audio_merge_mgr.get_media_task_result_dir', lambda *_:
                         (_ for _ in ()).throw(RuntimeError('boom')))
@@ -0,0 +1,209 @@
+"""认证缓存：已验证 token 的两级缓存、过期与密钥隔离，登录身份缓存与失效。"""
+
+import importlib
+import json
+from datetime import timedelta
+
+import pytest
+from flask import Flask, jsonify, request
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, get_jwt_identity
+
+auth_cache_module = importlib.import_module("core.services.auth_cache")
+TokenCache = auth_cache_module.TokenCache
+UserCache = auth_cache_module.UserCache
+
+
+class FakeRds:
+    """只实现 auth_cache 用到的 Hash 操作。"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+        return 1
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hdel(self, key, *fields):
+        bucket = self.hashes.get(key, {})
+        return sum(1 for f in fields if bucket.pop(f, None) is not None)
+
+    def hlen(self, key):
+        return len(self.hashes.get(key, {}))
+
+
+@pytest.fixture
+def rds(monkeypatch):
+    fake = FakeRds()
+    monkeypatch.setattr(auth_cache_module, "rds_mgr", fake)
+    return fake
+
+
+@pytest.fixture
+def app(rds, monkeypatch):
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-for-auth-cache-0001"
+    app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+    JWTManager(app)
+    monkeypatch.setattr(auth_cache_module, "token_cache", TokenCache())
+
+    verify_calls = []
+    real_verify = auth_cache_module.verify_jwt_in_request
+
+    def counting_verify():
+        verify_calls.append(1)
+        return real_verify()
+
+    monkeypatch.setattr(auth_cache_module, "verify_jwt_in_request", counting_verify)
+    app.verify_calls = verify_calls
+
+    @app.before_request
+    def _guard():
+        try:
+            auth_cache_module.verify_jwt_cached()
+        except Exception:
+            return jsonify({"code": -1}), 401
+
+    @app.route("/api/me")
+    def me():
+        return jsonify({"code": 0, "identity": get_jwt_identity()})
+
+    return app
+
+
+def _token(app, **kwargs):
+    with app.app_context():
+        return create_access_token(identity="7", **kwargs)
+
+
+def _get(client, token):
+    return client.get("/api/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_verified_token_cached_until_exp(app, monkeypatch):
+    client = app.test_client()
+    token = _token(app, expires_delta=timedelta(minutes=5))
+
+    for _ in range(5):
+        resp = _get(client, token)
+        assert resp.status_code == 200
+        assert resp.get_json()["identity"] == "7"
+    assert len(app.verify_calls) == 1
+
+    # 缓存到 exp 为止：之后重新验签
+    real_time = auth_cache_module.time.time
+    monkeypatch.setattr(auth_cache_module.time, "time", lambda: real_time() + 600)
+    _get(client, token)
+    assert len(app.verify_calls) == 2
+
+
+def test_invalid_and_refresh_tokens_not_cached(app):
+    client = app.test_client()
+    for _ in range(3):
+        assert _get(client, "not-a-jwt").status_code == 401
+    with app.app_context():
+        refresh = create_refresh_token(identity="7")
+    for _ in range(2):
+        assert _get(client, refresh).status_code == 401
+    assert len(app.verify_calls) == 5
+    assert client.get("/api/me").status_code == 401
+
+
+def test_shared_cache_across_processes_and_secret_isolation(app, rds):
+    client = app.test_client()
+    token = _token(app)
+    _get(client, token)
+
+    # 另一个进程：进程内缓存为空，从 Redis 命中
+    auth_cache_module.token_cache.clear_local()
+    assert _get(client, token).status_code == 200
+    assert len(app.verify_calls) == 1
+
+    # 更换密钥：旧缓存不再生效，旧 token 验签失败
+    auth_cache_module.token_cache.clear_local()
+    app.config["JWT_SECRET_KEY"] = "another-secret-key-for-auth-cache-02"
+    assert _get(client, token).status_code == 401
+    assert len(app.verify_calls) == 2
+
+
+def test_shared_cache_prunes_expired(app, rds, monkeypatch):
+    cache = TokenCache(shared_max=2)
+    with app.app_context():
+        now = auth_cache_module.time.time()
+        cache.put("a", {}, {"exp": now + 1})
+        cache.put("b", {}, {"exp": now + 1})
+        monkeypatch.setattr(auth_cache_module.time, "time", lambda: now + 5)
+        cache.put("c", {}, {"exp": now + 60})
+        (bucket,) = rds.hashes.values()
+        assert list(bucket) == [auth_cache_module._digest("c")]
+        assert cache.get("a") is None
+
+
+def test_user_cache_password_and_invalidation(rds):
+    users = UserCache()
+    item = users.put("leo", 3, 1, "e10adc3949ba59abbe56e057f20f883e")
+    assert "e10adc" not in json.dumps(rds.hashes)
+    assert users.check_password(item, "123456")  # 前端传明文，库中为 MD5
+    assert users.check_password(item, "e10adc3949ba59abbe56e057f20f883e")
+    assert not users.check_password(item, "wrong")
+    assert users.check_password(users.put("guest", 4, 0, None), "anything")
+
+    assert users.get("leo")["id"] == 3
+    assert users.invalidate(3) == 1
+    assert users.get("leo") is None
+    assert users.get("guest") is not None
+
+
+def test_login_uses_user_cache(rds, monkeypatch):
+    from core.models.user import User
+
+    auth_routes = importlib.import_module("core.api.auth_routes")
+    user = User(id=5, name="leo", icon="", pwd="pw", score=9, admin=0, wish_progress=0, wish_list="[]")
+
+    class FakeSession:
+
+        def __init__(self):
+            self.calls = []
+
+        def query(self, model):
+            self.calls.append("query")
+
+            class Q:
+
+                def filter(self, *args):
+                    return self
+
+                def first(self):
+                    return user
+
+            return Q()
+
+        def get(self, model, pk):
+            self.calls.append("get")
+            return user if pk == user.id else None
+
+    session = FakeSession()
+    monkeypatch.setattr(auth_routes, "db_obj", type("Db", (), {"session": session})())
+    monkeypatch.setattr(auth_routes, "read_json_from_request",
+                        lambda: request.get_json(silent=True) or {})
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-for-auth-cache-0001"
+    jwt = JWTManager(app)
+    jwt.user_identity_loader(lambda identity: json.dumps(identity, sort_keys=True))
+    app.register_blueprint(auth_routes.auth_bp, url_prefix="/api")
+    client = app.test_client()
+
+    def login(pwd):
+        return client.post("/api/auth/login", json={"username": "leo", "password": pwd})
+
+    assert login("pw").status_code == 200
+    for _ in range(3):
+        assert login("bad").status_code == 401
+    resp = login("pw")
+    assert resp.get_json()["user"]["score"] == 9
+    assert session.calls == ["query", "get"]
@@ -160,3 +160,22 @@ def test_run_task_async_task_gone_after_runner(task_mgr: SimpleTaskMgr):
             break
         time.sleep(0.1)
     assert task_mgr.get_task(task_id) is None
+
+
+def test_task_metrics_collected_on_render(tmp_path):
+    """抓取指标时按管理器与状态统计任务数。"""
+    from core.tools.metrics import registry
+
+    class MetricsTaskMgr(SimpleTaskMgr):
+        pass
+
+    mgr = MetricsTaskMgr(base_dir=str(tmp_path))
+    mgr.create_task(some_data="a")
+    _, _, task_id = mgr.create_task(some_data="b")
+    mgr._tasks[task_id].status = TASK_STATUS_PROCESSING
+    mgr.stop_task(task_id)
+
+    text = registry.render()
+    assert f'task_mgr_tasks{{mgr="MetricsTaskMgr",status="{TASK_STATUS_PENDING}"}} 1' in text
+    assert f'task_mgr_tasks{{mgr="MetricsTaskMgr",status="{TASK_STATUS_PROCESSING}"}} 1' in text
+    assert 'task_mgr_stop_requests{mgr="MetricsTaskMgr"} 1' in text
@@ -6,9 +6,11 @@ task_mgr_module = importlib.import_module("core.services.task.task_mgr")
 from core.services.task.block_time import (
     GLOBAL_BLOCK_TIME_RDS_ID,
     GLOBAL_BLOCK_TIME_RDS_TABLE,
+    compile_block_time,
     get_global_block_time_config,
     global_block_time_redis_key,
     invalidate_global_block_time_cache,
+    is_global_block_time_now,
     is_in_block_time_now,
     parse_block_time_config,
 )
@@ -182,3 +184,49 @@ def test_check_task_lock_priority_minus_one_excluded(monkeypatch):
     assert by_id[2]["msg"] == '请先完成 "高优先级未完成"'
     assert by_id[3]["lock"] is False
     assert by_id[3]["msg"] == ""
+
+
+def test_compiled_decision_cached_until_slot_boundary(monkeypatch):
+    raw = _blacklist_raw("09:00:00", "12:00:00")
+    compiled = compile_block_time(raw)
+    assert compile_block_time(raw) is compiled
+
+    states = []
+    entry = compiled._entries[USER_CANCAN]
+    original = type(entry).state
+    monkeypatch.setattr(type(entry), "state", lambda self, now: states.append(now) or original(self, now))
+
+    assert compiled.is_blocked(USER_CANCAN, datetime(2026, 6, 17, 10, 0)) is True
+    assert compiled.is_blocked(USER_CANCAN, datetime(2026, 6, 17, 11, 59, 59)) is True
+    assert len(states) == 1
+    assert compiled.is_blocked(USER_CANCAN, datetime(2026, 6, 17, 12, 0)) is False
+    assert compiled.is_blocked(USER_CANCAN, datetime(2026, 6, 17, 23, 0)) is False
+    assert len(states) == 2
+    # 跨天：边界截止于当天结束
+    assert compiled.is_blocked(USER_CANCAN, datetime(2026, 6, 18, 9, 30)) is True
+    assert len(states) == 3
+    assert compiled.is_blocked(4, datetime(2026, 6, 17, 10, 0)) is None
+
+
+def test_compiled_state_boundaries():
+    entry = compile_block_time(_blacklist_raw("22:00:00", "07:00:00"))._entries[USER_CANCAN]
+    assert entry.state(datetime(2026, 6, 17, 6, 0)) == (True, datetime(2026, 6, 17, 7, 0))
+    assert entry.state(datetime(2026, 6, 17, 12, 0)) == (False, datetime(2026, 6, 17, 22, 0))
+    assert entry.state(datetime(2026, 6, 17, 23, 0)) == (True, datetime(2026, 6, 18, 0, 0))
+
+    white = compile_block_time(_whitelist_raw("09:00", "12:00"))._entries[USER_CANCAN]
+    assert white.state(datetime(2026, 6, 17, 8, 0)) == (True, datetime(2026, 6, 17, 9, 0))
+    assert white.state(datetime(2026, 6, 17, 9, 0)) == (False, datetime(2026, 6, 17, 12, 0))
+
+
+def test_global_config_change_recompiles(monkeypatch):
+    invalidate_global_block_time_cache()
+    raw = {"value": _blacklist_raw("09:00:00", "12:00:00")}
+    monkeypatch.setattr("core.services.task.block_time.rds_mgr.get_str", lambda key: raw["value"])
+
+    assert is_global_block_time_now(TODAY, USER_CANCAN, now=NOW_IN_SLOT) is True
+    raw["value"] = _blacklist_raw("13:00:00", "15:00:00")
+    invalidate_global_block_time_cache()
+    assert is_global_block_time_now(TODAY, USER_CANCAN, now=NOW_IN_SLOT) is False
+    assert is_global_block_time_now(TODAY, USER_CANCAN, now=NOW_OUT_SLOT) is True
+    invalidate_global_block_time_cache()
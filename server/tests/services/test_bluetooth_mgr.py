@@ -184,7 +184,7 @@ def test_scan_ble_devices_updates_cache_and_returns_list(monkeypatch, mock_bluet
         assert return_adv is True
         return {"k": (device, adv)}
 
-    monkeypatch.setattr(bm.BleakScanner, "discover", fake_discover)
+    monkeypatch.setattr(bm.bleak.BleakScanner, "discover", fake_discover)
 
     devices = asyncio.run(mgr.scan_ble_devices(timeout=0.01))
 
@@ -214,7 +214,7 @@ def test_scan_ble_devices_exception_returns_empty_and_resets_flag(monkeypatch):
     async def fake_discover(timeout, return_adv):
         raise Exception("boom")
 
-    monkeypatch.setattr(bm.BleakScanner, "discover", fake_discover)
+    monkeypatch.setattr(bm.bleak.BleakScanner, "discover", fake_discover)
 
     devices = asyncio.run(mgr.scan_ble_devices(timeout=0.01))
     assert devices == []
@@ -251,13 +251,13 @@ def test_connect_device_success_and_failure(monkeypatch, mock_bluetooth_dev):
     mock_client.connect = fake_connect
     mock_client.read_gatt_char = fake_read_gatt
 
-    with patch.object(bm, "BleakClient", return_value=mock_client):
+    with patch.object(bm.bleak, "BleakClient", return_value=mock_client):
         result = asyncio.run(mgr.connect_device("aa:bb"))
         assert result["code"] == 0
         assert mgr.devices["AA:BB"].name == "GattName"
         assert mgr.devices["AA:BB"].connected is True
 
-    with patch.object(bm, "BleakClient", side_effect=Exception("Connection Error")):
+    with patch.object(bm.bleak, "BleakClient", side_effect=Exception("Connection Error")):
         mgr.devices["AA:BB"].connected = False
         result = asyncio.run(mgr.connect_device("aa:bb"))
         assert result["code"] == -1
@@ -441,7 +441,7 @@ def test_connect_device_exception_clears_connected(monkeypatch, mock_bluetooth_d
         async def connect(self):
             raise ConnectionError("fail")
 
-    monkeypatch.setattr(bm.BleakClient, "__new__", lambda cls, addr: FakeClient())
+    monkeypatch.setattr(bm.bleak.BleakClient, "__new__", lambda cls, addr: FakeClient())
     result = asyncio.run(mgr.connect_device("aa:bb"))
     assert result.get("code") == -1
     assert mgr.devices["AA:BB"].connected is False
@@ -0,0 +1,131 @@
+"""素材时长回填队列：去重、并发上限、失败重试间隔与启动扫描。"""
+
+import importlib
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+backfill_module = importlib.import_module("core.services.task.duration_backfill")
+DurationBackfill = backfill_module.DurationBackfill
+
+
+class FakeDb:
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.updates = []
+
+    def set_data(self, table, data, conditions=None):
+        self.updates.append(data)
+        return {"code": 0, "data": data["id"]}
+
+    def get_list(self, table, page_num=1, page_size=20, fields="*", conditions=None):
+        start = (page_num - 1) * page_size
+        return {"code": 0, "data": {"data": self.rows[start:start + page_size]}}
+
+
+class FakeProbe:
+    """可阻塞的 get_media_duration：记录调用与最大并发。"""
+
+    def __init__(self, result=42):
+        self.result = result
+        self.release = threading.Event()
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.calls.append(path)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.release.wait(5)
+        with self._lock:
+            self.active -= 1
+        return self.result
+
+
+def _wait_until(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    db, probe = FakeDb(), FakeProbe()
+    monkeypatch.setattr(backfill_module, "db_mgr", db)
+    monkeypatch.setattr(backfill_module, "get_media_duration", probe)
+    monkeypatch.setattr(backfill_module, "validate_and_normalize_path", lambda p, base, must_be_file: (p, None))
+    backfill = DurationBackfill(workers=2)
+    backfill.init(Flask(__name__))
+    yield backfill, db, probe
+    probe.release.set()
+
+
+def test_same_material_probed_once(env):
+    backfill, db, probe = env
+    results = [backfill.submit(7, "/v/7.mp4") for _ in range(20)]
+    assert results.count(True) == 1
+
+    probe.release.set()
+    _wait_until(lambda: backfill.stats()["filled"] == 1)
+    assert probe.calls == ["/v/7.mp4"]
+    assert db.updates == [{"id": 7, "duration": 42}]
+    assert backfill.stats()["deduplicated"] == 19
+
+    # 完成后可再次提交
+    assert backfill.submit(7, "/v/7.mp4") is True
+
+
+def test_concurrency_capped(env):
+    backfill, db, probe = env
+    for mid in range(1, 6):
+        backfill.submit(mid, f"/v/{mid}.mp4")
+    _wait_until(lambda: probe.active == 2)
+    stats = backfill.stats()
+    assert (stats["queued"], stats["in_flight"], stats["workers"]) == (3, 2, 2)
+
+    probe.release.set()
+    _wait_until(lambda: backfill.stats()["filled"] == 5)
+    assert probe.max_active == 2
+    _wait_until(lambda: backfill.stats()["workers"] == 0)
+    assert backfill.queue_size() == 0
+
+
+def test_failed_probe_not_retried_within_window(env):
+    backfill, db, probe = env
+    probe.result = None
+    probe.release.set()
+    backfill.submit(3, "/v/bad.mp4")
+    _wait_until(lambda: backfill.stats()["failed"] == 1)
+
+    assert backfill.submit(3, "/v/bad.mp4") is False
+    backfill.retry_after = 0
+    assert backfill.submit(3, "/v/bad.mp4") is True
+    assert db.updates == []
+
+
+def test_startup_sweep_submits_missing(env, monkeypatch):
+    backfill, db, probe = env
+    monkeypatch.setattr(backfill_module, "SWEEP_PAGE_SIZE", 2)
+    db.rows = [{"id": 1, "duration": 10, "path": "/v/1.mp4"},
+               {"id": 2, "duration": None, "path": "/v/2.mp4"},
+               {"id": 3, "duration": 0, "path": "/v/3.mp4"},
+               {"id": 4, "duration": None, "path": ""},
+               {"id": 5, "duration": None, "path": "/v/5.mp4"}]
+    probe.release.set()
+
+    assert backfill.sweep() == 3
+    _wait_until(lambda: backfill.stats()["filled"] == 3)
+    sweep = backfill.stats()["sweep"]
+    assert (sweep["running"], sweep["scanned"], sweep["missing"]) == (False, 5, 3)
+    assert sorted(u["id"] for u in db.updates) == [2, 3, 5]
+
+
+def test_submit_without_app_is_ignored():
+    assert DurationBackfill().submit(1, "/v/1.mp4") is False
@@ -0,0 +1,116 @@
+"""素材观看时长：窄表原子累加、内存增量定时写入、旧 statistics 的迁移与兼容视图。"""
+
+import importlib
+import json
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from core.db import db_obj
+
+material_stats_module = importlib.import_module("core.services.task.material_stats")
+MaterialStats = material_stats_module.MaterialStats
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'stats.db'}"
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"check_same_thread": False}}
+    db_obj.init_app(app)
+    with app.app_context():
+        db_obj.session.execute(text("CREATE TABLE t_material (id INTEGER PRIMARY KEY, statistics TEXT)"))
+        db_obj.session.execute(text("INSERT INTO t_material (id, statistics) VALUES "
+                                    "(1, '{\"3\": 100, \"4\": 5}'), (2, NULL), (3, 'not json')"))
+        db_obj.session.commit()
+        yield app
+        db_obj.session.remove()
+        db_obj.engine.dispose()
+
+
+def _statistics(material_id):
+    raw = db_obj.session.execute(text("SELECT statistics FROM t_material WHERE id = :id"),
+                                 {"id": material_id}).scalar()
+    return json.loads(raw) if raw else None
+
+
+def test_migrates_existing_statistics_once(app):
+    stats = MaterialStats()
+    stats.ensure_table()
+    rows = db_obj.session.execute(
+        text("SELECT material_id, user_id, seconds FROM t_material_stat ORDER BY user_id")).fetchall()
+    assert [tuple(r) for r in rows] == [(1, 3, 100), (1, 4, 5)]
+
+    # 表已存在时不再导入
+    MaterialStats().ensure_table()
+    assert db_obj.session.execute(text("SELECT COUNT(*) FROM t_material_stat")).scalar() == 2
+
+
+def test_flush_increments_and_refreshes_statistics(app):
+    stats = MaterialStats()
+    stats.add(1, 3, 20)
+    stats.add(1, 3, 10)
+    stats.add(2, 7, 15)
+    assert stats.pending_seconds(1, 3) == 30
+    assert stats.get_statistics([1, 2]) == {1: {"3": 130, "4": 5}, 2: {"7": 15}}
+    assert _statistics(1) == {"3": 100, "4": 5}  # 尚未写入
+
+    assert stats.flush() == 2
+    assert stats.pending_seconds(1, 3) == 0
+    assert _statistics(1) == {"3": 130, "4": 5}
+    assert _statistics(2) == {"7": 15}
+    view = db_obj.session.execute(text("SELECT statistics FROM v_material_statistics WHERE id = 1")).scalar()
+    assert json.loads(view) == {"3": 130, "4": 5}
+    assert stats.flush() == 0
+
+
+def test_concurrent_writers_do_not_lose_updates(app):
+    # 两个实例模拟两个进程，各自多线程累加后分别写入
+    writers = [MaterialStats(), MaterialStats()]
+
+    def heartbeat(stats):
+        for _ in range(200):
+            stats.add(2, 9, 1)
+
+    threads = [threading.Thread(target=heartbeat, args=(w,)) for w in writers for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for w in writers:
+        assert w.pending_seconds(2, 9) == 800
+        w.flush()
+    assert _statistics(2) == {"9": 1600}
+
+
+def test_failed_flush_keeps_increments(app, monkeypatch):
+    stats = MaterialStats()
+    stats.add(1, 3, 7)
+
+    def boom(batch):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(stats, "_write", boom)
+    assert stats.flush() == 0
+    stats.add(1, 3, 1)
+    assert stats.pending_seconds(1, 3) == 8
+
+    monkeypatch.undo()
+    assert stats.flush() == 1
+    assert _statistics(1)["3"] == 108
+
+
+def test_add_usage_accumulates_in_memory(monkeypatch):
+    usage_mgr_module = importlib.import_module("core.services.usage_mgr")
+    calls = []
+    monkeypatch.setattr(usage_mgr_module.db_mgr, "set_data", lambda table, data: calls.append(table) or {"code": 0})
+    stats = MaterialStats()
+    monkeypatch.setattr(usage_mgr_module, "material_stats", stats)
+
+    mgr = usage_mgr_module.UsageMgr()
+    for _ in range(3):
+        assert mgr.add_usage("video", "2024-01-01 10:00:00", 30, 3, out_key=11)["code"] == 0
+    assert calls == ["t_usage"] * 3
+    assert stats.pending_seconds(11, 3) == 90
@@ -0,0 +1,122 @@
+"""素材锁定状态：批量查询的查询次数、与单个查询一致的判定。"""
+
+import importlib
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.services.task.block_time import compile_block_time
+
+material_mgr_module = importlib.import_module("core.services.task.material_mgr")
+MaterialMgr = material_mgr_module.MaterialMgr
+
+USER = 3
+
+
+def _block_raw(start: str, end: str, user_id: int = USER) -> str:
+    return json.dumps({str(user_id): {"type": "blacklist", "blacklist": [{"start": start, "end": end}]}})
+
+
+class FakeDb:
+    """按表名返回固定数据并记录查询次数。"""
+
+    def __init__(self, materials, unlimits=(), task_block_time=None):
+        self.materials = {m["id"]: m for m in materials}
+        self.unlimits = list(unlimits)
+        self.task_block_time = task_block_time
+        self.calls = []
+
+    def get_list(self, table, page_num=1, page_size=20, fields="*", conditions=None):
+        self.calls.append(("get_list", table))
+        if table == material_mgr_module.TABLE_MATERIAL:
+            rows = [self.materials[i] for i in conditions["id"]["in"] if i in self.materials]
+        else:
+            rows = [r for r in self.unlimits if r["user_id"] == conditions["user_id"]]
+        return {"code": 0, "data": {"data": rows[:page_size]}}
+
+    def get_data(self, table, id, fields):
+        self.calls.append(("get_data", table))
+        if table == material_mgr_module.TABLE_MATERIAL:
+            return {"code": 0, "data": dict(self.materials.get(id, {}))}
+        if self.task_block_time is None:
+            return {"code": 0, "data": {}}
+        return {"code": 0, "data": {"block_time": self.task_block_time}}
+
+
+@pytest.fixture
+def setup(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(material_mgr_module.duration_backfill, "submit", lambda mid, path: fetched.append(mid))
+    global_raw = {"value": None}
+    monkeypatch.setattr(material_mgr_module, "get_global_block_time_compiled",
+                        lambda: compile_block_time(global_raw["value"]))
+
+    def _install(db):
+        monkeypatch.setattr(material_mgr_module, "db_mgr", db)
+        return db
+
+    return _install, global_raw, fetched
+
+
+def _materials(n):
+    mats = []
+    for i in range(1, n + 1):
+        stats = json.dumps({str(USER): 130 if i % 2 else 10})
+        mats.append({"id": i, "type": 1, "duration": 100, "statistics": stats, "path": f"/v/{i}.mp4"})
+    return mats
+
+
+def test_batch_uses_constant_queries(setup):
+    install, _, _ = setup
+    db = install(FakeDb(_materials(50), task_block_time="{}"))
+
+    out = MaterialMgr().get_materials_status(USER, list(range(1, 51)) + [999], task_id=7)
+
+    assert out["code"] == 0
+    statuses = out["data"]["statuses"]
+    assert len(db.calls) == 3  # 素材 + 不限时 + 任务 block_time
+    assert statuses["1"]["lock"] == MaterialMgr.LOCK_CODE_DURATION
+    assert statuses["2"] == {"lock": MaterialMgr.LOCK_CODE_NONE, "duration": 100}
+    assert statuses["999"] == {"lock": MaterialMgr.LOCK_CODE_NONE, "missing": True}
+
+
+def test_batch_matches_single_status(setup):
+    install, global_raw, fetched = setup
+    mats = _materials(4) + [{"id": 5, "type": 2, "duration": None, "statistics": None, "path": "a.pdf"},
+                            {"id": 6, "type": 1, "duration": None, "statistics": None, "path": "/v/6.mp4"}]
+    future = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+    unlimits = [{"user_id": USER, "lock_code": 3, "material_id": 3, "task_id": 7, "expires_at": future}]
+    install(FakeDb(mats, unlimits=unlimits))
+    mgr = MaterialMgr()
+
+    batch = mgr.get_materials_status(USER, [1, 2, 3, 4, 5, 6], task_id=7)["data"]["statuses"]
+    for mid in range(1, 7):
+        assert batch[str(mid)] == mgr.get_material_status(USER, mid, 7)["data"]
+    assert batch["3"]["unlimit"] is True
+    assert 6 in fetched
+
+    global_raw["value"] = _block_raw("00:00:00", "23:59:59")
+    batch = mgr.get_materials_status(USER, [1, 3], task_id=7)["data"]["statuses"]
+    assert batch["1"]["lock"] == MaterialMgr.LOCK_CODE_GLOBAL_BLOCK
+    assert batch["3"]["unlimit"] is True  # 素材级不限时优先于禁用时段
+    assert batch["1"] == mgr.get_material_status(USER, 1, 7)["data"]
+
+
+def test_task_block_time_overrides_global(setup):
+    install, global_raw, _ = setup
+    global_raw["value"] = _block_raw("00:00:00", "23:59:59")
+    # 任务对该用户有配置（且当前不在禁用时段）→ 不回退全局
+    install(FakeDb(_materials(2), task_block_time=_block_raw("00:00:00", "00:00:01")))
+
+    statuses = MaterialMgr().get_materials_status(USER, [1, 2], task_id=7)["data"]["statuses"]
+    assert statuses["1"]["lock"] == MaterialMgr.LOCK_CODE_DURATION
+    assert statuses["2"]["lock"] == MaterialMgr.LOCK_CODE_NONE
+
+
+def test_batch_rejects_oversized_request(setup):
+    install, _, _ = setup
+    db = install(FakeDb([]))
+    out = MaterialMgr().get_materials_status(USER, list(range(material_mgr_module.MATERIAL_STATUS_BATCH_MAX + 1)))
+    assert out["code"] != 0
+    assert db.calls == []
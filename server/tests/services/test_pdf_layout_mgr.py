@@ -0,0 +1,162 @@
+import os
+import re
+
+import pikepdf
+import pytest
+
+import core.services.tools.pdf_layout_mgr as plm
+from core.config import TASK_STATUS_FAILED, TASK_STATUS_PROCESSING, TASK_STATUS_SUCCESS
+
+
+def _make_pdf(path, pages):
+    pdf = pikepdf.Pdf.new()
+    for i in range(1, pages + 1):
+        page = pdf.add_blank_page(page_size=(200, 300))
+        page.Contents = pdf.make_stream(f"% P{i}\n0 0 10 10 re f".encode())
+    pdf.save(path)
+
+
+def _spread_markers(path):
+    """返回每个输出页从左到右放置的源页标记。"""
+    result = []
+    with pikepdf.open(path) as pdf:
+        for page in pdf.pages:
+            names = re.findall(rb"/(\S+) Do", page.Contents.read_bytes())
+            xobjects = page.Resources.XObject if names else {}
+            result.append([
+                re.search(rb"P(\d+)", xobjects["/" + n.decode()].read_bytes()).group(1).decode() for n in names
+            ])
+    return result
+
+
+@pytest.fixture
+def layout_env(monkeypatch, tmp_path):
+    monkeypatch.setattr(plm, "PDF_LAYOUT_BASE_DIR", str(tmp_path / "layout"))
+    monkeypatch.setattr(plm, "PDF_LAYOUT_UPLOAD_DIR", str(tmp_path / "layout" / "upload"))
+    monkeypatch.setattr(plm, "PDF_LAYOUT_OUTPUT_DIR", str(tmp_path / "layout" / "output"))
+    # 测试中直接在当前线程执行
+    monkeypatch.setattr(plm, "run_blocking", lambda func, timeout=None: func())
+    return tmp_path
+
+
+def _create_task(mgr, tmp_path, pages):
+    src = tmp_path / "src.pdf"
+    _make_pdf(str(src), pages)
+
+    class _File:
+        def save(self, dst):
+            os.replace(str(src), dst)
+
+    code, _, task_id = mgr.create_task(_File(), "book.pdf")
+    assert code == 0
+    return task_id
+
+
+def test_write_saddle_stitch_orders_spreads_and_reports_progress(tmp_path):
+    src, out = str(tmp_path / "src.pdf"), str(tmp_path / "out.pdf")
+    _make_pdf(src, 8)
+    events = []
+
+    count = plm._write_saddle_stitch(src, out, [], on_progress=lambda *e: events.append(e))
+
+    assert count == 4
+    assert _spread_markers(out) == [["8", "1"], ["2", "7"], ["6", "3"], ["4", "5"]]
+    with pikepdf.open(out) as pdf:
+        assert float(pdf.pages[0].mediabox[2]) == 400
+    assert [e for e in events if e[0] == 'layout'] == [('layout', i, 4) for i in range(1, 5)]
+    assert events[-1] == ('save', 100, 100)
+    assert not os.path.exists(out + ".tmp")
+
+
+def test_write_saddle_stitch_blank_fill_and_preview(tmp_path):
+    src, out = str(tmp_path / "src.pdf"), str(tmp_path / "out.pdf")
+    _make_pdf(src, 6)
+
+    # 在第 1 页前插入空白，末尾补齐到 8 页
+    count = plm._write_saddle_stitch(src, out, [1], max_spreads=1)
+
+    assert count == 1
+    assert _spread_markers(out) == [[]]
+    plm._write_saddle_stitch(src, out, [1])
+    assert _spread_markers(out)[1] == ["1", "6"]
+
+
+def test_write_saddle_stitch_drops_source_catalog(tmp_path):
+    src, out = str(tmp_path / "src.pdf"), str(tmp_path / "out.pdf")
+    _make_pdf(src, 4)
+    with pikepdf.open(src, allow_overwriting_input=True) as pdf:
+        with pdf.open_outline() as outline:
+            outline.root.append(pikepdf.OutlineItem("Chapter", 2))
+        pdf.Root.PageLabels = pikepdf.Dictionary(Nums=pikepdf.Array([0, pikepdf.Dictionary(S=pikepdf.Name.r)]))
+        pdf.save(src)
+
+    plm._write_saddle_stitch(src, out, [])
+
+    with pikepdf.open(out) as pdf:
+        assert "/Outlines" not in pdf.Root and "/PageLabels" not in pdf.Root
+        # 原始页面不再被写出：文件中只有对开页这 2 个 /Page 对象
+        page_objs = [o for o in pdf.objects if isinstance(o, pikepdf.Dictionary) and o.get("/Type") == "/Page"]
+        assert len(page_objs) == 2
+    assert _spread_markers(out) == [["4", "1"], ["2", "3"]]
+
+
+def test_generate_layout_sync_and_preview(layout_env):
+    mgr = plm.PdfLayoutMgr()
+    task_id = _create_task(mgr, layout_env, 8)
+
+    code, msg, filename = mgr.generate_preview(task_id, spreads=2)
+    assert code == 0, msg
+    assert _spread_markers(os.path.join(plm.PDF_LAYOUT_OUTPUT_DIR, filename)) == [["8", "1"], ["2", "7"]]
+
+    code, msg = mgr.generate_layout(task_id)
+    assert code == 0, msg
+    task = mgr.get_task(task_id)
+    assert task["status"] == TASK_STATUS_SUCCESS
+    assert task["progress"] == {"phase": "done", "total": 4, "processed": 4, "percent": 100}
+    assert len(_spread_markers(task["output_path"])) == 4
+
+    code, _ = mgr.delete_task(task_id)
+    assert code == 0
+    assert not os.path.exists(os.path.join(plm.PDF_LAYOUT_OUTPUT_DIR, filename))
+
+
+def test_generate_layout_background(layout_env, monkeypatch):
+    mgr = plm.PdfLayoutMgr()
+    task_id = _create_task(mgr, layout_env, 4)
+    states = []
+
+    def fake_run_task_async(tid, runner):
+        states.append(mgr.get_task(tid)["status"])
+        runner(mgr._get_task(tid))
+
+    monkeypatch.setattr(mgr, "_run_task_async", fake_run_task_async)
+
+    code, _ = mgr.generate_layout(task_id, background=True)
+    assert code == 0
+    assert len(states) == 1
+    assert mgr.get_task(task_id)["progress"]["phase"] == "done"
+
+    mgr._get_task(task_id).status = TASK_STATUS_PROCESSING
+    code, msg = mgr.generate_layout(task_id, background=True)
+    assert code == -1
+
+
+def test_generate_layout_sync_marks_processing_and_failure(layout_env, monkeypatch):
+    mgr = plm.PdfLayoutMgr()
+    task_id = _create_task(mgr, layout_env, 4)
+    seen = []
+
+    def failing_write(*args, **kwargs):
+        seen.append(mgr.get_task(task_id)["status"])
+        # 同步生成期间再次提交会被拒绝
+        seen.append(mgr.generate_layout(task_id)[0])
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(plm, "_write_saddle_stitch", failing_write)
+
+    code, _ = mgr.generate_layout(task_id)
+    assert code == -1
+    assert seen == [TASK_STATUS_PROCESSING, -1]
+    task = mgr.get_task(task_id)
+    assert task["status"] == TASK_STATUS_FAILED
+    assert task["error_message"] == "boom"
@@ -0,0 +1,64 @@
+"""PlaybackClock 单元测试：外推、漂移与自适应同步间隔。"""
+
+from core.services.playlist.playback_clock import (END_LEAD, FIRST_SYNC_DELAY, IDLE_SYNC_INTERVAL, MAX_SYNC_INTERVAL,
+                                                   MIN_SYNC_INTERVAL, PlaybackClock)
+
+
+def test_extrapolates_only_while_playing():
+    clock = PlaybackClock(now=0.0)
+    clock.restart(100, now=0.0)
+    assert clock.position_at(10.0) == 10.0
+    assert clock.remaining_at(10.0) == 90.0
+    assert clock.position_at(500.0) == 100.0  # clip 到时长
+
+    clock.observe("PAUSED_PLAYBACK", 20, 100, now=30.0)
+    assert clock.position_at(60.0) == 20.0
+
+
+def test_observe_reports_drift():
+    clock = PlaybackClock(now=0.0)
+    clock.restart(100, now=0.0)
+    assert clock.observe("PLAYING", 7, 100, now=10.0) == -3.0
+    assert clock.synced_at == 10.0
+    assert clock.is_fresh(5, now=14.0)
+    assert not clock.is_fresh(5, now=16.0)
+
+
+def test_set_state_keeps_extrapolated_position():
+    clock = PlaybackClock(now=0.0)
+    clock.restart(100, now=0.0)
+    clock.observe("PLAYING", 10, 100, now=10.0)
+
+    clock.set_state("PAUSED_PLAYBACK", now=25.0)
+    assert clock.position_at(60.0) == 25.0
+    clock.set_state("PLAYING", now=60.0)
+    assert clock.position_at(70.0) == 35.0
+    assert clock.synced_at == 10.0  # 仅状态变化，不算进度确认
+
+
+def test_sync_interval_adapts_to_drift_and_track_end():
+    clock = PlaybackClock(now=0.0)
+    clock.restart(600, now=0.0)
+    assert clock.next_sync_delay(0.0) == FIRST_SYNC_DELAY
+
+    clock.observe("PLAYING", 5, 600, now=5.0)  # 无漂移：拉长间隔
+    assert clock.next_sync_delay(5.0) == MAX_SYNC_INTERVAL
+
+    clock.observe("PLAYING", 30, 600, now=10.0)  # 漂移 +25s：缩短间隔
+    assert clock.next_sync_delay(10.0) == MIN_SYNC_INTERVAL
+
+    clock.observe("PLAYING", 500, 600, now=20.0)
+    # 最后一次同步安排在结束前 END_LEAD 秒
+    assert clock.next_sync_delay(20.0) == MIN_SYNC_INTERVAL
+    clock.observe("PLAYING", 505, 600, now=25.0)
+    assert clock.next_sync_delay(25.0) == 95 - END_LEAD
+    assert clock.next_sync_delay(25.0 + 95 - END_LEAD) is None
+
+
+def test_short_track_and_idle_state():
+    clock = PlaybackClock(now=0.0)
+    clock.restart(12, now=0.0)
+    assert clock.next_sync_delay(0.0) is None
+
+    clock.observe("PAUSED_PLAYBACK", 3, 12, now=1.0)
+    assert clock.next_sync_delay(1.0) == IDLE_SYNC_INTERVAL
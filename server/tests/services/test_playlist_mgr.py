@@ -779,3 +779,107 @@ def test_playlist_verify_all_exist(playlist_mgr, tmp_path):
     assert "均存在" in msg
     assert len(p1["playlist"]) == 1
 
+
+
+def _capture_spawns(monkeypatch):
+    spawned = []
+    monkeypatch.setattr(pm, "spawn", lambda fn, *a, **kw: spawned.append((fn, a, kw)))
+    return spawned
+
+
+def _background_plays(spawned):
+    return [(fn, a, kw) for fn, a, kw in spawned if getattr(fn, "__name__", "") == "_finish_play"]
+
+
+def test_play_returns_before_duration_probe_and_arms_timers_in_background(playlist_mgr, mock_device, monkeypatch):
+    spawned = _capture_spawns(monkeypatch)
+    probe = MagicMock(return_value=180)
+    monkeypatch.setattr(playlist_mgr._duration_fetcher, "update_file_duration", probe)
+    playlist_mgr.update_single_playlist(create_playlist_data("p1", "P1", [{"uri": "s1.mp3"}]))
+    mock_scheduler_mgr.add_date_job.reset_mock()
+
+    code, _ = playlist_mgr.play("p1")
+
+    assert code == 0
+    mock_device.play.assert_called_once_with("s1.mp3")
+    probe.assert_not_called()
+    mock_scheduler_mgr.add_date_job.assert_not_called()
+
+    [(fn, args, kwargs)] = _background_plays(spawned)
+    fn(*args, **kwargs)
+    probe.assert_called_once()
+    job_ids = [c.kwargs["job_id"] for c in mock_scheduler_mgr.add_date_job.call_args_list]
+    assert "playlist_file_timer_p1" in job_ids
+    assert [name for name, _ in args[-1].stages()] == ["volume", "device_play", "duration", "file_timer", "persist"]
+
+
+def test_play_file_timer_counts_from_device_play(playlist_mgr, mock_device, monkeypatch):
+    spawned = _capture_spawns(monkeypatch)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(pm.time, "monotonic", lambda: clock["now"])
+
+    def slow_probe(*_args, **_kwargs):
+        clock["now"] += 20  # 例如网络共享上的 ffprobe
+        return 180
+
+    monkeypatch.setattr(playlist_mgr._duration_fetcher, "update_file_duration", slow_probe)
+    start_timer = MagicMock()
+    monkeypatch.setattr(playlist_mgr._scheduling, "start_file_timer", start_timer)
+    playlist_mgr.update_single_playlist(create_playlist_data("p1", "P1", [{"uri": "s1.mp3"}]))
+
+    playlist_mgr.play("p1")
+    [(fn, args, kwargs)] = _background_plays(spawned)
+    fn(*args, **kwargs)
+
+    start_timer.assert_called_once_with("p1", 159.0)
+
+
+def test_play_background_is_cancelled_by_track_skip(playlist_mgr, mock_device, monkeypatch):
+    spawned = _capture_spawns(monkeypatch)
+    monkeypatch.setattr(playlist_mgr._duration_fetcher, "update_file_duration", MagicMock(return_value=180))
+    playlist_mgr.update_single_playlist(create_playlist_data("p1", "P1", [{"uri": "s1.mp3"}, {"uri": "s2.mp3"}]))
+
+    playlist_mgr.play("p1")
+    playlist_mgr.play_next("p1")
+    first, second = _background_plays(spawned)
+    mock_scheduler_mgr.add_date_job.reset_mock()
+
+    first[0](*first[1], **first[2])
+    mock_scheduler_mgr.add_date_job.assert_not_called()
+
+    second[0](*second[1], **second[2])
+    job_ids = [c.kwargs["job_id"] for c in mock_scheduler_mgr.add_date_job.call_args_list]
+    assert "playlist_file_timer_p1" in job_ids
+
+
+def test_play_background_after_stop_arms_no_timers(playlist_mgr, mock_device, monkeypatch):
+    spawned = _capture_spawns(monkeypatch)
+    probe = MagicMock(return_value=180)
+    monkeypatch.setattr(playlist_mgr._duration_fetcher, "update_file_duration", probe)
+    playlist_mgr.update_single_playlist(create_playlist_data(
+        "p1", "P1", [{"uri": "s1.mp3"}], schedule={"enabled": 0, "cron": "", "duration": 30}))
+
+    playlist_mgr.play("p1")
+    playlist_mgr.stop("p1")
+    [(fn, args, kwargs)] = _background_plays(spawned)
+    mock_scheduler_mgr.add_date_job.reset_mock()
+
+    fn(*args, **kwargs)
+
+    probe.assert_not_called()
+    mock_scheduler_mgr.add_date_job.assert_not_called()
+    assert "p1" not in playlist_mgr._scheduling.playlist_duration_timers
+
+
+@patch.object(pm.DurationFetcher, 'update_file_duration', return_value=180)
+def test_play_skips_unchanged_volume_until_stopped(mock_get_duration, playlist_mgr, mock_device):
+    playlist_mgr.update_single_playlist(
+        create_playlist_data("p1", "P1", [{"uri": "s1.mp3"}, {"uri": "s2.mp3"}], device_volume=15))
+
+    playlist_mgr.play("p1")
+    playlist_mgr.play_next("p1")
+    mock_device.set_volume.assert_called_once_with(15)
+
+    playlist_mgr.stop("p1")
+    playlist_mgr.play("p1")
+    assert mock_device.set_volume.call_count == 2
@@ -110,3 +110,126 @@ def test_start_playlist_duration_timer_stops_when_playing(mgr_with_mock_schedule
     cb = scheduler.add_date_job.call_args.kwargs["func"]
     cb()
     stop_mock.assert_called_once_with(pid)
+
+
+def _jobs_by_id(scheduler):
+    return {c.kwargs["job_id"]: c.kwargs["func"] for c in scheduler.add_date_job.call_args_list}
+
+
+def _start_playing(mgr, pid, duration):
+    mgr._playlist_raw[pid] = {"name": "P1", "files": [{"uri": "a.mp3"}]}
+    device = MagicMock()
+    device.stop.return_value = (0, "ok")
+    mgr._devices[pid] = {"obj": device}
+    mgr._playing_playlists.add(pid)
+    mgr._devices.mark_playing(pid, duration)
+    mgr._scheduling.start_file_timer(pid, duration - 1)
+    return device
+
+
+def test_file_timer_schedules_progress_sync_from_clock(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    _start_playing(mgr, "p1", 240)
+
+    jobs = _jobs_by_id(scheduler)
+    assert "playlist_file_timer_p1" in jobs
+    assert "playlist_progress_sync_p1" in jobs
+
+
+def test_progress_sync_reschedules_file_timer_on_drift(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    # 设备缓冲了 30s：外推位置 ~0，设备上报 0 且时长 270（元数据不准）
+    device.get_status.return_value = (0, {"state": "PLAYING", "duration": "00:04:30", "position": "00:00:00"})
+    before = mgr._scheduling._file_timer_run_dates["p1"]
+
+    _jobs_by_id(scheduler)["playlist_progress_sync_p1"]()
+
+    after = mgr._scheduling._file_timer_run_dates["p1"]
+    assert (after - before).total_seconds() > 25
+    device.get_status.assert_called_once()
+
+
+def test_progress_sync_keeps_timer_when_clock_agrees(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    device.get_status.return_value = (0, {"state": "PLAYING", "duration": "00:04:00", "position": "00:00:00"})
+    before = mgr._scheduling._file_timer_run_dates["p1"]
+    scheduler.add_date_job.reset_mock()
+
+    mgr._scheduling.reconcile_progress("p1")
+
+    assert mgr._scheduling._file_timer_run_dates["p1"] == before
+    jobs = _jobs_by_id(scheduler)
+    assert list(jobs) == ["playlist_progress_sync_p1"]
+
+
+def test_progress_event_stopped_early_plays_next(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    mgr.play_next = MagicMock(return_value=(0, "ok"))
+    mgr._devices.observe("p1", {"state": "PLAYING", "duration": "00:04:00", "position": "00:00:05"})
+
+    code, _ = mgr.report_playback_status("p1", {"state": "STOPPED", "duration": "00:04:00", "position": "00:03:10"})
+
+    assert code == 0
+    mgr.play_next.assert_called_once_with("p1")
+    device.get_status.assert_not_called()
+
+
+def test_file_timer_uses_fresh_clock_without_polling(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    mgr.play_next = MagicMock(return_value=(0, "ok"))
+    # 最后一次同步：还剩 1s
+    mgr._devices.observe("p1", {"state": "PLAYING", "duration": "00:04:00", "position": "00:03:59"})
+
+    _jobs_by_id(scheduler)["playlist_file_timer_p1"]()
+
+    device.get_status.assert_not_called()
+    mgr.play_next.assert_called_once_with("p1")
+
+
+def test_file_timer_defers_when_device_behind(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    mgr.play_next = MagicMock(return_value=(0, "ok"))
+    device.get_status.return_value = (0, {"state": "PLAYING", "duration": "00:04:00", "position": "00:03:00"})
+    scheduler.add_date_job.reset_mock()
+
+    mgr._on_file_timer_fire("p1")
+
+    mgr.play_next.assert_not_called()
+    assert "playlist_file_timer_p1" in _jobs_by_id(scheduler)
+
+
+def test_progress_event_without_position_keeps_clock(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    _start_playing(mgr, "p1", 240)
+    mgr._devices.observe("p1", {"state": "PLAYING", "duration": "00:04:00", "position": "00:01:00"})
+    mgr._scheduling.start_file_timer("p1", 179)
+    before = mgr._scheduling._file_timer_run_dates["p1"]
+
+    code, _ = mgr.report_playback_status("p1", {"state": "PLAYING"})
+
+    assert code == 0
+    assert mgr._devices.clock("p1").position_at() >= 60
+    assert mgr._scheduling._file_timer_run_dates["p1"] == before
+
+
+def test_file_timer_backs_off_while_paused(mgr_with_mock_scheduler):
+    mgr, scheduler, pm = mgr_with_mock_scheduler
+    device = _start_playing(mgr, "p1", 240)
+    mgr.play_next = MagicMock(return_value=(0, "ok"))
+    device.get_status.return_value = (0, {"state": "PAUSED_PLAYBACK", "duration": "00:04:00", "position": "00:02:00"})
+
+    mgr._on_file_timer_fire("p1")
+
+    mgr.play_next.assert_not_called()
+    delay = (mgr._scheduling._file_timer_run_dates["p1"] - datetime.datetime.now()).total_seconds()
+    assert delay > pm.PAUSED_RECHECK_INTERVAL - 5
+
+    # 恢复播放后进度同步把切歌定时器拉回到按剩余时长计算的时间
+    mgr.report_playback_status("p1", {"state": "PLAYING", "duration": "00:04:00", "position": "00:02:00"})
+    delay = (mgr._scheduling._file_timer_run_dates["p1"] - datetime.datetime.now()).total_seconds()
+    assert 115 < delay < 121
@@ -285,3 +285,24 @@ def test_job_executed_listener_success_no_exception(scheduler_mgr_instance):
 
     event = types.SimpleNamespace(job_id="j", exception=None)
     mgr._job_executed_listener(event)
+
+
+def test_job_listeners_record_metrics(scheduler_mgr_instance):
+    mgr = scheduler_mgr_instance
+
+    import core.services.scheduler_mgr as sm
+
+    runs = sm._JOB_RUNS.labels("metrics_job", "success")
+    misfires = sm._JOB_MISFIRES.labels("metrics_job", "missed")
+    duration = sm._JOB_DURATION.labels("metrics_job")
+    runs_before, misfires_before = runs.get(), misfires.get()
+    count_before = duration.snapshot()[0][-1]
+
+    mgr._job_submitted_listener(types.SimpleNamespace(job_id="metrics_job"))
+    mgr._job_executed_listener(types.SimpleNamespace(job_id="metrics_job", exception=None))
+    mgr._job_missed_listener(
+        types.SimpleNamespace(job_id="metrics_job", code=sm.EVENT_JOB_MISSED, scheduled_run_time=None))
+
+    assert runs.get() == runs_before + 1
+    assert misfires.get() == misfires_before + 1
+    assert duration.snapshot()[0][-1] == count_before + 1
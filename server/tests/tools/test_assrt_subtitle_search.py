@@ -3,6 +3,7 @@
 import json
 from unittest.mock import patch
 
+import pytest
 from flask import Flask
 
 import core.api.media_routes as media_routes
@@ -14,6 +15,24 @@ from core.config import (
 )
 from core.services.subtitle_mgr import SubtitleMgr, SubtitleRecognizeMgr
 from core.subtitles.assrt_client import AssrtClient, _lang_ok, _row
+from core.subtitles import subtitle_index
+
+
+class _MemoryStore(dict):
+
+    def get_str(self, key):
+        return self.get(key, "")
+
+    def set(self, key, value):
+        self[key] = value
+        return True
+
+
+@pytest.fixture(autouse=True)
+def _memory_subtitle_index(monkeypatch):
+    """全局字幕索引默认写 rds_mgr，测试中换成内存存储，避免临时路径落盘。"""
+    monkeypatch.setattr(subtitle_index, "_store", _MemoryStore())
+    monkeypatch.setattr(subtitle_index, "_known", None)
 
 
 def test_lang_ok_english_by_desc():
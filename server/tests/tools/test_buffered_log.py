@@ -0,0 +1,127 @@
+"""缓冲日志与访问日志采样：后台写盘、缓冲满丢弃计数、采样规则与 gevent 访问日志过滤。"""
+
+import logging
+import threading
+
+from core.tools.buffered_log import (AccessLogSampler, BufferedLogHandler, GeventAccessSampleFilter,
+                                     buffer_logger_handlers)
+from core.tools.metrics import registry
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self, block=None):
+        super().__init__()
+        self.block = block
+        self.lines = []
+        self.threads = set()
+        self.written = threading.Event()
+        self.setFormatter(logging.Formatter('%(message)s'))
+
+    def emit(self, record):
+        if self.block is not None:
+            self.block.wait()
+        self.lines.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+        self.written.set()
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_background_writer_formats_and_writes():
+    target = ListHandler()
+    handler = BufferedLogHandler(target, name='t-bg', flush_interval=0.01)
+    logger = _logger('test.buffered.bg', handler)
+
+    logger.info('%s %s %d', 'GET', '/api/x', 200)
+    assert target.written.wait(5)
+    assert target.lines == ['GET /api/x 200']
+    assert target.threads == {'log-writer-t-bg'}
+    handler.close()
+
+
+def test_full_buffer_drops_oldest_and_counts():
+    block = threading.Event()
+    target = ListHandler(block=block)
+    handler = BufferedLogHandler(target, name='t-drop', capacity=3, flush_interval=3600, flush_batch=100)
+    logger = _logger('test.buffered.drop', handler)
+
+    for i in range(5):
+        logger.info('line %d', i)
+    assert handler.dropped == 2
+    assert handler.pending() == 3
+    assert 'log_buffer_dropped_total{handler="t-drop"} 2' in registry.render()
+
+    block.set()
+    handler.flush()
+    assert target.lines == ['line 2', 'line 3', 'line 4']
+    assert handler.pending() == 0
+    handler.close()
+
+
+def test_buffer_logger_handlers_wraps_shared_handler_once():
+    target = ListHandler()
+    a = _logger('test.buffered.a', target)
+    b = _logger('test.buffered.b', target)
+
+    (buffered,) = buffer_logger_handlers([a, b], name='t-shared', flush_interval=3600)
+    assert a.handlers == [buffered] and b.handlers == [buffered]
+    assert buffer_logger_handlers([a, b], name='t-shared') == []
+
+    a.info('from a')
+    b.info('from b')
+    buffered.flush()
+    assert target.lines == ['from a', 'from b']
+    buffered.close()
+
+
+def test_sampler_rules_keep_errors_and_slow_requests():
+    sampler = AccessLogSampler.from_rules('/api/material/status:10, /web/:5, bad, /x:abc', slow_ms=500)
+    assert sampler.rules == [('/api/material/status', 10), ('/web/', 5)]
+
+    logged = [sampler.should_log('/api/material/status', 200, 3) for _ in range(20)]
+    assert logged.count(True) == 2 and logged[0] and logged[10]
+    assert sum(sampler.should_log('/web/app.js', 304, 1) for _ in range(10)) == 2
+
+    # 错误与慢请求不参与采样；未命中规则的路径全部记录
+    assert all(sampler.should_log('/api/material/status', 500, 3) for _ in range(5))
+    assert all(sampler.should_log('/api/material/status', 200, 800) for _ in range(5))
+    assert all(sampler.should_log('/api/todo/list', 200, 3) for _ in range(5))
+    assert AccessLogSampler.from_rules('').should_log('/web/a', 200, 1)
+
+
+def test_gevent_filter_samples_access_lines():
+    target = ListHandler()
+    logger = _logger('test.buffered.gevent', target)
+    logger.addFilter(GeventAccessSampleFilter(AccessLogSampler.from_rules('/web/:3')))
+
+    for _ in range(6):
+        logger.info('127.0.0.1 - - [19/Oct/2026 10:00:00] "GET /web/index.js HTTP/1.1" 200 512 0.000800')
+    logger.info('127.0.0.1 - - [19/Oct/2026 10:00:00] "GET /web/missing.js HTTP/1.1" 404 12 0.000300')
+    logger.info('127.0.0.1 - - [19/Oct/2026 10:00:00] "GET /web/big.js HTTP/1.1" 200 9 1.500000')
+    logger.info('unparseable line')
+
+    assert len(target.lines) == 5
+    assert target.lines[-1] == 'unparseable line'
+
+
+def test_shared_sampler_samples_each_access_log_independently():
+    sampler = AccessLogSampler.from_rules('/api/playlist/status:10')
+    target = ListHandler()
+    logger = _logger('test.buffered.shared', target)
+    logger.addFilter(GeventAccessSampleFilter(sampler))
+
+    flask_logged = 0
+    for _ in range(100):
+        # 与 create_app 中一致：同一请求先经 Flask after_request，再由 gevent 写访问日志
+        flask_logged += sampler.should_log('/api/playlist/status', 200, 2)
+        logger.info('127.0.0.1 - - [19/Oct/2026 10:00:00] "GET /api/playlist/status HTTP/1.1" 200 64 0.002000')
+
+    assert flask_logged == 10
+    assert len(target.lines) == 10
@@ -0,0 +1,172 @@
+"""进程内缓存：TTL 与容量淘汰、单飞加载、失效与统计，以及接入缓存的配置读取。"""
+
+import importlib
+import threading
+
+import pytest
+
+cache_module = importlib.import_module("core.tools.cache")
+CacheNamespace = cache_module.CacheNamespace
+CacheRegistry = cache_module.CacheRegistry
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", c)
+    return c
+
+
+def test_ttl_and_lru_eviction(clock):
+    ns = CacheNamespace("t-ttl", ttl=30, maxsize=2)
+    loads = []
+
+    def loader(key):
+        return lambda: loads.append(key) or key.upper()
+
+    assert ns.get("a", loader("a")) == "A"
+    assert ns.get("a", loader("a")) == "A"
+    clock.now += 31
+    assert ns.get("a", loader("a")) == "A"
+    assert loads == ["a", "a"]
+
+    ns.get("b", loader("b"))
+    ns.get("a", loader("a"))  # a 最近使用
+    ns.get("c", loader("c"))  # 淘汰 b
+    assert ns.peek("b") is None and ns.peek("a") == "A"
+    assert ns.get("x", loader("x"), ttl=1) == "X"
+    clock.now += 2
+    assert ns.peek("x") is None
+
+    stats = ns.stats()
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (2, 5, 5)
+    assert stats["evictions"] == 3 and stats["size"] == 2  # 过期条目在下次访问时移除
+
+
+def test_single_flight_across_threads():
+    ns = CacheNamespace("t-flight", ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return {"v": 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(ns.get("k", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while ns.stats()["coalesced"] < 7:
+        threading.Event().wait(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert ns.stats()["loading"] == 0
+
+
+def test_loader_errors_are_shared_not_cached():
+    ns = CacheNamespace("t-error")
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        release.wait(5)
+        raise ValueError("redis down")
+
+    errors = []
+
+    def worker():
+        try:
+            ns.get("k", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while ns.stats()["coalesced"] < 2:
+        threading.Event().wait(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert errors == ["redis down"] * 3 and len(calls) == 1
+    assert ns.get("k", lambda: "ok") == "ok"
+    assert ns.stats()["load_errors"] == 1
+
+
+def test_invalidation_during_load_is_not_stored():
+    ns = CacheNamespace("t-race")
+
+    def stale_loader():
+        ns.invalidate("k")  # 加载期间写入方更新了数据
+        return "stale"
+
+    assert ns.get("k", stale_loader) == "stale"
+    assert ns.peek("k") is None
+    assert ns.get("k", lambda: "fresh") == "fresh"
+    assert ns.invalidate("k") == 1 and ns.invalidate("k") == 0
+
+    ns.set("none", None)
+    assert ns.invalidate("none") == 1
+    with pytest.raises(RuntimeError):
+        ns.get("loop", lambda: ns.get("loop", lambda: 1))
+
+
+def test_registry_rds_bindings_and_stats():
+    reg = CacheRegistry()
+    a = reg.namespace("a", ttl=10, rds_keys=("cfg:1",))
+    b = reg.namespace("b", rds_keys=("cfg:1", "cfg:2"))
+    assert reg.namespace("a") is a
+    a.set("x", 1)
+    b.set("y", 2)
+
+    assert reg.invalidate_rds_key("cfg:2") == ["b"]
+    assert a.peek("x") == 1 and b.peek("y") is None
+    assert sorted(reg.invalidate_rds_key("cfg:1")) == ["a", "b"]
+    assert reg.invalidate_rds_key("unknown") == []
+    assert reg.invalidate("missing") == 0
+    assert set(reg.stats()) == {"a", "b"}
+    assert reg.stats()["a"]["ttl"] == 10
+
+
+def test_browser_config_cached_and_invalidated(monkeypatch):
+    browser_module = importlib.import_module("core.services.browser_mgr")
+    store = {"browser:config": '{"version": "1.0.0"}'}
+    reads = []
+
+    def get_str(key):
+        reads.append(key)
+        return store.get(key)
+
+    monkeypatch.setattr(browser_module.rds_mgr, "get_str", get_str)
+    monkeypatch.setattr(browser_module.rds_mgr, "set", lambda key, value: store.__setitem__(key, value))
+    browser_module._config_cache.invalidate()
+    mgr = browser_module.BrowserMgr()
+
+    first = mgr.load_config()
+    first["version"] = "mutated"  # 返回副本，不影响缓存
+    assert mgr.load_config() == {"version": "1.0.0"}
+    assert len(reads) == 1
+
+    assert mgr.publish_version()[2] == {"version": "1.0.1"}
+    assert mgr.load_config()["version"] == "1.0.1"
+    assert len(reads) == 2  # publish 读缓存，保存后失效重新读取
+
+    # 通用接口直接写 Redis 时按 key 失效
+    store["browser:config"] = '{"version": "2.0.0"}'
+    cache_module.cache_registry.invalidate_rds_key("browser:config")
+    assert mgr.load_config()["version"] == "2.0.0"
+    browser_module._config_cache.invalidate()
@@ -0,0 +1,106 @@
+"""ffmpeg_runner 单元测试：-progress 解析与受监督进程（用 shell 脚本模拟 ffmpeg）。"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from core.tools.ffmpeg_runner import FfmpegCancelled, ProgressReader, progress_from_fields, run_ffmpeg
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='依赖 sh 与信号')
+
+# 模拟 ffmpeg：从参数中取出 -progress 路径，按 FAKE_BLOCKS 写进度块（每块间隔 FAKE_SLEEP 秒），
+# 最后写 stderr 并以 FAKE_RC 退出；FAKE_PID 指定时记录自身 pid
+FAKE_FFMPEG = r'''#!/bin/sh
+[ -n "$FAKE_PID" ] && echo $$ > "$FAKE_PID"
+while [ $# -gt 0 ]; do
+  if [ "$1" = "-progress" ]; then progress="$2"; shift; fi
+  shift
+done
+i=1
+while [ $i -le "${FAKE_BLOCKS:-3}" ]; do
+  printf 'out_time_us=%d000000\nspeed=%sx\ntotal_size=%d\nprogress=continue\n' $i "${FAKE_SPEED:-2.5}" $((i * 1000)) >> "$progress"
+  sleep "${FAKE_SLEEP:-0.05}"
+  i=$((i + 1))
+done
+printf 'out_time_us=%d000000\nprogress=end\n' "${FAKE_BLOCKS:-3}" >> "$progress"
+echo "fake stderr" >&2
+exit "${FAKE_RC:-0}"
+'''
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path):
+    path = tmp_path / 'ffmpeg'
+    path.write_text(FAKE_FFMPEG)
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_progress_from_fields():
+    p = progress_from_fields({'out_time_us': '1500000', 'speed': '31.2x', 'total_size': '2048',
+                              'progress': 'continue'})
+    assert (p.out_time, p.speed, p.total_size, p.done) == (1.5, 31.2, 2048, False)
+
+    p = progress_from_fields({'out_time_us': 'N/A', 'out_time': '00:01:02.500000', 'speed': 'N/A',
+                              'progress': 'end'})
+    assert (p.out_time, p.speed, p.done) == (62.5, None, True)
+
+
+def test_progress_reader_handles_partial_writes(tmp_path):
+    path = tmp_path / 'progress'
+    reader = ProgressReader(str(path))
+    assert reader.poll() is None
+
+    with open(path, 'w') as f:
+        f.write('out_time_us=1000000\nspeed=1x\nprog')
+    assert reader.poll() is None
+    with open(path, 'a') as f:
+        f.write('ress=continue\nout_time_us=2000000\nprogress=continue\nout_time_us=3')
+    p = reader.poll()
+    assert p is not None and p.out_time == 2.0
+    assert reader.poll() is None
+
+
+def test_run_ffmpeg_reports_progress(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv('FAKE_BLOCKS', '3')
+    seen = []
+
+    returncode, stderr = run_ffmpeg([fake_ffmpeg, '-i', 'in', 'out'], on_progress=seen.append, poll_interval=0.02)
+
+    assert returncode == 0
+    assert 'fake stderr' in stderr
+    assert seen[-1].done and seen[-1].out_time == 3.0
+    assert any(p.speed == 2.5 for p in seen)
+
+
+def test_run_ffmpeg_nonzero_exit(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv('FAKE_BLOCKS', '1')
+    monkeypatch.setenv('FAKE_RC', '3')
+    assert run_ffmpeg([fake_ffmpeg], poll_interval=0.02)[0] == 3
+
+
+def test_run_ffmpeg_cancel_kills_process(fake_ffmpeg, monkeypatch, tmp_path):
+    pid_file = tmp_path / 'pid'
+    monkeypatch.setenv('FAKE_BLOCKS', '100')
+    monkeypatch.setenv('FAKE_SLEEP', '1')
+    monkeypatch.setenv('FAKE_PID', str(pid_file))
+    seen = []
+
+    start = time.monotonic()
+    with pytest.raises(FfmpegCancelled):
+        run_ffmpeg([fake_ffmpeg], on_progress=seen.append, should_stop=lambda: bool(seen), poll_interval=0.02)
+
+    assert time.monotonic() - start < 5
+    pid = int(pid_file.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+
+def test_run_ffmpeg_stall_timeout(fake_ffmpeg, monkeypatch):
+    monkeypatch.setenv('FAKE_BLOCKS', '100')
+    monkeypatch.setenv('FAKE_SLEEP', '30')
+
+    with pytest.raises(TimeoutError):
+        run_ffmpeg([fake_ffmpeg], stall_timeout=0.3, poll_interval=0.02)
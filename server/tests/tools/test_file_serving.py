@@ -0,0 +1,191 @@
+"""file_serving 单元测试：Range 解析、条件请求、打开文件缓存与 gevent sendfile handler。"""
+
+import os
+
+import pytest
+from flask import Flask, request
+
+from core.tools import file_serving
+from core.tools.file_serving import OpenFileCache, make_sendfile_handler, parse_ranges, serve_file
+
+DATA = bytes(range(256)) * 40  # 10240 字节
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / "movie.mp4"
+    path.write_bytes(DATA)
+    return str(path)
+
+
+@pytest.fixture
+def cache():
+    c = OpenFileCache(ttl=60)
+    yield c
+    c.invalidate()
+
+
+@pytest.fixture
+def client(media_file, cache):
+    app = Flask(__name__)
+
+    @app.route("/f")
+    def _serve():
+        return serve_file(cache.acquire(media_file, "video/mp4"), request)
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("bytes=0-99", [(0, 100)]),
+    ("bytes=100-", [(100, 10240)]),
+    ("bytes=-100", [(10140, 10240)]),
+    ("bytes=0-99,200-299", [(0, 100), (200, 300)]),
+    ("bytes=0-99,120-199", [(0, 200)]),  # 间隔小于 RANGE_MERGE_GAP，合并
+    ("bytes=0-20000", [(0, 10240)]),
+    ("bytes=20000-", []),
+    ("bytes=5-1", None),
+    ("bytes=abc", None),
+    ("items=0-1", None),
+])
+def test_parse_ranges(header, expected):
+    assert parse_ranges(header, len(DATA)) == expected
+
+
+def test_full_and_single_range(client):
+    resp = client.get("/f")
+    assert resp.status_code == 200
+    assert resp.data == DATA
+    assert resp.headers["Accept-Ranges"] == "bytes"
+
+    resp = client.get("/f", headers={"Range": "bytes=10-19"})
+    assert resp.status_code == 206
+    assert resp.data == DATA[10:20]
+    assert resp.headers["Content-Range"] == f"bytes 10-19/{len(DATA)}"
+    assert resp.headers["Content-Length"] == "10"
+
+
+def test_multi_range_is_multipart(client):
+    resp = client.get("/f", headers={"Range": "bytes=0-9,5000-5009"})
+    assert resp.status_code == 206
+    assert resp.mimetype == "multipart/byteranges"
+    body = resp.data
+    assert int(resp.headers["Content-Length"]) == len(body)
+    assert DATA[0:10] in body and DATA[5000:5010] in body
+    assert body.count(b"Content-Range: bytes") == 2
+
+
+def test_unsatisfiable_range(client):
+    resp = client.get("/f", headers={"Range": "bytes=99999-"})
+    assert resp.status_code == 416
+    assert resp.headers["Content-Range"] == f"bytes */{len(DATA)}"
+
+
+def test_conditional_requests(client):
+    first = client.get("/f")
+    etag = first.headers["ETag"]
+
+    resp = client.get("/f", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+    resp = client.get("/f", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert resp.status_code == 304
+
+    # If-Range 不匹配：忽略 Range，返回完整文件
+    resp = client.get("/f", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+    assert resp.status_code == 200
+    resp = client.get("/f", headers={"Range": "bytes=0-9", "If-Range": etag})
+    assert resp.status_code == 206
+
+
+def test_head_has_length_without_body(client):
+    resp = client.head("/f", headers={"Range": "bytes=0-99"})
+    assert resp.status_code == 206
+    assert resp.headers["Content-Length"] == "100"
+    assert resp.data == b""
+
+
+def test_cache_reuses_fd_and_detects_changes(media_file):
+    cache = OpenFileCache(ttl=0)  # 每次都用 stat 复核
+    first = cache.acquire(media_file, "video/mp4")
+    first.release()
+    again = cache.acquire(media_file, "video/mp4")
+    again.release()
+    assert again is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    with open(media_file, "ab") as f:
+        f.write(b"more")
+    changed = cache.acquire(media_file, "video/mp4")
+    assert changed is not first
+    assert changed.size == len(DATA) + 4
+    changed.release()
+    # 旧 fd 已关闭
+    with pytest.raises(OSError):
+        os.fstat(first.fd)
+    cache.invalidate()
+
+
+def test_evicted_fd_closed_only_after_release(tmp_path):
+    cache = OpenFileCache(max_entries=1, ttl=60)
+    a, b = tmp_path / "a.mp3", tmp_path / "b.mp3"
+    a.write_bytes(b"a" * 10)
+    b.write_bytes(b"b" * 10)
+
+    held = cache.acquire(str(a), "audio/mpeg")
+    cache.acquire(str(b), "audio/mpeg").release()  # 淘汰 a，但 a 仍在下发中
+    assert held.pread(0, 3) == b"aaa"
+    held.release()
+    with pytest.raises(OSError):
+        os.fstat(held.fd)
+    cache.invalidate()
+
+
+def test_missing_file_raises(cache, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cache.acquire(str(tmp_path / "missing.mp4"), "video/mp4")
+    with pytest.raises(FileNotFoundError):
+        cache.acquire(str(tmp_path), "video/mp4")
+
+
+@pytest.mark.skipif(not hasattr(os, "sendfile"), reason="平台不支持 os.sendfile")
+def test_gevent_handler_uses_sendfile(media_file, cache, monkeypatch):
+    import gevent.socket
+    from gevent.pywsgi import WSGIHandler, WSGIServer
+
+    app = Flask(__name__)
+
+    @app.route("/f")
+    def _serve():
+        return serve_file(cache.acquire(media_file, "video/mp4"), request)
+
+    calls = []
+    real_sendfile = os.sendfile
+
+    def counting_sendfile(*args):
+        calls.append(args)
+        return real_sendfile(*args)
+
+    monkeypatch.setattr(file_serving.os, "sendfile", counting_sendfile)
+
+    server = WSGIServer(("127.0.0.1", 0), app, handler_class=make_sendfile_handler(WSGIHandler), log=None)
+    server.start()
+    try:
+        sock = gevent.socket.create_connection(("127.0.0.1", server.server_port))
+        sock.sendall(b"GET /f HTTP/1.1\r\nHost: t\r\nRange: bytes=0-9,5000-5009\r\nConnection: close\r\n\r\n")
+        raw = b""
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            raw += chunk
+        sock.close()
+    finally:
+        server.stop()
+
+    head, _, body = raw.partition(b"\r\n\r\n")
+    assert b" 206 " in head.split(b"\r\n")[0]
+    assert DATA[0:10] in body and DATA[5000:5010] in body
+    assert len(calls) >= 2
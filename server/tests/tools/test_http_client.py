@@ -0,0 +1,212 @@
+"""PooledHttpClient 单元测试：本地 HTTP 服务验证 keep-alive、重试、并发限制、熔断、总超时与统计。"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from core.tools import http_client as http_client_module
+from core.tools.http_client import CircuitOpenError, HttpClientBusy, PooledHttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: bytes = b'{"code": 0}') -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.hits.append((self.path, self.client_address[1]))
+        if self.path.startswith("/flaky") and server.failures > 0:
+            server.failures -= 1
+            self._reply(503)
+            return
+        if self.path.startswith("/slow"):
+            time.sleep(0.3)
+        if self.path.startswith("/stream"):
+            body = b"".join(b"data: %d\n" % i for i in range(3))
+            self._reply(200, body)
+            return
+        self._reply(200)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.server.hits.append((self.path, self.client_address[1]))
+        if self.path.startswith("/slow"):
+            time.sleep(0.3)
+        self._reply(200)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.hits = []
+    httpd.failures = 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_keep_alive_reuses_connection(server):
+    client = PooledHttpClient("test")
+    for _ in range(5):
+        assert client.request("GET", _url(server, "/media/status")).status_code == 200
+    client.request("POST", _url(server, "/media/play"), json={"file_path": "a.mp3"})
+
+    assert len({port for _, port in server.hits}) == 1
+    stats = client.get_stats()
+    assert stats["GET /media/status"]["count"] == 5
+    assert stats["POST /media/play"]["count"] == 1
+
+
+def test_get_retries_on_503(server):
+    server.failures = 2
+    client = PooledHttpClient("test", backoff=0.01)
+
+    resp = client.request("GET", _url(server, "/flaky"))
+    assert resp.status_code == 200
+    assert len(server.hits) == 3
+    assert client.get_stats()["GET /flaky"]["retries"] == 2
+
+
+def test_post_not_retried_on_read_timeout(server):
+    client = PooledHttpClient("test", backoff=0.01)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.request("POST", _url(server, "/slow"), timeout=(1.0, 0.05))
+    time.sleep(0.35)
+    assert len(server.hits) == 1
+    assert client.get_stats()["POST /slow"]["errors"] == 1
+
+
+def test_connect_error_retried_then_raised():
+    client = PooledHttpClient("test", retries=2, backoff=0.01)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.request("POST", "http://127.0.0.1:9/media/play", timeout=0.2)
+    stats = client.get_stats()["POST /media/play"]
+    assert stats["retries"] == 2
+    assert stats["errors"] == 1
+
+
+def _wait_until(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def test_concurrency_limit_rejects_when_busy(server):
+    client = PooledHttpClient("test", max_concurrency=1, queue_timeout=0.05)
+    worker = threading.Thread(target=client.request, args=("GET", _url(server, "/slow")))
+    worker.start()
+    _wait_until(lambda: client.get_state()["in_flight"] == 1)
+
+    with pytest.raises(HttpClientBusy):
+        client.request("GET", _url(server, "/media/status"))
+    worker.join()
+    assert client.request("GET", _url(server, "/media/status")).status_code == 200
+    assert [path for path, _ in server.hits] == ["/slow", "/media/status"]
+
+
+def test_circuit_breaker_opens_and_recovers(server):
+    client = PooledHttpClient("test", retries=0, breaker_threshold=2, breaker_cooldown=0.2)
+    server.failures = 10
+    for _ in range(2):
+        assert client.request("GET", _url(server, "/flaky")).status_code == 503
+    assert client.get_state()["circuit"] == "open"
+
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", _url(server, "/flaky"))
+    assert len(server.hits) == 2
+
+    # 冷却后放行一个试探请求：仍失败则立即重新熔断
+    time.sleep(0.25)
+    assert client.get_state()["circuit"] == "half_open"
+    assert client.request("GET", _url(server, "/flaky")).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.request("GET", _url(server, "/flaky"))
+
+    # 试探成功则恢复
+    time.sleep(0.25)
+    server.failures = 0
+    assert client.request("GET", _url(server, "/flaky")).status_code == 200
+    assert client.get_state()["circuit"] == "closed"
+    assert client.request("GET", _url(server, "/flaky")).status_code == 200
+
+
+def test_half_open_trial_released_on_unexpected_error(server, monkeypatch):
+    client = PooledHttpClient("test", retries=0, breaker_threshold=1, breaker_cooldown=0.2)
+    server.failures = 10
+    assert client.request("GET", _url(server, "/flaky")).status_code == 503
+    time.sleep(0.25)
+
+    # 试探请求抛出非 RequestException：不应一直卡在半开状态
+    def broken(*_args, **_kwargs):
+        raise ValueError("boom")
+
+    original = client._session.request
+    monkeypatch.setattr(client._session, "request", broken)
+    with pytest.raises(ValueError):
+        client.request("GET", _url(server, "/flaky"))
+    monkeypatch.setattr(client._session, "request", original)
+
+    server.failures = 0
+    assert client.request("GET", _url(server, "/flaky")).status_code == 200
+    assert client.get_state()["circuit"] == "closed"
+
+
+def test_total_timeout_caps_retries(server):
+    client = PooledHttpClient("test", retries=5, backoff=0.01, jitter=0, total_timeout=0.25)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.request("GET", _url(server, "/slow"), timeout=(1.0, 0.1))
+    stats = client.get_stats()["GET /slow"]
+    assert stats["retries"] < 5
+    assert stats["max_ms"] < 400
+
+
+def test_backoff_jitter(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_client_module.time, "sleep", sleeps.append)
+    client = PooledHttpClient("test", backoff=1.0, jitter=0.5)
+    for _ in range(50):
+        assert client._sleep_backoff(2)
+    assert all(1.0 <= d <= 3.0 for d in sleeps)
+    assert len(set(sleeps)) > 1
+
+    # 退避后会超过总超时：不再等待
+    assert client._sleep_backoff(1, deadline=time.monotonic() + 0.1) is False
+    assert len(sleeps) == 50
+
+
+def test_stream_holds_slot_until_closed(server):
+    client = PooledHttpClient("test", max_concurrency=1, queue_timeout=0.01)
+    with client.stream("GET", _url(server, "/stream")) as resp:
+        assert client.get_state()["in_flight"] == 1
+        with pytest.raises(HttpClientBusy):
+            client.request("GET", _url(server, "/media/status"))
+        lines = list(client.iter_lines(resp))
+    assert lines == [b"data: 0", b"data: 1", b"data: 2"]
+    assert client.get_state()["in_flight"] == 0
+
+
+def test_request_duration_histogram(server):
+    client = PooledHttpClient("hist_test")
+    client.request("GET", _url(server, "/media/status"))
+    counts, total = http_client_module._REQUEST_SECONDS.labels("hist_test", "ok").snapshot()
+    assert counts[-1] == 1
+    assert 0 < total < 1
@@ -0,0 +1,141 @@
+"""延迟加载单元测试：模块代理、管理器注册表、循环依赖检测、启动耗时统计与启动耗时预算。"""
+
+import os
+import subprocess
+import sys
+import types
+
+import pytest
+
+from core.tools.lazy import ManagerRegistry, StartupProfiler, lazy_import
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 导入 core 时不应加载的重依赖（只在对应功能首次使用时加载）
+HEAVY_MODULES = ("pikepdf", "bleak", "dashscope", "upnpclient", "miservice", "faster_whisper")
+
+# 导入 core 与全部路由模块的耗时预算（秒），留足 CI 机器的波动余量
+STARTUP_BUDGET_SECONDS = 8.0
+
+
+def test_lazy_import_defers_until_attribute_access(monkeypatch):
+    fake = types.ModuleType("fake_heavy_mod")
+    fake.value = 1
+    loaded = []
+    monkeypatch.setitem(sys.modules, "fake_heavy_mod", fake)
+
+    proxy = lazy_import("fake_heavy_mod", on_load=lambda m: loaded.append(m))
+    assert loaded == []
+    assert "未加载" in repr(proxy)
+
+    assert proxy.value == 1
+    assert loaded == [fake]
+
+    proxy.value = 2  # 写入转发到真实模块（monkeypatch / patch.object 依赖这一点）
+    assert fake.value == 2
+    assert proxy.value == 2
+    assert len(loaded) == 1
+
+
+def test_lazy_import_missing_module_raises_on_use():
+    proxy = lazy_import("definitely_missing_module_xyz")
+    with pytest.raises(ImportError):
+        proxy.anything
+
+
+def test_registry_creates_once_and_records_init_time():
+    reg = ManagerRegistry()
+    created = []
+
+    class DemoMgr:
+        def __init__(self):
+            created.append(self)
+            self.count = 0
+
+        def bump(self):
+            self.count += 1
+            return self.count
+
+    mgr = reg.register("demo_mgr", DemoMgr)
+    assert not reg.is_initialized("demo_mgr")
+    assert created == []
+
+    assert mgr.bump() == 1
+    assert mgr.bump() == 2
+    assert len(created) == 1
+    assert reg.get("demo_mgr") is created[0]
+    assert "demo_mgr" in reg.init_times()
+
+    # 重复注册返回同一实例的代理
+    again = reg.register("demo_mgr", DemoMgr)
+    assert again.count == 2
+
+    with pytest.raises(KeyError):
+        reg.get("missing_mgr")
+
+
+def test_registry_detects_circular_dependency():
+    reg = ManagerRegistry()
+    a = reg.register("a_mgr", lambda: b.value)
+    b = reg.register("b_mgr", lambda: a.value)
+
+    with pytest.raises(RuntimeError, match="循环依赖"):
+        a.value
+    # 失败后可重试，不会卡在"创建中"状态
+    assert not reg.is_initialized("a_mgr")
+
+
+def test_init_eager_creates_only_eager_and_isolates_failures():
+    reg = ManagerRegistry()
+    created = []
+
+    def broken():
+        raise ValueError("boom")
+
+    reg.register("lazy_mgr", lambda: created.append("lazy"))
+    reg.register("broken_mgr", broken, eager=True)
+    reg.register("eager_mgr", lambda: created.append("eager"), eager=True)
+
+    reg.init_eager()
+    assert created == ["eager"]
+    assert reg.is_initialized("eager_mgr")
+    assert not reg.is_initialized("broken_mgr")
+    assert not reg.is_initialized("lazy_mgr")
+
+
+def test_startup_profiler_report():
+    profiler = StartupProfiler(enabled=True)
+    with profiler.step("import demo"):
+        pass
+    report = profiler.report()
+    assert report is not None
+    assert "import demo" in report
+    assert [name for name, _ in profiler.steps()] == ["import demo"]
+
+    disabled = StartupProfiler(enabled=False)
+    with disabled.step("x"):
+        pass
+    assert disabled.steps() == []
+    assert disabled.report() is None
+
+
+def test_startup_time_budget_and_heavy_modules_deferred():
+    """在独立进程中导入 core 与全部路由模块（create_app 注册蓝图前的全部导入）：耗时在预算内，重依赖未被加载。"""
+    code = (
+        "import importlib, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import core\n"
+        "for module_name, _, _ in core._BLUEPRINTS:\n"
+        "    importlib.import_module(module_name)\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print('RESULT', elapsed, ','.join(loaded))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=SERVER_DIR, capture_output=True, text=True, timeout=120)
+    result = [line for line in proc.stdout.splitlines() if line.startswith("RESULT")]
+    assert result, proc.stderr[-2000:]
+    parts = result[-1].split(" ")
+    elapsed = float(parts[1])
+    loaded = parts[2] if len(parts) > 2 else ""
+    assert loaded == "", f"启动时加载了重依赖: {loaded}"
+    assert elapsed < STARTUP_BUDGET_SECONDS, f"启动耗时 {elapsed:.2f}s 超出预算 {STARTUP_BUDGET_SECONDS}s"
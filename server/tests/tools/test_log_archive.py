@@ -0,0 +1,83 @@
+"""日志归档：多 member gzip 压缩与索引、按大小预算删除、轮转后后台压缩。"""
+
+import gzip
+import json
+import os
+
+from core.config.log_archive import (ArchivingTimedRotatingFileHandler, LogArchiver, compress_log_file,
+                                     enforce_budget, list_archives, load_archive_index)
+
+
+def _line(second: int, msg: str = "") -> str:
+    return f"2024-01-01 10:{second // 60:02d}:{second % 60:02d},000 [INFO] [x.py:1] {msg or f'm{second}'}\n"
+
+
+def _write(path, seconds):
+    with open(path, "w", encoding="utf-8") as f:
+        for s in seconds:
+            f.write(_line(s))
+            if s % 50 == 0:
+                f.write("Traceback (most recent call last):\n  File \"x.py\"\nValueError: 中文\n")
+
+
+def test_compress_splits_members_on_record_boundaries(tmp_path):
+    src = str(tmp_path / "app.log.2024-01-01")
+    _write(src, range(300))
+    original = open(src, "rb").read()
+
+    dst = compress_log_file(src, member_size=1024)
+    assert dst == src + ".gz" and not os.path.exists(src)
+    # 多 member 文件对标准 gzip 透明
+    assert gzip.open(dst).read() == original
+
+    index = load_archive_index(dst)
+    members = index["members"]
+    assert len(members) > 5
+    assert index["raw_size"] == len(original)
+    assert (index["first_ts"], index["last_ts"]) == ("2024-01-01 10:00:00", "2024-01-01 10:04:59")
+    with open(dst, "rb") as f:
+        for offset, length, raw_offset, raw_length, first_ts, last_ts in members:
+            f.seek(offset)
+            data = gzip.decompress(f.read(length))
+            assert data == original[raw_offset:raw_offset + raw_length]
+            assert data.startswith(first_ts.encode())
+            assert data.endswith(b"\n")
+    assert [m[2] for m in members] == sorted(m[2] for m in members)
+
+
+def test_budget_removes_oldest_archives(tmp_path):
+    base = str(tmp_path / "access.log")
+    for day in ("01", "02", "03"):
+        _write(f"{base}.2024-01-{day}", range(200))
+    open(base, "w").close()
+
+    result = LogArchiver(member_size=1024).archive(base, max_bytes=10 ** 9)
+    assert len(result["compressed"]) == 3 and result["removed"] == []
+    sizes = [os.path.getsize(p) + os.path.getsize(p + ".idx") for p in result["compressed"]]
+
+    removed = enforce_budget(base, sizes[1] + sizes[2])
+    assert [os.path.basename(p) for p in removed] == ["access.log.2024-01-01.gz"]
+    assert not os.path.exists(removed[0] + ".idx")
+    archives = list_archives(base)
+    assert [os.path.basename(a["file"]) for a in archives] == ["access.log.2024-01-03.gz", "access.log.2024-01-02.gz"]
+    assert archives[0]["compressed"] and archives[0]["size"] < archives[0]["raw_size"]
+    assert os.path.exists(base)
+
+
+def test_rollover_compresses_in_background(tmp_path):
+    base = str(tmp_path / "app.log")
+    _write(base + ".2023-12-31", range(10))  # 上次遗留的未压缩轮转文件
+    archiver = LogArchiver()
+    handler = ArchivingTimedRotatingFileHandler(base, max_archive_bytes=10 ** 9, archiver=archiver)
+    handler.stream.write(_line(1))
+    handler.doRollover()
+    handler.close()
+    archiver.join()
+
+    names = sorted(os.listdir(tmp_path))
+    assert "app.log" in names
+    archives = [n for n in names if n.endswith(".gz")]
+    assert len(archives) == 2 and "app.log.2023-12-31.gz" in archives
+    assert not [n for n in names if n.startswith("app.log.") and n[-3:] not in (".gz", "idx")]
+    index = json.load(open(os.path.join(tmp_path, archives[-1] + ".idx")))
+    assert index["raw_size"] == len(_line(1).encode())
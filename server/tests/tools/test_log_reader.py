@@ -0,0 +1,129 @@
+"""LogReader 单元测试：倒序分页、多行记录、时间范围索引与轮转文件。"""
+
+import os
+
+from core.tools.log_reader import LogReader
+
+
+def _line(second: int, level: str = "INFO", msg: str = "") -> str:
+    return f"2024-01-01 10:{second // 60:02d}:{second % 60:02d},000 [{level}] [x.py:1] {msg or f'm{second}'}\n"
+
+
+def _write(path, seconds, **kwargs):
+    with open(path, "w", encoding="utf-8") as f:
+        for s in seconds:
+            f.write(_line(s, **kwargs))
+
+
+def test_tail_pages_backward_across_blocks(tmp_path):
+    path = tmp_path / "app.log"
+    _write(path, range(500))
+    reader = LogReader(str(path), block_size=256, index_interval=1024)
+
+    page = reader.query(limit=3)
+    assert [line.split()[-1] for line in page["lines"]] == ["m499", "m498", "m497"]
+
+    seen = page["lines"]
+    while page["next"]:
+        page = reader.query(limit=97, cursor=page["next"])
+        seen += page["lines"]
+    assert len(seen) == 500
+    assert seen[-1].endswith("m0")
+
+
+def test_multiline_records_and_filters(tmp_path):
+    path = tmp_path / "app.log"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_line(1))
+        f.write(_line(2, level="ERROR", msg="boom"))
+        f.write("Traceback (most recent call last):\n  File \"x.py\"\nValueError: 中文\n")
+        f.write(_line(3, msg="timeout"))
+
+    reader = LogReader(str(path), block_size=16)
+    errors = reader.query(level="error")["lines"]
+    assert len(errors) == 1
+    assert errors[0].splitlines()[-1] == "ValueError: 中文"
+
+    assert [line.split()[-1] for line in reader.query(keyword="timeout")["lines"]] == ["timeout"]
+
+
+def test_time_range_uses_index(tmp_path):
+    path = tmp_path / "app.log"
+    _write(path, range(3000))
+    reader = LogReader(str(path), block_size=512, index_interval=2048)
+
+    lines = reader.query(limit=1000, since="2024-01-01 10:10:00", until="2024-01-01 10:10:04")["lines"]
+    assert [line.split()[-1] for line in lines] == ["m604", "m603", "m602", "m601", "m600"]
+
+    # until 为前缀时包含整分钟
+    lines = reader.query(limit=1000, since="2024-01-01 10:20", until="2024-01-01 10:20")["lines"]
+    assert len(lines) == 60
+    assert reader._indexes[str(path)].offsets
+
+
+def test_index_extends_incrementally(tmp_path):
+    path = tmp_path / "app.log"
+    _write(path, range(200))
+    reader = LogReader(str(path), index_interval=512)
+    reader.query(until="2024-01-01 10:00:10")
+    count = len(reader._indexes[str(path)].offsets)
+
+    with open(path, "a", encoding="utf-8") as f:
+        for s in range(200, 400):
+            f.write(_line(s))
+    lines = reader.query(limit=5, until="2024-01-01 10:05:00")["lines"]
+    assert lines[0].split()[-1] == "m300"
+    assert len(reader._indexes[str(path)].offsets) > count
+
+
+def test_rotated_files_are_read_newest_first(tmp_path):
+    path = tmp_path / "app.log"
+    _write(str(path) + ".2024-01-01", range(0, 3))
+    _write(str(path) + ".2024-01-02", range(3, 6))
+    _write(path, range(6, 9))
+    (tmp_path / "app.log.bak").write_text("ignored\n")
+
+    reader = LogReader(str(path))
+    assert [os.path.basename(p) for p in reader.files()] == ["app.log", "app.log.2024-01-02", "app.log.2024-01-01"]
+
+    page = reader.query(limit=4)
+    assert [line.split()[-1] for line in page["lines"]] == ["m8", "m7", "m6", "m5"]
+    rest = reader.query(limit=10, cursor=page["next"])["lines"]
+    assert [line.split()[-1] for line in rest] == ["m4", "m3", "m2", "m1", "m0"]
+
+    assert [line.split()[-1] for line in reader.query(since="2024-01-01 10:00:07")["lines"]] == ["m8", "m7"]
+
+
+def test_compressed_archives_read_by_member(tmp_path, monkeypatch):
+    import gzip
+
+    import core.tools.log_reader as log_reader_module
+    from core.config.log_archive import compress_log_file
+
+    path = tmp_path / "app.log"
+    _write(str(path) + ".2024-01-01", range(0, 600))
+    compress_log_file(str(path) + ".2024-01-01", member_size=2048)
+    _write(path, range(600, 603))
+    # 外部压缩、没有 .idx 的归档也能读取
+    (tmp_path / "app.log.2023-12-31.gz").write_bytes(gzip.compress(_line(0, msg="old").encode()))
+
+    reader = LogReader(str(path), block_size=256)
+    assert [os.path.basename(p) for p in reader.files()] == [
+        "app.log", "app.log.2024-01-01.gz", "app.log.2023-12-31.gz"]
+
+    seen, page = [], {"next": None}
+    while True:
+        page = reader.query(limit=77, cursor=page["next"])
+        seen += [line.split()[-1] for line in page["lines"]]
+        if not page["next"]:
+            break
+    assert seen == [f"m{s}" for s in range(602, -1, -1)] + ["old"]
+
+    # 时间范围查询只解压覆盖该范围的 member
+    calls = []
+    real_read = log_reader_module.read_member
+    monkeypatch.setattr(log_reader_module, "read_member", lambda f, m: calls.append(m) or real_read(f, m))
+    reader = LogReader(str(path))
+    lines = reader.query(limit=1000, since="2024-01-01 10:05:00", until="2024-01-01 10:05:02")["lines"]
+    assert [line.split()[-1] for line in lines] == ["m302", "m301", "m300"]
+    assert 1 <= len(calls) <= 2
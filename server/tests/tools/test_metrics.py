@@ -0,0 +1,72 @@
+"""MetricsRegistry 单元测试：计数、直方图累计桶、标签转义与采集回调。"""
+
+import pytest
+
+from core.tools.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_render():
+    reg = MetricsRegistry()
+    calls = reg.counter("demo_calls_total", "调用次数", ("op",))
+    calls.labels("get").inc()
+    calls.labels("get").inc(2)
+    calls.labels("set").inc()
+    reg.gauge("demo_up", "是否在线").set(1)
+
+    text = reg.render()
+    assert "# TYPE demo_calls_total counter" in text
+    assert 'demo_calls_total{op="get"} 3' in text
+    assert 'demo_calls_total{op="set"} 1' in text
+    assert "# TYPE demo_up gauge" in text
+    assert "demo_up 1\n" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = MetricsRegistry()
+    hist = reg.histogram("demo_seconds", "耗时", ("route",), buckets=(0.1, 1.0))
+    child = hist.labels("/a")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+
+    text = reg.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{route="/a"} 4' in text
+    assert 'demo_seconds_sum{route="/a"} 3.65' in text
+
+
+def test_register_is_idempotent_and_checks_type():
+    reg = MetricsRegistry()
+    first = reg.counter("demo_total", "x", ("a",))
+    assert reg.counter("demo_total", "x", ("a",)) is first
+    with pytest.raises(ValueError):
+        reg.gauge("demo_total", "x", ("a",))
+    with pytest.raises(ValueError):
+        first.labels("1", "2")
+
+
+def test_label_values_are_escaped():
+    reg = MetricsRegistry()
+    reg.counter("demo_total", "x", ("path",)).labels('a"b\\c\nd').inc()
+    assert 'demo_total{path="a\\"b\\\\c\\nd"} 1' in reg.render()
+
+
+def test_collectors_run_on_render_and_failures_are_isolated():
+    reg = MetricsRegistry()
+    gauge = reg.gauge("demo_items", "条目数")
+    state = {"n": 0}
+
+    def _broken():
+        raise RuntimeError("boom")
+
+    def _collect():
+        state["n"] += 1
+        gauge.set(state["n"] * 10)
+
+    reg.add_collector(_broken)
+    reg.add_collector(_collect)
+    reg.add_collector(_collect)
+
+    assert "demo_items 10\n" in reg.render()
+    assert "demo_items 20\n" in reg.render()
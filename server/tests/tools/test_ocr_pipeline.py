@@ -0,0 +1,186 @@
+"""OCR 流水线单元测试：用离线假后端验证内容哈希缓存、分块顺序合并、并发吞吐与本地预缩放。"""
+
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+import core.ai.ocr_pipeline as ocr_module
+from core.ai.ocr_pipeline import OcrPipeline, prepare_image
+from core.tools.async_util import run_blocking_many
+
+
+class FakeOcrBackend:
+    """离线 OCR 后端：按图片左上角像素颜色还原「页码」，可模拟延迟与失败。"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.spans = []  # (开始, 结束) 单调时间
+        self.fail_next = False
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, image_paths, continuation):
+        with self._lock:
+            self.calls.append((len(image_paths), continuation))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        start = time.monotonic()
+        try:
+            time.sleep(self.latency)
+            if self.fail_next:
+                self.fail_next = False
+                return "error", "API 调用失败"
+            pages = []
+            for path in image_paths:
+                with Image.open(path) as img:
+                    pages.append(f"page{round(img.convert('RGB').getpixel((0, 0))[0] / 10)}")
+            return "ok", " ".join(pages)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.spans.append((start, time.monotonic()))
+
+
+def _pages(tmp_path, count):
+    paths = []
+    for i in range(1, count + 1):
+        path = tmp_path / f"p{i}.png"
+        Image.new("RGB", (64, 64), (i * 10, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_chunks_merged_in_order_and_cached(tmp_path):
+    backend = FakeOcrBackend()
+    pipeline = OcrPipeline(backend=backend, chunk_size=3)
+    paths = _pages(tmp_path, 7)
+
+    status, text = pipeline.query(paths)
+    assert status == "ok"
+    assert text == "page1 page2 page3\n\npage4 page5 page6\n\npage7"
+    assert sorted(backend.calls) == [(1, True), (3, False), (3, True)]
+
+    # 同内容的照片（改名后）重新提交：全部命中缓存
+    copies = []
+    for i, p in enumerate(paths):
+        copy = tmp_path / f"copy{i}.png"
+        copy.write_bytes(open(p, "rb").read())
+        copies.append(str(copy))
+    assert pipeline.query(copies) == (status, text)
+    assert len(backend.calls) == 3
+    stats = pipeline.get_stats()
+    assert (stats["hits"], stats["backend_calls"]) == (3, 3)
+
+    # 追加一页：只识别新增块
+    extra = tmp_path / "p8.png"
+    Image.new("RGB", (64, 64), (80, 0, 0)).save(extra)
+    status, text = pipeline.query(paths + [str(extra)])
+    assert text.endswith("page7 page8")
+    assert len(backend.calls) == 4
+
+
+def test_errors_are_not_cached(tmp_path):
+    backend = FakeOcrBackend()
+    pipeline = OcrPipeline(backend=backend)
+    paths = _pages(tmp_path, 2)
+
+    backend.fail_next = True
+    assert pipeline.query(paths) == ("error", "API 调用失败")
+    assert pipeline.query(paths) == ("ok", "page1 page2")
+    assert len(backend.calls) == 2
+
+    # 部分块失败：成功的块已缓存，重试只识别失败的块
+    pipeline = OcrPipeline(backend=backend, chunk_size=1, max_workers=1)
+    backend.fail_next = True
+    assert pipeline.query(paths)[0] == "error"
+    assert pipeline.query(paths) == ("ok", "page1\n\npage2")
+    assert len(backend.calls) == 5
+
+
+def test_invalid_input():
+    pipeline = OcrPipeline(backend=FakeOcrBackend())
+    assert pipeline.query([])[0] == "error"
+    assert pipeline.query("/no/such/image.jpg")[0] == "error"
+
+
+def test_chunks_run_concurrently(tmp_path):
+    backend = FakeOcrBackend(latency=0.3)
+    pipeline = OcrPipeline(backend=backend, chunk_size=3, max_workers=3)
+    paths = _pages(tmp_path, 9)
+
+    status, _ = pipeline.query(paths)
+
+    assert status == "ok"
+    assert backend.max_active == 3
+    # 后端视角的总耗时：三块同时进行，约等于单次延迟（串行需要 0.9s）
+    starts, ends = zip(*backend.spans)
+    assert max(ends) - min(starts) < 0.6
+
+
+def test_timeout_keeps_work_dir_until_workers_finish(tmp_path, monkeypatch):
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    monkeypatch.setattr(ocr_module.tempfile, "mkdtemp", lambda prefix="": str(work_dir))
+    monkeypatch.setattr(ocr_module, "OCR_TIMEOUT", 0)
+    seen = []
+
+    class SlowBackend(FakeOcrBackend):
+
+        def __call__(self, image_paths, continuation):
+            result = super().__call__(image_paths, continuation)
+            seen.append(work_dir.is_dir())
+            return result
+
+    backend = SlowBackend(latency=1.5)
+    pipeline = OcrPipeline(backend=backend, chunk_size=1, max_workers=1)
+
+    status, msg = pipeline.query(_pages(tmp_path, 2))
+    assert status == "error" and msg
+    assert work_dir.is_dir()  # 第一块仍在识别
+
+    deadline = time.monotonic() + 5
+    while len(backend.spans) < 1 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    time.sleep(0.1)
+    assert seen == [True]
+    assert not work_dir.exists()
+    assert len(backend.calls) == 1  # 超时后未开始的块被跳过
+
+
+def test_prepare_image_downscales_large_photo(tmp_path):
+    src = tmp_path / "big.png"
+    Image.frombytes("RGB", (4000, 3000), os.urandom(4000 * 3000 * 3)).save(src)
+
+    out = prepare_image(str(src), str(tmp_path), max_side=1024)
+    assert out != str(src) and out.endswith(".jpg")
+    assert os.path.getsize(out) < os.path.getsize(src)
+    with Image.open(out) as img:
+        assert max(img.size) == 1024
+
+    small = tmp_path / "small.jpg"
+    Image.new("RGB", (32, 32), (255, 255, 255)).save(small, quality=30)
+    assert prepare_image(str(small), str(tmp_path)) == str(small)
+
+
+def test_run_blocking_many_keeps_order_and_limit():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def job(i):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02 * (5 - i))
+        with lock:
+            active[0] -= 1
+        return i * i
+
+    assert run_blocking_many([lambda i=i: job(i) for i in range(5)], max_workers=2) == [0, 1, 4, 9, 16]
+    assert peak[0] == 2
+
+    with pytest.raises(ValueError):
+        run_blocking_many([lambda: 1, lambda: int("x")])
@@ -0,0 +1,124 @@
+"""HybridRateLimiter 单元测试（基于 fakeredis）。"""
+
+import time
+
+import fakeredis
+import pytest
+
+from core.tools.rate_limiter import HybridRateLimiter, RedisRateLimiter
+
+
+@pytest.fixture
+def fake_redis():
+    return fakeredis.FakeRedis()
+
+
+def _fill_bucket(client, name: str, permits: int) -> None:
+    """新建的 Redis 桶 counter 从 0 开始累积，测试中直接填满。"""
+    client.hset(name, 'counter', permits)
+
+
+def test_hybrid_leases_in_batches(fake_redis):
+    limiter = HybridRateLimiter('hybrid-batch', rate=100, redis_client=fake_redis, batch_size=10, low_watermark=0)
+    _fill_bucket(fake_redis, 'hybrid-batch', 100)
+
+    for _ in range(9):
+        assert limiter.try_acquire(1)
+
+    stats = limiter.get_stats()
+    assert stats['acquired'] == 9
+    assert stats['local_permits'] == 1
+    assert stats['leases'] == 1
+    assert stats['leased_permits'] == 10
+    assert int(fake_redis.hget('hybrid-batch', 'counter')) == 90
+
+
+def test_hybrid_denies_when_bucket_exhausted(fake_redis):
+    limiter = HybridRateLimiter('hybrid-deny', rate=5, redis_client=fake_redis, batch_size=5, low_watermark=0)
+    _fill_bucket(fake_redis, 'hybrid-deny', 5)
+
+    assert all(limiter.try_acquire(1) for _ in range(5))
+    assert limiter.try_acquire(1) is False
+
+    stats = limiter.get_stats()
+    assert stats['denied'] == 1
+    assert stats['latency_ms']['count'] == 6
+    assert stats['fallback'] is False
+
+
+def test_hybrid_shares_bucket_with_redis_limiter(fake_redis):
+    hybrid = HybridRateLimiter('hybrid-shared', rate=10, redis_client=fake_redis, batch_size=4, low_watermark=0)
+    other = RedisRateLimiter('hybrid-shared', fake_redis)
+    _fill_bucket(fake_redis, 'hybrid-shared', 10)
+
+    assert hybrid.try_acquire(1)
+    granted = sum(1 for _ in range(10) if other.try_acquire(1, timeout=0.001))
+    assert granted == 6
+
+
+def test_hybrid_async_refill_below_low_watermark(fake_redis):
+    limiter = HybridRateLimiter('hybrid-refill', rate=100, redis_client=fake_redis, batch_size=10, low_watermark=5)
+    _fill_bucket(fake_redis, 'hybrid-refill', 100)
+
+    for _ in range(5):
+        assert limiter.try_acquire(1)
+
+    deadline = time.time() + 2
+    while limiter.get_stats()['leases'] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    stats = limiter.get_stats()
+    assert stats['leases'] == 2
+    assert stats['local_permits'] == 15
+
+
+def test_hybrid_falls_back_to_local_bucket_when_redis_down():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    client = fakeredis.FakeRedis(server=server)
+
+    limiter = HybridRateLimiter('hybrid-down', rate=3, redis_client=client, retry_interval=60)
+
+    assert all(limiter.try_acquire(1) for _ in range(3))
+    assert limiter.try_acquire(1) is False
+
+    stats = limiter.get_stats()
+    assert stats['fallback'] is True
+    assert stats['redis_errors'] == 1
+    assert stats['fallback_acquired'] == 3
+
+
+def test_hybrid_recovers_after_retry_interval():
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server)
+    limiter = HybridRateLimiter('hybrid-recover', rate=10, redis_client=client, batch_size=2, low_watermark=0,
+                                retry_interval=0.05)
+    _fill_bucket(client, 'hybrid-recover', 10)
+
+    server.connected = False
+    assert limiter.try_acquire(1)
+    assert limiter.is_fallback()
+
+    server.connected = True
+    time.sleep(0.06)
+    assert limiter.try_acquire(1)
+    assert not limiter.is_fallback()
+    assert limiter.get_stats()['leases'] == 1
+
+
+def test_hybrid_try_acquire_waits_for_local_refill():
+    server = fakeredis.FakeServer()
+    server.connected = False
+    limiter = HybridRateLimiter('hybrid-wait', rate=50, redis_client=fakeredis.FakeRedis(server=server),
+                                retry_interval=60)
+
+    assert all(limiter.try_acquire(1) for _ in range(50))
+    assert limiter.try_acquire(1) is False
+    assert limiter.try_acquire(1, timeout=0.5) is True
+
+
+def test_hybrid_rejects_invalid_amount(fake_redis):
+    limiter = HybridRateLimiter('hybrid-invalid', rate=5, redis_client=fake_redis)
+    with pytest.raises(ValueError):
+        limiter.try_acquire(0)
+    with pytest.raises(ValueError):
+        limiter.try_acquire(6)
@@ -0,0 +1,209 @@
+"""AI 流式中继单元测试：合并推送、慢客户端背压、取消传递与 TTFT / tokens/s 统计。"""
+
+import importlib
+import json
+from contextlib import contextmanager
+
+import gevent
+from gevent.event import Event
+
+from core.ai.stream_relay import MSG_CHUNK, MSG_END, StreamRelay, StreamStats
+
+ai_local_module = importlib.import_module("core.ai.ai_local")
+
+
+class Sink:
+
+    def __init__(self, delay=0.0, block=None):
+        self.delay = delay
+        self.block = block
+        self.calls = []
+
+    def __call__(self, payload, message_id, type):
+        if self.block is not None:
+            self.block.wait()
+        gevent.sleep(self.delay)
+        self.calls.append((type, payload, message_id))
+
+    def text(self):
+        return "".join(p for t, p, _ in self.calls if t == MSG_CHUNK)
+
+
+def test_chunks_coalesced_and_end_ordered():
+    sink = Sink()
+    relay = StreamRelay(sink, flush_interval=0.05)
+    relay.begin()
+    for ch in "hello":
+        relay.on_msg(ch, "m1", MSG_CHUNK)
+    relay.on_msg({"usage": {}}, "m1", MSG_END)
+    gevent.sleep(0.01)
+
+    assert sink.calls == [(MSG_CHUNK, "hello", "m1"), (MSG_END, {"usage": {}}, "m1")]
+    assert relay.get_stats()["flushes"] == 1
+
+
+def test_flush_on_size_or_interval():
+    sink = Sink()
+    relay = StreamRelay(sink, flush_chars=5, flush_interval=10)
+    relay.push("abc", "m1")
+    gevent.sleep(0.02)
+    assert sink.calls == []
+    relay.push("def", "m1")
+    gevent.sleep(0.02)
+    assert sink.text() == "abcdef"
+
+    relay = StreamRelay(sink, flush_chars=1000, flush_interval=0.05)
+    relay.push("x", "m2")
+    gevent.sleep(0.1)
+    assert sink.text() == "abcdefx"
+
+
+def test_slow_client_does_not_stall_upstream():
+    release = Event()
+    sink = Sink(block=release)
+    relay = StreamRelay(sink, flush_interval=0.01)
+    relay.begin()
+    for i in range(50):
+        # 下游卡在第一次推送上，上游仍可继续写入缓冲
+        assert relay.push(f"{i},", "m1")
+        gevent.sleep(0)
+    relay.end({}, "m1")
+    assert sink.calls == []
+
+    release.set()
+    gevent.sleep(0.1)
+    assert sink.text() == "".join(f"{i}," for i in range(50))
+    assert len(sink.calls) <= 3
+    assert sink.calls[-1][0] == MSG_END
+
+
+def test_stalled_client_cancels_upstream():
+    cancels = []
+    sink = Sink(block=Event())
+    relay = StreamRelay(sink, on_cancel=lambda: cancels.append(1), flush_chars=4,
+                        max_buffer_chars=10, stall_timeout=0.1)
+    relay.begin()
+    accepted = 0
+    while relay.push("abcd", "m1"):
+        accepted += 1
+        assert accepted < 100
+
+    assert relay.cancelled
+    assert cancels == [1]
+    # 第一次缓冲满时下游取走一批后卡住，第二次缓冲满时超时取消
+    assert relay.get_stats()["stalls"] == 2
+    assert relay.buffered_chars() == 0
+
+
+def test_cancel_drops_pending_and_notifies_only_when_active():
+    cancels = []
+    sink = Sink()
+    relay = StreamRelay(sink, on_cancel=lambda: cancels.append(1), flush_interval=1)
+    relay.begin()
+    relay.push("abc", "m1")
+    relay.cancel()
+    gevent.sleep(0.02)
+    assert sink.calls == []
+    assert cancels == [1]
+    assert relay.push("def", "m1") is False
+
+    relay.begin()
+    relay.finish()
+    relay.cancel()
+    assert cancels == [1]
+
+
+def test_stream_stats_per_conversation():
+    stats = StreamStats(max_conversations=2)
+    stats.record("c1", 0.5, 40, 2.0)
+    stats.record("c2", None, 0, 0)
+    stats.record("c3", 0.2, 5, 1.0)
+
+    out = stats.get()
+    assert set(out) == {"c2", "c3"}
+    assert out["c2"]["avg_ttft"] is None
+    stats.record("c3", 0.4, 10, 1.0)
+    c3 = stats.get("c3")["c3"]
+    assert (c3["replies"], c3["tokens"], c3["avg_ttft"], c3["last_tps"]) == (2, 15, 0.3, 10.0)
+    assert stats.get("missing") == {}
+
+
+class FakeDify:
+    """按行返回 SSE 事件的假 Dify 传输层。"""
+
+    def __init__(self, lines, delay=0.0):
+        self.lines = lines
+        self.delay = delay
+        self.requests = []
+
+    @contextmanager
+    def stream(self, method, url, **kwargs):
+        self.requests.append(url)
+
+        class Resp:
+
+            def raise_for_status(self):
+                pass
+
+        yield Resp()
+
+    def iter_lines(self, response):
+        for line in self.lines:
+            gevent.sleep(self.delay)
+            yield line
+
+    @contextmanager
+    def request(self, method, url, **kwargs):
+        self.requests.append(url)
+
+        class Resp:
+
+            def raise_for_status(self):
+                pass
+
+        yield Resp()
+
+
+def _event(**kwargs):
+    return b"data: " + json.dumps({"conversation_id": "conv1", "message_id": "m1", **kwargs}).encode()
+
+
+def test_ai_local_records_stats_and_stops_on_cancel(monkeypatch):
+    stats = StreamStats()
+    monkeypatch.setattr(ai_local_module, "stream_stats", stats)
+    lines = [_event(event="message", answer=str(i), task_id="t1") for i in range(5)]
+    lines.append(_event(event="message_end", metadata={"usage": {"completion_tokens": 12}}))
+    dify = FakeDify(lines, delay=0.01)
+    monkeypatch.setattr(ai_local_module, "dify_client", dify)
+
+    sink = Sink()
+    relay = StreamRelay(sink, flush_interval=0.01)
+    ai = ai_local_module.AILocal(relay.on_msg)
+    relay.on_cancel = ai.streaming_cancel
+    relay.begin()
+    ai.stream_msg("hi")
+    relay.finish()
+    gevent.sleep(0.05)
+
+    assert sink.text() == "01234"
+    item = stats.get("conv1")["conv1"]
+    assert item["last_ttft"] >= 0.01
+    assert item["tokens"] == 12
+
+    # 读到第 2 个 chunk 时取消：不再读取后续 chunk，并通知服务端 stop
+    seen = []
+
+    def on_msg(payload, message_id, type):
+        seen.append(payload)
+        if len(seen) == 2:
+            relay.cancel()
+
+    relay = StreamRelay(on_msg, flush_interval=0)
+    ai = ai_local_module.AILocal(relay.on_msg)
+    relay.on_cancel = ai.streaming_cancel
+    relay.begin()
+    ai.stream_msg("hi")
+    relay.finish()
+    gevent.sleep(0.05)
+    assert len(seen) == 2
+    assert dify.requests[-1].endswith("/chat-messages/t1/stop")
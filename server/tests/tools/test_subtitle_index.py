@@ -0,0 +1,191 @@
+"""字幕缓存单元测试：ASSRT 搜索缓存（fixture 驱动的假搜索提供方）与本地字幕索引。"""
+
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from core.services.subtitle_mgr import SubtitleMgr, SubtitleRecognizeMgr
+from core.subtitles.assrt_client import AssrtClient, AssrtError
+from core.subtitles.subtitle_index import SubtitleIndex
+
+# core.subtitles 导出了同名单例，这里取模块本身
+assrt_module = sys.modules["core.subtitles.assrt_client"]
+index_module = sys.modules["core.subtitles.subtitle_index"]
+
+FIXTURE = Path(__file__).parent / "fixtures" / "assrt_search.json"
+
+
+class FixtureSearchProvider:
+    """按 fixture 中的关键词返回 ASSRT 响应，并记录每次请求。"""
+
+    def __init__(self) -> None:
+        self.responses = json.loads(FIXTURE.read_text(encoding="utf-8"))
+        self.calls: list = []
+        self.fail_next = False
+
+    def __call__(self, path, params):
+        self.calls.append((path, dict(params)))
+        if self.fail_next:
+            self.fail_next = False
+            raise AssrtError("ASSRT 请求过于频繁，请稍后再试", status_code=30900)
+        return self.responses[params["q"]]
+
+
+@pytest.fixture
+def provider():
+    return FixtureSearchProvider()
+
+
+@pytest.fixture
+def client(provider):
+    return AssrtClient(provider=provider)
+
+
+def test_repeated_search_hits_cache(client, provider):
+    first = client.search_by_query("matrix", languages="en")
+    again = client.search_by_query("matrix", languages="en")
+    # 语言过滤在缓存之后，换语言不触发新请求
+    zh = client.search_by_query("matrix", languages="zh")
+
+    assert len(provider.calls) == 1
+    assert first == again
+    assert [row["id"] for row in first["data"]] == ["99"]
+    assert [row["id"] for row in zh["data"]] == ["100"]
+
+    client.search_by_query("matrix", page=2)
+    client.search_by_filename("matrix.mkv")
+    assert len(provider.calls) == 3
+
+
+def test_empty_result_is_negative_cached_with_shorter_ttl(client, provider, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(assrt_module.time, "monotonic", lambda: now[0])
+
+    assert client.search_by_query("no such movie")["total_count"] == 0
+    assert client.search_by_query("no such movie")["total_count"] == 0
+    assert len(provider.calls) == 1
+
+    now[0] += assrt_module.SEARCH_NEGATIVE_TTL + 1
+    client.search_by_query("no such movie")
+    client.search_by_query("matrix")
+    assert len(provider.calls) == 3
+
+    now[0] += assrt_module.SEARCH_NEGATIVE_TTL + 1  # 有结果的缓存仍有效
+    client.search_by_query("matrix")
+    assert len(provider.calls) == 3
+
+
+def test_errors_are_not_cached(client, provider):
+    provider.fail_next = True
+    with pytest.raises(AssrtError):
+        client.search_by_query("matrix")
+    assert client.search_by_query("matrix")["total_count"] == 1
+    assert len(provider.calls) == 2
+
+
+class MemoryStore(dict):
+    """内存版索引存储，避免测试把临时路径写进 rds_mgr。"""
+
+    def get_str(self, key):
+        return self.get(key, "")
+
+    def set(self, key, value):
+        self[key] = value
+        return True
+
+
+@pytest.fixture
+def rds_store():
+    return MemoryStore()
+
+
+def _age_dir(path) -> None:
+    """把目录 mtime 调到过去，跳出 racy 窗口。"""
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+
+
+def test_sidecars_scan_directory_once(tmp_path, rds_store):
+    index = SubtitleIndex(store=rds_store)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"v")
+    (tmp_path / "clip.zh.srt").write_text("1")
+    (tmp_path / "other.srt").write_text("1")
+    _age_dir(tmp_path)
+
+    for _ in range(3):
+        assert index.sidecars(str(video)) == [str(tmp_path / "clip.zh.srt")]
+    assert index.dir_scans == 1
+
+    # 新增字幕改变目录 mtime，缓存失效
+    (tmp_path / "clip.en.vtt").write_text("1")
+    assert index.sidecars(str(video)) == [str(tmp_path / "clip.zh.srt"), str(tmp_path / "clip.en.vtt")]
+    assert index.dir_scans == 2
+
+
+def test_sidecars_negative_entry_and_racy_dir(tmp_path, rds_store):
+    index = SubtitleIndex(store=rds_store)
+    video = tmp_path / "bare.mp4"
+    video.write_bytes(b"v")
+
+    # 刚修改过的目录不缓存
+    assert index.sidecars(str(video)) == []
+    assert index.sidecars(str(video)) == []
+    assert index.dir_scans == 2
+
+    _age_dir(tmp_path)
+    assert index.sidecars(str(video)) == []
+    assert index.sidecars(str(video)) == []
+    assert index.dir_scans == 3
+
+
+def test_known_subtitles_follow_content_hash(tmp_path, rds_store):
+    index = SubtitleIndex(store=rds_store)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    video = tmp_path / "a" / "movie.mkv"
+    video.write_bytes(os.urandom(200_000))
+    sub = tmp_path / "a" / "movie.en.srt"
+    sub.write_text("1")
+
+    index.record(str(video), str(sub))
+    assert rds_store  # 已持久化
+
+    copy = tmp_path / "b" / "renamed.mkv"
+    copy.write_bytes(video.read_bytes())
+    fresh = SubtitleIndex(store=rds_store)  # 重启后从存储加载
+    assert fresh.known_subtitles(str(copy)) == [str(sub)]
+    assert fresh.known_subtitles(str(copy)) == [str(sub)]
+    assert fresh.hash_reads == 1
+
+    sub.unlink()
+    assert fresh.known_subtitles(str(copy)) == []
+    assert json.loads(rds_store["subtitle:index"]) == {}
+
+
+@patch.object(SubtitleRecognizeMgr, "__init__", lambda self: None)
+def test_resolve_subtitles_uses_index(tmp_path, rds_store, monkeypatch):
+    monkeypatch.setattr("core.services.subtitle_mgr.config.DEFAULT_BASE_DIR", str(tmp_path), raising=False)
+    mgr = SubtitleMgr()
+    mgr.index = SubtitleIndex(store=rds_store)
+    video = tmp_path / "show.mp4"
+    video.write_bytes(b"video")
+    (tmp_path / "show.vtt").write_text("1")
+    elsewhere = tmp_path / "subs"
+    elsewhere.mkdir()
+    known = elsewhere / "downloaded.zh.srt"
+    known.write_text("1")
+    mgr.index.record(str(video), str(known))
+    _age_dir(tmp_path)
+
+    for _ in range(3):
+        out = mgr.resolve_subtitles(str(video))
+        assert out["code"] == 0
+        tracks = out["data"]["tracks"]
+        assert [t["path"] for t in tracks] == [str(tmp_path / "show.vtt"), str(known)]
+        assert tracks[1]["lang"] == "zh"
+    assert mgr.index.dir_scans == 1
+    assert mgr.index.hash_reads == 1
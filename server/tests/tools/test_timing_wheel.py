@@ -0,0 +1,54 @@
+"""TimingWheel 单元测试：到期、刷新、多圈与过期加入。"""
+
+from core.tools.timing_wheel import TimingWheel
+
+
+def test_expire_returns_only_due_keys():
+    wheel = TimingWheel(slots=8, tick=1.0)
+    wheel.expire(100)
+    wheel.schedule("a", 103)
+    wheel.schedule("b", 105)
+
+    assert wheel.expire(102) == []
+    assert wheel.expire(103) == ["a"]
+    assert "a" not in wheel
+    assert wheel.expire(110) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_reschedule_moves_key():
+    wheel = TimingWheel(slots=8, tick=1.0)
+    wheel.expire(0)
+    wheel.schedule("a", 3)
+    wheel.schedule("a", 6)
+
+    assert wheel.expire(4) == []
+    assert wheel.expire(6) == ["a"]
+
+
+def test_deadline_beyond_one_round():
+    wheel = TimingWheel(slots=4, tick=1.0)
+    wheel.expire(0)
+    wheel.schedule("far", 10)
+
+    assert wheel.expire(6) == []
+    assert "far" in wheel
+    assert wheel.expire(10) == ["far"]
+
+
+def test_schedule_in_past_and_cancel():
+    wheel = TimingWheel(slots=8, tick=1.0)
+    wheel.expire(50)
+    wheel.schedule("late", 40)
+    wheel.schedule("gone", 55)
+    wheel.cancel("gone")
+
+    assert wheel.expire(50) == ["late"]
+    assert wheel.expire(60) == []
+
+
+def test_first_expire_scans_keys_added_before():
+    wheel = TimingWheel(slots=8, tick=1.0)
+    wheel.schedule("a", 5)
+
+    assert wheel.expire(7) == ["a"]
@@ -392,6 +392,43 @@ export async function finishMaterial(
   return rsp.data.data!;
 }
 
+/** 素材锁定状态（lock: 0=未锁定, 1=任务禁用, 2=全局禁用, 3=时长超限） */
+export interface MaterialLockStatus {
+  lock: number;
+  reason?: string;
+  duration?: number;
+  unlimit?: boolean;
+  missing?: boolean;
+}
+
+/**
+ * 批量查询素材锁定状态
+ * @param userId - 用户ID
+ * @param materialIds - 素材ID列表（单次最多 200 个）
+ * @param taskId - 任务ID（可选，用于任务级禁用时段检查）
+ * @returns 以素材ID为键的状态表
+ */
+export async function getMaterialsStatus(
+  userId: number,
+  materialIds: number[],
+  taskId?: number
+): Promise<Record<string, MaterialLockStatus>> {
+  const body: any = {
+    user_id: userId,
+    material_ids: materialIds,
+  };
+  if (taskId) {
+    body.task_id = taskId;
+  }
+  const rsp = await apiClient.post<ApiResponse<{ statuses: Record<string, MaterialLockStatus> }>>("/material/status/batch", body);
+
+  if (rsp.data.code !== 0) {
+    throw new Error(rsp.data.msg || "获取素材状态失败");
+  }
+
+  return rsp.data.data!.statuses;
+}
+
 /**
  * 申请解锁视频素材（提交审批）
  * @param materialId - 素材ID